@@ -2,9 +2,14 @@
 """
 Punto de entrada de la aplicación TaskFlow
 Arranca el servidor Flask con arquitectura MVC
+
+Uso:
+    python app.py          # Servidor de desarrollo (Werkzeug)
+    python app.py serve    # Servidor de producción (workers pre-forkeados)
 """
 
 import os
+import sys
 from app import create_app
 
 # Obtener configuración del entorno (default: development)
@@ -20,11 +25,14 @@ if __name__ == '__main__':
     print(f"\n📋 Configuración: {config_name}")
     print(f"🌐 Servidor: http://localhost:{app.config['PORT']}")
     print(f"🐛 Debug: {app.config['DEBUG']}")
+    
+    produccion = len(sys.argv) > 1 and sys.argv[1] == 'serve'
     print("\n📚 Documentación de Endpoints:")
     print("\n👤 USUARIOS:")
     print("  GET    /api/users              - Listar usuarios")
     print("  GET    /api/users/<id>         - Obtener usuario")
     print("  POST   /api/users              - Crear usuario")
+    print("  POST   /api/users/bulk         - Crear varios usuarios")
     print("  PUT    /api/users/<id>         - Actualizar usuario")
     print("  DELETE /api/users/<id>         - Eliminar usuario")
     print("  GET    /api/users/<id>/tasks   - Tareas del usuario")
@@ -39,18 +47,44 @@ if __name__ == '__main__':
     print("  DELETE /api/tasks/<id>         - Eliminar tarea")
     print("  GET    /api/tasks/completed    - Tareas completadas")
     print("  GET    /api/tasks/pending      - Tareas pendientes")
+    print("  GET    /api/tasks/next         - Siguientes tareas por prioridad")
+    print("  GET    /api/tasks/ready        - Pendientes con dependencias completadas")
+    print("  GET    /api/tasks/due          - Pendientes que vencen en un rango")
+    print("  GET    /api/tasks/overdue/count - Cantidad de pendientes vencidas")
+    print("  GET    /api/tasks/<id>/similar - Tareas parecidas del mismo usuario")
+    print("  GET    /api/tasks/stream       - Cambios en vivo (SSE)")
+    print("  GET    /api/tasks/changes      - Cambios desde una versión")
+    print("  GET    /api/tasks/export       - Exportar tareas (NDJSON)")
+    print("  POST   /api/tasks/import       - Importar tareas (NDJSON)")
+    print("  GET    /api/tasks/analytics    - Analítica por grupo y periodo")
+    
+    print("\n📦 LOTES:")
+    print("  POST   /api/batch              - Varias llamadas en una petición")
     
     print("\n❤️  SALUD:")
     print("  GET    /api/health             - Estado del servidor")
     
+    print("\n📈 OBSERVABILIDAD:")
+    print("  GET    /api/metrics            - Métricas Prometheus")
+    print("  GET    /api/admin/profiles     - Perfiles por ruta (admin)")
+    print("  POST   /api/admin/archive      - Archivar completadas (admin)")
+    print("  GET    /api/admin/memory       - Memoria del almacén e índices (admin)")
+    print("  POST   /api/admin/memory/snapshots - Instantánea de tracemalloc (admin)")
+    print("  GET    /api/admin/memory/snapshots/<id> - Sitios con más memoria (admin)")
+    print("  GET    /api/admin/memory/diff  - Diferencia entre instantáneas (admin)")
+    print("  DELETE /api/admin/memory/snapshots - Descartar instantáneas (admin)")
+    
     print("\n" + "=" * 60)
     print("💡 Presiona Ctrl+C para detener el servidor")
     print("=" * 60 + "\n")
     
     # Arrancar servidor
-    app.run(host=app.config['HOST'], port=app.config['PORT'])
-    app.run(
-        host=app.config['HOST'],
-        port=app.config['PORT'],
-        debug=app.config['DEBUG']
-    )
+    if produccion:
+        from app.server import servir
+        servir(app)
+    else:
+        app.run(
+            host=app.config['HOST'],
+            port=app.config['PORT'],
+            debug=app.config['DEBUG']
+        )
@@ -4,7 +4,9 @@ Factory de la aplicación Flask
 Crea y configura la aplicación con todos sus componentes
 """
 
-from flask import Flask, jsonify
+import time
+
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from config import config
 
@@ -29,12 +31,30 @@ def create_app(config_name='default'):
     # Habilitar CORS
     CORS(app, origins=app.config.get('CORS_ORIGINS', '*'))
     
+    # Crear el almacén de tareas (antes de forkear workers)
+    inicializar_store(app)
+    
     # Registrar Blueprints
     registrar_blueprints(app)
     
     # Registrar manejadores de errores
     registrar_error_handlers(app)
     
+    # Registrar métricas por ruta y del almacén
+    registrar_metricas(app)
+    
+    # Control de admisión (después de las métricas: los rechazos se miden)
+    registrar_admision(app)
+    
+    # Archivado periódico de tareas completadas
+    registrar_archivado(app)
+    
+    # Perfilado por muestreo (solo si PROFILING_ENABLED)
+    registrar_perfilador(app)
+    
+    # Instantáneas de memoria y picos por ruta (solo si MEMORY_ROUTE_PEAKS_ENABLED)
+    registrar_memoria(app)
+    
     # Ruta de salud (health check)
     @app.route('/api/health', methods=['GET'])
     def health_check():
@@ -44,9 +64,41 @@ def create_app(config_name='default'):
             'message': 'TaskFlow API v2.0 - MVC Architecture'
         }), 200
     
+    # Trazas por petición (después de registrar todas las rutas)
+    registrar_trazas(app)
+    
     return app
 
 
+def inicializar_store(app):
+    """
+    Crea el almacén de tareas según la configuración
+    
+    Args:
+        app: Instancia de Flask
+    """
+    from app.services import task_service, user_service
+    
+    backend = app.config.get('TASK_STORE', 'memory')
+    opciones = {}
+    if backend == 'shared':
+        opciones['tamano'] = app.config['TASK_STORE_SIZE']
+    elif backend == 'sharded':
+        opciones['fragmentos'] = app.config['TASK_STORE_SHARDS']
+    if app.config.get('TASK_ARCHIVE_DIR'):
+        opciones['directorio_archivo'] = app.config['TASK_ARCHIVE_DIR']
+    
+    task_service.configurar_store(backend, **opciones)
+    task_service.eventos.configurar(app.config.get('STREAM_BUFFER_SIZE', 1000))
+    task_service.cambios.max_tombstones = app.config.get('CHANGES_MAX_TOMBSTONES', 10000)
+    print(f"✓ Almacén de tareas: {backend}")
+    
+    # Caché del listado de usuarios; la invalidación se comparte entre workers
+    user_service.configurar_cache(app.config.get('USERS_CACHE_TTL_SECONDS', 5),
+                                  app.config.get('USERS_CACHE_STALE_SECONDS', 60),
+                                  compartida=True)
+
+
 def registrar_blueprints(app):
     """
     Registra todos los Blueprints de la aplicación
@@ -54,15 +106,21 @@ def registrar_blueprints(app):
     Args:
         app: Instancia de Flask
     """
-    from app.routes import users_bp, tasks_bp
+    from app.routes import users_bp, tasks_bp, metrics_bp, admin_bp, batch_bp
     
     # Registrar Blueprints con prefijo /api
     app.register_blueprint(users_bp, url_prefix='/api')
     app.register_blueprint(tasks_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(batch_bp, url_prefix='/api')
     
     print("✓ Blueprints registrados:")
     print("  - users_bp en /api/users")
     print("  - tasks_bp en /api/tasks")
+    print("  - metrics_bp en /api/metrics")
+    print("  - admin_bp en /api/admin")
+    print("  - batch_bp en /api/batch")
 
 
 def registrar_error_handlers(app):
@@ -98,3 +156,308 @@ def registrar_error_handlers(app):
         }), 400
     
     print("✓ Manejadores de errores registrados")
+
+
+def registrar_metricas(app):
+    """
+    Mide cada petición y expone el tamaño del almacén de tareas
+    
+    Args:
+        app: Instancia de Flask
+    """
+    from app.services import task_service, user_service
+    from app.utils.metrics import registro, observar_peticion
+    
+    @app.before_request
+    def iniciar_medicion():
+        """Guarda el instante de inicio de la petición"""
+        request.environ['taskflow.inicio'] = time.perf_counter()
+    
+    @app.after_request
+    def registrar_peticion(response):
+        """Registra la latencia y el código de estado de la petición"""
+        inicio = request.environ.get('taskflow.inicio')
+        if inicio is not None:
+            ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+            observar_peticion(ruta, request.method, str(response.status_code),
+                              time.perf_counter() - inicio)
+        return response
+    
+    def tamano_store():
+        estadisticas = task_service.store.estadisticas()
+        backend = (('backend', task_service.store.backend),)
+        return [(backend, estadisticas['tareas'])]
+    
+    def tamano_indices():
+        estadisticas = task_service.store.estadisticas()
+        return [((('index', nombre),), entradas)
+                for nombre, entradas in estadisticas['indices'].items()]
+    
+    def tamano_archivo():
+        archivo = task_service.store.estadisticas()['archivo']
+        return [((('unit', 'tasks'),), archivo['tareas']),
+                ((('unit', 'bytes'),), archivo['bytes']),
+                ((('unit', 'blocks'),), archivo['bloques'])]
+    
+    def tareas_vencidas():
+        return [((), task_service.contar_tareas_vencidas()['vencidas'])]
+    
+    def cache_edad():
+        edad = user_service.cache_usuarios.edad()
+        return [((('cache', 'usuarios'),), -1 if edad is None else round(edad, 3))]
+    
+    def cache_eventos():
+        cache = user_service.cache_usuarios
+        return [((('cache', 'usuarios'), ('result', evento)), getattr(cache, atributo))
+                for evento, atributo in (('hit', 'aciertos'), ('stale', 'obsoletos'),
+                                         ('miss', 'fallos'), ('refresh', 'refrescos'),
+                                         ('refresh_error', 'refrescos_fallidos'))]
+    
+    registro.registrar_gauge('taskflow_task_store_tasks', tamano_store)
+    registro.registrar_gauge('taskflow_task_index_entries', tamano_indices)
+    registro.registrar_gauge('taskflow_task_archive_size', tamano_archivo)
+    registro.registrar_gauge('taskflow_tasks_overdue', tareas_vencidas)
+    registro.registrar_gauge('taskflow_cache_age_seconds', cache_edad)
+    registro.registrar_gauge('taskflow_cache_events_total', cache_eventos)
+    
+    print("✓ Métricas registradas en /api/metrics")
+
+
+def registrar_admision(app):
+    """
+    Limita el ritmo por cliente y las peticiones en curso por clase de ruta
+    
+    Las rutas se clasifican por blueprint (ADMISSION_BLUEPRINTS); las demás
+    (health, métricas, admin) y las de ADMISSION_EXEMPT no se limitan.
+    Un lote (/api/batch) gasta una ficha del cliente; sus sub-peticiones no
+    gastan ninguna, pero sí ocupan el presupuesto de su clase.
+    Un cliente que supera su ritmo recibe 429; si la espera estimada de la
+    clase (más la que la conexión ya pasó en la cola del servidor) supera
+    el objetivo, 503. Ambos con Retry-After.
+    
+    Args:
+        app: Instancia de Flask
+    """
+    from app.utils.admission import ControlAdmision, segundos_reintento
+    from app.utils.metrics import registro
+    
+    if not app.config.get('ADMISSION_ENABLED', True):
+        return
+    control = ControlAdmision(app.config['ADMISSION_CLASSES'],
+                              app.config.get('ADMISSION_CLIENT_RATE', 0),
+                              app.config.get('ADMISSION_CLIENT_BURST', 20))
+    clases = app.config.get('ADMISSION_BLUEPRINTS', {})
+    exentas = frozenset(app.config.get('ADMISSION_EXEMPT', ()))
+    cabecera_cliente = app.config.get('ADMISSION_CLIENT_HEADER')
+    
+    def rechazar(codigo, motivo, clase, segundos):
+        registro.incrementar('taskflow_admission_rejected_total',
+                             (('class', clase), ('reason', motivo)))
+        mensaje = ('Demasiadas peticiones' if codigo == 429
+                   else 'Servidor saturado, inténtalo más tarde')
+        respuesta = jsonify({'error': mensaje})
+        respuesta.status_code = codigo
+        respuesta.headers['Retry-After'] = segundos_reintento(segundos)
+        return respuesta
+    
+    @app.before_request
+    def admitir_peticion():
+        """Aplica el límite del cliente y el presupuesto de la clase de la ruta"""
+        clase = clases.get(request.blueprint)
+        lote = request.endpoint == 'batch.ejecutar_lote'
+        if (clase is None and not lote) or request.endpoint in exentas:
+            return None
+        
+        if not request.environ.get('taskflow.sublote'):
+            cliente = (request.headers.get(cabecera_cliente) if cabecera_cliente else None)
+            espera = control.limitar_cliente(cliente or request.remote_addr)
+            if espera:
+                return rechazar(429, 'client_rate', clase or 'batch', espera)
+        if clase is None:
+            return None
+        
+        # Lo que la conexión ya esperó en la cola del servidor cuenta para el objetivo
+        encolada = request.environ.get('taskflow.encolada')
+        presupuesto = control.presupuestos[clase]
+        espera = presupuesto.admitir(time.monotonic() - encolada if encolada is not None else 0.0)
+        if espera is not None:
+            return rechazar(503, 'overload', clase, espera)
+        request.environ['taskflow.admision'] = (presupuesto, time.monotonic())
+        return None
+    
+    @app.teardown_request
+    def liberar_admision(error):
+        """Devuelve el hueco de la petición a su clase"""
+        admision = request.environ.pop('taskflow.admision', None)
+        if admision:
+            presupuesto, inicio = admision
+            presupuesto.liberar(time.monotonic() - inicio)
+    
+    def en_curso():
+        return [((('class', nombre), ('state', estado)), getattr(presupuesto, atributo))
+                for nombre, presupuesto in control.presupuestos.items()
+                for estado, atributo in (('in_flight', 'en_curso'), ('queued', 'en_cola'))]
+    
+    registro.registrar_gauge('taskflow_admission_requests', en_curso)
+    
+    print("✓ Control de admisión: " + ", ".join(
+        f"{nombre} {p.max_en_curso} en curso / {p.objetivo * 1000:g} ms"
+        for nombre, p in control.presupuestos.items()))
+
+
+def registrar_archivado(app):
+    """
+    Arranca en cada worker, con su primera petición, el hilo que archiva
+    las tareas completadas antiguas
+    
+    El hilo no puede arrancarse antes del fork: el maestro no atiende
+    peticiones y un hilo con el lock del almacén tomado durante el fork lo
+    dejaría bloqueado en el hijo.
+    
+    Args:
+        app: Instancia de Flask
+    """
+    from app.services import task_service
+    
+    if not app.config.get('TASK_ARCHIVE_ENABLED', True):
+        return
+    intervalo = app.config['TASK_ARCHIVE_INTERVAL_SECONDS']
+    dias = app.config['TASK_ARCHIVE_AFTER_DAYS']
+    lote = app.config['TASK_ARCHIVE_BLOCK_SIZE']
+    
+    @app.before_request
+    def arrancar_archivado():
+        """Arranca el hilo de archivado de este proceso (solo la primera vez)"""
+        task_service.programar_archivado(intervalo, dias, lote)
+    
+    print(f"✓ Archivado de completadas hace más de {dias:g} días "
+          f"(cada {intervalo:g} s, {app.config.get('TASK_ARCHIVE_DIR') or 'en memoria'})")
+
+
+def registrar_perfilador(app):
+    """
+    Activa el perfilado por muestreo de peticiones
+    
+    Con PROFILING_ENABLED desactivado no se registra ningún hook, así que
+    el coste es nulo.
+    
+    Args:
+        app: Instancia de Flask
+    """
+    from app.utils.profiler import perfilador, nombre_ruta
+    
+    perfilador.configurar(app.config)
+    if not perfilador.activo:
+        return
+    
+    @app.before_request
+    def iniciar_perfilado():
+        """Decide si se perfila la petición (muestreo o token firmado)"""
+        modo = perfilador.debe_perfilar(request.headers.get('X-Profile-Token'))
+        if modo:
+            request.environ['taskflow.perfil'] = modo
+            perfilador.iniciar()
+    
+    @app.teardown_request
+    def terminar_perfilado(error):
+        """Agrega las muestras de la petición a su ruta"""
+        modo = request.environ.get('taskflow.perfil')
+        if modo:
+            regla = request.url_rule.rule if request.url_rule else 'sin_ruta'
+            perfilador.terminar(nombre_ruta(request.method, regla), modo)
+    
+    print(f"✓ Perfilador activo (proporción {perfilador.proporcion}, "
+          f"directorio {perfilador.directorio})")
+
+
+def registrar_memoria(app):
+    """
+    Configura el monitor de memoria y, con MEMORY_ROUTE_PEAKS_ENABLED, mide
+    el pico de memoria reservada de una fracción de las peticiones
+    
+    Sin el muestreo por ruta no se registra ningún hook y tracemalloc solo
+    se arranca con la primera instantánea pedida a /api/admin/memory.
+    
+    Args:
+        app: Instancia de Flask
+    """
+    from app.utils.memory import monitor_memoria
+    from app.utils.metrics import registro
+    
+    monitor_memoria.configurar(app.config)
+    if not monitor_memoria.picos_activos:
+        return
+    
+    @app.before_request
+    def iniciar_pico():
+        """Empieza a medir el pico si la petición sale en el muestreo"""
+        inicio = monitor_memoria.iniciar_pico()
+        if inicio is not None:
+            request.environ['taskflow.memoria'] = inicio
+    
+    @app.teardown_request
+    def terminar_pico(error):
+        """Registra el pico de la petición por ruta"""
+        inicio = request.environ.pop('taskflow.memoria', None)
+        if inicio is not None:
+            regla = request.url_rule.rule if request.url_rule else 'sin_ruta'
+            pico = monitor_memoria.terminar_pico(f"{request.method} {regla}", inicio)
+            registro.observar('taskflow_http_request_peak_alloc_bytes',
+                              (('route', regla), ('method', request.method)), pico)
+    
+    print(f"✓ Picos de memoria por ruta (proporción {monitor_memoria.proporcion}, "
+          f"{monitor_memoria.marcos} marcos por reserva)")
+
+
+def registrar_trazas(app):
+    """
+    Abre un span raíz por petición y un span por función de ruta
+    
+    Propaga el ID de traza en las cabeceras X-Trace-Id y traceparent de la
+    respuesta, y registra en el log 'taskflow.slow' las peticiones que
+    superan TRACING_SLOW_MS.
+    
+    Args:
+        app: Instancia de Flask
+    """
+    from app.utils.tracing import (iniciar_traza, terminar_traza, trazar,
+                                   registrar_lenta)
+    
+    if not app.config.get('TRACING_ENABLED', True):
+        return
+    umbral_ms = app.config.get('TRACING_SLOW_MS', 500)
+    
+    # Span por función de ruta
+    for endpoint, vista in list(app.view_functions.items()):
+        if endpoint != 'static':
+            app.view_functions[endpoint] = trazar(f"route {endpoint}")(vista)
+    
+    @app.before_request
+    def iniciar_span_raiz():
+        """Abre el span raíz (continúa la traza si llega traceparent)"""
+        raiz, token = iniciar_traza(f"{request.method} {request.path}",
+                                    traceparent=request.headers.get('traceparent'))
+        request.environ['taskflow.traza'] = (raiz, token)
+    
+    @app.after_request
+    def propagar_traza(response):
+        """Devuelve el ID de traza al cliente"""
+        traza = request.environ.get('taskflow.traza')
+        if traza:
+            raiz = traza[0]
+            response.headers['X-Trace-Id'] = raiz.trace_id
+            response.headers['traceparent'] = f"00-{raiz.trace_id}-{raiz.span_id}-01"
+            raiz.atributos['status'] = response.status_code
+        return response
+    
+    @app.teardown_request
+    def cerrar_span_raiz(error):
+        """Cierra la traza y la registra si fue lenta"""
+        traza = request.environ.pop('taskflow.traza', None)
+        if traza:
+            raiz, token = traza
+            terminar_traza(raiz, token)
+            if raiz.duracion_ms >= umbral_ms:
+                registrar_lenta(raiz)
+    
+    print(f"✓ Trazas activas (peticiones lentas > {umbral_ms:g} ms)")
@@ -4,6 +4,18 @@ Modelo de Tarea
 Define la estructura y comportamiento de las tareas en el sistema
 """
 
+import time
+
+def ahora():
+    """
+    Marca de tiempo actual para creada_en y completada_en
+
+    Returns:
+        float: Segundos desde epoch (UTC), con precisión de milisegundos
+    """
+    return round(time.time(), 3)
+
+
 class Task:
     """
     Representa una tarea en el sistema TaskFlow
@@ -15,13 +27,19 @@ class Task:
         completada (bool): Estado de completitud
         prioridad (str): Nivel de prioridad (alta, media, baja)
         usuario_id (int): ID del usuario asignado
+        creada_en (float): Momento de creación (segundos desde epoch, UTC)
+        completada_en (float): Momento en que se completó (None si está pendiente)
+        depende_de (tuple): IDs de las tareas que deben completarse antes
+        vence_en (float): Fecha límite (segundos desde epoch, UTC; None si no tiene)
+        etiquetas (tuple): Etiquetas en minúsculas, ordenadas y sin repetir
     """
     
     # Prioridades válidas
     PRIORIDADES_VALIDAS = ['alta', 'media', 'baja']
     
     def __init__(self, id, titulo, descripcion='', completada=False, 
-                 prioridad='media', usuario_id=None):
+                 prioridad='media', usuario_id=None, creada_en=None, completada_en=None,
+                 depende_de=(), vence_en=None, etiquetas=()):
         """
         Inicializa una nueva tarea
         
@@ -32,6 +50,12 @@ class Task:
             completada: Estado de completitud (default: False)
             prioridad: Nivel de prioridad (default: 'media')
             usuario_id: ID del usuario asignado (opcional)
+            creada_en: Momento de creación (default: ahora)
+            completada_en: Momento en que se completó (default: ahora si
+                completada, None si no)
+            depende_de: IDs de las tareas que la bloquean (default: ninguna)
+            vence_en: Fecha límite (opcional)
+            etiquetas: Etiquetas de la tarea (default: ninguna)
         """
         self.id = id
         self.titulo = titulo
@@ -39,6 +63,14 @@ class Task:
         self.completada = completada
         self.prioridad = prioridad.lower()
         self.usuario_id = usuario_id
+        self.creada_en = creada_en if creada_en is not None else ahora()
+        if completada and completada_en is None:
+            completada_en = self.creada_en
+        self.completada_en = completada_en if completada else None
+        # Tupla: la vacía es compartida y no ocupa memoria por tarea
+        self.depende_de = tuple(depende_de) if depende_de else ()
+        self.vence_en = vence_en
+        self.etiquetas = tuple(etiquetas) if etiquetas else ()
     
     def to_dict(self):
         """
@@ -53,7 +85,12 @@ class Task:
             'descripcion': self.descripcion,
             'completada': self.completada,
             'prioridad': self.prioridad,
-            'usuario_id': self.usuario_id
+            'usuario_id': self.usuario_id,
+            'creada_en': self.creada_en,
+            'completada_en': self.completada_en,
+            'depende_de': list(self.depende_de),
+            'vence_en': self.vence_en,
+            'etiquetas': list(self.etiquetas)
         }
     
     @staticmethod
@@ -74,16 +111,24 @@ class Task:
             descripcion=data.get('descripcion', ''),
             completada=data.get('completada', False),
             prioridad=data.get('prioridad', 'media'),
-            usuario_id=data.get('usuario_id')
+            usuario_id=data.get('usuario_id'),
+            creada_en=data.get('creada_en'),
+            completada_en=data.get('completada_en'),
+            depende_de=data.get('depende_de'),
+            vence_en=data.get('vence_en'),
+            etiquetas=data.get('etiquetas')
         )
     
     def marcar_completada(self):
         """Marca la tarea como completada"""
+        if not self.completada:
+            self.completada_en = ahora()
         self.completada = True
     
     def marcar_pendiente(self):
         """Marca la tarea como pendiente"""
         self.completada = False
+        self.completada_en = None
     
     def cambiar_prioridad(self, nueva_prioridad):
         """
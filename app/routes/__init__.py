@@ -6,5 +6,8 @@ Endpoints de la API
 
 from .users import users_bp
 from .tasks import tasks_bp
+from .metrics import metrics_bp
+from .admin import admin_bp
+from .batch import batch_bp
 
-__all__ = ['users_bp', 'tasks_bp']
+__all__ = ['users_bp', 'tasks_bp', 'metrics_bp', 'admin_bp', 'batch_bp']
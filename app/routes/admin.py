@@ -0,0 +1,246 @@
+# app/routes/admin.py
+"""
+Rutas de Administración (Blueprint)
+Endpoints operativos protegidos con ADMIN_TOKEN
+"""
+
+import hmac
+import os
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, request, send_file
+from app.utils.memory import AGRUPACIONES, monitor_memoria, uso_proceso
+from app.utils.profiler import perfilador
+
+# Crear Blueprint
+admin_bp = Blueprint('admin', __name__)
+
+
+def requiere_admin(vista):
+    """
+    Exige la cabecera X-Admin-Token igual a ADMIN_TOKEN
+    
+    Si ADMIN_TOKEN no está configurado los endpoints quedan deshabilitados.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        esperado = current_app.config.get('ADMIN_TOKEN')
+        if not esperado:
+            return jsonify({'error': 'Administración deshabilitada (ADMIN_TOKEN no configurado)'}), 403
+        recibido = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(esperado, recibido):
+            return jsonify({'error': 'Token de administración inválido'}), 401
+        return vista(*args, **kwargs)
+    return envoltura
+
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+@requiere_admin
+def listar_perfiles():
+    """
+    GET /api/admin/profiles
+    Lista los perfiles guardados por ruta
+    
+    Returns:
+        JSON: {'activo': bool, 'rutas': {ruta: [archivos]}} con código 200
+    """
+    perfilador.volcar()
+    return jsonify({
+        'activo': perfilador.activo,
+        'proporcion': perfilador.proporcion,
+        'rutas': perfilador.listar()
+    }), 200
+
+
+@admin_bp.route('/admin/profiles/<ruta>', methods=['GET'])
+@requiere_admin
+def descargar_perfil(ruta):
+    """
+    GET /api/admin/profiles/<ruta>
+    Descarga el perfil más reciente de una ruta (stacks colapsados)
+    
+    Args:
+        ruta: Nombre de la ruta, ej: GET_api_tasks
+    
+    Returns:
+        text/plain: Archivo .folded con código 200, o error 404
+    """
+    perfilador.volcar()
+    archivo = perfilador.ultimo(ruta)
+    
+    if not archivo:
+        return jsonify({'error': 'No hay perfiles para esa ruta'}), 404
+    
+    return send_file(archivo, mimetype='text/plain', as_attachment=True)
+
+
+@admin_bp.route('/admin/archive', methods=['POST'])
+@requiere_admin
+def archivar_tareas():
+    """
+    POST /api/admin/archive
+    Ejecuta ahora el archivado de tareas completadas
+    
+    Query params opcionales:
+        - older_than_days: antigüedad mínima en días (default: TASK_ARCHIVE_AFTER_DAYS)
+    
+    Returns:
+        JSON: {'archivadas': int, 'archivo': {bloques, tareas, bytes}} con
+        código 200, o error 400
+    """
+    from app.services import task_service
+    
+    dias = request.args.get('older_than_days', current_app.config['TASK_ARCHIVE_AFTER_DAYS'])
+    try:
+        dias = float(dias)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'older_than_days debe ser un número'}), 400
+    if dias < 0:
+        return jsonify({'error': 'older_than_days no puede ser negativo'}), 400
+    
+    archivadas = task_service.archivar_completadas(dias, current_app.config['TASK_ARCHIVE_BLOCK_SIZE'])
+    return jsonify({
+        'archivadas': archivadas,
+        'archivo': task_service.store.estadisticas()['archivo']
+    }), 200
+
+
+def _parametros_top():
+    """
+    Lee limit y group_by de los endpoints de instantáneas
+
+    Returns:
+        tuple: (limite, agrupar, error)
+    """
+    limite = request.args.get('limit', '10')
+    if not limite.isdigit() or not 1 <= int(limite) <= 100:
+        return None, None, 'limit debe ser un entero entre 1 y 100'
+    agrupar = request.args.get('group_by', 'lineno')
+    if agrupar not in AGRUPACIONES:
+        return None, None, f"group_by debe ser: {', '.join(AGRUPACIONES)}"
+    return int(limite), agrupar, None
+
+
+@admin_bp.route('/admin/memory', methods=['GET'])
+@requiere_admin
+def uso_memoria():
+    """
+    GET /api/admin/memory
+    Memoria del proceso que atiende la petición: residente, estimada del
+    almacén de tareas y sus índices, estado de tracemalloc y picos por ruta
+    
+    Query params opcionales:
+        - sample: elementos recorridos por contenedor al estimar (default:
+          MEMORY_ESTIMATE_SAMPLE; más es más preciso y más lento)
+    
+    Returns:
+        JSON: {pid, proceso, tareas, tracemalloc, picos_por_ruta} con código
+        200, o error 400
+    """
+    from app.services import task_service
+    
+    muestra = request.args.get('sample', str(current_app.config['MEMORY_ESTIMATE_SAMPLE']))
+    if not muestra.isdigit() or int(muestra) < 1:
+        return jsonify({'error': 'sample debe ser un entero positivo'}), 400
+    
+    return jsonify({
+        'pid': os.getpid(),
+        'proceso': uso_proceso(),
+        'tareas': task_service.obtener_uso_memoria(int(muestra)),
+        'tracemalloc': monitor_memoria.estado(),
+        'picos_por_ruta': monitor_memoria.picos()
+    }), 200
+
+
+@admin_bp.route('/admin/memory/snapshots', methods=['POST'])
+@requiere_admin
+def capturar_instantanea():
+    """
+    POST /api/admin/memory/snapshots
+    Toma una instantánea de tracemalloc en el proceso que atiende la petición
+    
+    La primera arranca tracemalloc (iniciada=true): solo cuenta lo reservado
+    desde entonces, así que sirve como punto de partida para comparar.
+    
+    Query params opcionales:
+        - limit: sitios de reserva en el resumen (1-100, default: 10)
+        - group_by: lineno, filename o traceback (default: lineno)
+    
+    Returns:
+        JSON: {id, fecha, pid, bytes, bloques, iniciada, top} con código 201,
+        o error 400
+    """
+    limite, agrupar, error = _parametros_top()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    return jsonify(monitor_memoria.capturar(limite, agrupar)), 201
+
+
+@admin_bp.route('/admin/memory/snapshots/<int:numero>', methods=['GET'])
+@requiere_admin
+def ver_instantanea(numero):
+    """
+    GET /api/admin/memory/snapshots/<id>
+    Sitios que más memoria tienen reservada en una instantánea
+    
+    Args:
+        numero: ID de la instantánea
+    
+    Returns:
+        JSON: {id, fecha, pid, bytes, bloques, top} con código 200, o error
+        400 o 404
+    """
+    limite, agrupar, error = _parametros_top()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    resumen = monitor_memoria.resumir(numero, limite, agrupar)
+    if resumen is None:
+        return jsonify({'error': 'Instantánea no encontrada en este proceso'}), 404
+    
+    return jsonify(resumen), 200
+
+
+@admin_bp.route('/admin/memory/diff', methods=['GET'])
+@requiere_admin
+def comparar_instantaneas():
+    """
+    GET /api/admin/memory/diff?from=<id>&to=<id>
+    Sitios cuya memoria reservada más creció o decreció entre dos instantáneas
+    
+    Query params opcionales:
+        - limit: sitios incluidos (1-100, default: 10)
+        - group_by: lineno, filename o traceback (default: lineno)
+    
+    Returns:
+        JSON: {desde, hasta, segundos, diferencia_bytes, top} con código
+        200, o error 400 o 404
+    """
+    desde, hasta = request.args.get('from', ''), request.args.get('to', '')
+    if not desde.isdigit() or not hasta.isdigit():
+        return jsonify({'error': 'from y to deben ser IDs de instantánea'}), 400
+    limite, agrupar, error = _parametros_top()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    diferencia = monitor_memoria.comparar(int(desde), int(hasta), limite, agrupar)
+    if diferencia is None:
+        return jsonify({'error': 'Instantánea no encontrada en este proceso'}), 404
+    
+    return jsonify(diferencia), 200
+
+
+@admin_bp.route('/admin/memory/snapshots', methods=['DELETE'])
+@requiere_admin
+def descartar_instantaneas():
+    """
+    DELETE /api/admin/memory/snapshots
+    Descarta las instantáneas y para tracemalloc (salvo que esté activo el
+    muestreo de picos por ruta)
+    
+    Returns:
+        JSON: Estado de tracemalloc con código 200
+    """
+    monitor_memoria.detener()
+    return jsonify(monitor_memoria.estado()), 200
@@ -0,0 +1,251 @@
+# app/routes/batch.py
+"""
+Rutas de Lotes (Blueprint)
+Ejecuta varias llamadas a la API en una sola petición
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.test import EnvironBuilder
+
+from app.services import user_service
+from app.utils.cache import ConsultasCompartidas
+from app.utils.tracing import traceparent
+
+# Crear Blueprint
+batch_bp = Blueprint('batch', __name__)
+
+# Métodos sin efectos: las lecturas consecutivas se ejecutan a la vez
+_LECTURAS = frozenset({'GET', 'HEAD'})
+_METODOS = _LECTURAS | {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Cabeceras de la petición del lote que no se copian a las sub-peticiones
+_CABECERAS_PROPIAS = frozenset({'content-length', 'content-type', 'transfer-encoding',
+                                'traceparent', 'connection', 'expect'})
+
+# Cabeceras de las respuestas que no se devuelven (el lote ya las tiene)
+_CABECERAS_OMITIDAS = frozenset({'content-length', 'content-type', 'x-trace-id',
+                                 'traceparent', 'access-control-allow-origin', 'vary'})
+
+
+def _validar(solicitudes, maximo):
+    """
+    Valida la lista de sub-peticiones del lote
+
+    Args:
+        solicitudes: Valor de 'requests' en el cuerpo
+        maximo: Sub-peticiones permitidas
+
+    Returns:
+        tuple: (lista normalizada de dicts {id, method, path, body, headers}, error)
+    """
+    if not isinstance(solicitudes, list) or not solicitudes:
+        return None, "requests debe ser una lista no vacía"
+    if len(solicitudes) > maximo:
+        return None, f"Un lote admite como máximo {maximo} peticiones"
+
+    normalizadas = []
+    for i, solicitud in enumerate(solicitudes):
+        if not isinstance(solicitud, dict):
+            return None, f"Petición {i}: debe ser un objeto"
+        metodo = str(solicitud.get('method', 'GET')).upper()
+        ruta = solicitud.get('path')
+        cabeceras = solicitud.get('headers') or {}
+        if metodo not in _METODOS:
+            return None, f"Petición {i}: método no permitido"
+        if not isinstance(ruta, str) or not ruta.startswith('/api/'):
+            return None, f"Petición {i}: path debe empezar por /api/"
+        if not isinstance(cabeceras, dict):
+            return None, f"Petición {i}: headers debe ser un objeto"
+        normalizadas.append({
+            'id': solicitud.get('id', i),
+            'method': metodo,
+            'path': ruta,
+            'body': solicitud.get('body'),
+            'headers': {str(k): str(v) for k, v in cabeceras.items()}
+        })
+    return normalizadas, None
+
+
+def _fases(solicitudes):
+    """
+    Agrupa las sub-peticiones en fases que se ejecutan en orden
+
+    Las lecturas consecutivas forman una fase concurrente; cada escritura
+    va sola, así que ve el efecto de todo lo anterior y lo siguiente ve el
+    suyo.
+
+    Returns:
+        list: Listas de índices
+    """
+    fases = []
+    for i, solicitud in enumerate(solicitudes):
+        if (solicitud['method'] in _LECTURAS and fases
+                and solicitudes[fases[-1][-1]]['method'] in _LECTURAS):
+            fases[-1].append(i)
+        else:
+            fases.append([i])
+    return fases
+
+
+def _error(solicitud, codigo, mensaje):
+    """Respuesta de una sub-petición que no se ejecutó"""
+    return {'id': solicitud['id'], 'status': codigo, 'body': {'error': mensaje}}
+
+
+def _despachar(app, solicitud, comunes, excluidas):
+    """
+    Ejecuta una sub-petición en el dispatcher de Flask, sin pasar por HTTP
+
+    Pasa por los mismos hooks que una petición normal (métricas, admisión,
+    trazas) y por los manejadores de errores; no gasta fichas del límite por
+    cliente (taskflow.sublote), que el lote ya pagó.
+
+    Args:
+        app: Aplicación Flask
+        solicitud: Sub-petición normalizada
+        comunes: Cabeceras y entorno heredados de la petición del lote
+        excluidas: Endpoints que no se pueden ejecutar en un lote
+
+    Returns:
+        tuple: ({id, status, body[, headers]}, bytes del cuerpo)
+    """
+    constructor = EnvironBuilder(
+        path=solicitud['path'], method=solicitud['method'], base_url=comunes['base_url'],
+        headers={**comunes['headers'], **solicitud['headers']},
+        json=solicitud['body'] if solicitud['body'] is not None else None,
+        environ_overrides={'REMOTE_ADDR': comunes['remote_addr'], 'taskflow.sublote': True})
+    try:
+        entorno = constructor.get_environ()
+    finally:
+        constructor.close()
+
+    contexto = app.request_context(entorno)
+    error = None
+    try:
+        try:
+            contexto.push()
+            if request.endpoint in excluidas:
+                return _error(solicitud, 400, "Esta ruta no se puede usar en un lote"), 0
+            respuesta = app.full_dispatch_request()
+        except Exception as e:
+            error = e
+            respuesta = app.handle_exception(e)
+
+        datos = respuesta.get_data()
+        if respuesta.is_json:
+            cuerpo = respuesta.get_json(silent=True)
+        else:
+            cuerpo = datos.decode('utf-8', 'replace')
+        resultado = {'id': solicitud['id'], 'status': respuesta.status_code, 'body': cuerpo}
+        cabeceras = {clave: valor for clave, valor in respuesta.headers.items()
+                     if clave.lower() not in _CABECERAS_OMITIDAS}
+        if cabeceras:
+            resultado['headers'] = cabeceras
+        return resultado, len(datos)
+    finally:
+        contexto.pop(error)
+
+
+@batch_bp.route('/batch', methods=['POST'])
+def ejecutar_lote():
+    """
+    POST /api/batch
+    Ejecuta varias llamadas a la API y devuelve todas las respuestas juntas
+
+    Las sub-peticiones se despachan dentro del proceso, cada una con los
+    mismos hooks que si llegara por HTTP. Las lecturas consecutivas se
+    ejecutan a la vez (hasta BATCH_MAX_CONCURRENCY); cada escritura se
+    ejecuta sola y en orden. Las consultas de usuarios a Supabase se
+    comparten dentro del lote. Las cabeceras de la petición del lote
+    (X-Admin-Token, etc.) se heredan.
+
+    Body JSON esperado:
+        {
+            "requests": [
+                {"id": "opcional", "method": "GET", "path": "/api/users/1",
+                 "body": {...}, "headers": {...}}
+            ]
+        }
+
+    Returns:
+        JSON: {"responses": [{id, status, body, headers}]} en el orden de
+        las peticiones con código 200, o 400 si el lote no es válido.
+        Las sub-peticiones que no llegan a ejecutarse antes de
+        BATCH_TIMEOUT_SECONDS responden 504. Cuando una respuesta supera
+        lo que queda de BATCH_MAX_RESPONSE_BYTES, el presupuesto se agota y
+        las siguientes no se ejecutan (413). La que lo superó responde 413
+        si es una lectura (no tuvo efecto); si es una escritura, ya aplicada,
+        conserva su status con body null y "truncated": true.
+    """
+    config = current_app.config
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': "Se esperaba un objeto JSON con 'requests'"}), 400
+
+    solicitudes, error = _validar(data.get('requests'), config['BATCH_MAX_REQUESTS'])
+    if error:
+        return jsonify({'error': error}), 400
+
+    app = current_app._get_current_object()
+    comunes = {
+        'base_url': request.host_url,
+        'remote_addr': request.remote_addr,
+        'headers': {clave: valor for clave, valor in request.headers.items()
+                    if clave.lower() not in _CABECERAS_PROPIAS}
+    }
+    cabecera = traceparent()
+    if cabecera:
+        comunes['headers']['traceparent'] = cabecera
+    excluidas = frozenset(config['BATCH_EXCLUDED'])
+    limite = time.monotonic() + config['BATCH_TIMEOUT_SECONDS']
+    presupuesto = [config['BATCH_MAX_RESPONSE_BYTES']]
+    lock = threading.Lock()
+    consultas = ConsultasCompartidas()
+
+    def ejecutar(solicitud):
+        if time.monotonic() > limite:
+            return _error(solicitud, 504, "Tiempo del lote agotado")
+        with lock:
+            agotado = presupuesto[0] <= 0
+        if agotado:
+            return _error(solicitud, 413, "Presupuesto de respuesta del lote agotado")
+        # Contexto nuevo: la sub-petición no ve la petición del lote, solo
+        # las consultas compartidas
+        resultado, tamano = contextvars.Context().run(_ejecutar_aislada, app, solicitud,
+                                                      comunes, excluidas, consultas)
+        with lock:
+            if tamano <= presupuesto[0]:
+                presupuesto[0] -= tamano
+                return resultado
+            presupuesto[0] = 0
+        if solicitud['method'] in _LECTURAS:
+            return _error(solicitud, 413, "Respuesta demasiado grande para el lote")
+        # La escritura ya se aplicó: se informa su status, sin el cuerpo
+        resultado['body'] = None
+        resultado['truncated'] = True
+        return resultado
+
+    respuestas = [None] * len(solicitudes)
+    concurrencia = config['BATCH_MAX_CONCURRENCY']
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        for fase in _fases(solicitudes):
+            if len(fase) == 1 or concurrencia <= 1:
+                for i in fase:
+                    respuestas[i] = ejecutar(solicitudes[i])
+            else:
+                for i, respuesta in zip(fase, pool.map(ejecutar,
+                                                       [solicitudes[i] for i in fase])):
+                    respuestas[i] = respuesta
+
+    return jsonify({'responses': respuestas}), 200
+
+
+def _ejecutar_aislada(app, solicitud, comunes, excluidas, consultas):
+    """Despacha una sub-petición compartiendo las consultas de usuario del lote"""
+    with user_service.compartir_consultas(consultas):
+        return _despachar(app, solicitud, comunes, excluidas)
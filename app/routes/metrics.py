@@ -0,0 +1,23 @@
+# app/routes/metrics.py
+"""
+Rutas de Métricas (Blueprint)
+Exposición de métricas en formato Prometheus
+"""
+
+from flask import Blueprint, Response
+from app.utils.metrics import registro
+
+# Crear Blueprint
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def obtener_metricas():
+    """
+    GET /api/metrics
+    Métricas del proceso en formato de texto de Prometheus
+    
+    Returns:
+        text/plain: Contadores, histogramas de latencia y tamaños del almacén
+    """
+    return Response(registro.exponer(), mimetype='text/plain; version=0.0.4')
@@ -4,12 +4,137 @@ Rutas de Tareas (Blueprint)
 Endpoints para gestión de tareas
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 from app.services import task_service
+from app.utils.validators import validar_etiqueta, validar_id_positivo
 
 # Crear Blueprint
 tasks_bp = Blueprint('tasks', __name__)
 
+# Tramas fijas del flujo SSE
+_RESET = b'event: reset\ndata: {}\n\n'
+_LATIDO = b': latido\n\n'
+
+
+def _codigo_error(error, por_defecto=400):
+    """
+    Código HTTP de un error del servicio de tareas
+
+    Args:
+        error: Mensaje de error
+        por_defecto: Código si no es de tarea inexistente ni de almacén lleno
+
+    Returns:
+        int: 404 si la tarea no existe, 507 si el almacén está lleno, o
+            por_defecto
+    """
+    if error == "Tarea no encontrada":
+        return 404
+    if error.startswith(task_service.ERROR_SIN_ESPACIO):
+        return 507
+    return por_defecto
+
+
+def _entero_positivo(nombre):
+    """
+    Lee un parámetro de query que debe ser un entero positivo
+
+    Args:
+        nombre: Nombre del parámetro
+
+    Returns:
+        tuple: (valor o None si no viene, error_message)
+    """
+    valor = request.args.get(nombre)
+    if valor is None:
+        return None, None
+    if not validar_id_positivo(valor):
+        return None, f"{nombre} debe ser un entero positivo"
+    return int(valor), None
+
+
+def _instante(nombre):
+    """
+    Lee un parámetro de query que debe ser un instante en segundos desde epoch
+
+    Args:
+        nombre: Nombre del parámetro
+
+    Returns:
+        tuple: (valor o None si no viene, error_message)
+    """
+    valor = request.args.get(nombre)
+    if valor is None:
+        return None, None
+    try:
+        valor = float(valor)
+    except ValueError:
+        return None, f"{nombre} debe ser una fecha en segundos desde epoch"
+    if not 0 <= valor < 1e11:
+        return None, f"{nombre} debe ser una fecha en segundos desde epoch"
+    return valor, None
+
+
+def _etiquetas(nombre):
+    """
+    Lee un parámetro de query con etiquetas separadas por comas
+
+    Una etiqueta con '-' delante se pide excluida.
+
+    Args:
+        nombre: Nombre del parámetro
+
+    Returns:
+        tuple: (lista de incluidas, lista de excluidas, error_message)
+    """
+    incluidas, excluidas = [], []
+    for etiqueta in request.args.get(nombre, '').split(','):
+        etiqueta = etiqueta.strip().lower()
+        if not etiqueta:
+            continue
+        destino = incluidas
+        if etiqueta.startswith('-'):
+            etiqueta, destino = etiqueta[1:], excluidas
+        if not validar_etiqueta(etiqueta):
+            return None, None, f"{nombre} contiene una etiqueta inválida: {etiqueta}"
+        destino.append(etiqueta)
+    return incluidas, excluidas, None
+
+
+def _flujo_eventos(usuario_id, ultimo_id, latido, reintento_ms):
+    """
+    Generador del flujo SSE de un suscriptor
+
+    Args:
+        usuario_id: Filtrar por usuario (o None)
+        ultimo_id: Last-Event-ID del cliente (None en una conexión nueva)
+        latido: Segundos sin eventos antes de enviar un latido
+        reintento_ms: Espera de reconexión sugerida al navegador
+
+    Yields:
+        bytes: Tramas SSE
+    """
+    eventos = task_service.eventos
+    yield f"retry: {reintento_ms}\n\n".encode('utf-8')
+    
+    if ultimo_id is None:
+        ultimo_id = eventos.ultimo_id
+    else:
+        # Reanudar: los eventos que el cliente no llegó a recibir
+        tramas, completo, ultimo_id = eventos.desde(ultimo_id, usuario_id)
+        if not completo:
+            yield _RESET
+        yield from tramas
+    
+    while True:
+        if not eventos.esperar(ultimo_id, latido):
+            yield _LATIDO
+            continue
+        tramas, completo, ultimo_id = eventos.desde(ultimo_id, usuario_id)
+        if not completo:
+            yield _RESET
+        yield from tramas
+
 
 @tasks_bp.route('/tasks', methods=['GET'])
 def listar_tareas():
@@ -20,15 +145,43 @@ def listar_tareas():
     Query params opcionales:
         - completada: true/false (filtra por estado)
         - prioridad: alta/media/baja (filtra por prioridad)
+        - sort: id, prioridad o titulo; con '-' delante, descendente
+        - limit: cantidad máxima de tareas (top-K, sin ordenar todo)
+        - include_archived: true para incluir las tareas archivadas
+        - tags: etiquetas separadas por comas que la tarea debe tener todas;
+          con '-' delante, etiquetas que no debe tener (tags=a,b,-c)
+        - tags_any: etiquetas de las que debe tener al menos una (también
+          admite '-etiqueta' para excluir)
     
     Returns:
-        JSON: Lista de tareas con código 200
+        JSON: Lista de tareas con código 200, o error 400
     """
     # Filtros opcionales
     completada = request.args.get('completada')
     prioridad = request.args.get('prioridad')
+    orden = request.args.get('sort')
+    archivadas = request.args.get('include_archived', 'false').lower() == 'true'
+    limite, error = _entero_positivo('limit')
+    if error:
+        return jsonify({'error': error}), 400
+    con_etiquetas, sin_etiquetas, error = _etiquetas('tags')
+    if error:
+        return jsonify({'error': error}), 400
+    alguna_etiqueta, sin_alguna, error = _etiquetas('tags_any')
+    if error:
+        return jsonify({'error': error}), 400
+    sin_etiquetas += sin_alguna
+    por_etiquetas = con_etiquetas or alguna_etiqueta or sin_etiquetas
     
-    if completada is not None:
+    if orden is not None or limite is not None or archivadas or por_etiquetas:
+        if completada is not None:
+            completada = completada.lower() == 'true'
+        tareas, error = task_service.listar_tareas(completada, prioridad or None,
+                                                   orden, limite, archivadas, con_etiquetas,
+                                                   alguna_etiqueta, sin_etiquetas)
+        if error:
+            return jsonify({'error': error}), 400
+    elif completada is not None:
         if completada.lower() == 'true':
             tareas = task_service.obtener_tareas_completadas()
         else:
@@ -41,19 +194,254 @@ def listar_tareas():
     return jsonify(tareas), 200
 
 
+@tasks_bp.route('/tasks/next', methods=['GET'])
+def listar_siguientes_tareas():
+    """
+    GET /api/tasks/next
+    Lista las tareas pendientes más urgentes (prioridad y luego antigüedad)
+    
+    Query params opcionales:
+        - usuario_id: solo las tareas de ese usuario
+        - k: cantidad de tareas (default: 1)
+    
+    Returns:
+        JSON: Lista de tareas con código 200, o error 400
+    """
+    usuario_id, error = _entero_positivo('usuario_id')
+    if error:
+        return jsonify({'error': error}), 400
+    k, error = _entero_positivo('k')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    tareas = task_service.obtener_siguientes_tareas(usuario_id, k or 1)
+    return jsonify(tareas), 200
+
+
+@tasks_bp.route('/tasks/ready', methods=['GET'])
+def listar_tareas_listas():
+    """
+    GET /api/tasks/ready
+    Lista las tareas pendientes cuyas dependencias (depende_de) están
+    todas completadas, en orden de ID
+
+    Query params opcionales:
+        - usuario_id: solo las tareas de ese usuario
+        - limit: cantidad máxima de tareas
+
+    Returns:
+        JSON: Lista de tareas con código 200, o error 400
+    """
+    usuario_id, error = _entero_positivo('usuario_id')
+    if error:
+        return jsonify({'error': error}), 400
+    limite, error = _entero_positivo('limit')
+    if error:
+        return jsonify({'error': error}), 400
+
+    tareas = task_service.obtener_tareas_listas(usuario_id, limite)
+    return jsonify(tareas), 200
+
+
+@tasks_bp.route('/tasks/due', methods=['GET'])
+def listar_tareas_por_vencer():
+    """
+    GET /api/tasks/due
+    Lista las tareas pendientes cuya fecha límite (vence_en) está en un
+    rango, la que vence antes primero
+
+    Query params opcionales:
+        - after: desde este instante, incluido (segundos desde epoch)
+        - before: hasta este instante, excluido (segundos desde epoch)
+        - usuario_id: solo las tareas de ese usuario
+        - limit: cantidad máxima de tareas
+
+    Returns:
+        JSON: Lista de tareas con código 200, o error 400
+    """
+    desde, error = _instante('after')
+    if error:
+        return jsonify({'error': error}), 400
+    hasta, error = _instante('before')
+    if error:
+        return jsonify({'error': error}), 400
+    usuario_id, error = _entero_positivo('usuario_id')
+    if error:
+        return jsonify({'error': error}), 400
+    limite, error = _entero_positivo('limit')
+    if error:
+        return jsonify({'error': error}), 400
+
+    tareas = task_service.obtener_tareas_por_vencer(desde, hasta, usuario_id, limite)
+    return jsonify(tareas), 200
+
+
+@tasks_bp.route('/tasks/overdue/count', methods=['GET'])
+def contar_tareas_vencidas():
+    """
+    GET /api/tasks/overdue/count
+    Cuenta las tareas pendientes cuya fecha límite ya pasó
+
+    Query params opcionales:
+        - usuario_id: solo las tareas de ese usuario
+
+    Returns:
+        JSON: {'vencidas': int, 'ahora': instante usado} con código 200, o
+        error 400
+    """
+    usuario_id, error = _entero_positivo('usuario_id')
+    if error:
+        return jsonify({'error': error}), 400
+
+    return jsonify(task_service.contar_tareas_vencidas(usuario_id)), 200
+
+
+@tasks_bp.route('/tasks/stream', methods=['GET'])
+def stream_tareas():
+    """
+    GET /api/tasks/stream
+    Flujo Server-Sent Events con los cambios de tareas
+    
+    Eventos: create, update, complete, delete (data: la tarea en JSON; id:
+    versión del almacén). 'reset' indica que se perdieron eventos y el
+    cliente debe volver a pedir /api/tasks. Cada STREAM_HEARTBEAT_SECONDS
+    sin eventos se envía un comentario de latido.
+    
+    Query params opcionales:
+        - usuario_id: solo los cambios de tareas de ese usuario
+        - last_event_id: alternativa a la cabecera Last-Event-ID
+    
+    Returns:
+        text/event-stream con código 200, o error 400
+    """
+    usuario_id, error = _entero_positivo('usuario_id')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    ultimo_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    if ultimo_id is not None:
+        if not ultimo_id.isdigit():
+            return jsonify({'error': "Last-Event-ID debe ser un entero"}), 400
+        ultimo_id = int(ultimo_id)
+    
+    config = current_app.config
+    task_service.vigilar_cambios(config['STREAM_POLL_MS'] / 1000)
+    flujo = _flujo_eventos(usuario_id, ultimo_id,
+                           config['STREAM_HEARTBEAT_SECONDS'], config['STREAM_RETRY_MS'])
+    return Response(flujo, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@tasks_bp.route('/tasks/changes', methods=['GET'])
+def listar_cambios():
+    """
+    GET /api/tasks/changes?since=<version>
+    Cambios desde una versión: tareas creadas o modificadas e IDs eliminados
+    
+    Query params:
+        - since: versión devuelta por la llamada anterior (default: 0)
+    
+    Returns:
+        JSON: {version, completo, tareas, eliminadas} con código 200, o error 400.
+        Con completo=true, tareas son todas las tareas actuales.
+    """
+    desde = request.args.get('since', '0')
+    if not desde.isdigit():
+        return jsonify({'error': "since debe ser un entero no negativo"}), 400
+    
+    return jsonify(task_service.obtener_cambios(int(desde))), 200
+
+
+@tasks_bp.route('/tasks/export', methods=['GET'])
+def exportar_tareas():
+    """
+    GET /api/tasks/export
+    Exporta todas las tareas como NDJSON (una tarea JSON por línea)
+    
+    La respuesta se genera por lotes mientras se envía, sin construir el
+    listado completo en memoria. Incluye las tareas archivadas (al final)
+    salvo con include_archived=false.
+    
+    Returns:
+        application/x-ndjson con código 200
+    """
+    archivadas = request.args.get('include_archived', 'true').lower() == 'true'
+    flujo = task_service.exportar_tareas(current_app.config['BULK_BATCH_SIZE'], archivadas)
+    return Response(flujo, mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename="tareas.ndjson"'
+    })
+
+
+@tasks_bp.route('/tasks/import', methods=['POST'])
+def importar_tareas():
+    """
+    POST /api/tasks/import
+    Importa tareas desde NDJSON (una tarea JSON por línea, como las de
+    /api/tasks/export)
+    
+    El cuerpo se lee de forma incremental y se inserta por lotes. Cada línea
+    se valida como en POST /api/tasks; las inválidas se rechazan sin
+    detener la importación. Las líneas vacías se ignoran.
+    
+    Returns:
+        JSON: {importadas, rechazadas, errores: [{linea, error}]} con código
+        200, o 400 (con el mismo resumen) si la importación se detuvo, o 507
+        si el almacén se llenó
+    """
+    config = current_app.config
+    resumen, error = task_service.importar_tareas(request.stream,
+                                                  config['BULK_BATCH_SIZE'],
+                                                  config['IMPORT_MAX_LINE_BYTES'],
+                                                  config['IMPORT_MAX_ERRORS'])
+    if error:
+        return jsonify({'error': error, **resumen}), _codigo_error(error)
+    
+    return jsonify(resumen), 200
+
+
+@tasks_bp.route('/tasks/analytics', methods=['GET'])
+def analitica_tareas():
+    """
+    GET /api/tasks/analytics
+    Tareas creadas y completadas por grupo y periodo
+    
+    Query params opcionales:
+        - group_by: usuario_id, prioridad o completada, o varios separados
+          por comas (default: sin agrupar)
+        - bucket: day o week (default: day; semanas de lunes a domingo, UTC)
+    
+    Returns:
+        JSON: {group_by, bucket, grupos} con código 200, o error 400. Cada
+        grupo trae total, completadas, pendientes, tasa_completadas,
+        segundos_hasta_completar y periodos [{periodo, creadas, completadas}]
+    """
+    analitica, error = task_service.obtener_analitica(request.args.get('group_by') or None,
+                                                      request.args.get('bucket', 'day'))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    return jsonify(analitica), 200
+
+
 @tasks_bp.route('/tasks/<int:task_id>', methods=['GET'])
 def obtener_tarea(task_id):
     """
     GET /api/tasks/<id>
     Obtiene una tarea específica
     
+    Query params opcionales:
+        - include_archived: true para buscarla también en el archivo
+    
     Args:
         task_id: ID de la tarea
     
     Returns:
         JSON: Datos de la tarea con código 200, o error 404
     """
-    tarea = task_service.obtener_tarea_por_id(task_id)
+    archivadas = request.args.get('include_archived', 'false').lower() == 'true'
+    tarea = task_service.obtener_tarea_por_id(task_id, archivadas)
     
     if not tarea:
         return jsonify({'error': 'Tarea no encontrada'}), 404
@@ -61,6 +449,40 @@ def obtener_tarea(task_id):
     return jsonify(tarea), 200
 
 
+@tasks_bp.route('/tasks/<int:task_id>/similar', methods=['GET'])
+def listar_tareas_similares(task_id):
+    """
+    GET /api/tasks/<id>/similar
+    Lista las tareas del mismo usuario con título y descripción parecidos
+    
+    Query params opcionales:
+        - min: similitud estimada mínima, de 0 a 1 (default: 0.5)
+        - limit: cantidad máxima de tareas (default: 10)
+    
+    Args:
+        task_id: ID de la tarea
+    
+    Returns:
+        JSON: Lista de tareas con su 'similitud', de más a menos parecida,
+        con código 200, o error 400/404
+    """
+    limite, error = _entero_positivo('limit')
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        umbral = float(request.args.get('min', 0.5))
+    except ValueError:
+        umbral = -1.0
+    if not 0 <= umbral <= 1:
+        return jsonify({'error': "min debe ser un número entre 0 y 1"}), 400
+    
+    tareas, error = task_service.obtener_tareas_similares(task_id, umbral, limite or 10)
+    if error:
+        return jsonify({'error': error}), 404
+    
+    return jsonify(tareas), 200
+
+
 @tasks_bp.route('/tasks', methods=['POST'])
 def crear_tarea():
     """
@@ -75,15 +497,27 @@ def crear_tarea():
             "usuario_id": int (opcional)
         }
     
+    Query params opcionales:
+        - duplicates: off, flag o reject (por defecto, TASK_DUPLICATES): qué
+          hacer si el usuario ya tiene una tarea muy parecida
+    
     Returns:
-        JSON: Tarea creada con código 201, o error 400
+        JSON: Tarea creada con código 201 (con 'posibles_duplicados' en modo
+        flag), error 409 si es duplicada en modo reject, 507 si el almacén
+        está lleno, o error 400
     """
     data = request.get_json()
+    duplicados = request.args.get('duplicates', current_app.config['TASK_DUPLICATES']).lower()
+    if duplicados not in task_service.MODOS_DUPLICADOS:
+        modos = ', '.join(task_service.MODOS_DUPLICADOS)
+        return jsonify({'error': f"duplicates debe ser uno de: {modos}"}), 400
     
-    tarea, error = task_service.crear_tarea(data)
+    tarea, error = task_service.crear_tarea(data, duplicados,
+                                            current_app.config['TASK_DUPLICATE_THRESHOLD'])
     
     if error:
-        return jsonify({'error': error}), 400
+        codigo = 409 if error.startswith(task_service.ERROR_DUPLICADA) else _codigo_error(error)
+        return jsonify({'error': error}), codigo
     
     return jsonify(tarea), 201
 
@@ -107,15 +541,14 @@ def actualizar_tarea(task_id):
         }
     
     Returns:
-        JSON: Tarea actualizada con código 200, o error 400/404
+        JSON: Tarea actualizada con código 200, o error 400/404/507
     """
     data = request.get_json()
     
     tarea, error = task_service.actualizar_tarea(task_id, data)
     
     if error:
-        codigo = 404 if error == "Tarea no encontrada" else 400
-        return jsonify({'error': error}), codigo
+        return jsonify({'error': error}), _codigo_error(error)
     
     return jsonify(tarea), 200
 
@@ -130,12 +563,13 @@ def marcar_tarea_completada(task_id):
         task_id: ID de la tarea
     
     Returns:
-        JSON: Tarea actualizada con código 200, o error 404
+        JSON: Tarea actualizada con código 200, o error 404 (507 si el
+        almacén está lleno)
     """
     tarea, error = task_service.marcar_tarea_completada(task_id)
     
     if error:
-        return jsonify({'error': error}), 404
+        return jsonify({'error': error}), _codigo_error(error, 404)
     
     return jsonify(tarea), 200
 
@@ -150,12 +584,13 @@ def eliminar_tarea(task_id):
         task_id: ID de la tarea
     
     Returns:
-        JSON: Mensaje de confirmación con código 200, o error 404
+        JSON: Mensaje de confirmación con código 200, o error 404 (507 si
+        el almacén está lleno)
     """
     exitoso, error = task_service.eliminar_tarea(task_id)
     
     if not exitoso:
-        return jsonify({'error': error}), 404
+        return jsonify({'error': error}), _codigo_error(error, 404)
     
     return jsonify({'message': 'Tarea eliminada exitosamente'}), 200
 
@@ -166,10 +601,14 @@ def listar_tareas_completadas():
     GET /api/tasks/completed
     Lista solo las tareas completadas
     
+    Query params opcionales:
+        - include_archived: true para añadir las tareas archivadas
+    
     Returns:
         JSON: Lista de tareas completadas con código 200
     """
-    tareas = task_service.obtener_tareas_completadas()
+    archivadas = request.args.get('include_archived', 'false').lower() == 'true'
+    tareas = task_service.obtener_tareas_completadas(archivadas)
     return jsonify(tareas), 200
 
 
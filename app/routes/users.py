@@ -4,7 +4,7 @@ Rutas de Usuarios (Blueprint)
 Endpoints para gestión de usuarios
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from app.services import user_service
 
 # Crear Blueprint
@@ -17,11 +17,14 @@ def listar_usuarios():
     GET /api/users
     Lista todos los usuarios
     
+    La respuesta puede venir de la caché: la cabecera Age indica sus
+    segundos de antigüedad.
+    
     Returns:
         JSON: Lista de usuarios con código 200
     """
-    usuarios = user_service.obtener_todos_usuarios()
-    return jsonify(usuarios), 200
+    usuarios, edad = user_service.listar_usuarios()
+    return jsonify(usuarios), 200, {'Age': str(int(edad))}
 
 
 @users_bp.route('/users/<user_id>', methods=['GET'])
@@ -70,6 +73,30 @@ def crear_usuario():
     return jsonify(usuario), 201
 
 
+@users_bp.route('/users/bulk', methods=['POST'])
+def crear_usuarios():
+    """
+    POST /api/users/bulk
+    Crea varios usuarios con una consulta y una inserción en Supabase
+    
+    Body JSON esperado: lista de usuarios como en POST /api/users (hasta
+    USERS_BULK_MAX). Cada uno se acepta o rechaza por separado: datos
+    inválidos, email repetido en el lote o ya registrado.
+    
+    Returns:
+        JSON: {creados, rechazados, resultados: [{indice, usuario} o
+        {indice, error}]} con código 200, o error 400
+    """
+    data = request.get_json(silent=True)
+    
+    resumen, error = user_service.crear_usuarios(data, current_app.config['USERS_BULK_MAX'])
+    
+    if error:
+        return jsonify({'error': error}), 400
+    
+    return jsonify(resumen), 200
+
+
 @users_bp.route('/users/<user_id>', methods=['PUT'])
 def actualizar_usuario(user_id):
     """
@@ -127,6 +154,9 @@ def obtener_tareas_usuario(user_id):
     GET /api/users/<id>/tasks
     Obtiene todas las tareas de un usuario
     
+    Query params opcionales:
+        - include_archived: true para añadir las tareas archivadas
+    
     Args:
         user_id: ID del usuario
     
@@ -138,7 +168,8 @@ def obtener_tareas_usuario(user_id):
         return jsonify({'error': 'Usuario no encontrado'}), 404
     
     from app.services import task_service
-    tareas = task_service.obtener_tareas_por_usuario(user_id)
+    archivadas = request.args.get('include_archived', 'false').lower() == 'true'
+    tareas = task_service.obtener_tareas_por_usuario(user_id, archivadas)
     
     return jsonify(tareas), 200
 
@@ -149,6 +180,9 @@ def obtener_estadisticas_usuario(user_id):
     GET /api/users/<id>/stats
     Obtiene estadísticas de tareas de un usuario
     
+    Query params opcionales:
+        - include_archived: true para contar también las tareas archivadas
+    
     Args:
         user_id: ID del usuario
     
@@ -160,6 +194,7 @@ def obtener_estadisticas_usuario(user_id):
         return jsonify({'error': 'Usuario no encontrado'}), 404
     
     from app.services import task_service
-    estadisticas = task_service.obtener_estadisticas_usuario(user_id)
+    archivadas = request.args.get('include_archived', 'false').lower() == 'true'
+    estadisticas = task_service.obtener_estadisticas_usuario(user_id, archivadas)
     
     return jsonify(estadisticas), 200
@@ -0,0 +1,357 @@
+# app/server.py
+"""
+Servidor de producción de TaskFlow
+Proceso maestro que precarga la aplicación y pre-forkea workers,
+cada uno con un pool fijo de hilos
+
+Señales del maestro:
+    SIGTERM / SIGINT  - Parada ordenada (termina las peticiones en curso)
+    SIGHUP            - Recarga ordenada: arranca workers nuevos y retira los viejos
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+class ManejadorPeticiones(WSGIRequestHandler):
+    """Manejador HTTP/1.1 que cierra las conexiones keep-alive inactivas"""
+
+    # Segundos que una conexión keep-alive puede ocupar un hilo sin actividad
+    timeout = 5
+
+    def make_environ(self):
+        """Añade al entorno WSGI el instante en que la conexión entró en la cola del pool"""
+        environ = super().make_environ()
+        tomar = getattr(self.server, 'tomar_encolada', None)
+        encolada = tomar() if tomar is not None else None
+        if encolada is not None:
+            environ['taskflow.encolada'] = encolada
+        return environ
+
+
+class ServidorPool(BaseWSGIServer):
+    """
+    Servidor WSGI que atiende las peticiones con un pool fijo de hilos
+
+    A diferencia del servidor de desarrollo (un hilo por conexión), el
+    número de hilos está acotado, lo que limita la memoria y el cambio de
+    contexto bajo carga.
+
+    Las conexiones cuya primera petición va a una ruta de flujo (SSE) pasan
+    a un hilo propio: pasan casi todo el tiempo esperando y ocuparían el
+    pool. Su número se limita con max_flujos; por encima se responde 503.
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, app, hilos=8, fd=None, rutas_flujo=(), max_flujos=10000):
+        """
+        Args:
+            host: Dirección de escucha
+            port: Puerto de escucha
+            app: Aplicación WSGI
+            hilos: Tamaño del pool de hilos
+            fd: Descriptor de un socket ya abierto (heredado del maestro)
+            rutas_flujo: Prefijos de ruta de conexiones de larga duración
+            max_flujos: Conexiones de flujo simultáneas como máximo
+        """
+        # BaseWSGIServer llama a server_close() al iniciar: el pool se crea después
+        self._pool = None
+        super().__init__(host, port, app, handler=ManejadorPeticiones, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=hilos,
+                                        thread_name_prefix='taskflow-worker')
+        self._rutas_flujo = tuple(ruta.encode('ascii') for ruta in rutas_flujo)
+        self._max_flujos = max_flujos
+        self._flujos = 0
+        self._flujos_lock = threading.Lock()
+        self._hilo = threading.local()
+
+    def process_request(self, request, client_address):
+        """Encola la conexión en el pool en lugar de atenderla en línea"""
+        self._pool.submit(self._atender, request, client_address, time.monotonic())
+
+    def tomar_encolada(self):
+        """
+        Instante (time.monotonic) en que se encoló la conexión del hilo actual
+
+        Solo lo recibe la primera petición de la conexión: las siguientes
+        (keep-alive) no pasan por la cola del pool.
+
+        Returns:
+            float: Instante o None
+        """
+        encolada = getattr(self._hilo, 'encolada', None)
+        self._hilo.encolada = None
+        return encolada
+
+    def _atender(self, request, client_address, encolada=None):
+        """Atiende una conexión dentro del pool"""
+        self._hilo.encolada = encolada
+        if self._rutas_flujo and self._es_flujo(request):
+            self._ceder_flujo(request, client_address)
+            return
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def _es_flujo(self, request):
+        """
+        Mira (sin consumirla) la línea de petición para saber si va a una ruta de flujo
+
+        Args:
+            request: Socket de la conexión
+
+        Returns:
+            bool: True si la ruta empieza por algún prefijo de rutas_flujo
+        """
+        try:
+            request.settimeout(ManejadorPeticiones.timeout)
+            inicio = request.recv(512, socket.MSG_PEEK)
+        except OSError:
+            return False
+        partes = inicio.split(b' ', 2)
+        return len(partes) > 1 and partes[1].startswith(self._rutas_flujo)
+
+    def _ceder_flujo(self, request, client_address):
+        """Pasa la conexión a un hilo propio, o responde 503 si hay demasiados flujos"""
+        with self._flujos_lock:
+            if self._flujos >= self._max_flujos:
+                lleno = True
+            else:
+                lleno = False
+                self._flujos += 1
+        if lleno:
+            try:
+                request.sendall(b'HTTP/1.1 503 Service Unavailable\r\nRetry-After: 5\r\n'
+                                b'Content-Length: 0\r\nConnection: close\r\n\r\n')
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        threading.Thread(target=self._atender_flujo, args=(request, client_address),
+                         daemon=True, name='taskflow-stream').start()
+
+    def _atender_flujo(self, request, client_address):
+        """Atiende una conexión de flujo en su propio hilo"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._flujos_lock:
+                self._flujos -= 1
+
+    @property
+    def flujos_activos(self):
+        """Conexiones de flujo abiertas"""
+        return self._flujos
+
+    def server_close(self):
+        """Espera a las peticiones en curso y cierra el socket"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        super().server_close()
+
+
+class Maestro:
+    """
+    Proceso maestro: abre el socket, forkea workers y los supervisa
+
+    Attributes:
+        app: Aplicación Flask ya creada (precargada antes del fork)
+        workers (int): Número de procesos worker
+        hilos (int): Hilos por worker
+        timeout_gracia (int): Segundos de espera antes de matar un worker
+    """
+
+    def __init__(self, app, host, port, workers, hilos, timeout_gracia,
+                 rutas_flujo=(), max_flujos=10000):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.hilos = hilos
+        self.timeout_gracia = timeout_gracia
+        self.rutas_flujo = rutas_flujo
+        self.max_flujos = max_flujos
+        self._socket = None
+        self._hijos = {}  # pid -> generación
+        self._generacion = 0
+        self._parar = False
+        self._recargar = False
+
+    # ------------------------------------------------------------------
+    # Maestro
+    # ------------------------------------------------------------------
+
+    def ejecutar(self):
+        """Arranca los workers y supervisa hasta recibir la señal de parada"""
+        self._socket = socket.create_server((self.host, self.port), backlog=2048)
+        self._socket.set_inheritable(True)
+
+        signal.signal(signal.SIGTERM, self._al_parar)
+        signal.signal(signal.SIGINT, self._al_parar)
+        signal.signal(signal.SIGHUP, self._al_recargar)
+
+        print(f"✓ Maestro {os.getpid()}: {self.workers} workers x {self.hilos} hilos "
+              f"en http://{self.host}:{self.port}")
+        self._completar_workers()
+
+        try:
+            while not self._parar:
+                if self._recargar:
+                    self._recargar = False
+                    self._rotar_workers()
+                self._recoger_hijos()
+                if not self._parar:
+                    self._completar_workers()
+                time.sleep(0.2)
+        finally:
+            self._detener_workers(list(self._hijos))
+            self._socket.close()
+            print("✓ Servidor detenido")
+
+    def _al_parar(self, signum, frame):
+        self._parar = True
+
+    def _al_recargar(self, signum, frame):
+        self._recargar = True
+
+    def _completar_workers(self):
+        """Arranca workers de la generación actual hasta llegar al número configurado"""
+        actuales = [pid for pid, gen in self._hijos.items() if gen == self._generacion]
+        for _ in range(self.workers - len(actuales)):
+            pid = os.fork()
+            if pid == 0:
+                self._ejecutar_worker()
+            self._hijos[pid] = self._generacion
+
+    def _rotar_workers(self):
+        """Recarga ordenada: arranca la nueva generación y retira la anterior"""
+        viejos = list(self._hijos)
+        self._generacion += 1
+        print(f"✓ Recargando workers (generación {self._generacion})")
+        self._completar_workers()
+        self._detener_workers(viejos)
+
+    def _recoger_hijos(self):
+        """Recoge los workers terminados para que se vuelvan a arrancar"""
+        while self._hijos:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._hijos.pop(pid, None)
+
+    def _detener_workers(self, pids):
+        """
+        Envía SIGTERM y espera a que terminen; los rezagados reciben SIGKILL
+
+        Args:
+            pids: Lista de PIDs a detener
+        """
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        limite = time.monotonic() + self.timeout_gracia
+        pendientes = set(pids)
+        while pendientes and time.monotonic() < limite:
+            for pid in list(pendientes):
+                try:
+                    terminado, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    terminado = pid
+                if terminado:
+                    pendientes.discard(pid)
+                    self._hijos.pop(pid, None)
+            time.sleep(0.05)
+
+        for pid in pendientes:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self._hijos.pop(pid, None)
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ejecutar_worker(self):
+        """Bucle de un worker (no retorna)"""
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        codigo = 0
+        try:
+            servidor = ServidorPool(self.host, self.port, self.app,
+                                    hilos=self.hilos, fd=self._socket.fileno(),
+                                    rutas_flujo=self.rutas_flujo,
+                                    max_flujos=self.max_flujos)
+
+            def detener(signum, frame):
+                # shutdown() bloquea hasta que serve_forever termina: otro hilo
+                threading.Thread(target=servidor.shutdown, daemon=True).start()
+
+            signal.signal(signal.SIGTERM, detener)
+            servidor.serve_forever()
+        except BaseException:
+            codigo = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(codigo)
+
+
+def servir(app):
+    """
+    Sirve la aplicación con el servidor de producción
+
+    Lee HOST, PORT, WORKERS, THREADS, GRACEFUL_TIMEOUT, STREAM_ROUTES y
+    STREAM_MAX_CONNECTIONS de app.config.
+    En plataformas sin fork() usa un único proceso con pool de hilos.
+
+    Args:
+        app: Aplicación Flask creada con create_app
+
+    Raises:
+        SystemExit: Si WORKERS > 1 con un almacén que no es 'shared': cada
+            worker tendría sus propias tareas
+    """
+    host = app.config['HOST']
+    port = app.config['PORT']
+    workers = app.config.get('WORKERS', 1)
+    hilos = app.config.get('THREADS', 8)
+    rutas_flujo = app.config.get('STREAM_ROUTES', ())
+    max_flujos = app.config.get('STREAM_MAX_CONNECTIONS', 10000)
+
+    if not hasattr(os, 'fork'):
+        servidor = ServidorPool(host, port, app, hilos=hilos,
+                                rutas_flujo=rutas_flujo, max_flujos=max_flujos)
+        servidor.serve_forever()
+        return
+
+    almacen = app.config.get('TASK_STORE', 'memory')
+    if workers > 1 and almacen != 'shared':
+        raise SystemExit(f"❌ TASK_STORE={almacen} con WORKERS={workers}: cada worker tendría "
+                         f"sus propias tareas. Usa TASK_STORE=shared o WORKERS=1.")
+
+    Maestro(app, host, port, workers, hilos,
+            app.config.get('GRACEFUL_TIMEOUT', 30),
+            rutas_flujo=rutas_flujo, max_flujos=max_flujos).ejecutar()
@@ -4,24 +4,239 @@ Servicio de Tareas
 Contiene toda la lógica de negocio relacionada con tareas
 """
 
-from app.models.task import Task
-from app.utils.validators import validar_string_no_vacio, validar_prioridad, sanitizar_string
+import heapq
+import importlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+from app.models.task import ahora
+from app.store import (crear_store, AlmacenLlenoError, IndicePendientes, IndiceVencimientos,
+                       RegistroCambios, GrafoDependencias, RANGO_PRIORIDAD)
+from app.utils.events import BufferEventos
+from app.utils.validators import validar_prioridad, PRIORIDADES_VALIDAS
+from app.utils.schema import Esquema, Campo, unir_errores
 from app.services.user_service import verificar_usuario_existe
+from app.utils.tracing import trazar
+from app.utils.memory import estimar_tamano
+
+logger = logging.getLogger(__name__)
+
+# Esquemas de validación (se compilan una vez al importar el módulo)
+_MENSAJE_PRIORIDAD = "La prioridad debe ser: alta, media o baja"
+_MENSAJE_DEPENDENCIAS = "depende_de debe ser una lista de hasta 100 IDs de tarea"
+_MENSAJE_USUARIO = "usuario_id debe ser un ID entero positivo o null"
+_MENSAJE_VENCIMIENTO = "vence_en debe ser una fecha en segundos desde epoch o null"
+_MENSAJE_ETIQUETAS = ("etiquetas debe ser una lista de hasta 20 etiquetas (letras minúsculas, "
+                      "dígitos y _.:-, sin '-' inicial, hasta 50 caracteres)")
+
+ESQUEMA_TAREA_NUEVA = Esquema({
+    'titulo': Campo(requerido=True, texto=True, no_vacio=True,
+                    mensaje="El título es requerido y no puede estar vacío"),
+    'descripcion': Campo(texto=True, nulo_si_invalido=True, por_defecto=None),
+    'completada': Campo(booleano=True, por_defecto=False),
+    'prioridad': Campo(texto=True, minusculas=True, opciones=PRIORIDADES_VALIDAS,
+                       por_defecto='media', mensaje=_MENSAJE_PRIORIDAD),
+    'usuario_id': Campo(entero_id=True, por_defecto=None, mensaje=_MENSAJE_USUARIO),
+    'depende_de': Campo(ids=100, por_defecto=(), mensaje=_MENSAJE_DEPENDENCIAS),
+    'vence_en': Campo(instante=True, por_defecto=None, mensaje=_MENSAJE_VENCIMIENTO),
+    'etiquetas': Campo(etiquetas=20, por_defecto=(), mensaje=_MENSAJE_ETIQUETAS)
+})
+
+ESQUEMA_TAREA_CAMBIOS = Esquema({
+    'titulo': Campo(texto=True, no_vacio=True, mensaje="El título no puede estar vacío"),
+    'descripcion': Campo(texto=True, nulo_si_invalido=True),
+    'completada': Campo(booleano=True),
+    'prioridad': Campo(texto=True, minusculas=True, opciones=PRIORIDADES_VALIDAS,
+                       mensaje=_MENSAJE_PRIORIDAD),
+    'usuario_id': Campo(entero_id=True, mensaje=_MENSAJE_USUARIO),
+    'depende_de': Campo(ids=100, mensaje=_MENSAJE_DEPENDENCIAS),
+    'vence_en': Campo(instante=True, mensaje=_MENSAJE_VENCIMIENTO),
+    'etiquetas': Campo(etiquetas=20, mensaje=_MENSAJE_ETIQUETAS)
+}, parcial=True)
+
+# Órdenes admitidos en los listados: nombre -> (clave, descendente).
+# Todas las claves desempatan por ID para que el orden sea estable
+ORDENES = {
+    'id': (None, False),
+    '-id': (None, True),
+    'prioridad': (lambda t: (RANGO_PRIORIDAD.get(t.prioridad, 1), t.id), False),
+    '-prioridad': (lambda t: (RANGO_PRIORIDAD.get(t.prioridad, 1), t.id), True),
+    'titulo': (lambda t: ((t.titulo or '').lower(), t.id), False),
+    '-titulo': (lambda t: ((t.titulo or '').lower(), t.id), True)
+}
+
+# Qué hacer al crear una tarea muy parecida a otra del mismo usuario
+# (ver crear_tarea y TASK_DUPLICATES en config.py)
+MODOS_DUPLICADOS = ('off', 'flag', 'reject')
+ERROR_DUPLICADA = "Ya existe una tarea muy parecida"
+
+# Inicio de los errores por almacén lleno (AlmacenLlenoError), distintos de
+# los de validación: las rutas responden 507
+ERROR_SIN_ESPACIO = "No hay espacio"
 
-# Base de datos en memoria (temporal)
-tasks_db = [
-    Task(id=1, titulo='Diseñar base de datos', descripcion='Crear el modelo ER de TaskFlow',
-         completada=True, prioridad='alta', usuario_id=1),
-    Task(id=2, titulo='Implementar API REST', descripcion='Crear endpoints CRUD',
-         completada=False, prioridad='alta', usuario_id=1),
-    Task(id=3, titulo='Crear frontend con React', descripcion='Interfaces de usuario',
-         completada=False, prioridad='media', usuario_id=2)
+# Marcas de tiempo que se conservan al importar (copias de seguridad)
+_MARCAS_IMPORTABLES = ('creada_en', 'completada_en')
+
+# Tareas de ejemplo con las que arranca cada almacén
+TAREAS_INICIALES = [
+    {'titulo': 'Diseñar base de datos', 'descripcion': 'Crear el modelo ER de TaskFlow',
+     'completada': True, 'prioridad': 'alta', 'usuario_id': 1},
+    {'titulo': 'Implementar API REST', 'descripcion': 'Crear endpoints CRUD',
+     'completada': False, 'prioridad': 'alta', 'usuario_id': 1},
+    {'titulo': 'Crear frontend con React', 'descripcion': 'Interfaces de usuario',
+     'completada': False, 'prioridad': 'media', 'usuario_id': 2}
 ]
 
-# Contador para IDs
-next_task_id = 4
+
+def configurar_store(backend='memory', **opciones):
+    """
+    Reemplaza el almacén de tareas por uno nuevo con los datos iniciales
+
+    Debe llamarse antes de crear los workers para que todos compartan
+    el mismo almacén (ver create_app). Los índices de INDICES_PEREZOSOS no
+    se registran aquí sino en su primer uso (ver obtener_indice).
+
+    Args:
+        backend: Nombre del backend ('memory', 'sharded', 'shared')
+        **opciones: Argumentos propios del backend
+
+    Returns:
+        TaskStore: El nuevo almacén
+    """
+    global store
+
+    nuevo = crear_store(backend, **opciones)
+    nuevo.registrar_indice(IndicePendientes())
+    nuevo.registrar_indice(IndiceVencimientos())
+    eventos.vaciar()
+    cambios.vaciar()
+    dependencias.vaciar()
+    nuevo.suscribir(_publicar_evento)
+    nuevo.suscribir(cambios.al_cambiar)
+    nuevo.suscribir(dependencias.al_cambiar)
+    for datos in TAREAS_INICIALES:
+        nuevo.insertar(datos)
+    
+    anterior, store = store, nuevo
+    if anterior is not None:
+        anterior.cerrar()
+    return store
+
+
+def _publicar_evento(tipo, tarea, anterior, version):
+    """
+    Oyente del almacén: publica cada cambio como evento SSE
+
+    El ID del evento es la versión del almacén, la misma en todos los
+    workers, así que Last-Event-ID sirve aunque el cliente se reconecte a
+    otro proceso. Una actualización que completa la tarea se publica como
+    'complete'. Si la tarea cambia de usuario, el evento llega a los dos.
+    """
+    if tipo == 'reset':
+        eventos.publicar(version, 'reset', {'version': version})
+        return
+    usuarios = (tarea.usuario_id,)
+    if anterior is not None:
+        if anterior['usuario_id'] != tarea.usuario_id:
+            usuarios += (anterior['usuario_id'],)
+        if tarea.completada and not anterior['completada']:
+            tipo = 'complete'
+    eventos.publicar(version, tipo, tarea.to_dict(), usuarios)
+
+
+def vigilar_cambios(intervalo):
+    """
+    Arranca (una vez por proceso) un hilo que trae periódicamente los cambios
+    de otros workers, para que los suscriptores de /api/tasks/stream reciban
+    sus eventos aunque este worker no atienda otras peticiones
+
+    Solo hace falta con almacenes compartidos; la comprobación sin cambios
+    lee unos bytes de la cabecera y no toma locks.
+
+    Args:
+        intervalo: Segundos entre comprobaciones
+    """
+    global _vigilante
+    if store.backend != 'shared' or _vigilante == os.getpid():
+        return
+    with _vigilante_lock:
+        if _vigilante == os.getpid():
+            return
+        _vigilante = os.getpid()
+
+        def vigilar():
+            while True:
+                time.sleep(intervalo)
+                store.sincronizar()
+
+        threading.Thread(target=vigilar, daemon=True, name='taskflow-sync').start()
+
+
+# Eventos de cambios para /api/tasks/stream
+eventos = BufferEventos()
+
+# Registro de cambios para /api/tasks/changes
+cambios = RegistroCambios()
+
+# Tareas listas para empezar para /api/tasks/ready. Los cambios de
+# depende_de (altas con dependencias, cambios y borrados) se validan y
+# aplican de uno en uno para que dos escrituras concurrentes no cierren un
+# ciclo entre ambas ni apunten a una tarea recién borrada (solo dentro del
+# proceso: con el almacén 'shared' dos workers sí podrían)
+dependencias = GrafoDependencias()
+_lock_dependencias = threading.Lock()
+_vigilante = None  # PID del proceso con el hilo de vigilar_cambios
+_vigilante_lock = threading.Lock()
+_archivador = None  # PID del proceso con el hilo de programar_archivado
+_archivador_lock = threading.Lock()
+
+# Índices que usan NumPy: se registran la primera vez que se consultan (ver
+# obtener_indice), así importar numpy no pesa en el arranque. Nombre ->
+# (módulo, clase)
+INDICES_PEREZOSOS = {
+    'analitica': ('app.store.analitica', 'IndiceAnalitica'),
+    'etiquetas': ('app.store.etiquetas', 'IndiceEtiquetas'),
+    'similares': ('app.store.similares', 'IndiceSimilares')
+}
+_indices_lock = threading.Lock()
+
+# Almacén de tareas (en memoria por defecto)
+store = None
+configurar_store()
+
+
+def obtener_indice(nombre):
+    """
+    Obtiene un índice del almacén, registrándolo si es de INDICES_PEREZOSOS
+    y aún no se ha usado
+
+    El registro construye el índice con las tareas actuales (y las
+    archivadas si las incluye); con el almacén 'shared' cada worker
+    construye el suyo en su primera consulta.
+
+    Args:
+        nombre: Nombre del índice
+
+    Returns:
+        Indice: El índice o None si no está registrado ni es perezoso
+    """
+    actual = store
+    indice = actual.indice(nombre)
+    if indice is not None or nombre not in INDICES_PEREZOSOS:
+        return indice
+    with _indices_lock:
+        indice = actual.indice(nombre)
+        if indice is None:
+            modulo, clase = INDICES_PEREZOSOS[nombre]
+            indice = actual.registrar_indice(getattr(importlib.import_module(modulo), clase)())
+    return indice
 
 
+@trazar()
 def obtener_todas_tareas():
     """
     Obtiene todas las tareas
@@ -29,43 +244,50 @@ def obtener_todas_tareas():
     Returns:
         list: Lista de todas las tareas
     """
-    return [task.to_dict() for task in tasks_db]
+    return [task.to_dict() for task in store.todas()]
 
 
-def obtener_tarea_por_id(task_id):
+@trazar()
+def obtener_tarea_por_id(task_id, incluir_archivadas=False):
     """
     Obtiene una tarea por su ID
     
     Args:
         task_id: ID de la tarea a buscar
+        incluir_archivadas: Buscarla también en el archivo
         
     Returns:
         dict: Datos de la tarea o None si no existe
     """
-    for task in tasks_db:
-        if task.id == task_id:
-            return task.to_dict()
-    return None
+    task = store.obtener(task_id)
+    if task is None and incluir_archivadas:
+        task = store.obtener_archivada(task_id)
+    return task.to_dict() if task else None
 
 
-def obtener_tareas_por_usuario(user_id):
+@trazar()
+def obtener_tareas_por_usuario(user_id, incluir_archivadas=False):
     """
     Obtiene todas las tareas de un usuario
     
     Args:
         user_id: ID del usuario
+        incluir_archivadas: Añadir al final las del archivo
         
     Returns:
         list: Lista de tareas del usuario
     """
-    tareas_usuario = [task.to_dict() for task in tasks_db 
-                      if task.usuario_id == user_id]
+    tareas_usuario = [task.to_dict() for task in store.de_usuario(user_id)]
+    if incluir_archivadas:
+        tareas_usuario.extend(task.to_dict() for task in store.archivadas(user_id))
     return tareas_usuario
 
 
+@trazar()
 def contar_tareas_por_usuario(user_id):
     """
-    Cuenta cuántas tareas tiene asignadas un usuario
+    Cuenta cuántas tareas tiene asignadas un usuario, archivadas incluidas
+    (las del archivo se cuentan sin descomprimirlo)
     
     Args:
         user_id: ID del usuario
@@ -73,57 +295,129 @@ def contar_tareas_por_usuario(user_id):
     Returns:
         int: Cantidad de tareas
     """
-    return len([task for task in tasks_db if task.usuario_id == user_id])
+    calientes = len(store.de_usuario(user_id))
+    return calientes + store.contar_archivadas(user_id)
 
 
-def crear_tarea(data):
+@trazar()
+def archivar_completadas(dias, lote=1000):
+    """
+    Mueve al archivo las tareas completadas hace más de 'dias' días
+
+    Args:
+        dias: Antigüedad mínima de completada_en en días
+        lote: Tareas por bloque comprimido
+
+    Returns:
+        int: Tareas archivadas
+    """
+    return store.archivar(time.time() - dias * 86400, lote)
+
+
+def programar_archivado(intervalo, dias, lote=1000):
+    """
+    Arranca (una vez por proceso) un hilo que archiva periódicamente las
+    tareas completadas antiguas
+
+    Con varios workers cada uno ejecuta su propio hilo; el almacén
+    compartido serializa el archivado con su lock global y una tarea ya
+    archivada por otro worker deja de ser candidata, así que no se duplica
+    nada.
+
+    Args:
+        intervalo: Segundos entre ejecuciones
+        dias: Antigüedad mínima de completada_en en días
+        lote: Tareas por bloque comprimido
+    """
+    global _archivador
+    if _archivador == os.getpid():
+        return
+    with _archivador_lock:
+        if _archivador == os.getpid():
+            return
+        _archivador = os.getpid()
+
+        def archivar():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    archivadas = archivar_completadas(dias, lote)
+                except Exception:
+                    logger.exception("Error al archivar tareas completadas")
+                    continue
+                if archivadas:
+                    logger.info("Archivadas %d tareas completadas hace más de %g días",
+                                archivadas, dias)
+
+        threading.Thread(target=archivar, daemon=True, name='taskflow-archivo').start()
+
+
+@trazar()
+def crear_tarea(data, duplicados='off', umbral_duplicado=0.8):
     """
     Crea una nueva tarea con validaciones
     
+    Las tareas muy parecidas del mismo usuario se buscan en el índice de
+    similares (MinHash/LSH), sin comparar con todas. La comprobación no es
+    atómica con la inserción: dos altas simultáneas del mismo texto pueden
+    pasar ambas.
+    
     Args:
         data: Diccionario con los datos de la tarea
+        duplicados: 'off' (no se buscan), 'flag' (se crea y se informan en
+            'posibles_duplicados') o 'reject' (no se crea)
+        umbral_duplicado: Similitud estimada (0 a 1) a partir de la cual una
+            tarea cuenta como duplicada
         
     Returns:
         tuple: (tarea_dict, error_message)
     """
-    global next_task_id
-    
     # Validar que existan datos
-    if not data:
+    if not data or not isinstance(data, dict):
         return None, "No se enviaron datos"
     
-    # Validar título
-    titulo = sanitizar_string(data.get('titulo'))
-    if not validar_string_no_vacio(titulo):
-        return None, "El título es requerido y no puede estar vacío"
+    # Validar todos los campos de una vez
+    limpios, errores = ESQUEMA_TAREA_NUEVA.validar(data)
+    if errores:
+        return None, unir_errores(errores)
     
-    # Validar prioridad (opcional)
-    prioridad = data.get('prioridad', 'media').lower()
-    if not validar_prioridad(prioridad):
-        return None, "La prioridad debe ser: alta, media o baja"
-    
-    # Validar usuario_id (opcional)
-    usuario_id = data.get('usuario_id')
+    # Validar usuario_id (opcional, consulta Supabase)
+    usuario_id = limpios['usuario_id']
     if usuario_id is not None:
         if not verificar_usuario_existe(usuario_id):
             return None, "El usuario asignado no existe"
     
-    # Crear tarea
-    nueva_tarea = Task(
-        id=next_task_id,
-        titulo=titulo,
-        descripcion=sanitizar_string(data.get('descripcion', '')),
-        completada=data.get('completada', False),
-        prioridad=prioridad,
-        usuario_id=usuario_id
-    )
+    parecidas = []
+    if duplicados != 'off':
+        parecidas = obtener_indice('similares').buscar(limpios['titulo'], limpios['descripcion'],
+                                                       usuario_id, umbral_duplicado, limite=5)
+        if parecidas and duplicados == 'reject':
+            ids = ', '.join(str(task_id) for _, task_id in parecidas)
+            return None, f"{ERROR_DUPLICADA} (IDs {ids})"
     
-    tasks_db.append(nueva_tarea)
-    next_task_id += 1
+    # Crear tarea (el almacén asigna el ID). Una tarea nueva no puede cerrar
+    # un ciclo: basta con que sus dependencias existan, comprobado con el
+    # lock para que no se borren antes de insertarla
+    try:
+        if limpios['depende_de']:
+            with _lock_dependencias:
+                error = _validar_dependencias(None, limpios['depende_de'])
+                if error:
+                    return None, error
+                nueva_tarea = store.insertar(limpios)
+        else:
+            nueva_tarea = store.insertar(limpios)
+    except AlmacenLlenoError:
+        return None, f"{ERROR_SIN_ESPACIO} para más tareas"
     
-    return nueva_tarea.to_dict(), None
+    tarea = nueva_tarea.to_dict()
+    if duplicados == 'flag':
+        tarea['posibles_duplicados'] = [{'id': task_id, 'similitud': valor}
+                                        for valor, task_id in parecidas]
+    return tarea, None
 
 
+@trazar()
 def actualizar_tarea(task_id, data):
     """
     Actualiza una tarea existente
@@ -135,51 +429,83 @@ def actualizar_tarea(task_id, data):
     Returns:
         tuple: (tarea_dict, error_message)
     """
-    if not data:
+    if not data or not isinstance(data, dict):
         return None, "No se enviaron datos"
     
     # Buscar tarea
-    tarea = None
-    for task in tasks_db:
-        if task.id == task_id:
-            tarea = task
-            break
-    
-    if not tarea:
+    if store.obtener(task_id) is None:
         return None, "Tarea no encontrada"
     
-    # Actualizar título si se envía
-    if 'titulo' in data:
-        titulo = sanitizar_string(data['titulo'])
-        if not validar_string_no_vacio(titulo):
-            return None, "El título no puede estar vacío"
-        tarea.titulo = titulo
+    # Validar solo los campos enviados, todos antes de aplicar nada
+    cambios, errores = ESQUEMA_TAREA_CAMBIOS.validar(data)
+    if errores:
+        return None, unir_errores(errores)
     
-    # Actualizar descripción si se envía
-    if 'descripcion' in data:
-        tarea.descripcion = sanitizar_string(data['descripcion'])
+    # Validar usuario_id si se envía (consulta Supabase)
+    usuario_id = cambios.get('usuario_id')
+    if usuario_id is not None and not verificar_usuario_existe(usuario_id):
+        return None, "El usuario asignado no existe"
     
-    # Actualizar completada si se envía
-    if 'completada' in data:
-        tarea.completada = bool(data['completada'])
+    try:
+        if 'depende_de' in cambios:
+            with _lock_dependencias:
+                error = _validar_dependencias(task_id, cambios['depende_de'])
+                if error:
+                    return None, error
+                tarea = store.actualizar(task_id, cambios)
+        else:
+            tarea = store.actualizar(task_id, cambios)
+    except AlmacenLlenoError:
+        return None, f"{ERROR_SIN_ESPACIO} para más tareas"
     
-    # Actualizar prioridad si se envía
-    if 'prioridad' in data:
-        prioridad = data['prioridad'].lower()
-        if not validar_prioridad(prioridad):
-            return None, "La prioridad debe ser: alta, media o baja"
-        tarea.prioridad = prioridad
-    
-    # Actualizar usuario_id si se envía
-    if 'usuario_id' in data:
-        usuario_id = data['usuario_id']
-        if usuario_id is not None and not verificar_usuario_existe(usuario_id):
-            return None, "El usuario asignado no existe"
-        tarea.usuario_id = usuario_id
+    if not tarea:
+        return None, "Tarea no encontrada"
     
     return tarea.to_dict(), None
 
 
+def _validar_dependencias(task_id, depende_de):
+    """
+    Comprueba que las dependencias existan y no formen un ciclo
+
+    Para encontrar ciclos se recorre hacia atrás desde las dependencias
+    nuevas, así que cuesta lo que la parte del grafo alcanzable desde ellas.
+    Las archivadas no tienen dependencias que seguir (ya no se modifican).
+
+    Args:
+        task_id: ID de la tarea que cambia (None si es nueva)
+        depende_de: IDs de sus dependencias
+
+    Returns:
+        str: Mensaje de error, o None si son válidas
+    """
+    if task_id in depende_de:
+        return "Una tarea no puede depender de sí misma"
+    
+    pila = []
+    for dependencia in depende_de:
+        tarea = store.obtener(dependencia)
+        if tarea is not None:
+            pila.append(tarea)
+        elif store.obtener_archivada(dependencia) is None:
+            return f"La tarea {dependencia} de depende_de no existe"
+    
+    if task_id is None:
+        return None
+    vistas = set(depende_de)
+    while pila:
+        for dependencia in pila.pop().depende_de:
+            if dependencia == task_id:
+                return "Las dependencias formarían un ciclo"
+            if dependencia not in vistas:
+                vistas.add(dependencia)
+                tarea = store.obtener(dependencia)
+                if tarea is not None:
+                    pila.append(tarea)
+    return None
+
+
+@trazar()
 def marcar_tarea_completada(task_id):
     """
     Marca una tarea como completada
@@ -190,46 +516,73 @@ def marcar_tarea_completada(task_id):
     Returns:
         tuple: (tarea_dict, error_message)
     """
-    # Buscar tarea
-    for task in tasks_db:
-        if task.id == task_id:
-            task.marcar_completada()
-            return task.to_dict(), None
+    try:
+        task = store.actualizar(task_id, {'completada': True})
+    except AlmacenLlenoError:
+        return None, f"{ERROR_SIN_ESPACIO} para más tareas"
     
-    return None, "Tarea no encontrada"
+    if not task:
+        return None, "Tarea no encontrada"
+    
+    return task.to_dict(), None
 
 
+@trazar()
 def eliminar_tarea(task_id):
     """
     Elimina una tarea
     
+    Si la tarea tiene dependientes pendientes o dependencias propias, se
+    hace con el lock de dependencias: un alta o un cambio de depende_de en
+    curso no ve la tarea existir al validar y desaparecer antes de
+    aplicarse. El resto (la mayoría) se elimina sin el lock; si un alta
+    concurrente llega a apuntarla, el resultado es el mismo que si se
+    hubiera creado justo antes del borrado (la dependencia cuenta como
+    cumplida).
+    
     Args:
         task_id: ID de la tarea a eliminar
         
     Returns:
         tuple: (success, error_message)
     """
-    global tasks_db
+    tarea = store.obtener(task_id)
+    if tarea is None:
+        return False, "Tarea no encontrada"
+    
+    try:
+        if tarea.depende_de or dependencias.tiene_dependientes(task_id):
+            with _lock_dependencias:
+                eliminada = store.eliminar(task_id)
+        else:
+            eliminada = store.eliminar(task_id)
+    except AlmacenLlenoError:
+        return False, f"{ERROR_SIN_ESPACIO} para registrar el cambio"
     
-    # Buscar y eliminar tarea
-    for i, task in enumerate(tasks_db):
-        if task.id == task_id:
-            tasks_db.pop(i)
-            return True, None
+    if not eliminada:
+        return False, "Tarea no encontrada"
     
-    return False, "Tarea no encontrada"
+    return True, None
 
 
-def obtener_tareas_completadas():
+@trazar()
+def obtener_tareas_completadas(incluir_archivadas=False):
     """
     Obtiene solo las tareas completadas
     
+    Args:
+        incluir_archivadas: Añadir al final las del archivo
+    
     Returns:
         list: Lista de tareas completadas
     """
-    return [task.to_dict() for task in tasks_db if task.completada]
+    completadas = [task.to_dict() for task in store.todas() if task.completada]
+    if incluir_archivadas:
+        completadas.extend(task.to_dict() for task in store.archivadas())
+    return completadas
 
 
+@trazar()
 def obtener_tareas_pendientes():
     """
     Obtiene solo las tareas pendientes
@@ -237,9 +590,10 @@ def obtener_tareas_pendientes():
     Returns:
         list: Lista de tareas pendientes
     """
-    return [task.to_dict() for task in tasks_db if not task.completada]
+    return [task.to_dict() for task in store.todas() if not task.completada]
 
 
+@trazar()
 def obtener_tareas_por_prioridad(prioridad):
     """
     Obtiene tareas filtradas por prioridad
@@ -253,21 +607,488 @@ def obtener_tareas_por_prioridad(prioridad):
     if not validar_prioridad(prioridad):
         return []
     
-    return [task.to_dict() for task in tasks_db 
+    return [task.to_dict() for task in store.todas()
             if task.prioridad == prioridad.lower()]
 
 
-def obtener_estadisticas_usuario(user_id):
+@trazar()
+def obtener_siguientes_tareas(usuario_id=None, k=1):
+    """
+    Obtiene las tareas pendientes más urgentes (por prioridad y antigüedad)
+
+    Se leen del índice de pendientes: el coste depende de k, no del total.
+
+    Args:
+        usuario_id: Limitar a las tareas de un usuario (opcional)
+        k: Cantidad máxima de tareas
+
+    Returns:
+        list: Lista de tareas, la más urgente primero
+    """
+    ids = store.indice('pendientes').primeros(k, usuario_id=usuario_id)
+    return [task.to_dict() for task in store.obtener_varias(ids)]
+
+
+@trazar()
+def obtener_tareas_listas(usuario_id=None, limite=None):
+    """
+    Obtiene las tareas pendientes cuyas dependencias están todas completadas
+
+    Se leen del grafo de dependencias, que se actualiza con cada cambio:
+    el coste depende del número de tareas devueltas, no del grafo.
+
+    Args:
+        usuario_id: Limitar a las tareas de un usuario (opcional)
+        limite: Cantidad máxima de tareas (opcional)
+
+    Returns:
+        list: Lista de tareas en orden de ID
+    """
+    store.sincronizar()
+    ids = dependencias.listas(usuario_id=usuario_id, limite=limite)
+    return [task.to_dict() for task in store.obtener_varias(ids)]
+
+
+@trazar()
+def obtener_tareas_por_vencer(desde=None, hasta=None, usuario_id=None, limite=None):
+    """
+    Obtiene las tareas pendientes cuya fecha límite está en un rango
+
+    Se leen del índice de vencimientos desde el inicio del rango: el coste
+    depende del número de tareas devueltas, no del total.
+
+    Args:
+        desde: Instante inicial (epoch), incluido (opcional)
+        hasta: Instante final (epoch), excluido (opcional)
+        usuario_id: Limitar a las tareas de un usuario (opcional)
+        limite: Cantidad máxima de tareas (opcional)
+
+    Returns:
+        list: Lista de tareas, la que vence antes primero
+    """
+    pares = store.indice('vencimientos').entre(desde, hasta, usuario_id, limite)
+    return [task.to_dict() for task in store.obtener_varias([task_id for _, task_id in pares])]
+
+
+@trazar()
+def contar_tareas_vencidas(usuario_id=None):
+    """
+    Cuenta las tareas pendientes cuya fecha límite ya pasó, sin recorrerlas
+
+    Args:
+        usuario_id: Limitar a las tareas de un usuario (opcional)
+
+    Returns:
+        dict: {'vencidas': int, 'ahora': instante usado}
+    """
+    instante = ahora()
+    return {
+        'vencidas': store.indice('vencimientos').contar_antes(instante, usuario_id),
+        'ahora': instante
+    }
+
+
+@trazar()
+def obtener_tareas_similares(task_id, umbral=0.5, limite=10):
+    """
+    Tareas del mismo usuario con título y descripción parecidos a una tarea
+    
+    Se leen del índice de similares: solo se comparan las tareas que
+    comparten alguna banda de la firma MinHash, no todas las del usuario.
+    
+    Args:
+        task_id: ID de la tarea
+        umbral: Similitud estimada mínima (0 a 1)
+        limite: Cantidad máxima de tareas
+        
+    Returns:
+        tuple: (lista de tareas con su 'similitud', de más a menos parecida,
+            error_message)
+    """
+    tarea = store.obtener(task_id)
+    if tarea is None:
+        return None, "Tarea no encontrada"
+    
+    pares = obtener_indice('similares').buscar(tarea.titulo, tarea.descripcion,
+                                               tarea.usuario_id, umbral, limite, excluir=task_id)
+    similitudes = {task_id: valor for valor, task_id in pares}
+    similares = []
+    for parecida in store.obtener_varias(task_id for _, task_id in pares):
+        datos = parecida.to_dict()
+        datos['similitud'] = similitudes[parecida.id]
+        similares.append(datos)
+    return similares, None
+
+
+@trazar()
+def listar_tareas(completada=None, prioridad=None, orden=None, limite=None,
+                  incluir_archivadas=False, con_etiquetas=(), alguna_etiqueta=(),
+                  sin_etiquetas=()):
+    """
+    Lista tareas filtradas, ordenadas y limitadas
+
+    Con límite no se ordena el listado completo: el orden por ID recorre el
+    almacén y se detiene en el límite, el orden por prioridad de las
+    pendientes sale del índice, y el resto usa una selección top-K. Con
+    las archivadas se combinan las dos capas (las pendientes nunca están
+    archivadas, así que entonces no se lee el archivo). Con etiquetas, los
+    IDs salen de los mapas de bits del índice de etiquetas (que aplica
+    también el estado y la prioridad) y solo se leen esas tareas.
+
+    Args:
+        completada: True/False para filtrar por estado (opcional)
+        prioridad: alta/media/baja para filtrar (opcional)
+        orden: Clave de ORDENES (por defecto 'id')
+        limite: Cantidad máxima de tareas (opcional)
+        incluir_archivadas: Incluir las tareas del archivo
+        con_etiquetas: Etiquetas que la tarea debe tener todas (opcional)
+        alguna_etiqueta: Etiquetas de las que debe tener al menos una (opcional)
+        sin_etiquetas: Etiquetas que no debe tener (opcional)
+
+    Returns:
+        tuple: (lista de tareas, error_message)
+    """
+    orden = orden or 'id'
+    if orden not in ORDENES:
+        return None, f"El orden debe ser uno de: {', '.join(ORDENES)}"
+    if prioridad is not None:
+        if not validar_prioridad(prioridad):
+            return [], None
+        prioridad = prioridad.lower()
+
+    filtro = None
+    if completada is not None and prioridad is not None:
+        filtro = lambda t: t.completada == completada and t.prioridad == prioridad
+    elif completada is not None:
+        filtro = lambda t: t.completada == completada
+    elif prioridad is not None:
+        filtro = lambda t: t.prioridad == prioridad
+
+    clave, descendente = ORDENES[orden]
+
+    if con_etiquetas or alguna_etiqueta or sin_etiquetas:
+        tareas = _listar_por_etiquetas(filtro, clave, descendente, limite, incluir_archivadas
+                                       and completada is not False, completada, prioridad,
+                                       con_etiquetas, alguna_etiqueta, sin_etiquetas)
+    elif incluir_archivadas and completada is not False:
+        candidatas = itertools.chain(store.todas(), store.archivadas())
+        if filtro is not None:
+            candidatas = filter(filtro, candidatas)
+        clave = clave or (lambda t: t.id)
+        if limite is None:
+            tareas = sorted(candidatas, key=clave, reverse=descendente)
+        else:
+            seleccionar = heapq.nlargest if descendente else heapq.nsmallest
+            tareas = seleccionar(limite, candidatas, key=clave)
+    elif limite is None:
+        tareas = store.todas()
+        if filtro is not None:
+            tareas = [t for t in tareas if filtro(t)]
+        if clave is not None:
+            tareas.sort(key=clave, reverse=descendente)
+        elif descendente:
+            tareas.reverse()
+    elif clave is None or (orden.endswith('prioridad') and prioridad is not None):
+        # Orden por ID (con una sola prioridad, el orden por prioridad también lo es)
+        tareas = store.primeras(limite, filtro, inverso=descendente)
+    elif orden.endswith('prioridad') and completada is False:
+        ids = store.indice('pendientes').primeros(limite, inverso=descendente)
+        tareas = store.obtener_varias(ids)
+    else:
+        candidatas = store.todas()
+        if filtro is not None:
+            candidatas = filter(filtro, candidatas)
+        seleccionar = heapq.nlargest if descendente else heapq.nsmallest
+        tareas = seleccionar(limite, candidatas, key=clave)
+
+    return [task.to_dict() for task in tareas], None
+
+
+def _listar_por_etiquetas(filtro, clave, descendente, limite, archivadas, completada,
+                          prioridad, con_etiquetas, alguna_etiqueta, sin_etiquetas):
+    """
+    Tareas de listar_tareas() cuando se filtra por etiquetas
+
+    Args:
+        filtro: Filtro de estado y prioridad (para las archivadas; o None)
+        clave: Clave de orden (None: por ID)
+        descendente: Orden descendente
+        limite: Cantidad máxima de tareas (o None)
+        archivadas: Incluir las tareas del archivo
+        completada, prioridad, con_etiquetas, alguna_etiqueta, sin_etiquetas:
+            Ver listar_tareas
+
+    Returns:
+        list: Lista de instancias Task, ya ordenada y limitada
+    """
+    # Por ID el índice ya entrega el orden pedido y se detiene en el límite
+    por_id = clave is None and not archivadas
+    ids = obtener_indice('etiquetas').filtrar(con_etiquetas, alguna_etiqueta, sin_etiquetas,
+                                              completada, prioridad,
+                                              limite if por_id else None,
+                                              descendente if por_id else False)
+    tareas = store.obtener_varias(ids)
+    if por_id:
+        return tareas
+
+    candidatas = tareas
+    if archivadas:
+        # El archivo no tiene índice: sus tareas se filtran una a una
+        con, alguna, sin = set(con_etiquetas), set(alguna_etiqueta), set(sin_etiquetas)
+
+        def cumple(tarea):
+            etiquetas = set(tarea.etiquetas)
+            return (con <= etiquetas and (not alguna or not alguna.isdisjoint(etiquetas))
+                    and sin.isdisjoint(etiquetas) and (filtro is None or filtro(tarea)))
+
+        candidatas = itertools.chain(tareas, filter(cumple, store.archivadas()))
+        clave = clave or (lambda t: t.id)
+    if limite is None:
+        return sorted(candidatas, key=clave, reverse=descendente)
+    seleccionar = heapq.nlargest if descendente else heapq.nsmallest
+    return seleccionar(limite, candidatas, key=clave)
+
+
+@trazar()
+def obtener_cambios(desde):
+    """
+    Obtiene las tareas creadas o modificadas y las eliminadas desde una versión
+
+    El coste depende del número de cambios, no del total de tareas. Si la
+    versión es demasiado antigua (sus tombstones ya se compactaron) o no
+    corresponde a este almacén, se devuelven todas las tareas con
+    'completo': True y el cliente debe reemplazar su copia.
+
+    Args:
+        desde: Versión devuelta por la llamada anterior (0 la primera vez)
+
+    Returns:
+        dict: {'version', 'completo', 'tareas', 'eliminadas'}
+    """
+    version = store.version
+    resultado = cambios.desde(desde)
+    if resultado is None:
+        return {
+            'version': version,
+            'completo': True,
+            'tareas': [task.to_dict() for task in store.todas()],
+            'eliminadas': []
+        }
+    
+    ids, eliminadas, version = resultado
+    return {
+        'version': version,
+        'completo': False,
+        'tareas': [task.to_dict() for task in store.obtener_varias(ids)],
+        'eliminadas': eliminadas
+    }
+
+
+def exportar_tareas(lote=1000, incluir_archivadas=True):
+    """
+    Exporta todas las tareas como NDJSON (un objeto JSON por línea)
+
+    Las tareas se leen del almacén por lotes de IDs y cada lote se
+    serializa y se entrega antes de leer el siguiente, así que la memoria
+    no depende del número de tareas. Las archivadas van al final, bloque a
+    bloque.
+
+    Args:
+        lote: Tareas por fragmento
+        incluir_archivadas: Exportar también las del archivo
+
+    Yields:
+        bytes: Fragmento con las líneas de un lote
+    """
+    lotes = store.recorrer(lote)
+    if incluir_archivadas:
+        lotes = itertools.chain(lotes, _en_lotes(store.archivadas(), lote))
+    for tareas in lotes:
+        yield ''.join(json.dumps(task.to_dict(), ensure_ascii=False) + '\n'
+                      for task in tareas).encode('utf-8')
+
+
+def _en_lotes(iterable, tamano):
+    """
+    Agrupa un iterable en listas de hasta 'tamano' elementos
+
+    Yields:
+        list: Lista no vacía de elementos
+    """
+    iterador = iter(iterable)
+    while True:
+        lote = list(itertools.islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _leer_lineas(flujo, max_bytes):
+    """
+    Lee un flujo línea a línea sin cargar más de una línea en memoria
+
+    Args:
+        flujo: Objeto con readline(limite) que devuelve bytes
+        max_bytes: Longitud máxima de una línea
+
+    Yields:
+        tuple: (número de línea, bytes de la línea o None si es demasiado larga)
+    """
+    numero = 0
+    while True:
+        linea = flujo.readline(max_bytes + 1)
+        if not linea:
+            return
+        numero += 1
+        if len(linea) > max_bytes and not linea.endswith(b'\n'):
+            # Descartar el resto de la línea sin guardarlo
+            while linea and not linea.endswith(b'\n'):
+                linea = flujo.readline(max_bytes + 1)
+            yield numero, None
+        else:
+            yield numero, linea
+
+
+@trazar()
+def importar_tareas(flujo, lote=1000, max_bytes_linea=65536, max_errores=100):
+    """
+    Importa tareas desde NDJSON leyendo el flujo de forma incremental
+
+    Cada línea se valida con las reglas de crear_tarea (el ID se asigna de
+    nuevo, así que depende_de se descarta; creada_en y completada_en se
+    conservan si son números). Las
+    líneas válidas se insertan por lotes y los usuarios asignados se
+    consultan una vez por importación. Solo se guarda un lote a la vez,
+    así que la memoria no depende del tamaño del archivo.
+
+    Args:
+        flujo: Objeto con readline(limite) que devuelve bytes
+        lote: Líneas que se validan e insertan juntas
+        max_bytes_linea: Longitud máxima de una línea
+        max_errores: Errores que se detallan en el resultado (se cuentan todos)
+
+    Returns:
+        tuple: (dict con 'importadas', 'rechazadas' y 'errores' [{linea,
+            error}], error_message si la importación se detuvo)
+    """
+    resumen = {'importadas': 0, 'rechazadas': 0, 'errores': []}
+    usuarios = {}  # usuario_id -> existe
+
+    def rechazar(numero, error):
+        resumen['rechazadas'] += 1
+        if len(resumen['errores']) < max_errores:
+            resumen['errores'].append({'linea': numero, 'error': error})
+
+    def procesar(numeros, items, fallos):
+        validas = []
+        resultados = ESQUEMA_TAREA_NUEVA.validar_lote(items)
+        for i, (numero, data, (limpios, errores)) in enumerate(zip(numeros, items, resultados)):
+            if i in fallos:
+                rechazar(numero, fallos[i])
+                continue
+            if errores:
+                rechazar(numero, unir_errores(errores))
+                continue
+            usuario_id = limpios['usuario_id']
+            if usuario_id is not None:
+                if isinstance(usuario_id, (list, dict)):
+                    existe = False
+                elif usuario_id in usuarios:
+                    existe = usuarios[usuario_id]
+                else:
+                    existe = usuarios[usuario_id] = verificar_usuario_existe(usuario_id)
+                if not existe:
+                    rechazar(numero, "El usuario asignado no existe")
+                    continue
+            del limpios['depende_de']
+            for campo in _MARCAS_IMPORTABLES:
+                valor = data.get(campo)
+                if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                    limpios[campo] = valor
+            validas.append(limpios)
+        try:
+            store.insertar_varias(validas)
+        except AlmacenLlenoError as error:
+            resumen['importadas'] += len(getattr(error, 'creadas', ()))
+            raise
+        resumen['importadas'] += len(validas)
+
+    # Lote en curso; las líneas que no se pudieron leer ocupan su lugar con
+    # el error en fallos (posición -> mensaje) para informar en orden
+    numeros, items, fallos = [], [], {}
+    try:
+        for numero, linea in _leer_lineas(flujo, max_bytes_linea):
+            if linea is None:
+                fallos[len(items)] = f"La línea supera {max_bytes_linea} bytes"
+                data = None
+            elif not linea.strip():
+                continue
+            else:
+                try:
+                    data = json.loads(linea)
+                except ValueError:
+                    fallos[len(items)] = "JSON inválido"
+                    data = None
+            numeros.append(numero)
+            items.append(data)
+            if len(items) >= lote:
+                procesar(numeros, items, fallos)
+                numeros, items, fallos = [], [], {}
+        if items:
+            procesar(numeros, items, fallos)
+    except AlmacenLlenoError:
+        return resumen, f"{ERROR_SIN_ESPACIO} para más tareas"
+    
+    return resumen, None
+
+
+@trazar()
+def obtener_analitica(agrupar=None, periodo='day'):
+    """
+    Cuenta tareas creadas y completadas por grupo y periodo
+
+    Se calcula sobre el índice columnar del almacén, en una pasada
+    vectorizada, sin recorrer las tareas.
+
+    Args:
+        agrupar: 'usuario_id', 'prioridad' o 'completada', o varios
+            separados por comas (opcional); con varios, cada grupo es un
+            diccionario campo -> valor
+        periodo: 'day' o 'week' (semanas de lunes a domingo, UTC)
+
+    Returns:
+        tuple: (dict con 'group_by', 'bucket' y 'grupos', error_message)
+    """
+    # Importar el módulo carga numpy: solo al pedir la analítica
+    from app.store.analitica import AGRUPACIONES, PERIODOS
+    
+    campos = tuple(campo.strip() for campo in agrupar.split(',')) if agrupar else ()
+    if any(campo not in AGRUPACIONES for campo in campos) or len(set(campos)) < len(campos):
+        return None, (f"group_by debe ser uno o varios (separados por comas, sin repetir) "
+                      f"de: {', '.join(AGRUPACIONES)}")
+    if periodo not in PERIODOS:
+        return None, f"bucket debe ser uno de: {', '.join(PERIODOS)}"
+    agrupar = ','.join(campos) or None
+    
+    grupos = obtener_indice('analitica').agregar(campos, periodo)
+    return {'group_by': agrupar, 'bucket': periodo, 'grupos': grupos}, None
+
+
+@trazar()
+def obtener_estadisticas_usuario(user_id, incluir_archivadas=False):
     """
     Obtiene estadísticas de tareas de un usuario
     
     Args:
         user_id: ID del usuario
+        incluir_archivadas: Contar también las del archivo
         
     Returns:
         dict: Estadísticas del usuario
     """
-    tareas_usuario = [task for task in tasks_db if task.usuario_id == user_id]
+    tareas_usuario = store.de_usuario(user_id)
+    if incluir_archivadas:
+        tareas_usuario.extend(store.archivadas(user_id))
     
     total = len(tareas_usuario)
     completadas = len([t for t in tareas_usuario if t.completada])
@@ -282,9 +1103,37 @@ def obtener_estadisticas_usuario(user_id):
         'total': total,
         'completadas': completadas,
         'pendientes': pendientes,
+        'vencidas': store.indice('vencimientos').contar_antes(ahora(), user_id),
         'por_prioridad': {
             'alta': alta,
             'media': media,
             'baja': baja
         }
     }
+
+
+def obtener_uso_memoria(muestra=1000):
+    """
+    Memoria estimada del almacén de tareas, sus índices, el archivo y los
+    registros de cambios y eventos de este proceso
+    
+    Args:
+        muestra: Elementos recorridos como máximo por contenedor (más es
+            más preciso y más lento)
+        
+    Returns:
+        dict: {'backend', 'tareas', 'store': {tareas, indices, archivo,
+            total}, 'cambios': bytes, 'eventos': bytes, 'total': bytes}
+    """
+    uso = store.uso_memoria(muestra)
+    registros = {
+        'cambios': estimar_tamano(cambios, muestra=muestra),
+        'eventos': estimar_tamano(eventos, muestra=muestra)
+    }
+    return {
+        'backend': store.backend,
+        'tareas': store.contar(),
+        'store': uso,
+        **registros,
+        'total': uso['total'] + sum(registros.values())
+    }
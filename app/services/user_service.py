@@ -5,49 +5,196 @@ Contiene toda la lógica de negocio relacionada con usuarios
 Conecta con Supabase PostgreSQL
 """
 
+import contextlib
+import contextvars
+import logging
 import os
-import httpx
-from app.utils.validators import validar_email, validar_string_no_vacio, sanitizar_string
+import threading
+import time
+from app.utils.validators import ROLES_VALIDOS
+from app.utils.schema import Esquema, Campo, unir_errores
+from app.utils.metrics import observar_supabase
+from app.utils.tracing import trazar, span, traceparent
+from app.utils.cache import CacheSWR
 
-# Configuración de Supabase
-SUPABASE_URL = os.getenv('SUPABASE_URL', '').rstrip('/')
-SUPABASE_KEY = os.getenv('SUPABASE_KEY', '')
+logger = logging.getLogger(__name__)
 
-# Headers para Supabase
-HEADERS = {
-    'Content-Type': 'application/json',
-    'Authorization': f'Bearer {SUPABASE_KEY}',
-    'apikey': SUPABASE_KEY,
-    'Prefer': 'return=representation'
-}
+# Esquemas de validación (se compilan una vez al importar el módulo)
+ESQUEMA_USUARIO_NUEVO = Esquema({
+    'nombre': Campo(requerido=True, texto=True, no_vacio=True,
+                    mensaje="El nombre no puede estar vacío",
+                    mensaje_requerido="El nombre es requerido"),
+    'email': Campo(requerido=True, texto=True, email=True,
+                   mensaje="El email no es válido",
+                   mensaje_requerido="El email es requerido"),
+    'rol': Campo(texto=True, minusculas=True, opciones=ROLES_VALIDOS, por_defecto='usuario',
+                 mensaje=f"Rol inválido. Debe ser: {', '.join(sorted(ROLES_VALIDOS))}")
+})
 
-# URL base para PostgREST
-REST_URL = f"{SUPABASE_URL}/rest/v1"
+ESQUEMA_USUARIO_CAMBIOS = Esquema({
+    'nombre': Campo(texto=True, no_vacio=True, mensaje="El nombre no puede estar vacío"),
+    'email': Campo(texto=True, email=True, mensaje="El email no es válido"),
+    'rol': Campo(texto=True, minusculas=True, opciones=ROLES_VALIDOS, mensaje="Rol inválido")
+}, parcial=True)
 
-print(f"DEBUG: SUPABASE_URL = {SUPABASE_URL}")
-print(f"DEBUG: SUPABASE_KEY = {'*' * 10 if SUPABASE_KEY else 'NO ENCONTRADA'}")
+# Cliente HTTP hacia Supabase: se crea en el primer uso (después del fork
+# de los workers) y reutiliza las conexiones entre peticiones
+_cliente = None
+_cliente_lock = threading.Lock()
 
 
-def obtener_todos_usuarios():
+def obtener_cliente():
+    """
+    Obtiene el cliente HTTP de Supabase, creándolo la primera vez
+
+    Lee SUPABASE_URL y SUPABASE_KEY del entorno en ese momento e importa
+    httpx bajo demanda para no cargarlo al arrancar la aplicación.
+    
+    Returns:
+        httpx.Client: Cliente con la URL base de PostgREST y las cabeceras
     """
-    Obtiene todos los usuarios desde Supabase
+    global _cliente
+    
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                import httpx
+                
+                supabase_url = os.getenv('SUPABASE_URL', '').rstrip('/')
+                supabase_key = os.getenv('SUPABASE_KEY', '')
+                logger.debug("SUPABASE_URL = %s", supabase_url)
+                logger.debug("SUPABASE_KEY = %s", '*' * 10 if supabase_key else 'NO ENCONTRADA')
+                
+                # URL base para PostgREST y headers para Supabase
+                _cliente = httpx.Client(
+                    base_url=f"{supabase_url}/rest/v1",
+                    headers={
+                        'Content-Type': 'application/json',
+                        'Authorization': f'Bearer {supabase_key}',
+                        'apikey': supabase_key,
+                        'Prefer': 'return=representation'
+                    }
+                )
+    return _cliente
+
+
+def _solicitar(funcion, metodo, ruta, **kwargs):
+    """
+    Hace una petición a PostgREST midiendo su latencia
+    
+    Args:
+        funcion: Nombre de la función de este servicio que hace la llamada
+        metodo: Método HTTP
+        ruta: Ruta relativa a /rest/v1 (con filtros)
+        **kwargs: Argumentos para httpx (json, params...)
+        
+    Returns:
+        httpx.Response: Respuesta de Supabase
+    """
+    inicio = time.perf_counter()
+    resultado = 'error'
+    # La ruta sin filtros: los valores (emails, IDs) no van a la traza
+    with span(f"supabase {metodo} {ruta.split('?', 1)[0]}", funcion=funcion) as actual:
+        cabecera = traceparent()
+        if cabecera:
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'traceparent': cabecera}
+        try:
+            response = obtener_cliente().request(metodo, ruta, **kwargs)
+            resultado = str(response.status_code)
+            return response
+        finally:
+            # Una escritura (aunque falle: su efecto es incierto) deja obsoleto el listado
+            if metodo != 'GET' and ruta.startswith('/users'):
+                cache_usuarios.invalidar()
+                consultas = _consultas.get()
+                if consultas is not None:
+                    consultas.limpiar()
+            observar_supabase(funcion, resultado, time.perf_counter() - inicio)
+            if actual is not None:
+                actual.atributos['status'] = resultado
+
+
+def _cargar_usuarios():
+    """
+    Descarga el listado completo de usuarios de Supabase
     
     Returns:
         list: Lista de todos los usuarios
+        
+    Raises:
+        RuntimeError: Si Supabase no responde 200
+    """
+    response = _solicitar('obtener_todos_usuarios', 'GET', "/users")
+    if response.status_code != 200:
+        raise RuntimeError(f"Supabase respondió {response.status_code}")
+    return response.json()
+
+
+# Caché del listado de usuarios (stale-while-revalidate); cualquier escritura
+# en /users la invalida (ver _solicitar)
+cache_usuarios = CacheSWR('usuarios', _cargar_usuarios)
+
+
+# Consultas de usuario por ID compartidas por las peticiones de un lote
+# (POST /api/batch); None fuera de un lote
+_consultas = contextvars.ContextVar('taskflow_consultas_usuarios', default=None)
+
+
+@contextlib.contextmanager
+def compartir_consultas(consultas):
     """
+    Dentro del bloque, cada usuario se consulta a Supabase una sola vez
+    
+    Args:
+        consultas: ConsultasCompartidas del lote (la misma en todos sus hilos)
+    """
+    token = _consultas.set(consultas)
     try:
-        response = httpx.get(
-            f"{REST_URL}/users",
-            headers=HEADERS
-        )
-        if response.status_code == 200:
-            return response.json()
-        return []
+        yield consultas
+    finally:
+        _consultas.reset(token)
+
+
+def configurar_cache(fresco, obsoleto, compartida=False):
+    """
+    Configura la caché del listado de usuarios
+    
+    Args:
+        fresco: Segundos de frescura (0 desactiva la caché)
+        obsoleto: Segundos en los que se sirve obsoleta mientras se refresca
+        compartida: Si la invalidación se comparte entre workers (llamar antes del fork)
+    """
+    cache_usuarios.configurar(fresco, obsoleto)
+    if compartida:
+        cache_usuarios.compartir_generacion()
+
+
+@trazar()
+def listar_usuarios():
+    """
+    Obtiene todos los usuarios, desde la caché si está vigente
+    
+    Returns:
+        tuple: (lista de usuarios, segundos de edad de la respuesta)
+    """
+    try:
+        return cache_usuarios.obtener()
     except Exception as e:
-        print(f"Error al obtener usuarios: {e}")
-        return []
+        logger.error("Error al obtener usuarios: %s", e)
+        return [], 0.0
 
 
+def obtener_todos_usuarios():
+    """
+    Obtiene todos los usuarios
+    
+    Returns:
+        list: Lista de todos los usuarios
+    """
+    return listar_usuarios()[0]
+
+
+@trazar()
 def obtener_usuario_por_id(user_id):
     """
     Obtiene un usuario por su ID desde Supabase
@@ -58,20 +205,26 @@ def obtener_usuario_por_id(user_id):
     Returns:
         dict: Datos del usuario o None si no existe
     """
+    consultas = _consultas.get()
+    if consultas is not None:
+        return consultas.obtener(('id', str(user_id)), lambda: _consultar_usuario(user_id))
+    return _consultar_usuario(user_id)
+
+
+def _consultar_usuario(user_id):
+    """Consulta un usuario por ID en Supabase (None si no existe o hay error)"""
     try:
-        response = httpx.get(
-            f"{REST_URL}/users?id=eq.{user_id}",
-            headers=HEADERS
-        )
+        response = _solicitar('obtener_usuario_por_id', 'GET', f"/users?id=eq.{user_id}")
         if response.status_code == 200:
             data = response.json()
             return data[0] if data else None
         return None
     except Exception as e:
-        print(f"Error al obtener usuario: {e}")
+        logger.error("Error al obtener usuario: %s", e)
         return None
 
 
+@trazar()
 def obtener_usuario_por_email(email):
     """
     Obtiene un usuario por su email
@@ -83,19 +236,17 @@ def obtener_usuario_por_email(email):
         dict: Datos del usuario o None si no existe
     """
     try:
-        response = httpx.get(
-            f"{REST_URL}/users?email=eq.{email}",
-            headers=HEADERS
-        )
+        response = _solicitar('obtener_usuario_por_email', 'GET', f"/users?email=eq.{email}")
         if response.status_code == 200:
             data = response.json()
             return data[0] if data else None
         return None
     except Exception as e:
-        print(f"Error al buscar por email: {e}")
+        logger.error("Error al buscar por email: %s", e)
         return None
 
 
+@trazar()
 def crear_usuario(data):
     """
     Crea un nuevo usuario en Supabase
@@ -108,46 +259,21 @@ def crear_usuario(data):
     """
     try:
         # Validar datos
-        if not data:
+        if not data or not isinstance(data, dict):
             return None, "No se enviaron datos"
         
-        # Extraer campos
-        nombre_raw = data.get('nombre')
-        email_raw = data.get('email')
-        
-        if not nombre_raw:
-            return None, "El nombre es requerido"
-        if not email_raw:
-            return None, "El email es requerido"
-        
-        # Limpiar datos
-        nombre = sanitizar_string(nombre_raw)
-        email = sanitizar_string(email_raw)
-        
-        if not validar_string_no_vacio(nombre):
-            return None, "El nombre no puede estar vacío"
-        
-        if not validar_email(email):
-            return None, "El email no es válido"
+        # Validar todos los campos localmente antes de consultar Supabase
+        nuevo_usuario, errores = ESQUEMA_USUARIO_NUEVO.validar(data)
+        if errores:
+            return None, unir_errores(errores)
         
         # Verificar email único
-        if obtener_usuario_por_email(email):
+        if obtener_usuario_por_email(nuevo_usuario['email']):
             return None, "El email ya está registrado"
         
-        rol = data.get('rol', 'usuario').lower()
-        roles_validos = ['administrador', 'usuario']
-        if rol not in roles_validos:
-            return None, f"Rol inválido. Debe ser: {', '.join(roles_validos)}"
-        
         # Insertar en Supabase
-        nuevo_usuario = {
-            'nombre': nombre,
-            'email': email,
-            'rol': rol
-        }
-        response = httpx.post(
-            f"{REST_URL}/users",
-            headers=HEADERS,
+        response = _solicitar(
+            'crear_usuario', 'POST', "/users",
             json=nuevo_usuario
         )
         
@@ -158,14 +284,99 @@ def crear_usuario(data):
             return None, "El email ya está registrado en la base de datos"
         else:
             error_msg = f"Error Supabase ({response.status_code}): {response.text}"
-            print(f"DEBUG: {error_msg}")
+            logger.error(error_msg)
             return None, "Error al crear usuario"
     except Exception as e:
         error_msg = f"Excepción: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.error(error_msg)
         return None, "Error interno al crear usuario"
 
 
+@trazar()
+def crear_usuarios(items, max_usuarios=200):
+    """
+    Crea varios usuarios en Supabase con dos llamadas en total
+    
+    Todos se validan localmente; los emails repetidos dentro del lote se
+    rechazan (se queda el primero) y los ya registrados se buscan en una
+    sola consulta email=in.(...). El resto se inserta con un único POST de
+    un array, que PostgREST aplica en una transacción: si entretanto otro
+    proceso registró alguno de los emails, no se crea ninguno.
+    
+    Args:
+        items: Lista de diccionarios con nombre, email y rol
+        max_usuarios: Tamaño máximo del lote (acota la longitud de la URL
+            de la consulta de emails)
+        
+    Returns:
+        tuple: (dict con 'creados', 'rechazados' y 'resultados' [{indice,
+            usuario} o {indice, error}] en el orden recibido,
+            error_message si no se pudo procesar el lote)
+    """
+    if not items or not isinstance(items, list):
+        return None, "Se esperaba una lista de usuarios"
+    if len(items) > max_usuarios:
+        return None, f"Como máximo {max_usuarios} usuarios por lote"
+    
+    resultados = [None] * len(items)
+    por_email = {}  # email -> índice del primer registro válido con ese email
+    for indice, (limpios, errores) in enumerate(ESQUEMA_USUARIO_NUEVO.validar_lote(items)):
+        if errores:
+            resultados[indice] = {'indice': indice, 'error': unir_errores(errores)}
+        elif limpios['email'] in por_email:
+            resultados[indice] = {'indice': indice, 'error': "El email está repetido en el lote"}
+        else:
+            por_email[limpios['email']] = indice
+            resultados[indice] = limpios  # pendiente de insertar
+    
+    try:
+        if por_email:
+            # Los valores van entre comillas: los emails llevan puntos
+            lista = ','.join(f'"{email}"' for email in por_email)
+            response = _solicitar('crear_usuarios', 'GET', "/users",
+                                  params={'select': 'email', 'email': f'in.({lista})'})
+            if response.status_code != 200:
+                logger.error("Error Supabase (%s): %s", response.status_code, response.text)
+                return None, "Error al verificar los emails"
+            for existente in response.json():
+                indice = por_email.pop(existente.get('email'), None)
+                if indice is not None:
+                    resultados[indice] = {'indice': indice, 'error': "El email ya está registrado"}
+        
+        if por_email:
+            response = _solicitar('crear_usuarios', 'POST', "/users",
+                                  json=[resultados[indice] for indice in por_email.values()])
+            if response.status_code == 201:
+                for usuario in response.json():
+                    indice = por_email.get(usuario.get('email'))
+                    if indice is not None:
+                        resultados[indice] = {'indice': indice, 'usuario': usuario}
+            else:
+                if response.status_code == 409:
+                    error = "Otro registro ocupó un email del lote; no se creó ningún usuario"
+                else:
+                    logger.error("Error Supabase (%s): %s", response.status_code, response.text)
+                    error = "Error al crear usuarios"
+                for indice in por_email.values():
+                    resultados[indice] = {'indice': indice, 'error': error}
+    except Exception as e:
+        logger.error("Excepción al crear usuarios: %s", e)
+        return None, "Error interno al crear usuarios"
+    
+    # Un 201 sin alguno de los usuarios (no debería ocurrir) cuenta como error
+    for indice in por_email.values():
+        if 'usuario' not in resultados[indice]:
+            resultados[indice] = {'indice': indice, 'error': "Supabase no devolvió el usuario"}
+    
+    creados = sum(1 for resultado in resultados if 'usuario' in resultado)
+    return {
+        'creados': creados,
+        'rechazados': len(resultados) - creados,
+        'resultados': resultados
+    }, None
+
+
+@trazar()
 def actualizar_usuario(user_id, data):
     """
     Actualiza un usuario en Supabase
@@ -177,40 +388,31 @@ def actualizar_usuario(user_id, data):
     Returns:
         tuple: (usuario_dict, error_message)
     """
-    if not data:
+    if not data or not isinstance(data, dict):
+        return None, "No se enviaron datos"
+    
+    # Validar localmente los campos enviados antes de consultar Supabase
+    cambios, errores = ESQUEMA_USUARIO_CAMBIOS.validar(data)
+    if errores:
+        return None, unir_errores(errores)
+    if not cambios:
         return None, "No se enviaron datos"
     
     # Verificar que existe
     if not obtener_usuario_por_id(user_id):
         return None, "Usuario no encontrado"
     
-    # Validar datos si se envían
-    if 'nombre' in data:
-        nombre = sanitizar_string(data['nombre'])
-        if not validar_string_no_vacio(nombre):
-            return None, "El nombre no puede estar vacío"
-    
-    if 'email' in data:
-        email = sanitizar_string(data['email'])
-        if not validar_email(email):
-            return None, "El email no es válido"
-        
+    if 'email' in cambios:
         # Verificar unicidad
-        usuario_existente = obtener_usuario_por_email(email)
+        usuario_existente = obtener_usuario_por_email(cambios['email'])
         if usuario_existente and usuario_existente.get('id') != user_id:
             return None, "El email ya está en uso"
     
-    if 'rol' in data:
-        rol = data['rol'].lower()
-        if rol not in ['administrador', 'usuario']:
-            return None, "Rol inválido"
-    
-    # Actualizar en Supabase
+    # Actualizar en Supabase (solo los valores validados y limpios)
     try:
-        response = httpx.patch(
-            f"{REST_URL}/users?id=eq.{user_id}",
-            headers=HEADERS,
-            json=data
+        response = _solicitar(
+            'actualizar_usuario', 'PATCH', f"/users?id=eq.{user_id}",
+            json=cambios
         )
         
         if response.status_code == 200:
@@ -221,6 +423,7 @@ def actualizar_usuario(user_id, data):
         return None, f"Error al actualizar: {str(e)}"
 
 
+@trazar()
 def eliminar_usuario(user_id):
     """
     Elimina un usuario de Supabase
@@ -237,10 +440,7 @@ def eliminar_usuario(user_id):
         return False, "No se puede eliminar un usuario con tareas asignadas"
     
     try:
-        response = httpx.delete(
-            f"{REST_URL}/users?id=eq.{user_id}",
-            headers=HEADERS
-        )
+        response = _solicitar('eliminar_usuario', 'DELETE', f"/users?id=eq.{user_id}")
         
         if response.status_code == 204:
             return True, None
@@ -250,6 +450,7 @@ def eliminar_usuario(user_id):
         return False, f"Error al eliminar: {str(e)}"
 
 
+@trazar()
 def verificar_usuario_existe(user_id):
     """
     Verifica si un usuario existe
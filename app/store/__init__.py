@@ -0,0 +1,107 @@
+# app/store/__init__.py
+"""
+Módulo de almacenamiento
+Backends intercambiables para guardar las tareas
+"""
+
+import importlib
+
+from .base import TaskStore, AlmacenLlenoError
+from .memory import MemoryTaskStore
+from .sharded import ShardedTaskStore, IndiceFragmentado
+from .indices import (Indice, IndicePendientes, IndiceVencimientos, ListaOrdenada,
+                      RANGO_PRIORIDAD)
+from .cambios import RegistroCambios
+from .dependencias import GrafoDependencias
+from .archivo import ArchivoTareas, BloqueArchivado
+
+# Backends disponibles por nombre (ver TASK_STORE en config.py).
+# Se importan bajo demanda: 'shared' carga multiprocessing.shared_memory
+BACKENDS = {
+    'memory': ('.memory', 'MemoryTaskStore'),
+    'sharded': ('.sharded', 'ShardedTaskStore'),
+    'shared': ('.shared', 'SharedMemoryTaskStore')
+}
+
+# Nombres que se importan bajo demanda: sus módulos cargan numpy
+_PEREZOSOS = {
+    'IndiceAnalitica': '.analitica',
+    'AGRUPACIONES': '.analitica',
+    'PERIODOS': '.analitica',
+    'IndiceEtiquetas': '.etiquetas',
+    'MapaBits': '.etiquetas',
+    'IndiceSimilares': '.similares'
+}
+
+
+def obtener_backend(backend):
+    """
+    Obtiene la clase de un backend, importando su módulo si hace falta
+
+    Args:
+        backend: Nombre del backend ('memory', 'sharded', 'shared')
+
+    Returns:
+        type: Clase del almacén
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de tareas desconocido: {backend}")
+    modulo, clase = BACKENDS[backend]
+    return getattr(importlib.import_module(modulo, __name__), clase)
+
+
+def crear_store(backend='memory', **opciones):
+    """
+    Crea un almacén de tareas
+
+    Args:
+        backend: Nombre del backend ('memory', 'sharded', 'shared')
+        **opciones: Argumentos propios del backend
+
+    Returns:
+        TaskStore: Almacén creado
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    return obtener_backend(backend)(**opciones)
+
+
+def __getattr__(nombre):
+    """Importación perezosa de SharedMemoryTaskStore y de los índices con numpy"""
+    if nombre == 'SharedMemoryTaskStore':
+        return obtener_backend('shared')
+    if nombre in _PEREZOSOS:
+        return getattr(importlib.import_module(_PEREZOSOS[nombre], __name__), nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+__all__ = [
+    'TaskStore',
+    'MemoryTaskStore',
+    'ShardedTaskStore',
+    'IndiceFragmentado',
+    'SharedMemoryTaskStore',
+    'AlmacenLlenoError',
+    'Indice',
+    'IndicePendientes',
+    'IndiceVencimientos',
+    'ListaOrdenada',
+    'RANGO_PRIORIDAD',
+    'RegistroCambios',
+    'GrafoDependencias',
+    'IndiceAnalitica',
+    'AGRUPACIONES',
+    'PERIODOS',
+    'IndiceEtiquetas',
+    'MapaBits',
+    'IndiceSimilares',
+    'ArchivoTareas',
+    'BloqueArchivado',
+    'BACKENDS',
+    'obtener_backend',
+    'crear_store'
+]
@@ -0,0 +1,367 @@
+# app/store/analitica.py
+"""
+Índice columnar para analítica de tareas
+Guarda los campos que se agregan (usuario, prioridad, estado y marcas de
+tiempo) en arrays NumPy, una fila por tarea, que el almacén actualiza en
+cada escritura; las agregaciones se calculan en una pasada vectorizada
+"""
+
+import numpy as np
+
+from .indices import Indice, RANGO_PRIORIDAD
+
+# Agrupaciones admitidas (se pueden combinar varias)
+AGRUPACIONES = ('usuario_id', 'prioridad', 'completada')
+
+# Periodos admitidos: nombre -> (días, desplazamiento en días). El 1/1/1970
+# fue jueves: con 3 días de desplazamiento las semanas empiezan en lunes
+PERIODOS = {
+    'day': (1, 0),
+    'week': (7, 3)
+}
+
+_DIA = 86400
+_SIN_USUARIO = -1
+_PRIORIDADES = sorted(RANGO_PRIORIDAD, key=RANGO_PRIORIDAD.get)
+
+
+class IndiceAnalitica(Indice):
+    """
+    Columnas NumPy de las tareas para agregaciones por grupo y periodo
+
+    Cada tarea ocupa una fila (id -> fila en un diccionario); una baja deja
+    la fila libre para la siguiente alta. Las columnas crecen duplicando su
+    capacidad, así que mantener el índice cuesta O(1) por escritura y una
+    consulta no convierte ninguna tarea a Python. Las tareas archivadas
+    conservan su fila: la analítica cubre todo el histórico.
+    """
+
+    nombre = 'analitica'
+    incluye_archivadas = True
+
+    def __init__(self, capacidad=1024):
+        """
+        Args:
+            capacidad: Filas reservadas inicialmente
+        """
+        super().__init__()
+        self._capacidad_inicial = capacidad
+        self.vaciar()
+
+    def vaciar(self):
+        self._reservar(self._capacidad_inicial)
+        self._filas = {}    # id -> fila
+        self._libres = []   # filas de tareas eliminadas
+        self._usadas = 0    # filas ocupadas alguna vez (las columnas válidas son [:_usadas])
+
+    def _reservar(self, capacidad):
+        """Crea las columnas vacías"""
+        self._viva = np.zeros(capacidad, dtype=bool)
+        self._usuario = np.full(capacidad, _SIN_USUARIO, dtype=np.int64)
+        self._prioridad = np.zeros(capacidad, dtype=np.int8)
+        self._completada = np.zeros(capacidad, dtype=bool)
+        self._creada_en = np.zeros(capacidad, dtype=np.float64)
+        self._completada_en = np.full(capacidad, np.nan, dtype=np.float64)
+
+    def _crecer(self):
+        """Duplica la capacidad de las columnas conservando las filas"""
+        columnas = (self._viva, self._usuario, self._prioridad, self._completada,
+                    self._creada_en, self._completada_en)
+        self._reservar(2 * len(self._viva))
+        for vieja, nueva in zip(columnas, (self._viva, self._usuario, self._prioridad,
+                                           self._completada, self._creada_en,
+                                           self._completada_en)):
+            nueva[:len(vieja)] = vieja
+
+    def _escribir(self, fila, tarea):
+        """Copia los campos de una tarea en su fila"""
+        self._viva[fila] = True
+        self._usuario[fila] = _SIN_USUARIO if tarea.usuario_id is None else tarea.usuario_id
+        self._prioridad[fila] = RANGO_PRIORIDAD.get(tarea.prioridad, RANGO_PRIORIDAD['media'])
+        self._completada[fila] = bool(tarea.completada)
+        self._creada_en[fila] = tarea.creada_en
+        self._completada_en[fila] = (tarea.completada_en if tarea.completada_en is not None
+                                     else np.nan)
+
+    def reconstruir(self, tareas):
+        """Rellena las columnas de una vez (más rápido que fila a fila)"""
+        tareas = list(tareas)
+        self.vaciar()
+        if len(tareas) > len(self._viva):
+            self._reservar(len(tareas))
+        n = len(tareas)
+        self._viva[:n] = True
+        self._usuario[:n] = [_SIN_USUARIO if t.usuario_id is None else t.usuario_id
+                             for t in tareas]
+        self._prioridad[:n] = [RANGO_PRIORIDAD.get(t.prioridad, RANGO_PRIORIDAD['media'])
+                               for t in tareas]
+        self._completada[:n] = [bool(t.completada) for t in tareas]
+        self._creada_en[:n] = [t.creada_en for t in tareas]
+        self._completada_en[:n] = [np.nan if t.completada_en is None else t.completada_en
+                                   for t in tareas]
+        self._filas = {t.id: fila for fila, t in enumerate(tareas)}
+        self._usadas = n
+
+    def al_insertar(self, tarea):
+        if self._libres:
+            fila = self._libres.pop()
+        else:
+            if self._usadas == len(self._viva):
+                self._crecer()
+            fila = self._usadas
+            self._usadas += 1
+        self._filas[tarea.id] = fila
+        self._escribir(fila, tarea)
+
+    def al_actualizar(self, anterior, tarea):
+        self._escribir(self._filas[tarea.id], tarea)
+
+    def al_archivar(self, tarea):
+        # La fila se queda: una tarea archivada ya no cambia
+        pass
+
+    def al_eliminar(self, tarea):
+        fila = self._filas.pop(tarea.id, None)
+        if fila is not None:
+            self._viva[fila] = False
+            self._libres.append(fila)
+
+    def agregar(self, agrupar=None, periodo='day'):
+        """
+        Cuenta tareas creadas y completadas por grupo y periodo
+
+        Todo se calcula con operaciones vectorizadas sobre las columnas: se
+        codifica el grupo y el periodo de cada fila en una sola clave entera
+        y se cuentan las claves con bincount. Con varios campos, el grupo
+        combina sus códigos en base mixta y solo salen las combinaciones
+        que tienen tareas.
+
+        Args:
+            agrupar: Campo de AGRUPACIONES o tupla de campos (None o vacía:
+                un único grupo)
+            periodo: Clave de PERIODOS
+
+        Returns:
+            list: Un diccionario por grupo con 'grupo' (el valor del campo o,
+                con varios, un diccionario campo -> valor), 'total', 'completadas',
+                'pendientes', 'tasa_completadas', 'segundos_hasta_completar'
+                (media) y 'periodos' (lista de {'periodo', 'creadas',
+                'completadas'}, solo los que tienen actividad)
+        """
+        campos = _campos(agrupar)
+        return _agregar_columnas(self._columnas(campos), campos, periodo)
+
+    @staticmethod
+    def agregar_combinados(indices, agrupar=None, periodo='day'):
+        """
+        Como agregar(), sobre las filas de varios índices (uno por fragmento
+        de un almacén fragmentado)
+
+        Las columnas de cada índice se copian con su propio lock y se
+        concatenan; la agregación es la misma que con un solo índice.
+
+        Args:
+            indices: Lista de IndiceAnalitica
+            agrupar: Campo de AGRUPACIONES o tupla de campos (None o vacía:
+                un único grupo)
+            periodo: Clave de PERIODOS
+
+        Returns:
+            list: Igual que agregar()
+        """
+        campos = _campos(agrupar)
+        partes = [indice._columnas(campos) for indice in indices]
+        valores = tuple(np.concatenate([parte[0][i] for parte in partes])
+                        for i in range(len(campos)))
+        columnas = (valores,) + tuple(np.concatenate([parte[i] for parte in partes])
+                                      for i in range(1, len(partes[0])))
+        return _agregar_columnas(columnas, campos, periodo)
+
+    def _columnas(self, campos):
+        """
+        Copia las columnas de las filas vivas
+
+        Args:
+            campos: Tupla de campos de AGRUPACIONES
+
+        Returns:
+            tuple: (tupla con la columna de cada campo, completada, creada_en,
+                completada_en), arrays alineados
+        """
+        with self.lock:
+            usadas = self._usadas
+            viva = self._viva[:usadas]
+            columnas = {'usuario_id': self._usuario, 'prioridad': self._prioridad,
+                        'completada': self._completada}
+            valores = tuple(columnas[campo][:usadas][viva] for campo in campos)
+            return (valores, self._completada[:usadas][viva], self._creada_en[:usadas][viva],
+                    self._completada_en[:usadas][viva])
+
+    def __len__(self):
+        return len(self._filas)
+
+
+def _campos(agrupar):
+    """
+    Campos de agrupación como tupla
+
+    Args:
+        agrupar: None, un campo o una secuencia de campos
+
+    Returns:
+        tuple: Campos (vacía si no se agrupa)
+    """
+    if agrupar is None:
+        return ()
+    if isinstance(agrupar, str):
+        return (agrupar,)
+    return tuple(agrupar)
+
+
+def _agregar_columnas(columnas, campos, periodo):
+    """
+    Agrega las columnas de IndiceAnalitica._columnas() (ver IndiceAnalitica.agregar)
+
+    Returns:
+        list: Un diccionario por grupo
+    """
+    valores, completada, creada_en, completada_en = columnas
+    grupos, codigos = _codificar(campos, valores, len(completada))
+
+    n_grupos = len(grupos)
+    total = np.bincount(codigos, minlength=n_grupos)
+    hechas = completada & ~np.isnan(completada_en)
+    completadas = np.bincount(codigos, weights=completada, minlength=n_grupos)
+    duracion = np.bincount(codigos[hechas], weights=completada_en[hechas] - creada_en[hechas],
+                           minlength=n_grupos)
+    con_duracion = np.bincount(codigos[hechas], minlength=n_grupos)
+
+    # Periodo de cada creación y de cada completado, contado en días desde epoch
+    dias, desplazamiento = PERIODOS[periodo]
+    p_creada = np.floor((creada_en / _DIA + desplazamiento) / dias).astype(np.int64)
+    p_completada = np.floor((completada_en[hechas] / _DIA + desplazamiento)
+                            / dias).astype(np.int64)
+    todos = np.concatenate((p_creada, p_completada))
+    minimo = int(todos.min()) if len(todos) else 0
+    n_periodos = int(todos.max()) - minimo + 1 if len(todos) else 1
+    celdas, creadas, terminadas = _contar_celdas(
+        codigos * n_periodos + (p_creada - minimo),
+        codigos[hechas] * n_periodos + (p_completada - minimo),
+        n_grupos * n_periodos)
+
+    # Solo las celdas con actividad pasan a Python
+    grupo_celda = celdas // n_periodos
+    inicio_celda = ((celdas % n_periodos + minimo) * dias
+                    - desplazamiento).astype('datetime64[D]').astype(str)
+
+    resultado = []
+    for codigo, grupo in enumerate(grupos):
+        n = int(total[codigo])
+        c = int(completadas[codigo])
+        resultado.append({
+            'grupo': grupo,
+            'total': n,
+            'completadas': c,
+            'pendientes': n - c,
+            'tasa_completadas': round(c / n, 4) if n else 0.0,
+            'segundos_hasta_completar': (round(float(duracion[codigo] / con_duracion[codigo]), 3)
+                                         if con_duracion[codigo] else None),
+            'periodos': []
+        })
+    for g, inicio, a, b in zip(grupo_celda.tolist(), inicio_celda.tolist(),
+                               creadas.tolist(), terminadas.tolist()):
+        resultado[g]['periodos'].append({'periodo': inicio, 'creadas': a, 'completadas': b})
+    return resultado
+
+
+def _codificar(campos, valores, n):
+    """
+    Código de grupo de cada fila
+
+    Con varios campos, los códigos de cada uno se combinan en base mixta
+    (el primero es la cifra más significativa, así que los grupos salen
+    ordenados por el primer campo) y se renumeran con unique para contar
+    solo las combinaciones presentes.
+
+    Args:
+        campos: Tupla de campos de AGRUPACIONES (vacía si no se agrupa)
+        valores: Columna de cada campo
+        n: Número de filas
+
+    Returns:
+        tuple: (lista de valores de grupo por código, array de códigos)
+    """
+    if not campos:
+        return [None], np.zeros(n, dtype=np.int64)
+    if len(campos) == 1:
+        return _codificar_campo(campos[0], valores[0])
+
+    por_campo = [_codificar_campo(campo, columna) for campo, columna in zip(campos, valores)]
+    codigos = np.zeros(n, dtype=np.int64)
+    for grupos_campo, codigos_campo in por_campo:
+        codigos = codigos * len(grupos_campo) + codigos_campo
+    presentes, codigos = np.unique(codigos, return_inverse=True)
+
+    # Cifras de cada combinación presente, de la menos a la más significativa
+    cifras = []
+    resto = presentes
+    for grupos_campo, _ in reversed(por_campo):
+        cifras.append((resto % len(grupos_campo)).tolist())
+        resto = resto // len(grupos_campo)
+    cifras.reverse()
+    grupos = [{campo: grupos_campo[cifra] for campo, (grupos_campo, _), cifra
+               in zip(campos, por_campo, combinacion)}
+              for combinacion in zip(*cifras)]
+    return grupos, codigos.astype(np.int64)
+
+
+def _codificar_campo(campo, valores):
+    """
+    Código de grupo de cada fila para un solo campo
+
+    Args:
+        campo: Campo de AGRUPACIONES
+        valores: Columna del campo
+
+    Returns:
+        tuple: (lista de valores de grupo por código, array de códigos)
+    """
+    if campo == 'prioridad':
+        return list(_PRIORIDADES), valores.astype(np.int64)
+    if campo == 'completada':
+        return [False, True], valores.astype(np.int64)
+    usuarios, codigos = np.unique(valores, return_inverse=True)
+    grupos = [None if u == _SIN_USUARIO else u for u in usuarios.tolist()]
+    if grupos and grupos[0] is None:
+        # Sin usuario, al final
+        codigos = codigos - 1
+        codigos[codigos < 0] = len(grupos) - 1
+        grupos = grupos[1:] + [None]
+    return grupos, codigos.astype(np.int64)
+
+
+def _contar_celdas(claves_a, claves_b, tamano):
+    """
+    Cuenta las apariciones de cada clave en dos arrays de claves en [0, tamano)
+
+    Con un rango pequeño se usa bincount (lineal); si el rango es mucho
+    mayor que el número de claves (muchos grupos y periodos dispersos) se
+    cuenta ordenando con unique para no reservar tamano contadores.
+
+    Returns:
+        tuple: (claves presentes en alguno de los dos, ordenadas;
+            apariciones en claves_a; apariciones en claves_b)
+    """
+    if tamano <= max(4 * (len(claves_a) + len(claves_b)), 1 << 16):
+        cuentas_a = np.bincount(claves_a, minlength=tamano)
+        cuentas_b = np.bincount(claves_b, minlength=tamano)
+        celdas = np.flatnonzero(cuentas_a + cuentas_b)
+        return celdas, cuentas_a[celdas], cuentas_b[celdas]
+    valores_a, repetidas_a = np.unique(claves_a, return_counts=True)
+    valores_b, repetidas_b = np.unique(claves_b, return_counts=True)
+    celdas = np.union1d(valores_a, valores_b)
+    cuentas_a = np.zeros(len(celdas), dtype=np.int64)
+    cuentas_b = np.zeros(len(celdas), dtype=np.int64)
+    cuentas_a[np.searchsorted(celdas, valores_a)] = repetidas_a
+    cuentas_b[np.searchsorted(celdas, valores_b)] = repetidas_b
+    return celdas, cuentas_a, cuentas_b
@@ -0,0 +1,255 @@
+# app/store/archivo.py
+"""
+Archivo (capa fría) de tareas
+Las tareas completadas hace tiempo salen del almacén caliente y se guardan
+aquí en bloques JSON comprimidos con zlib, en memoria o en disco. Los
+bloques no se modifican; solo se descomprimen cuando una consulta pide
+explícitamente las tareas archivadas.
+"""
+
+import base64
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+
+# Nivel de compresión de los bloques (se comprimen una vez, se leen poco)
+NIVEL_COMPRESION = 6
+
+
+class BloqueArchivado:
+    """
+    Metadatos de un bloque de tareas archivadas
+
+    Los recuentos por usuario permiten contar y descartar bloques sin
+    descomprimirlos.
+
+    Attributes:
+        desde (int): ID más bajo del bloque
+        hasta (int): ID más alto del bloque
+        tareas (int): Tareas del bloque
+        usuarios (dict): usuario_id -> tareas del bloque
+        bytes (int): Tamaño comprimido
+        datos (bytes): Contenido comprimido (None si está en disco)
+        ruta (str): Archivo con el contenido (None si está en memoria)
+    """
+
+    __slots__ = ('desde', 'hasta', 'tareas', 'usuarios', 'bytes', 'datos', 'ruta')
+
+    def __init__(self, desde, hasta, tareas, usuarios, bytes, datos=None, ruta=None):
+        self.desde = desde
+        self.hasta = hasta
+        self.tareas = tareas
+        self.usuarios = usuarios
+        self.bytes = bytes
+        self.datos = datos
+        self.ruta = ruta
+
+    def to_dict(self):
+        """
+        Serializa el bloque (para el log del almacén compartido)
+
+        Returns:
+            dict: Metadatos y el contenido en base64 o la ruta del archivo
+        """
+        resultado = {
+            'desde': self.desde,
+            'hasta': self.hasta,
+            'tareas': self.tareas,
+            'usuarios': [[usuario, n] for usuario, n in self.usuarios.items()],
+            'bytes': self.bytes
+        }
+        if self.ruta is not None:
+            resultado['ruta'] = self.ruta
+        else:
+            resultado['datos'] = base64.b64encode(self.datos).decode('ascii')
+        return resultado
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Crea un bloque desde su forma serializada
+
+        Args:
+            data: Diccionario de to_dict()
+
+        Returns:
+            BloqueArchivado: El bloque
+        """
+        datos = base64.b64decode(data['datos']) if 'datos' in data else None
+        return cls(data['desde'], data['hasta'], data['tareas'],
+                   {usuario: n for usuario, n in data['usuarios']}, data['bytes'],
+                   datos=datos, ruta=data.get('ruta'))
+
+
+class ArchivoTareas:
+    """
+    Bloques comprimidos de tareas archivadas
+
+    Con directorio, cada bloque se escribe en un archivo de un subdirectorio
+    propio del almacén (se borra al cerrarlo); sin directorio, los bloques
+    quedan en memoria. Los bloques son inmutables y solo se añaden, así que
+    las lecturas trabajan sobre una copia de la lista sin bloquear las
+    escrituras.
+
+    Attributes:
+        directorio (str): Subdirectorio de los bloques (None: en memoria)
+    """
+
+    def __init__(self, directorio=None):
+        """
+        Args:
+            directorio: Directorio donde guardar los bloques (None: en memoria)
+        """
+        self.directorio = None
+        self._pid_creador = os.getpid()
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+            self.directorio = tempfile.mkdtemp(prefix='archivo-', dir=directorio)
+        self._bloques = []
+        self._reciente = (None, None)  # (bloque, tareas) del último descomprimido
+        self._lock = threading.Lock()
+
+    def crear_bloque(self, tareas):
+        """
+        Comprime tareas en un bloque nuevo (sin añadirlo todavía)
+
+        Args:
+            tareas: Lista de diccionarios (Task.to_dict()) ordenada por ID
+
+        Returns:
+            BloqueArchivado: El bloque creado
+        """
+        usuarios = {}
+        for tarea in tareas:
+            usuario = tarea.get('usuario_id')
+            usuarios[usuario] = usuarios.get(usuario, 0) + 1
+        datos = zlib.compress(json.dumps(tareas, separators=(',', ':'),
+                                         ensure_ascii=False).encode('utf-8'),
+                              NIVEL_COMPRESION)
+        desde, hasta = tareas[0]['id'], tareas[-1]['id']
+        if self.directorio is None:
+            return BloqueArchivado(desde, hasta, len(tareas), usuarios, len(datos), datos=datos)
+        ruta = os.path.join(self.directorio, f'{desde}-{hasta}.json.z')
+        with open(ruta, 'wb') as archivo:
+            archivo.write(datos)
+        return BloqueArchivado(desde, hasta, len(tareas), usuarios, len(datos), ruta=ruta)
+
+    def agregar(self, bloque):
+        """
+        Añade un bloque al archivo
+
+        Args:
+            bloque: BloqueArchivado
+        """
+        self._bloques.append(bloque)
+
+    def vaciar(self):
+        """Olvida todos los bloques (los archivos en disco se conservan)"""
+        self._bloques = []
+        self._reciente = (None, None)
+
+    def bloques(self):
+        """
+        Copia de la lista de bloques
+
+        Returns:
+            list: Lista de BloqueArchivado en orden de archivado
+        """
+        return list(self._bloques)
+
+    def leer(self, bloque):
+        """
+        Descomprime un bloque
+
+        Args:
+            bloque: BloqueArchivado
+
+        Returns:
+            list: Diccionarios de las tareas del bloque
+        """
+        with self._lock:
+            reciente, tareas = self._reciente
+            if reciente is bloque:
+                return tareas
+        datos = bloque.datos
+        if datos is None:
+            with open(bloque.ruta, 'rb') as archivo:
+                datos = archivo.read()
+        tareas = json.loads(zlib.decompress(datos))
+        with self._lock:
+            self._reciente = (bloque, tareas)
+        return tareas
+
+    def tareas(self, usuario_id=None):
+        """
+        Recorre las tareas archivadas bloque a bloque
+
+        Args:
+            usuario_id: Limitar a las de un usuario (se saltan los bloques
+                que no tienen ninguna)
+
+        Yields:
+            dict: Datos de cada tarea
+        """
+        for bloque in self.bloques():
+            if usuario_id is not None and usuario_id not in bloque.usuarios:
+                continue
+            for tarea in self.leer(bloque):
+                if usuario_id is None or tarea.get('usuario_id') == usuario_id:
+                    yield tarea
+
+    def obtener(self, task_id):
+        """
+        Busca una tarea archivada por ID
+
+        Solo se descomprimen los bloques cuyo rango de IDs la contiene.
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            dict: Datos de la tarea o None si no está archivada
+        """
+        for bloque in self.bloques():
+            if bloque.desde <= task_id <= bloque.hasta:
+                for tarea in self.leer(bloque):
+                    if tarea['id'] == task_id:
+                        return tarea
+        return None
+
+    def contar(self, usuario_id=None):
+        """
+        Cuenta tareas archivadas sin descomprimir nada
+
+        Args:
+            usuario_id: Limitar a las de un usuario (opcional)
+
+        Returns:
+            int: Cantidad de tareas
+        """
+        if usuario_id is None:
+            return sum(bloque.tareas for bloque in self.bloques())
+        return sum(bloque.usuarios.get(usuario_id, 0) for bloque in self.bloques())
+
+    def estadisticas(self):
+        """
+        Tamaño del archivo
+
+        Returns:
+            dict: {'bloques', 'tareas', 'bytes'} (bytes comprimidos)
+        """
+        bloques = self.bloques()
+        return {
+            'bloques': len(bloques),
+            'tareas': sum(bloque.tareas for bloque in bloques),
+            'bytes': sum(bloque.bytes for bloque in bloques)
+        }
+
+    def cerrar(self):
+        """Borra el subdirectorio de bloques si este proceso lo creó"""
+        if self.directorio and os.getpid() == self._pid_creador:
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            self.directorio = None
@@ -0,0 +1,591 @@
+# app/store/base.py
+"""
+Almacén base de tareas
+Mantiene las tareas del proceso en un diccionario indexado por ID
+"""
+
+import itertools
+import threading
+
+from app.models.task import Task, ahora
+from app.utils.memory import estimar_tamano
+from .archivo import ArchivoTareas
+
+
+class AlmacenLlenoError(MemoryError):
+    """El almacén no tiene espacio para más tareas"""
+    pass
+
+
+class TaskStore:
+    """
+    Almacén de tareas en memoria del proceso
+
+    Las tareas se guardan en un diccionario por ID. Como los IDs se asignan
+    de forma creciente, el orden de inserción coincide con el orden por ID.
+    Los índices secundarios registrados (ver app/store/indices.py) se
+    actualizan en cada escritura, con el lock del almacén tomado.
+
+    Cada escritura incrementa la versión del almacén y se notifica a los
+    oyentes suscritos como oyente(tipo, tarea, anterior, version), con tipo
+    'create', 'update' o 'delete'. El tipo 'reset' indica que la vista local
+    se reconstruyó sin conocer los cambios intermedios; anterior es entonces
+    la lista de tareas de la vista reconstruida.
+
+    Las tareas completadas hace tiempo pueden moverse con archivar() a un
+    archivo comprimido (capa fría, ver app/store/archivo.py). Desde ese
+    momento las consultas normales no las ven; solo las leen los métodos
+    *_archivadas. Archivar no es un cambio: no incrementa la versión ni se
+    notifica a los oyentes.
+
+    Attributes:
+        backend (str): Nombre del backend
+    """
+
+    backend = None
+
+    def __init__(self, directorio_archivo=None):
+        """
+        Inicializa un almacén vacío
+
+        Args:
+            directorio_archivo: Directorio de los bloques archivados (None: en memoria)
+        """
+        self._tareas = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._indices = {}
+        self._oyentes = []
+        self._version = 0
+        self._archivo = ArchivoTareas(directorio_archivo)
+        self._huecos = 0  # Entradas archivadas aún ocupando el dict
+
+    @property
+    def version(self):
+        """Versión actual del almacén (número de escrituras aplicadas)"""
+        self.sincronizar()
+        return self._version
+
+    def suscribir(self, oyente):
+        """
+        Suscribe una función a los cambios del almacén
+
+        Se llama con el lock del almacén tomado, así que debe ser rápida.
+
+        Args:
+            oyente: Callable oyente(tipo, tarea, anterior, version)
+        """
+        with self._lock:
+            self._oyentes.append(oyente)
+
+    def _notificar(self, tipo, tarea, anterior=None):
+        """
+        Incrementa la versión y avisa a los oyentes (requiere el lock)
+
+        Args:
+            tipo: 'create', 'update', 'delete' o 'reset'
+            tarea: Task afectada (None en 'reset')
+            anterior: Valores previos en 'update' (Task.to_dict()); en
+                'reset', las tareas de la vista reconstruida
+        """
+        if tipo != 'reset':
+            self._version += 1
+        for oyente in self._oyentes:
+            oyente(tipo, tarea, anterior, self._version)
+
+    # ------------------------------------------------------------------
+    # Índices
+    # ------------------------------------------------------------------
+
+    def registrar_indice(self, indice):
+        """
+        Registra un índice secundario y lo construye con las tareas actuales
+
+        Args:
+            indice: Instancia de Indice
+
+        Returns:
+            Indice: El índice registrado
+        """
+        self.sincronizar()
+        with self._lock:
+            indice.lock = self._lock
+            indice.reconstruir(self._tareas_de_indice(indice))
+            self._indices[indice.nombre] = indice
+        return indice
+
+    def indice(self, nombre):
+        """
+        Obtiene un índice registrado, con los cambios de otros procesos aplicados
+
+        Args:
+            nombre: Nombre del índice
+
+        Returns:
+            Indice: El índice o None si no está registrado
+        """
+        self.sincronizar()
+        return self._indices.get(nombre)
+
+    def _reconstruir_indices(self):
+        """Reconstruye todos los índices (requiere el lock)"""
+        for indice in self._indices.values():
+            indice.reconstruir(self._tareas_de_indice(indice))
+
+    def _tareas_de_indice(self, indice):
+        """Tareas con las que se construye un índice: las calientes y, si las
+        incluye, las archivadas"""
+        if not indice.incluye_archivadas:
+            return self._tareas.values()
+        return itertools.chain(self._tareas.values(),
+                               (Task.from_dict(datos) for datos in self._archivo.tareas()))
+
+    def _guardar_local(self, tarea_id, datos, notificar=True):
+        """
+        Crea o actualiza una tarea en la vista local y avisa a los índices
+        y a los oyentes (requiere el lock)
+
+        Args:
+            tarea_id: ID de la tarea
+            datos: Diccionario con los campos nuevos
+            notificar: False al reconstruir una instantánea (no es un cambio)
+
+        Returns:
+            Task: La tarea creada o actualizada
+        """
+        tarea = self._tareas.get(tarea_id)
+        if tarea is None:
+            tarea = Task.from_dict(datos, id=tarea_id)
+            self._tareas[tarea_id] = tarea
+            for indice in self._indices.values():
+                indice.al_insertar(tarea)
+            if notificar:
+                self._notificar('create', tarea)
+            return tarea
+
+        anterior = tarea.to_dict() if self._indices or self._oyentes else None
+        for campo, valor in datos.items():
+            setattr(tarea, campo, valor)
+        for indice in self._indices.values():
+            indice.al_actualizar(anterior, tarea)
+        if notificar:
+            self._notificar('update', tarea, anterior)
+        return tarea
+
+    @staticmethod
+    def _sellar_cambios(tarea, cambios):
+        """
+        Añade completada_en a los cambios que completan o reabren una tarea
+
+        Args:
+            tarea: Task antes de los cambios
+            cambios: Diccionario campo -> nuevo valor
+
+        Returns:
+            dict: Los cambios (una copia si hubo que añadir la marca)
+        """
+        if 'completada' not in cambios or 'completada_en' in cambios:
+            return cambios
+        completada = bool(cambios['completada'])
+        if completada == bool(tarea.completada):
+            return cambios
+        return dict(cambios, completada_en=ahora() if completada else None)
+
+    def _eliminar_local(self, task_id):
+        """
+        Quita una tarea de la vista local y avisa a los índices y a los
+        oyentes (requiere el lock)
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: Tarea eliminada o None si no existía
+        """
+        tarea = self._tareas.pop(task_id, None)
+        if tarea is not None:
+            for indice in self._indices.values():
+                indice.al_eliminar(tarea)
+            self._notificar('delete', tarea)
+        return tarea
+
+    def _archivar_local(self, bloque):
+        """
+        Añade un bloque al archivo y quita sus tareas de la vista caliente
+        (requiere el lock)
+
+        Los índices reciben al_archivar. Si una tarea del bloque no está en
+        la vista (reconstrucción desde una instantánea), los índices que
+        incluyen las archivadas la reciben como alta.
+
+        Args:
+            bloque: BloqueArchivado
+        """
+        self._archivo.agregar(bloque)
+        historicos = [indice for indice in self._indices.values()
+                      if indice.incluye_archivadas]
+        for datos in self._archivo.leer(bloque):
+            tarea = self._tareas.pop(datos['id'], None)
+            if tarea is not None:
+                self._huecos += 1
+                for indice in self._indices.values():
+                    indice.al_archivar(tarea)
+            elif historicos:
+                tarea = Task.from_dict(datos)
+                for indice in historicos:
+                    indice.al_insertar(tarea)
+        # Un dict no libera las entradas borradas hasta que crece, y los
+        # recorridos en orden las saltan una a una: tras archivar el
+        # principio del historial se copia (coste amortizado constante)
+        if self._huecos > len(self._tareas):
+            self._tareas = dict(self._tareas)
+            self._huecos = 0
+
+    @staticmethod
+    def _archivable(tarea, antes_de):
+        """Si una tarea está completada desde antes del instante dado"""
+        return (tarea.completada and tarea.completada_en is not None
+                and tarea.completada_en < antes_de)
+
+    def _preparar_bloque(self, ids, antes_de):
+        """
+        Comprime en un bloque las tareas de ids que siguen siendo
+        archivables (requiere el lock)
+
+        Args:
+            ids: IDs candidatos, en orden
+            antes_de: Instante (epoch) límite de completada_en
+
+        Returns:
+            BloqueArchivado: El bloque, o None si ninguna sigue siéndolo
+        """
+        tareas = self._tareas
+        datos = [tareas[i].to_dict() for i in ids
+                 if i in tareas and self._archivable(tareas[i], antes_de)]
+        return self._archivo.crear_bloque(datos) if datos else None
+
+    def _archivar_bloque(self, ids, antes_de):
+        """
+        Archiva un bloque de tareas
+
+        Args:
+            ids: IDs candidatos, en orden
+            antes_de: Instante (epoch) límite de completada_en
+
+        Returns:
+            int: Tareas archivadas
+        """
+        with self._lock:
+            bloque = self._preparar_bloque(ids, antes_de)
+            if bloque is None:
+                return 0
+            self._archivar_local(bloque)
+            return bloque.tareas
+
+    def archivar(self, antes_de, lote=1000):
+        """
+        Mueve al archivo las tareas completadas antes de un instante
+
+        Las candidatas se buscan con un recorrido de la capa caliente; luego
+        se archivan por bloques de 'lote' tareas, tomando el lock una vez
+        por bloque para no bloquear las peticiones durante todo el trabajo.
+
+        Args:
+            antes_de: Instante (epoch) límite de completada_en
+            lote: Tareas por bloque comprimido
+
+        Returns:
+            int: Tareas archivadas
+        """
+        self.sincronizar()
+        with self._lock:
+            ids = [tarea.id for tarea in self._tareas.values()
+                   if self._archivable(tarea, antes_de)]
+        archivadas = 0
+        for inicio in range(0, len(ids), lote):
+            archivadas += self._archivar_bloque(ids[inicio:inicio + lote], antes_de)
+        return archivadas
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def sincronizar(self):
+        """Trae los cambios hechos por otros procesos (no aplica en memoria)"""
+        pass
+
+    def todas(self):
+        """
+        Obtiene todas las tareas ordenadas por ID
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        self.sincronizar()
+        with self._lock:
+            return list(self._tareas.values())
+
+    def obtener(self, task_id):
+        """
+        Obtiene una tarea por su ID
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: La tarea o None si no existe
+        """
+        self.sincronizar()
+        return self._tareas.get(task_id)
+
+    def obtener_varias(self, ids):
+        """
+        Obtiene varias tareas por ID, en el orden dado
+
+        Args:
+            ids: Iterable de IDs (los que ya no existan se omiten)
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        self.sincronizar()
+        with self._lock:
+            tareas = self._tareas
+            return [tareas[i] for i in ids if i in tareas]
+
+    def de_usuario(self, usuario_id):
+        """
+        Obtiene las tareas de un usuario ordenadas por ID
+
+        Args:
+            usuario_id: ID del usuario
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        self.sincronizar()
+        with self._lock:
+            return [tarea for tarea in self._tareas.values() if tarea.usuario_id == usuario_id]
+
+    def primeras(self, k, filtro=None, inverso=False):
+        """
+        Obtiene las primeras k tareas por ID que cumplen un filtro
+
+        Recorre el diccionario en orden (o al revés) y se detiene al reunir
+        k tareas, sin copiar ni ordenar el almacén completo.
+
+        Args:
+            k: Cantidad máxima de tareas
+            filtro: Callable Task -> bool (opcional)
+            inverso: True para empezar por el ID más alto
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        self.sincronizar()
+        resultado = []
+        if k <= 0:
+            return resultado
+        with self._lock:
+            valores = self._tareas.values()
+            for tarea in (reversed(valores) if inverso else valores):
+                if filtro is None or filtro(tarea):
+                    resultado.append(tarea)
+                    if len(resultado) >= k:
+                        break
+        return resultado
+
+    def recorrer(self, lote=1000):
+        """
+        Recorre las tareas por ID en lotes, sin copiar el almacén
+
+        Cada lote se lee con el lock tomado y el recorrido continúa por
+        rango de IDs, así que las escrituras concurrentes pueden intercalarse
+        entre lotes: una tarea creada durante el recorrido aparece si su ID
+        aún no se alcanzó.
+
+        Args:
+            lote: IDs que se examinan por lote
+
+        Yields:
+            list: Lista no vacía de instancias Task
+        """
+        siguiente = 1
+        while True:
+            self.sincronizar()
+            with self._lock:
+                if siguiente >= self._next_id:
+                    return
+                fin = min(siguiente + lote, self._next_id)
+                tareas = self._tareas
+                encontradas = [tareas[i] for i in range(siguiente, fin) if i in tareas]
+            siguiente = fin
+            if encontradas:
+                yield encontradas
+
+    def contar(self):
+        """
+        Cuenta las tareas almacenadas
+
+        Returns:
+            int: Cantidad de tareas
+        """
+        self.sincronizar()
+        return len(self._tareas)
+
+    def estadisticas(self):
+        """
+        Tamaño del almacén, de sus índices y del archivo
+
+        Returns:
+            dict: {'tareas': int, 'indices': {nombre: entradas},
+                'archivo': {'bloques', 'tareas', 'bytes'}}
+        """
+        self.sincronizar()
+        with self._lock:
+            indices = {'id': len(self._tareas)}
+            for nombre, indice in self._indices.items():
+                indices[nombre] = len(indice)
+            return {
+                'tareas': len(self._tareas),
+                'indices': indices,
+                'archivo': self._archivo.estadisticas()
+            }
+
+    def uso_memoria(self, muestra=1000):
+        """
+        Memoria estimada del almacén, de cada índice y del archivo
+
+        Las tareas se miden primero; los índices solo suman lo que no
+        comparten con ellas. Es una estimación por muestreo (ver
+        app/utils/memory.estimar_tamano).
+
+        Args:
+            muestra: Elementos recorridos como máximo por contenedor
+
+        Returns:
+            dict: {'tareas': bytes, 'indices': {nombre: bytes},
+                'archivo': bytes en memoria, 'total': bytes}
+        """
+        self.sincronizar()
+        with self._lock:
+            vistos = {id(self._lock)}
+            tareas = estimar_tamano(self._tareas, vistos, muestra)
+            indices = {nombre: estimar_tamano(indice, vistos, muestra)
+                       for nombre, indice in self._indices.items()}
+            archivo = estimar_tamano(self._archivo, vistos, muestra)
+        return {
+            'tareas': tareas,
+            'indices': indices,
+            'archivo': archivo,
+            'total': tareas + sum(indices.values()) + archivo
+        }
+
+    def archivadas(self, usuario_id=None):
+        """
+        Recorre las tareas archivadas (descomprime los bloques)
+
+        Args:
+            usuario_id: Limitar a las de un usuario (opcional)
+
+        Yields:
+            Task: Copia de cada tarea archivada, por bloques en orden de archivado
+        """
+        self.sincronizar()
+        for datos in self._archivo.tareas(usuario_id):
+            yield Task.from_dict(datos)
+
+    def obtener_archivada(self, task_id):
+        """
+        Obtiene una tarea archivada por su ID
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: Copia de la tarea o None si no está archivada
+        """
+        self.sincronizar()
+        datos = self._archivo.obtener(task_id)
+        return Task.from_dict(datos) if datos is not None else None
+
+    def contar_archivadas(self, usuario_id=None):
+        """
+        Cuenta las tareas archivadas sin descomprimir los bloques
+
+        Args:
+            usuario_id: Limitar a las de un usuario (opcional)
+
+        Returns:
+            int: Cantidad de tareas archivadas
+        """
+        self.sincronizar()
+        return self._archivo.contar(usuario_id)
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def insertar(self, datos):
+        """
+        Inserta una tarea nueva asignándole el siguiente ID
+
+        Args:
+            datos: Diccionario con los campos de la tarea (sin ID)
+
+        Returns:
+            Task: Tarea creada
+        """
+        with self._lock:
+            tarea_id = self._next_id
+            self._next_id += 1
+            return self._guardar_local(tarea_id, datos)
+
+    def insertar_varias(self, lista):
+        """
+        Inserta varias tareas nuevas con IDs consecutivos
+
+        Args:
+            lista: Lista de diccionarios con los campos de cada tarea
+
+        Returns:
+            list: Tareas creadas, en el mismo orden
+        """
+        with self._lock:
+            return [self.insertar(datos) for datos in lista]
+
+    def actualizar(self, task_id, cambios):
+        """
+        Aplica cambios a una tarea existente
+
+        Completar o reabrir la tarea fija o borra completada_en.
+
+        Args:
+            task_id: ID de la tarea
+            cambios: Diccionario campo -> nuevo valor (ya validados)
+
+        Returns:
+            Task: Tarea actualizada o None si no existe
+        """
+        with self._lock:
+            tarea = self._tareas.get(task_id)
+            if tarea is None:
+                return None
+            return self._guardar_local(task_id, self._sellar_cambios(tarea, cambios))
+
+    def eliminar(self, task_id):
+        """
+        Elimina una tarea
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: Tarea eliminada o None si no existía
+        """
+        with self._lock:
+            return self._eliminar_local(task_id)
+
+    def cerrar(self):
+        """Libera los recursos del almacén"""
+        self._archivo.cerrar()
@@ -0,0 +1,139 @@
+# app/store/cambios.py
+"""
+Registro de cambios del almacén de tareas
+Oyente del almacén que recuerda, en orden de versión, la última versión en
+que cambió cada tarea y las bajas (tombstones), para responder qué cambió
+desde una versión recorriendo solo los cambios
+"""
+
+import collections
+import threading
+
+from app.utils.secuencia import MarcaContigua
+
+
+class RegistroCambios:
+    """
+    Última versión de cambio por tarea, en orden de versión
+
+    Un OrderedDict id -> (versión, eliminada) se mantiene ordenado moviendo
+    al final cada tarea que cambia, así que los cambios posteriores a una
+    versión están al final y se leen hacia atrás hasta encontrar una versión
+    anterior. Los tombstones más antiguos se compactan al superar
+    max_tombstones; desde entonces no se puede responder a versiones
+    anteriores (minimo) y el cliente debe hacer una sincronización completa.
+
+    Los cambios pueden llegar con versiones desordenadas (ShardedTaskStore
+    numera sin lock global): se colocan en su sitio desde el final, y desde()
+    solo informa hasta la última versión cuyas anteriores ya llegaron todas.
+
+    Attributes:
+        max_tombstones (int): Bajas que se recuerdan como máximo
+        minimo (int): Versión más antigua desde la que se puede sincronizar
+    """
+
+    def __init__(self, max_tombstones=10000):
+        """
+        Args:
+            max_tombstones: Bajas que se recuerdan como máximo
+        """
+        self.max_tombstones = max_tombstones
+        self.minimo = 0
+        self._marca = MarcaContigua()
+        self._ultimos = collections.OrderedDict()  # id -> (versión, eliminada)
+        self._tombstones = collections.deque()     # (versión, id) en orden de versión
+        self._lock = threading.Lock()
+
+    def al_cambiar(self, tipo, tarea, anterior, version):
+        """
+        Oyente del almacén (ver TaskStore.suscribir)
+
+        Args:
+            tipo: 'create', 'update', 'delete' o 'reset'
+            tarea: Task afectada
+            anterior: Valores previos (no se usan)
+            version: Versión del almacén tras el cambio
+        """
+        with self._lock:
+            if tipo == 'reset':
+                # La vista se reconstruyó sin ver los cambios intermedios
+                self._ultimos.clear()
+                self._tombstones.clear()
+                self.minimo = version
+                self._marca.reiniciar(version)
+                return
+            self._marca.llegar(version)
+            eliminada = tipo == 'delete'
+            ultimos = self._ultimos
+            ultimos.pop(tarea.id, None)
+            # Los cambios con versión mayor que ya llegaron (pocos: los que
+            # se numeraron a la vez) se retiran y se vuelven a poner detrás
+            posteriores = []
+            while ultimos and ultimos[next(reversed(ultimos))][0] > version:
+                posteriores.append(ultimos.popitem())
+            ultimos[tarea.id] = (version, eliminada)
+            for posterior in reversed(posteriores):
+                ultimos[posterior[0]] = posterior[1]
+            if eliminada:
+                tombstones = self._tombstones
+                posicion = len(tombstones)
+                while posicion and tombstones[posicion - 1][0] > version:
+                    posicion -= 1
+                tombstones.insert(posicion, (version, tarea.id))
+                if len(tombstones) > self.max_tombstones:
+                    self._compactar()
+
+    def _compactar(self):
+        """Olvida los tombstones más antiguos hasta quedar en max_tombstones (requiere el lock)"""
+        while len(self._tombstones) > self.max_tombstones:
+            version, task_id = self._tombstones.popleft()
+            # Solo si sigue siendo el último cambio de esa tarea
+            if self._ultimos.get(task_id) == (version, True):
+                del self._ultimos[task_id]
+            self.minimo = max(self.minimo, version)
+
+    def desde(self, version):
+        """
+        Cambios posteriores a una versión
+
+        Args:
+            version: Versión que tiene el cliente
+
+        Returns:
+            tuple: (ids modificados o creados, ids eliminados, versión actual),
+                o None si la versión es anterior a minimo o posterior a la
+                actual (hace falta una sincronización completa). Los
+                cambios posteriores a la versión actual (llegados antes que
+                alguno anterior) se dejan para la siguiente llamada
+        """
+        with self._lock:
+            actual = self._marca.valor
+            if version < self.minimo or version > actual:
+                return None
+            modificadas, eliminadas = [], []
+            for task_id in reversed(self._ultimos):
+                cambio, eliminada = self._ultimos[task_id]
+                if cambio <= version:
+                    break
+                if cambio <= actual:
+                    (eliminadas if eliminada else modificadas).append(task_id)
+            modificadas.reverse()
+            eliminadas.reverse()
+            return modificadas, eliminadas, actual
+
+    def vaciar(self, version=0):
+        """
+        Olvida todos los cambios
+
+        Args:
+            version: Versión actual del almacén
+        """
+        with self._lock:
+            self._ultimos.clear()
+            self._tombstones.clear()
+            self._marca = MarcaContigua(version)
+            self.minimo = version
+
+    def __len__(self):
+        """Tareas y tombstones registrados"""
+        return len(self._ultimos)
@@ -0,0 +1,239 @@
+# app/store/dependencias.py
+"""
+Grafo de dependencias entre tareas
+Oyente del almacén que mantiene, de forma incremental, qué tareas
+pendientes tienen todas sus dependencias completadas (listas para empezar)
+"""
+
+import bisect
+import threading
+
+
+class GrafoDependencias:
+    """
+    Tareas pendientes listas para empezar, actualizadas con cada cambio
+
+    Cada tarea pendiente guarda el conjunto de sus dependencias que siguen
+    pendientes (bloqueos); las que no tienen ninguno están en una lista
+    ordenada por ID, global y por usuario. Para cada tarea se recuerdan
+    además las tareas pendientes que dependen de ella (dependientes), así
+    que completarla solo toca a sus dependientes directos, y la consulta de
+    listas cuesta lo que el resultado, aunque el grafo sea profundo.
+
+    Una dependencia eliminada, archivada o inexistente cuenta como cumplida.
+    Archivar no se notifica, pero solo se archivan tareas completadas, que
+    ya no bloquean a nadie.
+
+    Es un oyente y no un índice porque las dependencias cruzan fragmentos
+    en ShardedTaskStore (los índices son por fragmento).
+    """
+
+    def __init__(self):
+        self._pendientes = {}       # id -> usuario_id de las pendientes
+        self._bloqueos = {}         # id pendiente -> set de dependencias pendientes (solo si hay)
+        self._dependientes = {}     # id -> set de ids pendientes que dependen de ella
+        self._listas = []           # IDs listos, ordenados
+        self._listas_usuario = {}   # usuario_id -> IDs listos, ordenados
+        self._lock = threading.Lock()
+
+    def al_cambiar(self, tipo, tarea, anterior, version):
+        """
+        Oyente del almacén (ver TaskStore.suscribir)
+
+        Args:
+            tipo: 'create', 'update', 'delete' o 'reset'
+            tarea: Task afectada
+            anterior: Valores previos en 'update'; en 'reset', las tareas de
+                la vista reconstruida
+            version: Versión del almacén tras el cambio (no se usa)
+        """
+        with self._lock:
+            if tipo == 'reset':
+                self._reconstruir(anterior or ())
+            elif tipo == 'create':
+                if not tarea.completada:
+                    self._agregar(tarea.id, tarea.usuario_id, tarea.depende_de)
+            elif tipo == 'delete':
+                if tarea.id in self._pendientes:
+                    self._quitar(tarea.id, tarea.depende_de)
+                self._resolver(tarea.id)
+                self._dependientes.pop(tarea.id, None)
+            else:
+                self._actualizar(tarea, anterior)
+
+    def _actualizar(self, tarea, anterior):
+        """Aplica una actualización (requiere el lock)"""
+        pendiente = not tarea.completada
+        estaba = not anterior['completada']
+        if not pendiente and not estaba:
+            return
+        previas = tuple(anterior['depende_de'])
+        if (pendiente and estaba and anterior['usuario_id'] == tarea.usuario_id
+                and previas == tuple(tarea.depende_de)):
+            return
+        if estaba:
+            self._quitar(tarea.id, previas)
+        if pendiente:
+            self._agregar(tarea.id, tarea.usuario_id, tarea.depende_de)
+        if estaba and not pendiente:
+            self._resolver(tarea.id)
+        elif pendiente and not estaba:
+            self._bloquear(tarea.id)
+
+    def _agregar(self, task_id, usuario_id, depende_de):
+        """Da de alta una tarea pendiente (requiere el lock)"""
+        self._pendientes[task_id] = usuario_id
+        bloqueos = set()
+        for dependencia in depende_de:
+            self._dependientes.setdefault(dependencia, set()).add(task_id)
+            if dependencia in self._pendientes:
+                bloqueos.add(dependencia)
+        if bloqueos:
+            self._bloqueos[task_id] = bloqueos
+        else:
+            self._insertar_lista(task_id, usuario_id)
+
+    def _quitar(self, task_id, depende_de):
+        """Da de baja una tarea pendiente, sin tocar a sus dependientes (requiere el lock)"""
+        usuario_id = self._pendientes.pop(task_id)
+        for dependencia in depende_de:
+            dependientes = self._dependientes.get(dependencia)
+            if dependientes is not None:
+                dependientes.discard(task_id)
+                if not dependientes:
+                    del self._dependientes[dependencia]
+        if self._bloqueos.pop(task_id, None) is None:
+            self._quitar_lista(task_id, usuario_id)
+
+    def _resolver(self, task_id):
+        """Una tarea deja de estar pendiente: desbloquea a sus dependientes (requiere el lock)"""
+        for dependiente in self._dependientes.get(task_id, ()):
+            bloqueos = self._bloqueos.get(dependiente)
+            if bloqueos is None:
+                continue
+            bloqueos.discard(task_id)
+            if not bloqueos:
+                del self._bloqueos[dependiente]
+                self._insertar_lista(dependiente, self._pendientes[dependiente])
+
+    def _bloquear(self, task_id):
+        """Una tarea vuelve a estar pendiente: bloquea a sus dependientes (requiere el lock)"""
+        for dependiente in self._dependientes.get(task_id, ()):
+            bloqueos = self._bloqueos.get(dependiente)
+            if bloqueos is None:
+                self._bloqueos[dependiente] = {task_id}
+                self._quitar_lista(dependiente, self._pendientes[dependiente])
+            else:
+                bloqueos.add(task_id)
+
+    def _insertar_lista(self, task_id, usuario_id):
+        """Añade un ID a las listas ordenadas (requiere el lock)"""
+        bisect.insort(self._listas, task_id)
+        bisect.insort(self._listas_usuario.setdefault(usuario_id, []), task_id)
+
+    def _quitar_lista(self, task_id, usuario_id):
+        """Quita un ID de las listas ordenadas (requiere el lock)"""
+        _quitar_ordenado(self._listas, task_id)
+        lista = self._listas_usuario.get(usuario_id)
+        if lista is not None:
+            _quitar_ordenado(lista, task_id)
+            if not lista:
+                del self._listas_usuario[usuario_id]
+
+    def _reconstruir(self, tareas):
+        """Rehace el grafo desde todas las tareas (requiere el lock)"""
+        self._vaciar()
+        pendientes = [tarea for tarea in tareas if not tarea.completada]
+        for tarea in pendientes:
+            self._pendientes[tarea.id] = tarea.usuario_id
+        for tarea in pendientes:
+            bloqueos = set()
+            for dependencia in tarea.depende_de:
+                self._dependientes.setdefault(dependencia, set()).add(tarea.id)
+                if dependencia in self._pendientes:
+                    bloqueos.add(dependencia)
+            if bloqueos:
+                self._bloqueos[tarea.id] = bloqueos
+            else:
+                self._listas.append(tarea.id)
+                self._listas_usuario.setdefault(tarea.usuario_id, []).append(tarea.id)
+        # Se ordena una vez al final en lugar de insertar una a una
+        self._listas.sort()
+        for lista in self._listas_usuario.values():
+            lista.sort()
+
+    def _vaciar(self):
+        """Olvida todo el grafo (requiere el lock)"""
+        self._pendientes.clear()
+        self._bloqueos.clear()
+        self._dependientes.clear()
+        self._listas.clear()
+        self._listas_usuario.clear()
+
+    def listas(self, usuario_id=None, limite=None):
+        """
+        Tareas pendientes cuyas dependencias están todas completadas
+
+        Args:
+            usuario_id: Solo las de este usuario (opcional)
+            limite: Cantidad máxima de IDs (opcional)
+
+        Returns:
+            list: IDs en orden ascendente
+        """
+        with self._lock:
+            if usuario_id is None:
+                lista = self._listas
+            else:
+                lista = self._listas_usuario.get(usuario_id, ())
+            return list(lista[:limite])
+
+    def bloqueos(self, task_id):
+        """
+        Dependencias pendientes de una tarea
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            list: IDs que la bloquean, ordenados (vacía si está lista,
+                completada o no existe)
+        """
+        with self._lock:
+            return sorted(self._bloqueos.get(task_id, ()))
+
+    def tiene_dependientes(self, task_id):
+        """
+        Si alguna tarea pendiente depende de una tarea
+
+        Se lee sin el lock (una consulta de diccionario es atómica).
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            bool: True si tiene dependientes pendientes
+        """
+        return task_id in self._dependientes
+
+    def vaciar(self):
+        """Olvida todo el grafo"""
+        with self._lock:
+            self._vaciar()
+
+    def __len__(self):
+        """Tareas listas"""
+        return len(self._listas)
+
+
+def _quitar_ordenado(lista, valor):
+    """
+    Quita un valor de una lista ordenada, si está
+
+    Args:
+        lista: Lista ordenada
+        valor: Valor a quitar
+    """
+    posicion = bisect.bisect_left(lista, valor)
+    if posicion < len(lista) and lista[posicion] == valor:
+        del lista[posicion]
@@ -0,0 +1,489 @@
+# app/store/etiquetas.py
+"""
+Índice de etiquetas con mapas de bits comprimidos
+Cada etiqueta (y cada estado y prioridad) guarda el conjunto de IDs de sus
+tareas en un MapaBits; los filtros por etiquetas se resuelven con
+intersecciones, uniones y diferencias de mapas, sin recorrer las tareas
+"""
+
+import heapq
+import itertools
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from .indices import Indice
+
+# Un contenedor cubre 2^16 IDs consecutivos (los 16 bits bajos del ID)
+_BITS_CONTENEDOR = 16
+_BYTES_DENSO = (1 << _BITS_CONTENEDOR) // 8
+
+# Un contenedor disperso pasa a denso al superar este tamaño (a partir de
+# ahí el denso ocupa menos: 8 KiB frente a 2 bytes por ID) y vuelve a
+# disperso por debajo de la mitad, para no alternar en el límite
+_MAX_DISPERSO = 4096
+_MIN_DENSO = _MAX_DISPERSO // 2
+
+
+def _a_denso(valores):
+    """
+    Contenedor denso con los valores dados
+
+    Args:
+        valores: Array NumPy uint16 (o convertible) con los 16 bits bajos
+
+    Returns:
+        bytearray: 8 KiB, un bit por valor posible
+    """
+    bits = np.zeros(_BYTES_DENSO, dtype=np.uint8)
+    valores = np.asarray(valores, dtype=np.uint16)
+    np.bitwise_or.at(bits, valores >> 3, (1 << (valores & 7)).astype(np.uint8))
+    return bytearray(bits.tobytes())
+
+
+def _a_disperso(valores):
+    """
+    Contenedor disperso con los valores dados
+
+    Args:
+        valores: Array NumPy (o convertible) ordenado y sin repetidos
+
+    Returns:
+        array: array('H') ordenado
+    """
+    contenedor = array('H')
+    contenedor.frombytes(np.asarray(valores, dtype=np.uint16).tobytes())
+    return contenedor
+
+
+def _valores(contenedor):
+    """
+    Valores de un contenedor, ordenados
+
+    Args:
+        contenedor: array('H') o bytearray denso
+
+    Returns:
+        numpy.ndarray: uint16 ordenado
+    """
+    if isinstance(contenedor, bytearray):
+        bits = np.unpackbits(np.frombuffer(contenedor, dtype=np.uint8), bitorder='little')
+        return np.flatnonzero(bits).astype(np.uint16)
+    return np.frombuffer(contenedor, dtype=np.uint16)
+
+
+def _contiene(bits, valores):
+    """
+    Máscara de los valores presentes en un contenedor denso
+
+    Args:
+        bits: Array NumPy uint8 del contenedor denso
+        valores: Array NumPy uint16
+
+    Returns:
+        numpy.ndarray: bool, uno por valor
+    """
+    return ((bits[valores >> 3] >> (valores & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def _normalizar(contenedor, cuenta):
+    """
+    Ajusta un contenedor resultado de una operación a su forma
+
+    Args:
+        contenedor: Array NumPy uint16 (disperso) o uint8 de 8 KiB (denso)
+        cuenta: Valores que contiene
+
+    Returns:
+        array, bytearray o None si quedó vacío
+    """
+    if cuenta == 0:
+        return None
+    if contenedor.dtype == np.uint8:
+        if cuenta > _MAX_DISPERSO:
+            return bytearray(contenedor.tobytes())
+        return _a_disperso(np.flatnonzero(np.unpackbits(contenedor, bitorder='little')))
+    if cuenta > _MAX_DISPERSO:
+        return _a_denso(contenedor)
+    return _a_disperso(contenedor)
+
+
+def _contar_bits(bits):
+    """Bits a 1 de un array NumPy uint8"""
+    return int.from_bytes(bits.tobytes(), 'little').bit_count()
+
+
+def _y(a, b):
+    """Intersección de dos contenedores"""
+    if isinstance(a, bytearray) and isinstance(b, bytearray):
+        bits = np.frombuffer(a, dtype=np.uint8) & np.frombuffer(b, dtype=np.uint8)
+        return _normalizar(bits, _contar_bits(bits))
+    if isinstance(a, bytearray):
+        a, b = b, a
+    valores = np.frombuffer(a, dtype=np.uint16)
+    if isinstance(b, bytearray):
+        comunes = valores[_contiene(np.frombuffer(b, dtype=np.uint8), valores)]
+    else:
+        comunes = np.intersect1d(valores, np.frombuffer(b, dtype=np.uint16),
+                                 assume_unique=True)
+    return _normalizar(comunes, len(comunes))
+
+
+def _o(a, b):
+    """Unión de dos contenedores"""
+    if not isinstance(a, bytearray) and not isinstance(b, bytearray):
+        todos = np.union1d(np.frombuffer(a, dtype=np.uint16), np.frombuffer(b, dtype=np.uint16))
+        return _normalizar(todos, len(todos))
+    if not isinstance(a, bytearray):
+        a, b = b, a
+    bits = np.frombuffer(a, dtype=np.uint8).copy()
+    if isinstance(b, bytearray):
+        bits |= np.frombuffer(b, dtype=np.uint8)
+    else:
+        valores = np.frombuffer(b, dtype=np.uint16)
+        np.bitwise_or.at(bits, valores >> 3, (1 << (valores & 7)).astype(np.uint8))
+    return _normalizar(bits, _contar_bits(bits))
+
+
+def _menos(a, b):
+    """Diferencia de dos contenedores (los valores de a que no están en b)"""
+    if isinstance(a, bytearray):
+        bits = np.frombuffer(a, dtype=np.uint8).copy()
+        if isinstance(b, bytearray):
+            bits &= ~np.frombuffer(b, dtype=np.uint8)
+        else:
+            valores = np.frombuffer(b, dtype=np.uint16)
+            np.bitwise_and.at(bits, valores >> 3, ~(1 << (valores & 7)).astype(np.uint8))
+        return _normalizar(bits, _contar_bits(bits))
+    valores = np.frombuffer(a, dtype=np.uint16)
+    if isinstance(b, bytearray):
+        restantes = valores[~_contiene(np.frombuffer(b, dtype=np.uint8), valores)]
+    else:
+        restantes = np.setdiff1d(valores, np.frombuffer(b, dtype=np.uint16),
+                                 assume_unique=True)
+    return _normalizar(restantes, len(restantes))
+
+
+class MapaBits:
+    """
+    Conjunto de IDs de tarea comprimido, al estilo de los Roaring bitmaps
+
+    Los IDs se reparten en contenedores por sus 16 bits altos. Un contenedor
+    con pocos IDs es un array('H') ordenado de los 16 bits bajos (2 bytes
+    por ID, alta y baja por bisección); uno con más de _MAX_DISPERSO es un
+    mapa de 8 KiB con un bit por ID posible (alta y baja en O(1)). Las
+    operaciones entre mapas trabajan contenedor a contenedor con NumPy y
+    solo tocan las claves altas que pueden aportar al resultado.
+
+    Los mapas resultado de una operación son nuevos: los operandos no se
+    modifican.
+    """
+
+    __slots__ = ('_contenedores', '_cuentas')
+
+    def __init__(self):
+        self._contenedores = {}   # 16 bits altos -> array('H') o bytearray
+        self._cuentas = {}        # 16 bits altos -> IDs (solo los densos)
+
+    @classmethod
+    def _desde(cls, contenedores):
+        """Mapa con los contenedores dados (None se descarta)"""
+        mapa = cls()
+        for alto, contenedor in contenedores:
+            if contenedor is None:
+                continue
+            mapa._contenedores[alto] = contenedor
+            if isinstance(contenedor, bytearray):
+                mapa._cuentas[alto] = _contar_bits(np.frombuffer(contenedor, dtype=np.uint8))
+        return mapa
+
+    def agregar(self, task_id):
+        """
+        Añade un ID (no hace nada si ya está)
+
+        Args:
+            task_id: Entero no negativo
+        """
+        alto, bajo = task_id >> _BITS_CONTENEDOR, task_id & 0xFFFF
+        contenedor = self._contenedores.get(alto)
+        if contenedor is None:
+            self._contenedores[alto] = array('H', (bajo,))
+        elif isinstance(contenedor, bytearray):
+            mascara = 1 << (bajo & 7)
+            if not contenedor[bajo >> 3] & mascara:
+                contenedor[bajo >> 3] |= mascara
+                self._cuentas[alto] += 1
+        else:
+            posicion = bisect_left(contenedor, bajo)
+            if posicion < len(contenedor) and contenedor[posicion] == bajo:
+                return
+            contenedor.insert(posicion, bajo)
+            if len(contenedor) > _MAX_DISPERSO:
+                self._contenedores[alto] = _a_denso(np.frombuffer(contenedor, dtype=np.uint16))
+                self._cuentas[alto] = len(contenedor)
+
+    def quitar(self, task_id):
+        """
+        Quita un ID (no hace nada si no está)
+
+        Args:
+            task_id: Entero no negativo
+        """
+        alto, bajo = task_id >> _BITS_CONTENEDOR, task_id & 0xFFFF
+        contenedor = self._contenedores.get(alto)
+        if contenedor is None:
+            return
+        if isinstance(contenedor, bytearray):
+            mascara = 1 << (bajo & 7)
+            if not contenedor[bajo >> 3] & mascara:
+                return
+            contenedor[bajo >> 3] &= ~mascara & 0xFF
+            self._cuentas[alto] -= 1
+            if self._cuentas[alto] < _MIN_DENSO:
+                self._contenedores[alto] = _a_disperso(_valores(contenedor))
+                del self._cuentas[alto]
+            return
+        posicion = bisect_left(contenedor, bajo)
+        if posicion < len(contenedor) and contenedor[posicion] == bajo:
+            del contenedor[posicion]
+            if not contenedor:
+                del self._contenedores[alto]
+
+    def __contains__(self, task_id):
+        alto, bajo = task_id >> _BITS_CONTENEDOR, task_id & 0xFFFF
+        contenedor = self._contenedores.get(alto)
+        if contenedor is None:
+            return False
+        if isinstance(contenedor, bytearray):
+            return bool(contenedor[bajo >> 3] & (1 << (bajo & 7)))
+        posicion = bisect_left(contenedor, bajo)
+        return posicion < len(contenedor) and contenedor[posicion] == bajo
+
+    def __len__(self):
+        return (sum(self._cuentas.values())
+                + sum(len(c) for c in self._contenedores.values()
+                      if not isinstance(c, bytearray)))
+
+    def __bool__(self):
+        return bool(self._contenedores)
+
+    def __and__(self, otro):
+        # Solo las claves altas comunes; se recorren las del mapa con menos
+        pequeno, grande = sorted((self._contenedores, otro._contenedores), key=len)
+        return MapaBits._desde((alto, _y(contenedor, grande[alto]))
+                               for alto, contenedor in pequeno.items() if alto in grande)
+
+    def __or__(self, otro):
+        contenedores = []
+        for alto in self._contenedores.keys() | otro._contenedores.keys():
+            a = self._contenedores.get(alto)
+            b = otro._contenedores.get(alto)
+            if a is None or b is None:
+                # Sin operación: se copia para no compartir un contenedor mutable
+                contenedor = a if b is None else b
+                contenedores.append((alto, contenedor[:]))
+            else:
+                contenedores.append((alto, _o(a, b)))
+        return MapaBits._desde(contenedores)
+
+    def __sub__(self, otro):
+        contenedores = []
+        for alto, contenedor in self._contenedores.items():
+            quitar = otro._contenedores.get(alto)
+            contenedores.append((alto, contenedor[:] if quitar is None
+                                 else _menos(contenedor, quitar)))
+        return MapaBits._desde(contenedores)
+
+    def ids(self, limite=None, inverso=False):
+        """
+        IDs del mapa en orden
+
+        Se convierten contenedor a contenedor y se para al alcanzar el
+        límite, así que los primeros k cuestan lo que sus contenedores.
+
+        Args:
+            limite: Cantidad máxima de IDs (opcional)
+            inverso: True para devolverlos de mayor a menor
+
+        Returns:
+            list: IDs
+        """
+        resultado = []
+        for alto in sorted(self._contenedores, reverse=inverso):
+            valores = _valores(self._contenedores[alto])
+            if inverso:
+                valores = valores[::-1]
+            if limite is not None:
+                valores = valores[:limite - len(resultado)]
+            base = alto << _BITS_CONTENEDOR
+            resultado.extend((valores.astype(np.int64) + base).tolist())
+            if limite is not None and len(resultado) >= limite:
+                break
+        return resultado
+
+    def bytes(self):
+        """
+        Memoria ocupada por los contenedores
+
+        Returns:
+            int: Bytes (sin contar el diccionario)
+        """
+        return sum(len(c) if isinstance(c, bytearray) else 2 * len(c)
+                   for c in self._contenedores.values())
+
+
+class IndiceEtiquetas(Indice):
+    """
+    Mapas de bits de IDs por etiqueta, estado y prioridad
+
+    Un filtro 'todas estas etiquetas, alguna de estas, ninguna de estas'
+    combinado con completada y prioridad se evalúa como intersecciones,
+    uniones y diferencias de mapas (de menor a mayor, para que el resultado
+    parcial se reduzca cuanto antes). Cada alta, cambio o baja toca solo los
+    mapas de las etiquetas, estado y prioridad de la tarea.
+    """
+
+    nombre = 'etiquetas'
+
+    def __init__(self):
+        super().__init__()
+        self.vaciar()
+
+    def vaciar(self):
+        self._todas = MapaBits()
+        self._completadas = MapaBits()
+        self._prioridades = {}   # prioridad -> MapaBits
+        self._etiquetas = {}     # etiqueta -> MapaBits
+
+    def _mapa(self, mapas, clave):
+        """Mapa de una clave, creándolo si no existe"""
+        mapa = mapas.get(clave)
+        if mapa is None:
+            mapa = mapas[clave] = MapaBits()
+        return mapa
+
+    def _soltar(self, mapas, clave, task_id):
+        """Quita un ID del mapa de una clave y descarta el mapa si queda vacío"""
+        mapa = mapas.get(clave)
+        if mapa is not None:
+            mapa.quitar(task_id)
+            if not mapa:
+                del mapas[clave]
+
+    def al_insertar(self, tarea):
+        self._todas.agregar(tarea.id)
+        if tarea.completada:
+            self._completadas.agregar(tarea.id)
+        self._mapa(self._prioridades, tarea.prioridad).agregar(tarea.id)
+        for etiqueta in tarea.etiquetas:
+            self._mapa(self._etiquetas, etiqueta).agregar(tarea.id)
+
+    def al_actualizar(self, anterior, tarea):
+        if anterior['completada'] != tarea.completada:
+            if tarea.completada:
+                self._completadas.agregar(tarea.id)
+            else:
+                self._completadas.quitar(tarea.id)
+        if anterior['prioridad'] != tarea.prioridad:
+            self._soltar(self._prioridades, anterior['prioridad'], tarea.id)
+            self._mapa(self._prioridades, tarea.prioridad).agregar(tarea.id)
+        previas = set(anterior['etiquetas'])
+        actuales = set(tarea.etiquetas)
+        for etiqueta in previas - actuales:
+            self._soltar(self._etiquetas, etiqueta, tarea.id)
+        for etiqueta in actuales - previas:
+            self._mapa(self._etiquetas, etiqueta).agregar(tarea.id)
+
+    def al_eliminar(self, tarea):
+        self._todas.quitar(tarea.id)
+        self._completadas.quitar(tarea.id)
+        self._soltar(self._prioridades, tarea.prioridad, tarea.id)
+        for etiqueta in tarea.etiquetas:
+            self._soltar(self._etiquetas, etiqueta, tarea.id)
+
+    def _evaluar(self, todas, alguna, ninguna, completada, prioridad):
+        """Mapa de las tareas que cumplen el filtro (requiere el lock)"""
+        vacio = MapaBits()
+        requeridos = []
+        for etiqueta in todas:
+            mapa = self._etiquetas.get(etiqueta)
+            if mapa is None:
+                return vacio
+            requeridos.append(mapa)
+        if alguna:
+            mapas = [self._etiquetas[e] for e in alguna if e in self._etiquetas]
+            if not mapas:
+                return vacio
+            requeridos.append(mapas[0] if len(mapas) == 1 else _unir(mapas))
+        if prioridad is not None:
+            mapa = self._prioridades.get(prioridad)
+            if mapa is None:
+                return vacio
+            requeridos.append(mapa)
+        if completada:
+            requeridos.append(self._completadas)
+        if not requeridos:
+            requeridos.append(self._todas)
+
+        requeridos.sort(key=len)
+        resultado = requeridos[0]
+        for mapa in requeridos[1:]:
+            resultado = resultado & mapa
+            if not resultado:
+                return resultado
+        restar = [self._etiquetas[e] for e in ninguna if e in self._etiquetas]
+        if completada is False:
+            restar.append(self._completadas)
+        for mapa in restar:
+            resultado = resultado - mapa
+        return resultado
+
+    def filtrar(self, todas=(), alguna=(), ninguna=(), completada=None, prioridad=None,
+                limite=None, inverso=False):
+        """
+        IDs de las tareas que cumplen un filtro de etiquetas
+
+        Args:
+            todas: Etiquetas que la tarea debe tener todas (AND)
+            alguna: Etiquetas de las que debe tener al menos una (OR; vacía:
+                sin condición)
+            ninguna: Etiquetas que no debe tener (NOT)
+            completada: True/False para filtrar por estado (opcional)
+            prioridad: alta/media/baja para filtrar (opcional)
+            limite: Cantidad máxima de IDs (opcional)
+            inverso: True para devolverlos de mayor a menor
+
+        Returns:
+            list: IDs en orden
+        """
+        with self.lock:
+            return self._evaluar(todas, alguna, ninguna, completada,
+                                 prioridad).ids(limite, inverso)
+
+    @staticmethod
+    def filtrar_combinados(indices, todas=(), alguna=(), ninguna=(), completada=None,
+                           prioridad=None, limite=None, inverso=False):
+        """
+        Como filtrar(), sobre varios índices (uno por fragmento de un
+        almacén fragmentado): cada uno aporta como mucho limite IDs y se
+        mezclan en orden
+
+        Returns:
+            list: IDs en orden
+        """
+        partes = [indice.filtrar(todas, alguna, ninguna, completada, prioridad,
+                                 limite, inverso) for indice in indices]
+        return list(itertools.islice(heapq.merge(*partes, reverse=inverso), limite))
+
+    def __len__(self):
+        return len(self._etiquetas)
+
+
+def _unir(mapas):
+    """Unión de varios mapas, de menor a mayor"""
+    mapas = sorted(mapas, key=len)
+    resultado = mapas[0]
+    for mapa in mapas[1:]:
+        resultado = resultado | mapa
+    return resultado
@@ -0,0 +1,457 @@
+# app/store/indices.py
+"""
+Índices secundarios del almacén de tareas
+El almacén avisa a cada índice registrado de las altas, cambios y bajas
+(también de las que llegan de otros procesos), así que los índices se
+mantienen de forma incremental y las consultas no recorren todas las tareas
+"""
+
+import bisect
+import heapq
+import itertools
+import threading
+
+# Orden de las prioridades: primero la más urgente
+RANGO_PRIORIDAD = {'alta': 0, 'media': 1, 'baja': 2}
+
+
+class Indice:
+    """
+    Base de los índices del almacén
+
+    El almacén llama a los métodos al_* con su lock tomado; las consultas de
+    los índices toman el mismo lock (ver TaskStore.registrar_indice).
+
+    Attributes:
+        nombre (str): Nombre del índice (en estadisticas() y métricas)
+        lock: Lock del almacén al que está vinculado
+        incluye_archivadas (bool): Si conserva las tareas archivadas (al
+            reconstruirse recibe también las del archivo)
+    """
+
+    nombre = None
+    incluye_archivadas = False
+
+    def __init__(self):
+        """Crea un índice vacío, aún sin vincular a un almacén"""
+        self.lock = threading.RLock()
+
+    def reconstruir(self, tareas):
+        """
+        Vacía el índice y lo rellena con las tareas dadas
+
+        Args:
+            tareas: Iterable de Task
+        """
+        self.vaciar()
+        for tarea in tareas:
+            self.al_insertar(tarea)
+
+    def vaciar(self):
+        """Elimina todas las entradas"""
+        raise NotImplementedError
+
+    def al_insertar(self, tarea):
+        """
+        Registra una tarea nueva
+
+        Args:
+            tarea: Task insertada
+        """
+        raise NotImplementedError
+
+    def al_actualizar(self, anterior, tarea):
+        """
+        Registra el cambio de una tarea
+
+        Args:
+            anterior: Diccionario con los valores previos (Task.to_dict())
+            tarea: Task ya actualizada
+        """
+        raise NotImplementedError
+
+    def al_eliminar(self, tarea):
+        """
+        Registra la baja de una tarea
+
+        Args:
+            tarea: Task eliminada
+        """
+        raise NotImplementedError
+
+    def al_archivar(self, tarea):
+        """
+        Registra que una tarea pasó al archivo (por defecto, como una baja)
+
+        Args:
+            tarea: Task archivada
+        """
+        self.al_eliminar(tarea)
+
+    def __len__(self):
+        """Número de entradas del índice"""
+        raise NotImplementedError
+
+
+class IndicePendientes(Indice):
+    """
+    Tareas pendientes ordenadas por prioridad y antigüedad
+
+    Por cada prioridad guarda una lista ordenada de IDs (el ID crece con la
+    creación, así que el orden por ID es el orden por antigüedad), en global
+    y por usuario. Una tarea nueva se añade al final en O(log n); los k
+    primeros se leen en O(k) sin ordenar nada.
+    """
+
+    nombre = 'pendientes'
+
+    def __init__(self):
+        super().__init__()
+        self.vaciar()
+
+    def vaciar(self):
+        self._global = [[] for _ in RANGO_PRIORIDAD]
+        self._por_usuario = {}
+
+    def _listas(self, usuario_id, crear=False):
+        """Listas por prioridad de un usuario"""
+        listas = self._por_usuario.get(usuario_id)
+        if listas is None and crear:
+            listas = self._por_usuario[usuario_id] = [[] for _ in RANGO_PRIORIDAD]
+        return listas
+
+    def _agregar(self, task_id, completada, prioridad, usuario_id):
+        """Añade una tarea a sus listas si está pendiente"""
+        if completada:
+            return
+        rango = RANGO_PRIORIDAD.get(prioridad, RANGO_PRIORIDAD['media'])
+        for listas in (self._global, self._listas(usuario_id, crear=True)):
+            lista = listas[rango]
+            if not lista or lista[-1] < task_id:
+                lista.append(task_id)
+            else:
+                bisect.insort(lista, task_id)
+
+    def _quitar(self, task_id, completada, prioridad, usuario_id):
+        """Quita una tarea de las listas donde estaba según sus valores previos"""
+        if completada:
+            return
+        rango = RANGO_PRIORIDAD.get(prioridad, RANGO_PRIORIDAD['media'])
+        por_usuario = self._listas(usuario_id)
+        for listas in (self._global, por_usuario):
+            if listas is None:
+                continue
+            lista = listas[rango]
+            i = bisect.bisect_left(lista, task_id)
+            if i < len(lista) and lista[i] == task_id:
+                del lista[i]
+        if por_usuario is not None and not any(por_usuario):
+            del self._por_usuario[usuario_id]
+
+    def al_insertar(self, tarea):
+        self._agregar(tarea.id, tarea.completada, tarea.prioridad, tarea.usuario_id)
+
+    def al_actualizar(self, anterior, tarea):
+        if (anterior['completada'] == tarea.completada
+                and anterior['prioridad'] == tarea.prioridad
+                and anterior['usuario_id'] == tarea.usuario_id):
+            return
+        self._quitar(tarea.id, anterior['completada'], anterior['prioridad'],
+                     anterior['usuario_id'])
+        self._agregar(tarea.id, tarea.completada, tarea.prioridad, tarea.usuario_id)
+
+    def al_eliminar(self, tarea):
+        self._quitar(tarea.id, tarea.completada, tarea.prioridad, tarea.usuario_id)
+
+    def primeros(self, k, usuario_id=None, inverso=False):
+        """
+        IDs de las k tareas pendientes más urgentes
+
+        Args:
+            k: Cantidad máxima de IDs
+            usuario_id: Limitar a las tareas de un usuario (opcional)
+            inverso: True para empezar por la menos urgente (y más reciente)
+
+        Returns:
+            list: IDs en orden de prioridad y antigüedad
+        """
+        with self.lock:
+            listas = self._global if usuario_id is None else self._listas(usuario_id)
+            if not listas:
+                return []
+            ids = []
+            for lista in (reversed(listas) if inverso else listas):
+                faltan = k - len(ids)
+                if faltan <= 0:
+                    break
+                if inverso:
+                    ids.extend(lista[:-faltan - 1:-1])
+                else:
+                    ids.extend(lista[:faltan])
+            return ids
+
+    @staticmethod
+    def primeros_combinados(indices, k, inverso=False):
+        """
+        Como primeros(), sobre varios índices (uno por fragmento de un
+        almacén fragmentado)
+
+        De cada índice se copian, con su propio lock, como mucho k IDs por
+        prioridad; dentro de cada prioridad se mezclan por ID.
+
+        Args:
+            indices: Lista de IndicePendientes
+            k: Cantidad máxima de IDs
+            inverso: True para empezar por la menos urgente (y más reciente)
+
+        Returns:
+            list: IDs en orden de prioridad y antigüedad
+        """
+        por_prioridad = [[] for _ in RANGO_PRIORIDAD]
+        for indice in indices:
+            with indice.lock:
+                for rango, lista in enumerate(indice._global):
+                    por_prioridad[rango].append(lista[:-k - 1:-1] if inverso else lista[:k])
+        ids = []
+        for listas in (reversed(por_prioridad) if inverso else por_prioridad):
+            faltan = k - len(ids)
+            if faltan <= 0:
+                break
+            ids.extend(itertools.islice(heapq.merge(*listas, reverse=inverso), faltan))
+        return ids
+
+    def __len__(self):
+        return sum(len(lista) for lista in self._global)
+
+
+class ListaOrdenada:
+    """
+    Lista ordenada repartida en trozos de unos CARGA elementos
+
+    Una lista plana con bisect.insort mueve en cada inserción todos los
+    elementos posteriores; con inserciones en cualquier posición y millones
+    de entradas eso domina. Aquí solo se mueven los del trozo, y una lista
+    de máximos por trozo localiza el trozo con bisect. Contar los menores
+    que un valor suma las longitudes de los trozos anteriores (n / CARGA
+    sumas, sin recorrer elementos).
+    """
+
+    CARGA = 1000
+
+    def __init__(self, valores=()):
+        """
+        Args:
+            valores: Valores iniciales (se ordenan una vez)
+        """
+        ordenados = sorted(valores)
+        carga = self.CARGA
+        self._trozos = [ordenados[i:i + carga] for i in range(0, len(ordenados), carga)]
+        self._maximos = [trozo[-1] for trozo in self._trozos]
+        self._longitud = len(ordenados)
+
+    def agregar(self, valor):
+        """Inserta un valor en su posición"""
+        if not self._trozos:
+            self._trozos.append([valor])
+            self._maximos.append(valor)
+        else:
+            i = bisect.bisect_left(self._maximos, valor)
+            if i == len(self._maximos):
+                i -= 1
+                self._trozos[i].append(valor)
+                self._maximos[i] = valor
+            else:
+                bisect.insort(self._trozos[i], valor)
+            trozo = self._trozos[i]
+            if len(trozo) > 2 * self.CARGA:
+                mitad = len(trozo) // 2
+                self._trozos[i:i + 1] = [trozo[:mitad], trozo[mitad:]]
+                self._maximos[i:i + 1] = [trozo[mitad - 1], trozo[-1]]
+        self._longitud += 1
+
+    def quitar(self, valor):
+        """
+        Quita un valor, si está
+
+        Returns:
+            bool: Si estaba
+        """
+        i = bisect.bisect_left(self._maximos, valor)
+        if i == len(self._maximos):
+            return False
+        trozo = self._trozos[i]
+        j = bisect.bisect_left(trozo, valor)
+        if j == len(trozo) or trozo[j] != valor:
+            return False
+        del trozo[j]
+        if trozo:
+            self._maximos[i] = trozo[-1]
+        else:
+            del self._trozos[i]
+            del self._maximos[i]
+        self._longitud -= 1
+        return True
+
+    def contar_menores(self, valor):
+        """Cantidad de elementos menores que un valor"""
+        i = bisect.bisect_left(self._maximos, valor)
+        if i == len(self._maximos):
+            return self._longitud
+        return sum(map(len, self._trozos[:i])) + bisect.bisect_left(self._trozos[i], valor)
+
+    def desde(self, valor):
+        """
+        Itera en orden los elementos mayores o iguales que un valor
+
+        Args:
+            valor: Límite inferior (None: desde el principio)
+        """
+        if not self._trozos:
+            return
+        if valor is None:
+            i, j = 0, 0
+        else:
+            i = bisect.bisect_left(self._maximos, valor)
+            if i == len(self._maximos):
+                return
+            j = bisect.bisect_left(self._trozos[i], valor)
+        yield from itertools.islice(self._trozos[i], j, None)
+        for trozo in itertools.islice(self._trozos, i + 1, None):
+            yield from trozo
+
+    def __len__(self):
+        return self._longitud
+
+
+class IndiceVencimientos(Indice):
+    """
+    Tareas pendientes con fecha límite, ordenadas por vence_en
+
+    Guarda pares (vence_en, id) en una ListaOrdenada global y una por
+    usuario. Un rango de fechas se lee desde su inicio en O(log n + k), y
+    las vencidas antes de un instante se cuentan sin recorrerlas. Las
+    tareas completadas o sin vence_en no están en el índice.
+    """
+
+    nombre = 'vencimientos'
+
+    def __init__(self):
+        super().__init__()
+        self.vaciar()
+
+    def vaciar(self):
+        self._global = ListaOrdenada()
+        self._por_usuario = {}
+
+    def reconstruir(self, tareas):
+        # Se ordena una vez en lugar de insertar una a una
+        self.vaciar()
+        por_usuario = {}
+        entradas = []
+        for tarea in tareas:
+            if not tarea.completada and tarea.vence_en is not None:
+                entrada = (tarea.vence_en, tarea.id)
+                entradas.append(entrada)
+                por_usuario.setdefault(tarea.usuario_id, []).append(entrada)
+        self._global = ListaOrdenada(entradas)
+        self._por_usuario = {usuario_id: ListaOrdenada(lista)
+                             for usuario_id, lista in por_usuario.items()}
+
+    def _agregar(self, task_id, completada, vence_en, usuario_id):
+        """Añade una tarea si está pendiente y tiene fecha límite"""
+        if completada or vence_en is None:
+            return
+        self._global.agregar((vence_en, task_id))
+        lista = self._por_usuario.get(usuario_id)
+        if lista is None:
+            lista = self._por_usuario[usuario_id] = ListaOrdenada()
+        lista.agregar((vence_en, task_id))
+
+    def _quitar(self, task_id, completada, vence_en, usuario_id):
+        """Quita una tarea según sus valores previos"""
+        if completada or vence_en is None:
+            return
+        self._global.quitar((vence_en, task_id))
+        lista = self._por_usuario.get(usuario_id)
+        if lista is not None:
+            lista.quitar((vence_en, task_id))
+            if not lista:
+                del self._por_usuario[usuario_id]
+
+    def al_insertar(self, tarea):
+        self._agregar(tarea.id, tarea.completada, tarea.vence_en, tarea.usuario_id)
+
+    def al_actualizar(self, anterior, tarea):
+        if (anterior['completada'] == tarea.completada
+                and anterior['vence_en'] == tarea.vence_en
+                and anterior['usuario_id'] == tarea.usuario_id):
+            return
+        self._quitar(tarea.id, anterior['completada'], anterior['vence_en'],
+                     anterior['usuario_id'])
+        self._agregar(tarea.id, tarea.completada, tarea.vence_en, tarea.usuario_id)
+
+    def al_eliminar(self, tarea):
+        self._quitar(tarea.id, tarea.completada, tarea.vence_en, tarea.usuario_id)
+
+    def _lista(self, usuario_id):
+        """Lista global o de un usuario (None si el usuario no tiene ninguna)"""
+        return self._global if usuario_id is None else self._por_usuario.get(usuario_id)
+
+    def entre(self, desde=None, hasta=None, usuario_id=None, limite=None):
+        """
+        Pares de las tareas que vencen en un rango
+
+        Args:
+            desde: Instante inicial, incluido (None: sin límite)
+            hasta: Instante final, excluido (None: sin límite)
+            usuario_id: Limitar a las tareas de un usuario (opcional)
+            limite: Cantidad máxima de pares (opcional)
+
+        Returns:
+            list: Pares (vence_en, id) en orden de vencimiento
+        """
+        with self.lock:
+            lista = self._lista(usuario_id)
+            if lista is None:
+                return []
+            # (x,) es menor que cualquier (x, id): el rango es [desde, hasta)
+            pares = lista.desde(None if desde is None else (desde,))
+            if hasta is not None:
+                pares = itertools.takewhile(lambda par: par[0] < hasta, pares)
+            return list(itertools.islice(pares, limite))
+
+    def contar_antes(self, hasta, usuario_id=None):
+        """
+        Cantidad de tareas que vencen antes de un instante (las vencidas si
+        es el actual)
+
+        Args:
+            hasta: Instante, excluido
+            usuario_id: Limitar a las tareas de un usuario (opcional)
+
+        Returns:
+            int: Cantidad de tareas
+        """
+        with self.lock:
+            lista = self._lista(usuario_id)
+            return lista.contar_menores((hasta,)) if lista is not None else 0
+
+    @staticmethod
+    def entre_combinados(indices, desde=None, hasta=None, limite=None):
+        """
+        Como entre(), sobre varios índices (uno por fragmento de un almacén
+        fragmentado): cada uno aporta como mucho limite pares y se mezclan
+
+        Returns:
+            list: Pares (vence_en, id) en orden de vencimiento
+        """
+        partes = [indice.entre(desde, hasta, limite=limite) for indice in indices]
+        return list(itertools.islice(heapq.merge(*partes), limite))
+
+    @staticmethod
+    def contar_antes_combinados(indices, hasta):
+        """Como contar_antes(), sumando varios índices"""
+        return sum(indice.contar_antes(hasta) for indice in indices)
+
+    def __len__(self):
+        return len(self._global)
@@ -0,0 +1,19 @@
+# app/store/memory.py
+"""
+Almacén de tareas en memoria
+Backend por defecto: las tareas viven solo en el proceso actual
+"""
+
+from .base import TaskStore
+
+
+class MemoryTaskStore(TaskStore):
+    """
+    Almacén en memoria del proceso
+
+    Adecuado para desarrollo o para un único proceso servidor. Con varios
+    workers cada uno tendría su propia copia de las tareas; para ese caso
+    usar SharedMemoryTaskStore.
+    """
+
+    backend = 'memory'
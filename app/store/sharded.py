@@ -0,0 +1,748 @@
+# app/store/sharded.py
+"""
+Almacén de tareas fragmentado
+Reparte las tareas del proceso en N fragmentos por usuario_id, cada uno con
+su propio lock y sus propios índices, para que las escrituras de usuarios
+distintos no compitan por el mismo lock
+"""
+
+import bisect
+import contextlib
+import heapq
+import itertools
+import operator
+import threading
+import zlib
+
+from app.utils.memory import estimar_tamano
+from .base import TaskStore
+
+_POR_ID = operator.attrgetter('id')
+_POR_NUMERO = operator.attrgetter('numero')
+
+# Tareas llegadas fuera de orden por encima de las cuales un fragmento
+# reordena su diccionario (además de superar la cuarta parte de sus tareas)
+_MAX_MOVIDAS = 1024
+
+
+class _Fragmento(TaskStore):
+    """
+    Un fragmento de ShardedTaskStore
+
+    Es un TaskStore normal salvo en que los IDs los asigna el almacén
+    fragmentado y los cambios se numeran y se notifican a través de él.
+
+    El diccionario de tareas está en orden de ID salvo las que llegan de
+    otro fragmento con un ID menor que el último: se añaden al final y su
+    ID se guarda en una lista ordenada aparte, y los recorridos en orden
+    mezclan las dos secuencias.
+
+    Attributes:
+        numero (int): Posición del fragmento (orden en que se toman los locks)
+    """
+
+    backend = 'memory'
+
+    def __init__(self, padre, numero, directorio_archivo=None):
+        """
+        Args:
+            padre: ShardedTaskStore al que pertenece
+            numero: Posición del fragmento
+            directorio_archivo: Directorio de los bloques archivados (None: en memoria)
+        """
+        super().__init__(directorio_archivo)
+        self._padre = padre
+        self._oyentes = padre._oyentes  # para saber si hay oyentes (_guardar_local)
+        self.numero = numero
+        self._movidas = []          # IDs fuera de orden en _tareas, ordenados
+        self._movidas_set = set()
+
+    def _notificar(self, tipo, tarea, anterior=None):
+        """La versión es la del almacén fragmentado (requiere el lock)"""
+        self._padre._notificar(tipo, tarea, anterior)
+
+    def _archivar_local(self, bloque):
+        """Archiva el bloque y olvida la ubicación de sus tareas (requiere el lock)"""
+        super()._archivar_local(bloque)
+        ubicacion = self._padre._ubicacion
+        for datos in self._archivo.leer(bloque):
+            ubicacion.pop(datos['id'], None)
+            self._sacar(datos['id'])
+
+    def _eliminar_local(self, task_id):
+        """Ver TaskStore._eliminar_local (requiere el lock)"""
+        tarea = super()._eliminar_local(task_id)
+        self._sacar(task_id)
+        return tarea
+
+    def _colocar(self, tarea):
+        """
+        Añade una tarea que llega de otro fragmento (requiere el lock)
+
+        Si su ID es menor que el último del diccionario, o ya hay movidas
+        (el último puede ser una de ellas y no el mayor), se añade al final
+        y se anota en la lista ordenada de movidas (coste logarítmico más el
+        desplazamiento de esa lista, que es corta). Cuando las movidas pasan
+        de _MAX_MOVIDAS y de la cuarta parte de las tareas, el diccionario
+        se reordena (coste amortizado constante).
+
+        Args:
+            tarea: Task que se mueve a este fragmento
+        """
+        tareas = self._tareas
+        if self._movidas or (tareas and next(reversed(tareas)) > tarea.id):
+            bisect.insort(self._movidas, tarea.id)
+            self._movidas_set.add(tarea.id)
+        tareas[tarea.id] = tarea
+        if len(self._movidas) > max(_MAX_MOVIDAS, len(tareas) // 4):
+            self._tareas = dict(sorted(tareas.items()))
+            self._movidas = []
+            self._movidas_set = set()
+
+    def _sacar(self, task_id):
+        """Olvida una tarea que sale del fragmento si era una movida (requiere el lock)"""
+        if task_id in self._movidas_set:
+            self._movidas_set.discard(task_id)
+            del self._movidas[bisect.bisect_left(self._movidas, task_id)]
+
+    def _en_orden(self, inverso=False):
+        """
+        Recorre las tareas en orden de ID (requiere el lock)
+
+        Args:
+            inverso: True para empezar por el ID más alto
+
+        Returns:
+            Iterator: Instancias Task
+        """
+        valores = self._tareas.values()
+        valores = reversed(valores) if inverso else iter(valores)
+        if not self._movidas:
+            return valores
+        movidas = self._movidas_set
+        tareas = self._tareas
+        resto = (tarea for tarea in valores if tarea.id not in movidas)
+        colocadas = (tareas[i] for i in (reversed(self._movidas) if inverso else self._movidas))
+        return heapq.merge(resto, colocadas, key=_POR_ID, reverse=inverso)
+
+    def todas(self):
+        """Ver TaskStore.todas"""
+        with self._lock:
+            return list(self._en_orden())
+
+    def de_usuario(self, usuario_id):
+        """Ver TaskStore.de_usuario"""
+        with self._lock:
+            return [tarea for tarea in self._en_orden() if tarea.usuario_id == usuario_id]
+
+    def primeras(self, k, filtro=None, inverso=False):
+        """Ver TaskStore.primeras"""
+        if k <= 0:
+            return []
+        with self._lock:
+            candidatas = self._en_orden(inverso)
+            if filtro is not None:
+                candidatas = filter(filtro, candidatas)
+            return list(itertools.islice(candidatas, k))
+
+
+class IndiceFragmentado:
+    """
+    Vista de un índice repartido en los fragmentos de un ShardedTaskStore
+
+    Las consultas de un usuario van solo al índice de su fragmento; las
+    globales combinan los índices de todos con el método *_combinados del
+    tipo de índice (ver IndicePendientes.primeros_combinados,
+    IndiceAnalitica.agregar_combinados, IndiceVencimientos.entre_combinados
+    e IndiceEtiquetas.filtrar_combinados). IndiceSimilares.buscar es siempre
+    de un usuario.
+
+    Attributes:
+        nombre (str): Nombre del índice
+    """
+
+    def __init__(self, almacen, nombre):
+        """
+        Args:
+            almacen: ShardedTaskStore
+            nombre: Nombre del índice registrado
+        """
+        self.nombre = nombre
+        self._almacen = almacen
+
+    def _indices(self):
+        """Índice de cada fragmento, en orden"""
+        return [fragmento._indices[self.nombre] for fragmento in self._almacen._fragmentos]
+
+    def primeros(self, k, usuario_id=None, inverso=False):
+        """Ver IndicePendientes.primeros"""
+        if usuario_id is not None:
+            fragmento = self._almacen._fragmento(usuario_id)
+            return fragmento._indices[self.nombre].primeros(k, usuario_id=usuario_id,
+                                                            inverso=inverso)
+        indices = self._indices()
+        return type(indices[0]).primeros_combinados(indices, k, inverso)
+
+    def agregar(self, agrupar=None, periodo='day'):
+        """Ver IndiceAnalitica.agregar"""
+        indices = self._indices()
+        return type(indices[0]).agregar_combinados(indices, agrupar, periodo)
+
+    def entre(self, desde=None, hasta=None, usuario_id=None, limite=None):
+        """Ver IndiceVencimientos.entre"""
+        if usuario_id is not None:
+            fragmento = self._almacen._fragmento(usuario_id)
+            return fragmento._indices[self.nombre].entre(desde, hasta, usuario_id, limite)
+        indices = self._indices()
+        return type(indices[0]).entre_combinados(indices, desde, hasta, limite)
+
+    def contar_antes(self, hasta, usuario_id=None):
+        """Ver IndiceVencimientos.contar_antes"""
+        if usuario_id is not None:
+            fragmento = self._almacen._fragmento(usuario_id)
+            return fragmento._indices[self.nombre].contar_antes(hasta, usuario_id)
+        indices = self._indices()
+        return type(indices[0]).contar_antes_combinados(indices, hasta)
+
+    def filtrar(self, todas=(), alguna=(), ninguna=(), completada=None, prioridad=None,
+                limite=None, inverso=False):
+        """Ver IndiceEtiquetas.filtrar"""
+        indices = self._indices()
+        return type(indices[0]).filtrar_combinados(indices, todas, alguna, ninguna, completada,
+                                                   prioridad, limite, inverso)
+
+    def buscar(self, titulo, descripcion=None, usuario_id=None, umbral=0.5, limite=10,
+               excluir=None):
+        """Ver IndiceSimilares.buscar"""
+        fragmento = self._almacen._fragmento(usuario_id)
+        return fragmento._indices[self.nombre].buscar(titulo, descripcion, usuario_id, umbral,
+                                                      limite, excluir)
+
+    def __len__(self):
+        """Entradas de todos los fragmentos"""
+        return sum(len(indice) for indice in self._indices())
+
+
+class ShardedTaskStore:
+    """
+    Almacén en memoria del proceso repartido en fragmentos por usuario_id
+
+    Tiene la misma interfaz que TaskStore. Cada fragmento es un TaskStore
+    con su propio lock y sus propios índices (registrar_indice crea uno por
+    fragmento). Las operaciones de un usuario van a su fragmento y las de
+    una tarea por ID lo encuentran en un mapa id -> fragmento, así que solo
+    toman un lock; los listados de todo el almacén mezclan los fragmentos
+    por ID.
+
+    Los IDs siguen siendo globales y crecientes, y se asignan con el lock
+    del fragmento tomado, de modo que cada fragmento sigue en orden de ID.
+    La versión también es única, pero se numera con un contador sin lock
+    y se avisa a los oyentes con solo el lock del fragmento: los cambios
+    de una misma tarea les llegan en orden, pero dos cambios de fragmentos
+    distintos pueden llegar con las versiones cruzadas (los oyentes que
+    publican "lo posterior a N" usan MarcaContigua). Cambiar el usuario_id
+    de una tarea la mueve de fragmento (con los dos locks, en orden de
+    fragmento) y se notifica como un único 'update'.
+
+    Como MemoryTaskStore, cada proceso tiene su propia copia: sirve para un
+    proceso con muchos hilos; con varios workers, SharedMemoryTaskStore.
+
+    Attributes:
+        backend (str): Nombre del backend
+        fragmentos (int): Número de fragmentos
+    """
+
+    backend = 'sharded'
+
+    def __init__(self, fragmentos=8, directorio_archivo=None):
+        """
+        Inicializa un almacén vacío
+
+        Args:
+            fragmentos: Número de fragmentos
+            directorio_archivo: Directorio de los bloques archivados (None: en memoria)
+
+        Raises:
+            ValueError: Si fragmentos es menor que 1
+        """
+        if fragmentos < 1:
+            raise ValueError("El almacén necesita al menos un fragmento")
+        self.fragmentos = fragmentos
+        self._oyentes = []
+        self._version = 0
+        self._versiones = itertools.count(1)  # next() es atómico con el GIL
+        self._next_id = 1
+        self._lock_ids = threading.Lock()
+        # id -> fragmento. Sin lock propio: cada clave solo se modifica con
+        # el lock de su fragmento y las operaciones de dict son atómicas
+        self._ubicacion = {}
+        self._vistas = {}
+        self._fragmentos = [_Fragmento(self, numero, directorio_archivo)
+                            for numero in range(fragmentos)]
+
+    @property
+    def version(self):
+        """
+        Versión del almacén (número de escrituras aplicadas)
+
+        Es la última que se numeró: con escrituras concurrentes puede
+        quedarse un poco por detrás de otra ya numerada, nunca por delante
+        de las aplicadas.
+        """
+        return self._version
+
+    def suscribir(self, oyente):
+        """
+        Suscribe una función a los cambios del almacén
+
+        Se llama con el lock del fragmento de la tarea tomado, así que debe
+        ser rápida, y desde varios hilos a la vez (uno por fragmento), así
+        que necesita su propio lock. Las versiones pueden llegarle
+        desordenadas entre tareas distintas.
+
+        Args:
+            oyente: Callable oyente(tipo, tarea, anterior, version)
+        """
+        self._oyentes.append(oyente)
+
+    def _notificar(self, tipo, tarea, anterior=None):
+        """
+        Numera el cambio y avisa a los oyentes (requiere el lock del
+        fragmento de la tarea)
+
+        Args:
+            tipo: 'create', 'update', 'delete' o 'reset'
+            tarea: Task afectada (None en 'reset')
+            anterior: Valores previos en 'update' (Task.to_dict())
+        """
+        if tipo != 'reset':
+            version = next(self._versiones)
+            self._version = version
+        else:
+            version = self._version
+        for oyente in self._oyentes:
+            oyente(tipo, tarea, anterior, version)
+
+    def _fragmento(self, usuario_id):
+        """
+        Fragmento de un usuario
+
+        Los IDs numéricos (también como texto) se reparten por módulo; el
+        resto por su CRC32. Las tareas sin usuario van al primero.
+
+        Args:
+            usuario_id: ID del usuario (o None)
+
+        Returns:
+            _Fragmento: El fragmento
+        """
+        if usuario_id is None:
+            return self._fragmentos[0]
+        try:
+            clave = int(usuario_id)
+        except (TypeError, ValueError):
+            clave = zlib.crc32(str(usuario_id).encode('utf-8'))
+        return self._fragmentos[clave % self.fragmentos]
+
+    # ------------------------------------------------------------------
+    # Índices
+    # ------------------------------------------------------------------
+
+    def registrar_indice(self, indice):
+        """
+        Registra un índice secundario en todos los fragmentos
+
+        El índice dado queda en el primer fragmento; el resto recibe uno
+        nuevo del mismo tipo, creado sin argumentos.
+
+        Args:
+            indice: Instancia de Indice
+
+        Returns:
+            IndiceFragmentado: Vista que consulta el índice de todos los fragmentos
+        """
+        for fragmento in self._fragmentos:
+            fragmento.registrar_indice(indice if fragmento.numero == 0 else type(indice)())
+        vista = self._vistas[indice.nombre] = IndiceFragmentado(self, indice.nombre)
+        return vista
+
+    def indice(self, nombre):
+        """
+        Obtiene un índice registrado
+
+        Args:
+            nombre: Nombre del índice
+
+        Returns:
+            IndiceFragmentado: Vista del índice o None si no está registrado
+        """
+        return self._vistas.get(nombre)
+
+    # ------------------------------------------------------------------
+    # Archivo
+    # ------------------------------------------------------------------
+
+    def archivar(self, antes_de, lote=1000):
+        """
+        Mueve al archivo de cada fragmento las tareas completadas antes de
+        un instante (ver TaskStore.archivar)
+
+        Args:
+            antes_de: Instante (epoch) límite de completada_en
+            lote: Tareas por bloque comprimido
+
+        Returns:
+            int: Tareas archivadas
+        """
+        return sum(fragmento.archivar(antes_de, lote) for fragmento in self._fragmentos)
+
+    def archivadas(self, usuario_id=None):
+        """
+        Recorre las tareas archivadas (descomprime los bloques)
+
+        Args:
+            usuario_id: Limitar a las de un usuario (solo se lee su fragmento)
+
+        Yields:
+            Task: Copia de cada tarea archivada, fragmento a fragmento
+        """
+        if usuario_id is not None:
+            yield from self._fragmento(usuario_id).archivadas(usuario_id)
+            return
+        for fragmento in self._fragmentos:
+            yield from fragmento.archivadas()
+
+    def obtener_archivada(self, task_id):
+        """
+        Obtiene una tarea archivada por su ID
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: Copia de la tarea o None si no está archivada
+        """
+        for fragmento in self._fragmentos:
+            tarea = fragmento.obtener_archivada(task_id)
+            if tarea is not None:
+                return tarea
+        return None
+
+    def contar_archivadas(self, usuario_id=None):
+        """
+        Cuenta las tareas archivadas sin descomprimir los bloques
+
+        Args:
+            usuario_id: Limitar a las de un usuario (opcional)
+
+        Returns:
+            int: Cantidad de tareas archivadas
+        """
+        if usuario_id is not None:
+            return self._fragmento(usuario_id).contar_archivadas(usuario_id)
+        return sum(fragmento.contar_archivadas() for fragmento in self._fragmentos)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def sincronizar(self):
+        """Sin efecto: el almacén es local al proceso"""
+        pass
+
+    def todas(self):
+        """
+        Obtiene todas las tareas ordenadas por ID
+
+        Cada fragmento ya está en orden, así que la ordenación (timsort)
+        solo mezcla tramos ordenados.
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        tareas = list(itertools.chain.from_iterable(
+            fragmento.todas() for fragmento in self._fragmentos))
+        tareas.sort(key=_POR_ID)
+        return tareas
+
+    def obtener(self, task_id):
+        """
+        Obtiene una tarea por su ID
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: La tarea o None si no existe
+        """
+        fragmento = self._ubicacion.get(task_id)
+        while fragmento is not None:
+            tarea = fragmento.obtener(task_id)
+            if tarea is not None:
+                return tarea
+            # Se movió de fragmento mientras se leía: buscarla en el nuevo
+            actual = self._ubicacion.get(task_id)
+            if actual is fragmento:
+                return None
+            fragmento = actual
+        return None
+
+    def obtener_varias(self, ids):
+        """
+        Obtiene varias tareas por ID, en el orden dado
+
+        Args:
+            ids: Iterable de IDs (los que ya no existan se omiten)
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        return [tarea for tarea in map(self.obtener, ids) if tarea is not None]
+
+    def de_usuario(self, usuario_id):
+        """
+        Obtiene las tareas de un usuario ordenadas por ID (solo recorre su fragmento)
+
+        Args:
+            usuario_id: ID del usuario
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        return self._fragmento(usuario_id).de_usuario(usuario_id)
+
+    def primeras(self, k, filtro=None, inverso=False):
+        """
+        Obtiene las primeras k tareas por ID que cumplen un filtro
+
+        Se piden k a cada fragmento y se mezclan por ID.
+
+        Args:
+            k: Cantidad máxima de tareas
+            filtro: Callable Task -> bool (opcional)
+            inverso: True para empezar por el ID más alto
+
+        Returns:
+            list: Lista de instancias Task
+        """
+        if k <= 0:
+            return []
+        listas = [fragmento.primeras(k, filtro, inverso) for fragmento in self._fragmentos]
+        return list(itertools.islice(heapq.merge(*listas, key=_POR_ID, reverse=inverso), k))
+
+    def recorrer(self, lote=1000):
+        """
+        Recorre las tareas por ID en lotes, sin copiar el almacén
+
+        Como en TaskStore.recorrer, las escrituras concurrentes pueden
+        intercalarse entre lotes.
+
+        Args:
+            lote: IDs que se examinan por lote
+
+        Yields:
+            list: Lista no vacía de instancias Task
+        """
+        siguiente = 1
+        while True:
+            fin = min(siguiente + lote, self._next_id)
+            if siguiente >= fin:
+                return
+            encontradas = self.obtener_varias(range(siguiente, fin))
+            siguiente = fin
+            if encontradas:
+                yield encontradas
+
+    def contar(self):
+        """
+        Cuenta las tareas almacenadas
+
+        Returns:
+            int: Cantidad de tareas
+        """
+        return sum(fragmento.contar() for fragmento in self._fragmentos)
+
+    def estadisticas(self):
+        """
+        Tamaño del almacén, de sus índices y del archivo, sumando los fragmentos
+
+        Returns:
+            dict: Como TaskStore.estadisticas, más 'fragmentos' (tareas de cada uno)
+        """
+        resultado = {'tareas': 0, 'indices': {},
+                     'archivo': {'bloques': 0, 'tareas': 0, 'bytes': 0}, 'fragmentos': []}
+        for fragmento in self._fragmentos:
+            estadisticas = fragmento.estadisticas()
+            resultado['tareas'] += estadisticas['tareas']
+            resultado['fragmentos'].append(estadisticas['tareas'])
+            for nombre, entradas in estadisticas['indices'].items():
+                resultado['indices'][nombre] = resultado['indices'].get(nombre, 0) + entradas
+            for clave, valor in estadisticas['archivo'].items():
+                resultado['archivo'][clave] += valor
+        return resultado
+
+    def uso_memoria(self, muestra=1000):
+        """
+        Memoria estimada sumando los fragmentos
+
+        Returns:
+            dict: Como TaskStore.uso_memoria; 'tareas' incluye el mapa de
+                ubicación de los IDs
+        """
+        resultado = {'tareas': 0, 'indices': {}, 'archivo': 0, 'total': 0}
+        for fragmento in self._fragmentos:
+            uso = fragmento.uso_memoria(muestra)
+            resultado['tareas'] += uso['tareas']
+            resultado['archivo'] += uso['archivo']
+            resultado['total'] += uso['total']
+            for nombre, tamano in uso['indices'].items():
+                resultado['indices'][nombre] = resultado['indices'].get(nombre, 0) + tamano
+        # Se mide una copia (dict.copy() es atómico) porque el mapa cambia sin lock
+        ubicacion = estimar_tamano(self._ubicacion.copy(), {id(f) for f in self._fragmentos},
+                                   muestra)
+        resultado['tareas'] += ubicacion
+        resultado['total'] += ubicacion
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _reservar_ids(self, cantidad):
+        """
+        Reserva IDs consecutivos (con el lock de los fragmentos destino tomado)
+
+        Returns:
+            int: Primer ID reservado
+        """
+        with self._lock_ids:
+            inicio = self._next_id
+            self._next_id += cantidad
+            return inicio
+
+    def insertar(self, datos):
+        """
+        Inserta una tarea nueva en el fragmento de su usuario
+
+        Args:
+            datos: Diccionario con los campos de la tarea (sin ID)
+
+        Returns:
+            Task: Tarea creada
+        """
+        fragmento = self._fragmento(datos.get('usuario_id'))
+        with fragmento._lock:
+            tarea_id = self._reservar_ids(1)
+            self._ubicacion[tarea_id] = fragmento
+            return fragmento._guardar_local(tarea_id, datos)
+
+    def insertar_varias(self, lista):
+        """
+        Inserta varias tareas nuevas con IDs consecutivos
+
+        Toma a la vez, en orden, los locks de los fragmentos afectados.
+
+        Args:
+            lista: Lista de diccionarios con los campos de cada tarea
+
+        Returns:
+            list: Tareas creadas, en el mismo orden
+        """
+        destinos = [self._fragmento(datos.get('usuario_id')) for datos in lista]
+        with contextlib.ExitStack() as locks:
+            for fragmento in sorted(set(destinos), key=_POR_NUMERO):
+                locks.enter_context(fragmento._lock)
+            inicio = self._reservar_ids(len(lista))
+            creadas = []
+            for tarea_id, datos, fragmento in zip(itertools.count(inicio), lista, destinos):
+                self._ubicacion[tarea_id] = fragmento
+                creadas.append(fragmento._guardar_local(tarea_id, datos))
+            return creadas
+
+    def actualizar(self, task_id, cambios):
+        """
+        Aplica cambios a una tarea existente
+
+        Si cambia usuario_id y el nuevo usuario es de otro fragmento, la
+        tarea se mueve con los locks de los dos fragmentos tomados.
+
+        Args:
+            task_id: ID de la tarea
+            cambios: Diccionario campo -> nuevo valor (ya validados)
+
+        Returns:
+            Task: Tarea actualizada o None si no existe
+        """
+        while True:
+            origen = self._ubicacion.get(task_id)
+            if origen is None:
+                return None
+            destino = (self._fragmento(cambios['usuario_id']) if 'usuario_id' in cambios
+                       else origen)
+            with contextlib.ExitStack() as locks:
+                for fragmento in sorted({origen, destino}, key=_POR_NUMERO):
+                    locks.enter_context(fragmento._lock)
+                if self._ubicacion.get(task_id) is not origen:
+                    # Se movió o se eliminó mientras se esperaba el lock
+                    continue
+                if destino is origen:
+                    return origen.actualizar(task_id, cambios)
+                return self._mover(origen, destino, task_id, cambios)
+
+    def _mover(self, origen, destino, task_id, cambios):
+        """
+        Aplica cambios que llevan una tarea a otro fragmento (requiere los
+        locks de los dos)
+
+        La tarea se añade al destino antes de quitarla del origen, así que
+        una lectura sin lock la encuentra en uno u otro.
+
+        Args:
+            origen: Fragmento actual
+            destino: Fragmento del nuevo usuario
+            task_id: ID de la tarea
+            cambios: Diccionario campo -> nuevo valor
+
+        Returns:
+            Task: Tarea actualizada
+        """
+        tarea = origen._tareas[task_id]
+        cambios = origen._sellar_cambios(tarea, cambios)
+        anterior = tarea.to_dict()
+        for indice in origen._indices.values():
+            indice.al_eliminar(tarea)
+        for campo, valor in cambios.items():
+            setattr(tarea, campo, valor)
+        destino._colocar(tarea)
+        for indice in destino._indices.values():
+            indice.al_insertar(tarea)
+        self._ubicacion[task_id] = destino
+        del origen._tareas[task_id]
+        origen._sacar(task_id)
+        self._notificar('update', tarea, anterior)
+        return tarea
+
+    def eliminar(self, task_id):
+        """
+        Elimina una tarea
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: Tarea eliminada o None si no existía
+        """
+        while True:
+            fragmento = self._ubicacion.get(task_id)
+            if fragmento is None:
+                return None
+            with fragmento._lock:
+                if self._ubicacion.get(task_id) is not fragmento:
+                    continue
+                del self._ubicacion[task_id]
+                return fragmento._eliminar_local(task_id)
+
+    def cerrar(self):
+        """Libera los recursos de todos los fragmentos"""
+        for fragmento in self._fragmentos:
+            fragmento.cerrar()
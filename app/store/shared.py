@@ -0,0 +1,328 @@
+# app/store/shared.py
+"""
+Almacén de tareas en memoria compartida
+Permite que varios workers pre-forkeados sirvan las mismas tareas
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import struct
+from multiprocessing import shared_memory
+
+from app.models.task import Task
+from .archivo import BloqueArchivado
+from .base import TaskStore, AlmacenLlenoError
+
+# Cabecera del segmento: epoch, fin del log, siguiente ID, versión
+_CABECERA = struct.Struct('<QQQQ')
+# Cabecera de cada registro: longitud del payload, operación
+_REGISTRO = struct.Struct('<IB')
+
+OP_GUARDAR = 1
+OP_ELIMINAR = 2
+# Fin de la instantánea de una compactación; su payload es la versión
+OP_INSTANTANEA = 3
+# Bloque de tareas que pasan al archivo (no es un cambio: no sube la versión)
+OP_ARCHIVAR = 4
+
+
+class SharedMemoryTaskStore(TaskStore):
+    """
+    Almacén respaldado por un segmento multiprocessing.shared_memory
+
+    El segmento contiene un log de operaciones (guardar tarea completa,
+    eliminar ID o archivar un bloque comprimido). Cada proceso mantiene su vista local de las tareas y solo
+    reproduce los registros nuevos desde su último desplazamiento, de modo
+    que una lectura sin cambios pendientes no toca el lock ni copia datos.
+    Cuando el log se llena se compacta en una instantánea y se incrementa el
+    epoch para que los demás procesos reconstruyan su vista. Cada registro
+    de cambio incrementa la versión de la cabecera; la instantánea no.
+
+    El segmento y el lock se crean en el proceso maestro antes del fork;
+    los workers los heredan.
+
+    Attributes:
+        nombre (str): Nombre del segmento de memoria compartida
+        tamano (int): Tamaño del segmento en bytes
+    """
+
+    backend = 'shared'
+
+    def __init__(self, tamano=64 * 1024 * 1024, nombre=None, directorio_archivo=None):
+        """
+        Crea el segmento compartido
+
+        Args:
+            tamano: Tamaño del segmento en bytes
+            nombre: Nombre del segmento (opcional, se genera uno si no se indica)
+            directorio_archivo: Directorio de los bloques archivados (None: los
+                bloques viajan en el log y cada proceso los guarda en memoria)
+        """
+        super().__init__(directorio_archivo)
+        self._shm = shared_memory.SharedMemory(name=nombre, create=True, size=tamano)
+        self.nombre = self._shm.name
+        self.tamano = self._shm.size
+        self._lock_global = multiprocessing.RLock()
+        self._pid_creador = os.getpid()
+        self._epoch = 0
+        self._offset = _CABECERA.size
+        _CABECERA.pack_into(self._shm.buf, 0, self._epoch, self._offset, 1, 0)
+        atexit.register(self.cerrar)
+
+    # ------------------------------------------------------------------
+    # Sincronización
+    # ------------------------------------------------------------------
+
+    def sincronizar(self):
+        """Reproduce los registros escritos por otros procesos"""
+        epoch, fin = struct.unpack_from('<QQ', self._shm.buf, 0)
+        if epoch == self._epoch and fin == self._offset:
+            return
+        with self._lock_global:
+            self._sincronizar_bloqueado()
+
+    def _sincronizar_bloqueado(self):
+        """Reproduce el log pendiente (requiere el lock global)"""
+        buf = self._shm.buf
+        epoch, fin, next_id, version = _CABECERA.unpack_from(buf, 0)
+        with self._lock:
+            # Tras una compactación los registros hasta OP_INSTANTANEA
+            # reconstruyen la vista y no son cambios
+            en_instantanea = epoch != self._epoch
+            if en_instantanea:
+                version_previa = self._version
+                self._tareas.clear()
+                self._huecos = 0
+                self._archivo.vaciar()
+                self._reconstruir_indices()
+                self._epoch = epoch
+                self._offset = _CABECERA.size
+            offset = self._offset
+            while offset < fin:
+                longitud, op = _REGISTRO.unpack_from(buf, offset)
+                inicio = offset + _REGISTRO.size
+                payload = json.loads(bytes(buf[inicio:inicio + longitud]))
+                if op == OP_INSTANTANEA:
+                    if en_instantanea:
+                        en_instantanea = False
+                        self._version = payload
+                        if payload != version_previa:
+                            # Hubo cambios que esta vista no llegó a ver
+                            self._notificar('reset', None, list(self._tareas.values()))
+                else:
+                    self._aplicar(op, payload, notificar=not en_instantanea)
+                offset = inicio + longitud
+            self._offset = offset
+            self._next_id = next_id
+            self._version = version
+
+    def _aplicar(self, op, payload, notificar=True):
+        """
+        Aplica un registro del log a la vista local
+
+        Args:
+            op: Código de operación
+            payload: Datos decodificados del registro
+            notificar: False para los registros de una instantánea
+        """
+        if op == OP_GUARDAR:
+            self._guardar_local(payload['id'], payload, notificar=notificar)
+        elif op == OP_ELIMINAR:
+            self._eliminar_local(payload)
+        elif op == OP_ARCHIVAR:
+            self._archivar_local(BloqueArchivado.from_dict(payload))
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _escribir(self, op, payload, next_id=None, cambio=True):
+        """
+        Añade un registro al log (requiere el lock global y la vista al día)
+
+        Args:
+            op: Código de operación
+            payload: Datos serializables a JSON
+            next_id: Nuevo valor del contador de IDs (opcional)
+            cambio: Si el registro incrementa la versión
+
+        Raises:
+            AlmacenLlenoError: Si el registro no cabe ni tras compactar
+        """
+        datos = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        buf = self._shm.buf
+        epoch, fin, actual_next_id, version = _CABECERA.unpack_from(buf, 0)
+        if fin + _REGISTRO.size + len(datos) > self.tamano:
+            fin = self._compactar()
+            epoch = self._epoch
+            if fin + _REGISTRO.size + len(datos) > self.tamano:
+                raise AlmacenLlenoError("El almacén compartido de tareas está lleno")
+        _REGISTRO.pack_into(buf, fin, len(datos), op)
+        inicio = fin + _REGISTRO.size
+        buf[inicio:inicio + len(datos)] = datos
+        fin = inicio + len(datos)
+        # La cabecera se publica al final: los lectores nunca ven un registro a medias
+        _CABECERA.pack_into(buf, 0, epoch, fin,
+                            next_id if next_id is not None else actual_next_id,
+                            version + 1 if cambio else version)
+        self._offset = fin
+
+    def _compactar(self):
+        """
+        Reescribe el log como una instantánea de las tareas actuales
+
+        Returns:
+            int: Nuevo fin del log
+        """
+        buf = self._shm.buf
+        _, _, next_id, version = _CABECERA.unpack_from(buf, 0)
+        offset = _CABECERA.size
+        registros = [(OP_GUARDAR, tarea.to_dict()) for tarea in self._tareas.values()]
+        registros.extend((OP_ARCHIVAR, bloque.to_dict()) for bloque in self._archivo.bloques())
+        registros.append((OP_INSTANTANEA, version))
+        for op, payload in registros:
+            datos = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            if offset + _REGISTRO.size + len(datos) > self.tamano:
+                raise AlmacenLlenoError("El almacén compartido de tareas está lleno")
+            _REGISTRO.pack_into(buf, offset, len(datos), op)
+            inicio = offset + _REGISTRO.size
+            buf[inicio:inicio + len(datos)] = datos
+            offset = inicio + len(datos)
+        self._epoch += 1
+        _CABECERA.pack_into(buf, 0, self._epoch, offset, next_id, version)
+        self._offset = offset
+        return offset
+
+    def insertar(self, datos):
+        """
+        Inserta una tarea nueva con un ID único entre todos los procesos
+
+        Args:
+            datos: Diccionario con los campos de la tarea (sin ID)
+
+        Returns:
+            Task: Tarea creada
+        """
+        return self.insertar_varias([datos])[0]
+
+    def insertar_varias(self, lista):
+        """
+        Inserta varias tareas tomando el lock global una sola vez
+
+        Args:
+            lista: Lista de diccionarios con los campos de cada tarea
+
+        Returns:
+            list: Tareas creadas, en el mismo orden
+
+        Raises:
+            AlmacenLlenoError: Si el log se llena; las tareas anteriores
+                de la lista ya quedaron insertadas (atributo creadas)
+        """
+        with self._lock_global:
+            self._sincronizar_bloqueado()
+            with self._lock:
+                creadas = []
+                for datos in lista:
+                    tarea_id = self._next_id
+                    # Las marcas de tiempo se fijan una vez, igual en todos los procesos
+                    nueva = Task.from_dict(datos, id=tarea_id).to_dict()
+                    try:
+                        self._escribir(OP_GUARDAR, nueva, next_id=tarea_id + 1)
+                    except AlmacenLlenoError as error:
+                        error.creadas = creadas
+                        raise
+                    self._next_id = tarea_id + 1
+                    creadas.append(self._guardar_local(tarea_id, nueva))
+                return creadas
+
+    def _archivar_bloque(self, ids, antes_de):
+        """
+        Archiva un bloque de tareas y lo publica al resto de procesos
+
+        Args:
+            ids: IDs candidatos, en orden
+            antes_de: Instante (epoch) límite de completada_en
+
+        Returns:
+            int: Tareas archivadas
+        """
+        with self._lock_global:
+            self._sincronizar_bloqueado()
+            with self._lock:
+                bloque = self._preparar_bloque(ids, antes_de)
+                if bloque is None:
+                    return 0
+                self._escribir(OP_ARCHIVAR, bloque.to_dict(), cambio=False)
+                self._archivar_local(bloque)
+                return bloque.tareas
+
+    def actualizar(self, task_id, cambios):
+        """
+        Aplica cambios a una tarea y los publica al resto de procesos
+
+        Args:
+            task_id: ID de la tarea
+            cambios: Diccionario campo -> nuevo valor (ya validados)
+
+        Returns:
+            Task: Tarea actualizada o None si no existe
+        """
+        with self._lock_global:
+            self._sincronizar_bloqueado()
+            with self._lock:
+                tarea = self._tareas.get(task_id)
+                if tarea is None:
+                    return None
+                cambios = self._sellar_cambios(tarea, cambios)
+                nuevos = tarea.to_dict()
+                nuevos.update(cambios)
+                self._escribir(OP_GUARDAR, nuevos)
+                return self._guardar_local(task_id, cambios)
+
+    def eliminar(self, task_id):
+        """
+        Elimina una tarea en todos los procesos
+
+        Args:
+            task_id: ID de la tarea
+
+        Returns:
+            Task: Tarea eliminada o None si no existía
+        """
+        with self._lock_global:
+            self._sincronizar_bloqueado()
+            with self._lock:
+                if task_id not in self._tareas:
+                    return None
+                self._escribir(OP_ELIMINAR, task_id)
+                return self._eliminar_local(task_id)
+
+    def uso_memoria(self, muestra=1000):
+        """
+        Memoria estimada de la copia local, más el uso del segmento compartido
+
+        Returns:
+            dict: Como TaskStore.uso_memoria, más 'log': {'usados_bytes',
+                'reservados_bytes'}. El segmento es uno para todos los
+                procesos y no entra en 'total'.
+        """
+        resultado = super().uso_memoria(muestra)
+        fin = struct.unpack_from('<QQ', self._shm.buf, 0)[1]
+        resultado['log'] = {'usados_bytes': fin, 'reservados_bytes': self._shm.size}
+        return resultado
+
+    def cerrar(self):
+        """Cierra el segmento y lo libera si este proceso lo creó"""
+        if self._shm is None:
+            return
+        self._archivo.cerrar()
+        self._shm.close()
+        if os.getpid() == self._pid_creador:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
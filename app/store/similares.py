@@ -0,0 +1,286 @@
+# app/store/similares.py
+"""
+Índice de tareas parecidas (MinHash + LSH)
+Cada tarea se resume en una firma MinHash de los trigramas de su título y
+descripción; las firmas se reparten en bandas y dos tareas son candidatas
+si coinciden en alguna banda entera. Buscar las parecidas a un texto solo
+compara la firma con las candidatas de sus cubetas, no con todas las tareas
+"""
+
+import re
+import unicodedata
+
+import numpy as np
+
+from .indices import Indice
+
+# Funciones hash de la firma, repartidas en BANDAS de FILAS. Con 8 bandas de
+# 4 filas, dos textos con similitud de Jaccard 0.8 son candidatos con
+# probabilidad 1 - (1 - 0.8^4)^8 ~ 0.99, y con 0.3 solo ~ 0.06
+BANDAS = 8
+FILAS = 4
+PERMUTACIONES = BANDAS * FILAS
+
+# Tareas cuyas firmas se calculan juntas al reconstruir el índice
+_LOTE = 1024
+
+# Candidatas que se comparan como mucho por búsqueda: si un texto se repite
+# miles de veces no se comparan todas sus copias
+_MAX_CANDIDATAS = 1000
+
+_NO_ALFANUMERICO = re.compile(r'[\W_]+')
+
+# Hash universal multiplicativo: h_i(x) = (a_i * x + b_i) mod 2^64, bits altos.
+# Semilla fija: las firmas son iguales en todos los procesos
+_aleatorio = np.random.default_rng(20240521)
+_A = _aleatorio.integers(1, 2 ** 63, PERMUTACIONES, dtype=np.uint64) | np.uint64(1)
+_B = _aleatorio.integers(0, 2 ** 63, PERMUTACIONES, dtype=np.uint64)
+# Mezcla las filas de una banda en una clave de 64 bits
+_MEZCLA = _aleatorio.integers(1, 2 ** 63, FILAS, dtype=np.uint64) | np.uint64(1)
+
+
+def normalizar_texto(titulo, descripcion=None):
+    """
+    Texto comparable de una tarea: minúsculas, sin tildes ni signos
+
+    Args:
+        titulo: Título de la tarea
+        descripcion: Descripción (opcional)
+
+    Returns:
+        str: Palabras separadas por un espacio
+    """
+    texto = f"{titulo or ''} {descripcion or ''}".lower()
+    if not texto.isascii():
+        texto = ''.join(c for c in unicodedata.normalize('NFKD', texto)
+                        if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def _tejas(texto):
+    """
+    Tejas de un texto normalizado: sus trigramas de bytes en UTF-8, leídos
+    como enteros de 24 bits (se obtienen todas de una vez, sin un hash por
+    teja)
+
+    Returns:
+        numpy.ndarray: uint64, una por posición (con repetidas)
+    """
+    octetos = np.frombuffer(texto.encode('utf-8').ljust(3), dtype=np.uint8).astype(np.uint64)
+    return (octetos[:-2] << np.uint64(16)) | (octetos[1:-1] << np.uint64(8)) | octetos[2:]
+
+
+def _minimos(tejas, inicios):
+    """
+    Firmas de varios textos con sus tejas concatenadas
+
+    Args:
+        tejas: Array uint64 con las tejas de todos los textos
+        inicios: Posición de la primera teja de cada texto
+
+    Returns:
+        numpy.ndarray: uint32 de forma (textos, PERMUTACIONES)
+    """
+    hashes = np.multiply.outer(_A, tejas)
+    hashes += _B[:, None]
+    # El mínimo de los 64 bits da el mínimo de sus 32 bits altos
+    return (np.minimum.reduceat(hashes, inicios, axis=1) >> np.uint64(32)).T.astype(np.uint32)
+
+
+def firmar(titulo, descripcion=None):
+    """
+    Firma MinHash de una tarea
+
+    Args:
+        titulo: Título de la tarea
+        descripcion: Descripción (opcional)
+
+    Returns:
+        bytes: PERMUTACIONES valores uint32, o None si el texto queda vacío
+    """
+    texto = normalizar_texto(titulo, descripcion)
+    if not texto:
+        return None
+    hashes = np.multiply.outer(_A, _tejas(texto))
+    hashes += _B[:, None]
+    return (hashes.min(axis=1) >> np.uint64(32)).astype(np.uint32).tobytes()
+
+
+def _claves_bandas(firmas):
+    """
+    Clave de cada banda de una o varias firmas
+
+    Args:
+        firmas: Array uint32 de forma (..., PERMUTACIONES)
+
+    Returns:
+        list: Claves (enteros de 64 bits) de cada banda, por firma
+    """
+    filas = firmas.astype(np.uint64).reshape(firmas.shape[:-1] + (BANDAS, FILAS))
+    return (filas * _MEZCLA).sum(axis=-1).tolist()
+
+
+def similitud(firma_a, firma_b):
+    """
+    Similitud de Jaccard estimada entre dos firmas
+
+    Returns:
+        float: Fracción de valores iguales (0 a 1)
+    """
+    return float(np.mean(np.frombuffer(firma_a, dtype=np.uint32)
+                         == np.frombuffer(firma_b, dtype=np.uint32)))
+
+
+class IndiceSimilares(Indice):
+    """
+    Firmas MinHash de las tareas en cubetas LSH, por usuario
+
+    Cada usuario (también None, las tareas sin asignar) tiene sus propias
+    cubetas: las parecidas se buscan solo entre las tareas del mismo
+    usuario. Una cubeta guarda un ID o, si hay varios, una lista. Una
+    búsqueda calcula la firma del texto, reúne las candidatas de sus BANDAS
+    cubetas y estima la similitud solo con ellas: el coste depende de
+    cuántas tareas parecidas hay, no de cuántas tareas hay.
+
+    Las tareas sin texto comparable no están en el índice.
+    """
+
+    nombre = 'similares'
+
+    def __init__(self):
+        super().__init__()
+        self.vaciar()
+
+    def vaciar(self):
+        self._firmas = {}   # id -> (usuario_id, firma)
+        self._cubetas = {}  # usuario_id -> [dict clave -> id o lista de ids] por banda
+
+    def reconstruir(self, tareas):
+        # Las firmas se calculan por lotes: una operación NumPy por lote
+        self.vaciar()
+        lote = []
+        for tarea in tareas:
+            lote.append(tarea)
+            if len(lote) == _LOTE:
+                self._agregar_lote(lote)
+                lote = []
+        if lote:
+            self._agregar_lote(lote)
+
+    def _agregar_lote(self, tareas):
+        """Añade varias tareas calculando sus firmas juntas"""
+        partes, inicios, indexadas = [], [], []
+        posicion = 0
+        for tarea in tareas:
+            texto = normalizar_texto(tarea.titulo, tarea.descripcion)
+            if texto:
+                tejas = _tejas(texto)
+                partes.append(tejas)
+                inicios.append(posicion)
+                posicion += len(tejas)
+                indexadas.append(tarea)
+        if not indexadas:
+            return
+        firmas = _minimos(np.concatenate(partes), inicios)
+        for tarea, firma, claves in zip(indexadas, firmas, _claves_bandas(firmas)):
+            self._agregar(tarea.id, tarea.usuario_id, firma.tobytes(), claves)
+
+    def _agregar(self, task_id, usuario_id, firma, claves=None):
+        """Guarda la firma de una tarea y la añade a sus cubetas"""
+        self._firmas[task_id] = (usuario_id, firma)
+        bandas = self._cubetas.get(usuario_id)
+        if bandas is None:
+            bandas = self._cubetas[usuario_id] = [{} for _ in range(BANDAS)]
+        if claves is None:
+            claves = _claves_bandas(np.frombuffer(firma, dtype=np.uint32))
+        for cubetas, clave in zip(bandas, claves):
+            actual = cubetas.get(clave)
+            if actual is None:
+                cubetas[clave] = task_id
+            elif isinstance(actual, list):
+                actual.append(task_id)
+            else:
+                cubetas[clave] = [actual, task_id]
+
+    def _quitar(self, task_id):
+        """Quita una tarea de sus cubetas (si está)"""
+        entrada = self._firmas.pop(task_id, None)
+        if entrada is None:
+            return
+        usuario_id, firma = entrada
+        bandas = self._cubetas[usuario_id]
+        claves = _claves_bandas(np.frombuffer(firma, dtype=np.uint32))
+        for cubetas, clave in zip(bandas, claves):
+            actual = cubetas[clave]
+            if not isinstance(actual, list):
+                del cubetas[clave]
+                continue
+            actual.remove(task_id)
+            if len(actual) == 1:
+                cubetas[clave] = actual[0]
+        if not bandas[0]:
+            del self._cubetas[usuario_id]
+
+    def al_insertar(self, tarea):
+        firma = firmar(tarea.titulo, tarea.descripcion)
+        if firma is not None:
+            self._agregar(tarea.id, tarea.usuario_id, firma)
+
+    def al_actualizar(self, anterior, tarea):
+        if (anterior['titulo'] == tarea.titulo and anterior['descripcion'] == tarea.descripcion
+                and anterior['usuario_id'] == tarea.usuario_id):
+            return
+        self._quitar(tarea.id)
+        self.al_insertar(tarea)
+
+    def al_eliminar(self, tarea):
+        self._quitar(tarea.id)
+
+    def buscar(self, titulo, descripcion=None, usuario_id=None, umbral=0.5, limite=10,
+               excluir=None):
+        """
+        Tareas de un usuario parecidas a un texto
+
+        Args:
+            titulo: Título a comparar
+            descripcion: Descripción a comparar (opcional)
+            usuario_id: Usuario en cuyas tareas se busca (None: las sin usuario)
+            umbral: Similitud mínima estimada (0 a 1)
+            limite: Cantidad máxima de resultados
+            excluir: ID que no se devuelve (la propia tarea)
+
+        Returns:
+            list: Pares (similitud, id), de más a menos parecida
+        """
+        # La firma no depende del índice: se calcula sin el lock
+        firma = firmar(titulo, descripcion)
+        if firma is None:
+            return []
+        claves = _claves_bandas(np.frombuffer(firma, dtype=np.uint32))
+        with self.lock:
+            bandas = self._cubetas.get(usuario_id)
+            if bandas is None:
+                return []
+            candidatas = set()
+            for cubetas, clave in zip(bandas, claves):
+                actual = cubetas.get(clave)
+                if actual is None:
+                    continue
+                if isinstance(actual, list):
+                    candidatas.update(actual[:_MAX_CANDIDATAS])
+                else:
+                    candidatas.add(actual)
+            candidatas.discard(excluir)
+            ids = sorted(candidatas)[:_MAX_CANDIDATAS]
+            if not ids:
+                return []
+            firmas = b''.join(self._firmas[i][1] for i in ids)
+        # Similitud con todas las candidatas en una operación
+        matriz = np.frombuffer(firmas, dtype=np.uint32).reshape(len(ids), PERMUTACIONES)
+        similitudes = (matriz == np.frombuffer(firma, dtype=np.uint32)).mean(axis=1)
+        pares = [(round(float(s), 3), i) for s, i in zip(similitudes, ids) if s >= umbral]
+        pares.sort(key=lambda par: (-par[0], par[1]))
+        return pares[:limite]
+
+    def __len__(self):
+        return len(self._firmas)
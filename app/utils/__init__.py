@@ -12,6 +12,7 @@ from .validators import (
     sanitizar_string,
     validar_id_positivo
 )
+from .schema import Esquema, Campo, unir_errores
 
 __all__ = [
     'validar_email',
@@ -19,5 +20,8 @@ __all__ = [
     'validar_prioridad',
     'validar_rol',
     'sanitizar_string',
-    'validar_id_positivo'
+    'validar_id_positivo',
+    'Esquema',
+    'Campo',
+    'unir_errores'
 ]
@@ -0,0 +1,221 @@
+# app/utils/admission.py
+"""
+Control de admisión
+Limita el ritmo de cada cliente (token bucket) y las peticiones en curso por
+clase de ruta; cuando la espera estimada supera el objetivo, la petición se
+rechaza al momento en lugar de acumularse hasta que todo venza a la vez
+"""
+
+import collections
+import math
+import threading
+import time
+
+
+class CubosPorCliente:
+    """
+    Token bucket por cliente
+
+    Cada cliente tiene hasta 'rafaga' fichas que se reponen a 'tasa' por
+    segundo; cada petición gasta una. Los clientes se guardan en un
+    OrderedDict acotado: al superar max_clientes se olvida el menos reciente
+    (vuelve con el cubo lleno).
+
+    Attributes:
+        tasa (float): Fichas por segundo
+        rafaga (int): Capacidad del cubo
+        max_clientes (int): Clientes recordados como máximo
+    """
+
+    def __init__(self, tasa, rafaga, max_clientes=10000):
+        """
+        Args:
+            tasa: Fichas por segundo
+            rafaga: Capacidad del cubo
+            max_clientes: Clientes recordados como máximo
+        """
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.max_clientes = max_clientes
+        self._cubos = collections.OrderedDict()  # cliente -> [fichas, instante]
+        self._lock = threading.Lock()
+
+    def tomar(self, cliente):
+        """
+        Gasta una ficha del cliente
+
+        Args:
+            cliente: Identificador del cliente
+
+        Returns:
+            float: 0 si hay ficha, o segundos hasta la siguiente
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            cubo = self._cubos.get(cliente)
+            if cubo is None:
+                cubo = self._cubos[cliente] = [self.rafaga, ahora]
+                if len(self._cubos) > self.max_clientes:
+                    self._cubos.popitem(last=False)
+            else:
+                self._cubos.move_to_end(cliente)
+                cubo[0] = min(self.rafaga, cubo[0] + (ahora - cubo[1]) * self.tasa)
+                cubo[1] = ahora
+            if cubo[0] >= 1:
+                cubo[0] -= 1
+                return 0.0
+            return (1 - cubo[0]) / self.tasa
+
+    def __len__(self):
+        """Clientes recordados"""
+        return len(self._cubos)
+
+
+class Presupuesto:
+    """
+    Peticiones en curso de una clase de ruta
+
+    Admite hasta max_en_curso a la vez; las siguientes esperan en una cola
+    de hasta max_cola. La espera de una petición nueva se estima con la
+    cola y la media móvil del tiempo de servicio; si supera el objetivo (o
+    la cola está llena) se rechaza sin esperar.
+
+    Attributes:
+        nombre (str): Nombre de la clase
+        max_en_curso (int): Peticiones atendidas a la vez
+        max_cola (int): Peticiones esperando como máximo
+        objetivo (float): Espera máxima aceptable en segundos
+        en_curso (int): Peticiones atendiéndose
+        en_cola (int): Peticiones esperando
+        servicio (float): Media móvil del tiempo de servicio en segundos
+    """
+
+    # Peso de la última observación en la media móvil del servicio
+    SUAVIZADO = 0.1
+
+    def __init__(self, nombre, max_en_curso, max_cola, objetivo):
+        """
+        Args:
+            nombre: Nombre de la clase
+            max_en_curso: Peticiones atendidas a la vez
+            max_cola: Peticiones esperando como máximo
+            objetivo: Espera máxima aceptable en segundos
+        """
+        self.nombre = nombre
+        self.max_en_curso = max_en_curso
+        self.max_cola = max_cola
+        self.objetivo = objetivo
+        self.en_curso = 0
+        self.en_cola = 0
+        self.servicio = 0.0
+        self._condicion = threading.Condition()
+
+    def estimar_espera(self):
+        """
+        Espera estimada de una petición que llega ahora (sin lock: aproximada)
+
+        Returns:
+            float: Segundos (0 si hay hueco libre)
+        """
+        if self.en_curso < self.max_en_curso and not self.en_cola:
+            return 0.0
+        return (self.en_cola + 1) * self.servicio / self.max_en_curso
+
+    def admitir(self, esperado=0.0):
+        """
+        Ocupa un hueco, esperando en la cola si la espera estimada lo permite
+
+        Args:
+            esperado: Segundos que la petición ya esperó antes de llegar aquí
+
+        Returns:
+            float: None si se admitió; si no, segundos de espera estimados
+        """
+        with self._condicion:
+            if self.en_curso < self.max_en_curso and not self.en_cola:
+                if esperado > self.objetivo:
+                    return esperado
+                self.en_curso += 1
+                return None
+            estimada = esperado + self.estimar_espera()
+            if estimada > self.objetivo or self.en_cola >= self.max_cola:
+                return max(estimada, self.servicio)
+            self.en_cola += 1
+            try:
+                limite = time.monotonic() + self.objetivo - esperado
+                while self.en_curso >= self.max_en_curso:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        return max(self.estimar_espera(), self.servicio)
+                    self._condicion.wait(restante)
+            finally:
+                self.en_cola -= 1
+            self.en_curso += 1
+            return None
+
+    def liberar(self, segundos):
+        """
+        Libera un hueco y actualiza el tiempo de servicio
+
+        Args:
+            segundos: Lo que tardó la petición admitida
+        """
+        with self._condicion:
+            self.en_curso -= 1
+            if self.servicio:
+                self.servicio += self.SUAVIZADO * (segundos - self.servicio)
+            else:
+                self.servicio = segundos
+            self._condicion.notify()
+
+
+class ControlAdmision:
+    """
+    Control de admisión de la aplicación (uno por proceso)
+
+    Cada worker aplica sus propios límites: con N workers la capacidad
+    total es N veces la configurada.
+
+    Attributes:
+        cubos (CubosPorCliente): Límite por cliente (None si está desactivado)
+        presupuestos (dict): nombre de clase -> Presupuesto
+    """
+
+    def __init__(self, clases, tasa_cliente=0, rafaga_cliente=20, max_clientes=10000):
+        """
+        Args:
+            clases: Diccionario clase -> (max_en_curso, max_cola, objetivo_ms)
+            tasa_cliente: Peticiones por segundo por cliente (0: sin límite)
+            rafaga_cliente: Ráfaga permitida por cliente
+            max_clientes: Clientes recordados como máximo
+        """
+        self.cubos = (CubosPorCliente(tasa_cliente, rafaga_cliente, max_clientes)
+                      if tasa_cliente > 0 else None)
+        self.presupuestos = {
+            nombre: Presupuesto(nombre, max_en_curso, max_cola, objetivo_ms / 1000)
+            for nombre, (max_en_curso, max_cola, objetivo_ms) in clases.items()
+        }
+
+    def limitar_cliente(self, cliente):
+        """
+        Aplica el token bucket del cliente
+
+        Returns:
+            float: 0 si puede continuar, o segundos hasta que pueda
+        """
+        if self.cubos is None:
+            return 0.0
+        return self.cubos.tomar(cliente)
+
+
+def segundos_reintento(segundos):
+    """
+    Valor de la cabecera Retry-After
+
+    Args:
+        segundos: Espera estimada
+
+    Returns:
+        str: Segundos enteros, al menos 1
+    """
+    return str(max(1, math.ceil(segundos)))
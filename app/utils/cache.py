@@ -0,0 +1,272 @@
+# app/utils/cache.py
+"""
+Cachés
+CacheSWR guarda una respuesta entera durante un tiempo de frescura; pasado
+ese tiempo, y durante una ventana de obsolescencia, la sigue sirviendo al
+momento mientras un único hilo de fondo la recarga. ConsultasCompartidas
+evita repetir la misma consulta dentro de un lote de peticiones.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class CacheSWR:
+    """
+    Caché de un único valor con frescura y ventana obsoleta
+
+    - Fresca (edad <= fresco): se sirve sin más.
+    - Obsoleta (edad <= fresco + obsoleto): se sirve y, si no hay ya uno en
+      marcha, se lanza un refresco en un hilo de fondo.
+    - Sin valor, caducada o invalidada: la carga es síncrona y de un solo
+      vuelo (las peticiones simultáneas esperan a la misma carga).
+
+    invalidar() sube una generación; los valores (y los refrescos en curso)
+    de una generación anterior se descartan. Con compartir_generacion() la
+    generación vive en memoria compartida, así que una escritura en un
+    worker invalida la caché de todos.
+
+    Attributes:
+        nombre (str): Nombre de la caché (etiqueta de las métricas)
+        fresco (float): Segundos en los que el valor se sirve sin refrescar
+        obsoleto (float): Segundos adicionales en los que se sirve refrescando
+        aciertos (int): Valores frescos servidos
+        obsoletos (int): Valores obsoletos servidos
+        fallos (int): Cargas síncronas (sin valor utilizable)
+        refrescos (int): Cargas correctas (síncronas o de fondo)
+        refrescos_fallidos (int): Cargas que lanzaron una excepción
+    """
+
+    def __init__(self, nombre, cargar, fresco=5.0, obsoleto=60.0):
+        """
+        Args:
+            nombre: Nombre de la caché
+            cargar: Función sin argumentos que devuelve el valor (lanza si falla)
+            fresco: Segundos de frescura
+            obsoleto: Segundos de la ventana obsoleta
+        """
+        self.nombre = nombre
+        self.fresco = fresco
+        self.obsoleto = obsoleto
+        self.aciertos = 0
+        self.obsoletos = 0
+        self.fallos = 0
+        self.refrescos = 0
+        self.refrescos_fallidos = 0
+        self._cargar = cargar
+        self._generacion = _Generacion()
+        self._valor = None
+        self._cargado_en = None
+        self._generacion_valor = None
+        self._cargando = False
+        self._refrescando = False
+        self._condicion = threading.Condition()
+
+    def configurar(self, fresco, obsoleto):
+        """
+        Cambia los tiempos y descarta el valor guardado
+
+        Args:
+            fresco: Segundos de frescura (0 desactiva la caché)
+            obsoleto: Segundos de la ventana obsoleta
+        """
+        with self._condicion:
+            self.fresco = fresco
+            self.obsoleto = obsoleto
+            self._cargado_en = None
+
+    def compartir_generacion(self):
+        """
+        Mueve la generación a memoria compartida
+
+        Debe llamarse antes de forkear los workers para que la hereden.
+        """
+        with self._condicion:
+            self._generacion = _GeneracionCompartida(self._generacion.valor)
+
+    @property
+    def activa(self):
+        """Si la caché guarda valores (fresco > 0)"""
+        return self.fresco > 0
+
+    def invalidar(self):
+        """Descarta el valor actual y los refrescos en curso"""
+        self._generacion.incrementar()
+
+    def edad(self):
+        """
+        Edad del valor guardado
+
+        Returns:
+            float: Segundos desde la carga, o None si no hay valor vigente
+        """
+        with self._condicion:
+            if self._cargado_en is None or self._generacion_valor != self._generacion.valor:
+                return None
+            return time.monotonic() - self._cargado_en
+
+    def obtener(self):
+        """
+        Obtiene el valor, cargándolo o refrescándolo si hace falta
+
+        Returns:
+            tuple: (valor, segundos de edad)
+
+        Raises:
+            Exception: La de la función de carga si la carga síncrona falla
+        """
+        if not self.activa:
+            return self._cargar(), 0.0
+        with self._condicion:
+            while True:
+                vigente = self._vigente()
+                if vigente is not None:
+                    return vigente
+                if not self._cargando:
+                    break
+                self._condicion.wait()
+            self._cargando = True
+            self.fallos += 1
+            generacion = self._generacion.valor
+        try:
+            valor = self._cargar()
+        except Exception:
+            with self._condicion:
+                self.refrescos_fallidos += 1
+                self._cargando = False
+                self._condicion.notify_all()
+            raise
+        with self._condicion:
+            self.refrescos += 1
+            self._guardar(valor, generacion)
+            self._cargando = False
+            self._condicion.notify_all()
+        return valor, 0.0
+
+    def _vigente(self):
+        """
+        Valor fresco u obsoleto (con el lock tomado); lanza el refresco si toca
+
+        Returns:
+            tuple: (valor, edad) o None si hay que cargar
+        """
+        if self._cargado_en is None or self._generacion_valor != self._generacion.valor:
+            return None
+        edad = time.monotonic() - self._cargado_en
+        if edad <= self.fresco:
+            self.aciertos += 1
+            return self._valor, edad
+        if edad > self.fresco + self.obsoleto:
+            return None
+        self.obsoletos += 1
+        if not self._refrescando:
+            self._refrescando = True
+            threading.Thread(target=self._refrescar, args=(self._generacion.valor,),
+                             daemon=True, name=f'cache-{self.nombre}').start()
+        return self._valor, edad
+
+    def _refrescar(self, generacion):
+        """Recarga el valor en segundo plano; si falla se sigue sirviendo el obsoleto"""
+        try:
+            valor = self._cargar()
+        except Exception as e:
+            logger.warning("Fallo al refrescar la caché %s: %s", self.nombre, e)
+            with self._condicion:
+                self.refrescos_fallidos += 1
+                self._refrescando = False
+            return
+        with self._condicion:
+            self.refrescos += 1
+            self._guardar(valor, generacion)
+            self._refrescando = False
+
+    def _guardar(self, valor, generacion):
+        """Guarda el valor si su generación sigue vigente (con el lock tomado)"""
+        if generacion == self._generacion.valor:
+            self._valor = valor
+            self._cargado_en = time.monotonic()
+            self._generacion_valor = generacion
+
+
+class ConsultasCompartidas:
+    """
+    Memo de consultas de vida corta (por ejemplo, un lote de peticiones)
+
+    Cada clave se calcula una sola vez; las llamadas simultáneas con la
+    misma clave esperan al primer cálculo y reciben su resultado (o su
+    excepción).
+    """
+
+    def __init__(self):
+        self._futuros = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, calcular):
+        """
+        Devuelve el resultado de la clave, calculándolo la primera vez
+
+        Args:
+            clave: Clave hashable de la consulta
+            calcular: Función sin argumentos que la resuelve
+
+        Returns:
+            El resultado de calcular()
+        """
+        with self._lock:
+            futuro = self._futuros.get(clave)
+            propio = futuro is None
+            if propio:
+                futuro = self._futuros[clave] = Future()
+        if propio:
+            try:
+                futuro.set_result(calcular())
+            except Exception as e:
+                futuro.set_exception(e)
+        return futuro.result()
+
+    def limpiar(self):
+        """Olvida los resultados (tras una escritura que los deja obsoletos)"""
+        with self._lock:
+            self._futuros.clear()
+
+
+class _Generacion:
+    """Contador de generación de un proceso"""
+
+    def __init__(self):
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def incrementar(self):
+        """Sube la generación (sin perder incrementos entre hilos)"""
+        with self._lock:
+            self.valor += 1
+
+
+class _GeneracionCompartida:
+    """Contador de generación en memoria compartida entre procesos"""
+
+    def __init__(self, valor):
+        self._compartido = multiprocessing.Value('Q', valor, lock=True)
+        self._crudo = self._compartido.get_obj()
+
+    @property
+    def valor(self):
+        """Generación actual (lectura sin lock: un entero alineado de 8 bytes)"""
+        return self._crudo.value
+
+    def incrementar(self):
+        """
+        Sube la generación con el lock entre procesos
+
+        Un incremento perdido dejaría en la generación final un refresco que
+        empezó antes de una de las dos escrituras, y su valor obsoleto se
+        aceptaría como actual.
+        """
+        with self._compartido.get_lock():
+            self._compartido.value += 1
@@ -0,0 +1,148 @@
+# app/utils/events.py
+"""
+Buffer de eventos para Server-Sent Events
+Guarda los últimos eventos ya serializados en formato SSE y despierta a
+los suscriptores que esperan uno nuevo
+"""
+
+import collections
+import json
+import threading
+
+from app.utils.secuencia import MarcaContigua
+
+
+class BufferEventos:
+    """
+    Buffer acotado de eventos con IDs crecientes
+
+    Cada evento se serializa una sola vez al publicarlo, así que el coste
+    de enviarlo no crece con el número de suscriptores. Un cliente que se
+    reconecta con Last-Event-ID recibe los eventos posteriores mientras
+    sigan en el buffer.
+
+    Los IDs pueden llegar desordenados (ShardedTaskStore numera los cambios
+    sin lock global): cada evento se coloca en su sitio y solo se entregan
+    hasta el último ID cuyos anteriores ya llegaron todos (ultimo_id).
+
+    Attributes:
+        capacidad (int): Eventos que se conservan para reanudar
+    """
+
+    def __init__(self, capacidad=1000):
+        """
+        Args:
+            capacidad: Eventos que se conservan para reanudar
+        """
+        self.capacidad = capacidad
+        self._eventos = collections.deque(maxlen=capacidad)  # (id, usuarios, trama)
+        self._condicion = threading.Condition()
+        self._marca = MarcaContigua()
+
+    @property
+    def ultimo_id(self):
+        """ID del último evento publicado cuyos anteriores ya se publicaron"""
+        return self._marca.valor
+
+    def configurar(self, capacidad):
+        """
+        Cambia la capacidad conservando los eventos más recientes
+
+        Args:
+            capacidad: Nueva capacidad
+        """
+        with self._condicion:
+            self.capacidad = capacidad
+            self._eventos = collections.deque(self._eventos, maxlen=capacidad)
+
+    def vaciar(self, ultimo_id=0):
+        """
+        Descarta los eventos (por ejemplo, al reemplazar el almacén)
+
+        Args:
+            ultimo_id: ID a partir del cual continúa la numeración
+        """
+        with self._condicion:
+            self._eventos.clear()
+            self._marca = MarcaContigua(ultimo_id)
+            self._condicion.notify_all()
+
+    def publicar(self, evento_id, tipo, datos, usuarios=None):
+        """
+        Publica un evento y despierta a los suscriptores
+
+        Args:
+            evento_id: ID creciente del evento (en 'reset', la numeración
+                continúa desde él aunque falten los anteriores)
+            tipo: Nombre del evento SSE
+            datos: Datos serializables a JSON
+            usuarios: Tupla de usuario_id afectados (None: todos los suscriptores)
+        """
+        trama = (f"id: {evento_id}\nevent: {tipo}\n"
+                 f"data: {json.dumps(datos, ensure_ascii=False)}\n\n").encode('utf-8')
+        with self._condicion:
+            eventos = self._eventos
+            if len(eventos) == eventos.maxlen:
+                eventos.popleft()
+            posicion = len(eventos)
+            while posicion and eventos[posicion - 1][0] > evento_id:
+                posicion -= 1
+            eventos.insert(posicion, (evento_id, usuarios, trama))
+            anterior = self._marca.valor
+            if tipo == 'reset':
+                self._marca.reiniciar(evento_id)
+            else:
+                self._marca.llegar(evento_id)
+            if self._marca.valor != anterior:
+                self._condicion.notify_all()
+
+    def desde(self, ultimo_id, usuario_id=None):
+        """
+        Eventos posteriores a un ID
+
+        Args:
+            ultimo_id: ID del último evento que tiene el cliente
+            usuario_id: Solo eventos de ese usuario (opcional)
+
+        Returns:
+            tuple: (lista de tramas, completo, nuevo ultimo_id). completo es
+                False si algún evento posterior a ultimo_id ya salió del
+                buffer o la numeración se reinició
+        """
+        with self._condicion:
+            actual = self._marca.valor
+            if ultimo_id > actual:
+                return [], False, actual
+            nuevos = []
+            completo = True
+            for evento_id, usuarios, trama in reversed(self._eventos):
+                if evento_id <= ultimo_id:
+                    break
+                if evento_id > actual:
+                    continue
+                if usuario_id is None or usuarios is None or usuario_id in usuarios:
+                    nuevos.append(trama)
+            else:
+                # Se recorrió todo el buffer: ¿falta algo anterior al más antiguo?
+                mas_antiguo = self._eventos[0][0] if self._eventos else actual + 1
+                completo = mas_antiguo <= ultimo_id + 1 or ultimo_id == actual
+            nuevos.reverse()
+            return nuevos, completo, actual
+
+    def esperar(self, ultimo_id, timeout):
+        """
+        Bloquea hasta que haya un evento posterior a ultimo_id o venza el timeout
+
+        Args:
+            ultimo_id: ID del último evento que tiene el suscriptor
+            timeout: Segundos máximos de espera
+
+        Returns:
+            bool: True si hay eventos nuevos (o la numeración se reinició)
+        """
+        with self._condicion:
+            return self._condicion.wait_for(lambda: self._marca.valor != ultimo_id, timeout)
+
+    def __len__(self):
+        """Eventos en el buffer"""
+        return len(self._eventos)
@@ -0,0 +1,361 @@
+# app/utils/memory.py
+"""
+Contabilidad de memoria
+Estimación del tamaño de estructuras en memoria (almacén de tareas e
+índices), instantáneas de tracemalloc bajo demanda con comparación entre
+ellas y muestreo opcional del pico de memoria reservada por petición
+"""
+
+import collections
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+# Tipos sin referencias a otros objetos que interese recorrer
+_ATOMICOS = (int, float, complex, bool, str, bytes, bytearray, range, type(None))
+
+# Código, clases y módulos: no son datos del almacén, no se recorren ni se cuentan
+_IGNORADOS = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+              types.MethodType, types.CodeType, types.FrameType)
+
+_SECUENCIAS = (list, tuple, set, frozenset, collections.deque)
+
+# Reservas de tracemalloc que no son de la aplicación
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+AGRUPACIONES = ('lineno', 'filename', 'traceback')
+
+
+def estimar_tamano(objeto, vistos=None, muestra=1000):
+    """
+    Estima los bytes que ocupa un objeto con todo lo que referencia
+
+    Recorre diccionarios, secuencias y atributos (__dict__ y __slots__)
+    sumando sys.getsizeof de cada objeto una sola vez. De los contenedores
+    con más de 'muestra' elementos solo recorre una muestra repartida y
+    extrapola, así que el coste no crece con el tamaño del almacén. Los
+    arrays de numpy cuentan sus datos si son suyos (no las vistas).
+
+    Args:
+        objeto: Objeto a medir
+        vistos: Conjunto de id() ya contados (para no contar dos veces lo
+            compartido entre varias llamadas)
+        muestra: Elementos recorridos como máximo por contenedor
+
+    Returns:
+        int: Bytes estimados
+    """
+    vistos = set() if vistos is None else vistos
+    total = 0.0
+    pendientes = [(objeto, 1.0)]
+    while pendientes:
+        actual, factor = pendientes.pop()
+        if id(actual) in vistos or isinstance(actual, _IGNORADOS):
+            continue
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual) * factor
+        if isinstance(actual, _ATOMICOS):
+            continue
+
+        if isinstance(actual, dict):
+            hijos, n = actual.items(), len(actual)
+        elif isinstance(actual, _SECUENCIAS):
+            hijos, n = actual, len(actual)
+        else:
+            hijos = []
+            atributos = getattr(actual, '__dict__', None)
+            if atributos is not None:
+                hijos.append(atributos)
+            for clase in type(actual).__mro__:
+                for nombre in clase.__dict__.get('__slots__', ()):
+                    if hasattr(actual, nombre):
+                        hijos.append(getattr(actual, nombre))
+            n = len(hijos)
+        if not n:
+            continue
+
+        paso = max(1, n // muestra)
+        tomados = list(itertools.islice(hijos, 0, None, paso))
+        factor_hijos = factor * n / len(tomados)
+        for hijo in tomados:
+            if isinstance(actual, dict):
+                pendientes.append((hijo[0], factor_hijos))
+                pendientes.append((hijo[1], factor_hijos))
+            else:
+                pendientes.append((hijo, factor_hijos))
+    return int(total)
+
+
+def uso_proceso():
+    """
+    Memoria residente del proceso
+
+    Returns:
+        dict: {'rss_bytes': actual (None si no se puede leer),
+            'rss_max_bytes': pico desde el arranque (None si no se puede leer)}
+    """
+    rss = rss_max = None
+    try:
+        with open('/proc/self/statm', encoding='ascii') as archivo:
+            rss = int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        rss_max = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo da en KiB, macOS en bytes
+        rss_max = rss_max if sys.platform == 'darwin' else rss_max * 1024
+    except ImportError:
+        pass
+    return {'rss_bytes': rss, 'rss_max_bytes': rss_max}
+
+
+def _estadistica(estadistica, agrupar):
+    """Convierte un tracemalloc.Statistic o StatisticDiff en un dict"""
+    marco = estadistica.traceback[0]
+    resultado = {'archivo': marco.filename}
+    if agrupar != 'filename':
+        resultado['linea'] = marco.lineno
+    resultado['bytes'] = estadistica.size
+    resultado['bloques'] = estadistica.count
+    if agrupar == 'traceback':
+        resultado['traza'] = [f"{m.filename}:{m.lineno}" for m in estadistica.traceback]
+    if isinstance(estadistica, tracemalloc.StatisticDiff):
+        resultado['diferencia_bytes'] = estadistica.size_diff
+        resultado['diferencia_bloques'] = estadistica.count_diff
+    return resultado
+
+
+class MonitorMemoria:
+    """
+    Instantáneas de tracemalloc y picos de memoria por ruta
+
+    La primera instantánea arranca tracemalloc: lo reservado antes no
+    aparece en ninguna. Se conservan las últimas 'maximo' instantáneas del
+    proceso (con varios workers cada uno tiene las suyas). detener() para
+    tracemalloc y libera las instantáneas.
+
+    Con el muestreo por ruta activo (MEMORY_ROUTE_PEAKS_ENABLED) tracemalloc
+    queda activo desde el arranque y una fracción de las peticiones mide el
+    pico reservado durante la petición. El pico de tracemalloc es del
+    proceso, así que se mide una petición a la vez (las que coinciden con
+    otra medida no se muestrean) y lo que reservan a la vez otros hilos
+    también cuenta: es una cota superior.
+
+    Attributes:
+        marcos (int): Marcos de pila guardados por reserva
+        maximo (int): Instantáneas conservadas
+        picos_activos (bool): Muestreo de picos por ruta
+        proporcion (float): Fracción de peticiones muestreadas
+    """
+
+    def __init__(self):
+        """Crea un monitor sin instantáneas y con el muestreo por ruta desactivado"""
+        self.marcos = 1
+        self.maximo = 5
+        self.picos_activos = False
+        self.proporcion = 0.0
+        self._instantaneas = collections.OrderedDict()  # id -> (fecha, Snapshot)
+        self._siguiente = 1
+        self._lock = threading.Lock()
+        self._lock_pico = threading.Lock()
+        self._picos = {}  # ruta -> [muestras, suma, máximo]
+
+    def configurar(self, config):
+        """
+        Lee la configuración de la aplicación
+
+        Args:
+            config: app.config
+        """
+        self.marcos = max(1, config.get('MEMORY_TRACE_FRAMES', 1))
+        self.maximo = max(2, config.get('MEMORY_MAX_SNAPSHOTS', 5))
+        self.picos_activos = config.get('MEMORY_ROUTE_PEAKS_ENABLED', False)
+        self.proporcion = config.get('MEMORY_ROUTE_PEAKS_SAMPLE_RATE', 0.1)
+        if self.picos_activos:
+            self._asegurar_traza()
+
+    def _asegurar_traza(self):
+        """Arranca tracemalloc si no está activo"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.marcos)
+
+    def estado(self):
+        """
+        Estado de tracemalloc en este proceso
+
+        Returns:
+            dict: {'activo', 'marcos', 'actual_bytes', 'pico_bytes',
+                'sobrecarga_bytes', 'instantaneas': [ids]}
+        """
+        activo = tracemalloc.is_tracing()
+        actual, pico = tracemalloc.get_traced_memory() if activo else (0, 0)
+        with self._lock:
+            ids = list(self._instantaneas)
+        return {
+            'activo': activo,
+            'marcos': tracemalloc.get_traceback_limit() if activo else self.marcos,
+            'actual_bytes': actual,
+            'pico_bytes': pico,
+            'sobrecarga_bytes': tracemalloc.get_tracemalloc_memory() if activo else 0,
+            'instantaneas': ids
+        }
+
+    # ------------------------------------------------------------------
+    # Instantáneas
+    # ------------------------------------------------------------------
+
+    def capturar(self, limite=10, agrupar='lineno'):
+        """
+        Toma una instantánea (arranca tracemalloc si hace falta)
+
+        Args:
+            limite: Sitios de reserva incluidos en el resumen
+            agrupar: 'lineno', 'filename' o 'traceback'
+
+        Returns:
+            dict: Resumen (ver resumir) con 'iniciada': True si esta llamada
+                arrancó tracemalloc
+        """
+        iniciada = not tracemalloc.is_tracing()
+        self._asegurar_traza()
+        instantanea = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        with self._lock:
+            numero = self._siguiente
+            self._siguiente += 1
+            self._instantaneas[numero] = (time.time(), instantanea)
+            while len(self._instantaneas) > self.maximo:
+                self._instantaneas.popitem(last=False)
+        resumen = self.resumir(numero, limite, agrupar)
+        resumen['iniciada'] = iniciada
+        return resumen
+
+    def _obtener(self, numero):
+        with self._lock:
+            return self._instantaneas.get(numero)
+
+    def resumir(self, numero, limite=10, agrupar='lineno'):
+        """
+        Sitios que más memoria tienen reservada en una instantánea
+
+        Args:
+            numero: ID de la instantánea
+            limite: Sitios incluidos
+            agrupar: 'lineno', 'filename' o 'traceback'
+
+        Returns:
+            dict: {'id', 'fecha', 'pid', 'bytes', 'bloques', 'top': [{archivo,
+                linea, bytes, bloques}]}, o None si no existe
+        """
+        guardada = self._obtener(numero)
+        if guardada is None:
+            return None
+        fecha, instantanea = guardada
+        estadisticas = instantanea.statistics(agrupar)
+        return {
+            'id': numero,
+            'fecha': fecha,
+            'pid': os.getpid(),
+            'bytes': sum(e.size for e in estadisticas),
+            'bloques': sum(e.count for e in estadisticas),
+            'top': [_estadistica(e, agrupar) for e in estadisticas[:limite]]
+        }
+
+    def comparar(self, desde, hasta, limite=10, agrupar='lineno'):
+        """
+        Sitios cuya memoria reservada más cambió entre dos instantáneas
+
+        Args:
+            desde: ID de la instantánea anterior
+            hasta: ID de la instantánea posterior
+            limite: Sitios incluidos
+            agrupar: 'lineno', 'filename' o 'traceback'
+
+        Returns:
+            dict: {'desde', 'hasta', 'diferencia_bytes', 'top': [{archivo,
+                linea, bytes, bloques, diferencia_bytes, diferencia_bloques}]},
+                o None si alguna no existe
+        """
+        anterior, posterior = self._obtener(desde), self._obtener(hasta)
+        if anterior is None or posterior is None:
+            return None
+        diferencias = posterior[1].compare_to(anterior[1], agrupar)
+        return {
+            'desde': desde,
+            'hasta': hasta,
+            'segundos': round(posterior[0] - anterior[0], 3),
+            'diferencia_bytes': sum(d.size_diff for d in diferencias),
+            'top': [_estadistica(d, agrupar) for d in diferencias[:limite]]
+        }
+
+    def detener(self):
+        """Descarta las instantáneas y para tracemalloc (salvo con el muestreo por ruta)"""
+        with self._lock:
+            self._instantaneas.clear()
+        if not self.picos_activos:
+            tracemalloc.stop()
+
+    # ------------------------------------------------------------------
+    # Picos por petición
+    # ------------------------------------------------------------------
+
+    def iniciar_pico(self):
+        """
+        Empieza a medir el pico de la petición actual si toca muestrearla
+
+        Returns:
+            int: Memoria reservada al empezar (None si no se mide)
+        """
+        if not self.picos_activos or not tracemalloc.is_tracing():
+            return None
+        if random.random() >= self.proporcion or not self._lock_pico.acquire(blocking=False):
+            return None
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def terminar_pico(self, ruta, inicio):
+        """
+        Termina la medida de iniciar_pico() y la acumula por ruta
+
+        Args:
+            ruta: Regla de la ruta (con el método)
+            inicio: Valor devuelto por iniciar_pico()
+
+        Returns:
+            int: Bytes de pico por encima de lo reservado al empezar
+        """
+        try:
+            pico = max(0, tracemalloc.get_traced_memory()[1] - inicio)
+        finally:
+            self._lock_pico.release()
+        with self._lock:
+            acumulado = self._picos.setdefault(ruta, [0, 0, 0])
+            acumulado[0] += 1
+            acumulado[1] += pico
+            acumulado[2] = max(acumulado[2], pico)
+        return pico
+
+    def picos(self):
+        """
+        Picos medidos por ruta
+
+        Returns:
+            dict: ruta -> {'muestras', 'medio_bytes', 'max_bytes'}
+        """
+        with self._lock:
+            return {ruta: {'muestras': n, 'medio_bytes': suma // n, 'max_bytes': maximo}
+                    for ruta, (n, suma, maximo) in sorted(self._picos.items())}
+
+
+# Monitor global de la aplicación
+monitor_memoria = MonitorMemoria()
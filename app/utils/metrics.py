@@ -0,0 +1,244 @@
+# app/utils/metrics.py
+"""
+Métricas en formato Prometheus
+Contadores e histogramas con un fragmento por hilo: cada hilo escribe solo
+en su propio diccionario, sin locks, y la exposición suma los fragmentos
+"""
+
+import bisect
+import threading
+
+# Límites superiores (segundos) de los buckets de latencia
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites superiores (bytes) para histogramas de memoria: de 4 KiB a 1 GiB
+BUCKETS_BYTES = tuple(4 ** n * 1024 for n in range(1, 11))
+
+
+class RegistroMetricas:
+    """
+    Registro de contadores, histogramas y gauges
+
+    Las escrituras van al fragmento del hilo actual (un dict), así que el
+    registro no añade contención entre hilos. Los fragmentos de hilos que
+    ya terminaron se acumulan en un agregado para no crecer sin límite.
+    Las métricas son por proceso: con varios workers cada uno expone las suyas.
+    """
+
+    def __init__(self):
+        """Inicializa un registro vacío"""
+        self._local = threading.local()
+        self._fragmentos = []  # (hilo, dict)
+        self._retirados = {}
+        self._lock = threading.Lock()  # solo para altas y exposición
+        self._descripciones = {}
+        self._buckets = {}
+        self._gauges = {}
+
+    def _fragmento(self):
+        """Devuelve el diccionario del hilo actual, creándolo si hace falta"""
+        fragmento = getattr(self._local, 'fragmento', None)
+        if fragmento is None:
+            fragmento = {}
+            self._local.fragmento = fragmento
+            with self._lock:
+                self._fragmentos.append((threading.current_thread(), fragmento))
+        return fragmento
+
+    def describir(self, nombre, tipo, ayuda, buckets=BUCKETS):
+        """
+        Declara una métrica para la exposición
+
+        Args:
+            nombre: Nombre de la métrica
+            tipo: 'counter', 'histogram' o 'gauge'
+            ayuda: Texto de ayuda
+            buckets: Límites de los buckets de un histograma (default: BUCKETS)
+        """
+        self._descripciones[nombre] = (tipo, ayuda)
+        self._buckets[nombre] = buckets
+
+    def incrementar(self, nombre, etiquetas=(), valor=1):
+        """
+        Incrementa un contador
+
+        Args:
+            nombre: Nombre de la métrica
+            etiquetas: Tupla de pares (clave, valor)
+            valor: Cantidad a sumar
+        """
+        fragmento = self._fragmento()
+        clave = (nombre, etiquetas)
+        fragmento[clave] = fragmento.get(clave, 0) + valor
+
+    def observar(self, nombre, etiquetas, valor):
+        """
+        Registra una observación en un histograma
+
+        Args:
+            nombre: Nombre de la métrica
+            etiquetas: Tupla de pares (clave, valor)
+            valor: Valor observado (segundos, o la unidad de sus buckets)
+        """
+        buckets = self._buckets.get(nombre, BUCKETS)
+        fragmento = self._fragmento()
+        clave = (nombre, etiquetas)
+        histograma = fragmento.get(clave)
+        if histograma is None:
+            # Un contador por bucket + el bucket +Inf, suma y cantidad
+            histograma = fragmento[clave] = [0] * (len(buckets) + 3)
+        histograma[bisect.bisect_left(buckets, valor)] += 1
+        histograma[-2] += valor
+        histograma[-1] += 1
+
+    def registrar_gauge(self, nombre, funcion):
+        """
+        Registra un gauge que se calcula en cada exposición
+
+        Args:
+            nombre: Nombre de la métrica
+            funcion: Callable que devuelve una lista de (etiquetas, valor)
+        """
+        self._gauges[nombre] = funcion
+
+    def _sumar(self, destino, origen):
+        """Suma un fragmento sobre un agregado"""
+        for clave, valor in origen.items():
+            if isinstance(valor, list):
+                acumulado = destino.get(clave)
+                if acumulado is None:
+                    destino[clave] = list(valor)
+                else:
+                    for i, v in enumerate(valor):
+                        acumulado[i] += v
+            else:
+                destino[clave] = destino.get(clave, 0) + valor
+
+    def recolectar(self):
+        """
+        Suma todos los fragmentos
+
+        Returns:
+            dict: (nombre, etiquetas) -> valor o lista del histograma
+        """
+        with self._lock:
+            vivos = []
+            for hilo, fragmento in self._fragmentos:
+                if hilo.is_alive():
+                    vivos.append((hilo, fragmento))
+                else:
+                    self._sumar(self._retirados, fragmento.copy())
+            self._fragmentos = vivos
+
+            total = {}
+            self._sumar(total, self._retirados)
+            for _, fragmento in vivos:
+                # dict.copy() es atómico frente a otros hilos
+                self._sumar(total, fragmento.copy())
+        return total
+
+    def exponer(self):
+        """
+        Genera el texto en formato de exposición de Prometheus
+
+        Returns:
+            str: Métricas en texto plano
+        """
+        por_nombre = {}
+        for (nombre, etiquetas), valor in self.recolectar().items():
+            por_nombre.setdefault(nombre, []).append((etiquetas, valor))
+        for nombre, funcion in self._gauges.items():
+            por_nombre[nombre] = list(funcion())
+
+        lineas = []
+        for nombre in sorted(por_nombre):
+            tipo, ayuda = self._descripciones.get(nombre, ('untyped', ''))
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in sorted(por_nombre[nombre], key=lambda e: e[0]):
+                if tipo == 'histogram':
+                    acumulado = 0
+                    buckets = self._buckets.get(nombre, BUCKETS)
+                    for limite, cantidad in zip(buckets + ('+Inf',), valor):
+                        acumulado += cantidad
+                        le = limite if limite == '+Inf' else repr(limite)
+                        lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', le),))} {acumulado}")
+                    lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {valor[-2]}")
+                    lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {valor[-1]}")
+                else:
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiquetas(etiquetas):
+    """Formatea las etiquetas como {clave="valor",...}"""
+    if not etiquetas:
+        return ''
+    partes = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{clave}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+# Registro global de la aplicación
+registro = RegistroMetricas()
+
+registro.describir('taskflow_http_requests_total', 'counter',
+                   'Peticiones HTTP atendidas por ruta, método y código de estado')
+registro.describir('taskflow_http_request_duration_seconds', 'histogram',
+                   'Latencia de las peticiones HTTP por ruta y método')
+registro.describir('taskflow_supabase_requests_total', 'counter',
+                   'Llamadas a Supabase por función de user_service y resultado')
+registro.describir('taskflow_supabase_request_duration_seconds', 'histogram',
+                   'Latencia de las llamadas a Supabase por función de user_service')
+registro.describir('taskflow_task_store_tasks', 'gauge',
+                   'Tareas en el almacén')
+registro.describir('taskflow_task_index_entries', 'gauge',
+                   'Entradas por índice del almacén de tareas')
+registro.describir('taskflow_task_archive_size', 'gauge',
+                   'Tamaño del archivo de tareas: tareas, bytes comprimidos y bloques')
+registro.describir('taskflow_tasks_overdue', 'gauge',
+                   'Tareas pendientes con la fecha límite (vence_en) ya pasada')
+registro.describir('taskflow_http_request_peak_alloc_bytes', 'histogram',
+                   'Pico de memoria reservada por petición muestreada, por ruta y método',
+                   BUCKETS_BYTES)
+registro.describir('taskflow_admission_rejected_total', 'counter',
+                   'Peticiones rechazadas por el control de admisión por clase y motivo')
+registro.describir('taskflow_admission_requests', 'gauge',
+                   'Peticiones en curso y en espera por clase de ruta')
+registro.describir('taskflow_cache_age_seconds', 'gauge',
+                   'Edad del valor guardado por caché (sin valor vigente: -1)')
+registro.describir('taskflow_cache_events_total', 'counter',
+                   'Eventos por caché: hit, stale, miss, refresh y refresh_error')
+
+
+def observar_peticion(ruta, metodo, estado, segundos):
+    """
+    Registra una petición HTTP atendida
+
+    Args:
+        ruta: Regla de la ruta (ej: /api/tasks/<int:task_id>)
+        metodo: Método HTTP
+        estado: Código de estado de la respuesta
+        segundos: Duración de la petición
+    """
+    registro.incrementar('taskflow_http_requests_total',
+                         (('route', ruta), ('method', metodo), ('status', estado)))
+    registro.observar('taskflow_http_request_duration_seconds',
+                      (('route', ruta), ('method', metodo)), segundos)
+
+
+def observar_supabase(funcion, resultado, segundos):
+    """
+    Registra una llamada saliente a Supabase
+
+    Args:
+        funcion: Nombre de la función de user_service
+        resultado: Código de estado HTTP o 'error'
+        segundos: Duración de la llamada
+    """
+    registro.incrementar('taskflow_supabase_requests_total',
+                         (('function', funcion), ('status', resultado)))
+    registro.observar('taskflow_supabase_request_duration_seconds',
+                      (('function', funcion),), segundos)
@@ -0,0 +1,286 @@
+# app/utils/profiler.py
+"""
+Perfilador por muestreo de peticiones
+Toma muestras de la pila de los hilos que atienden peticiones perfiladas y
+las guarda como stacks colapsados (formato de flamegraph.pl / speedscope)
+"""
+
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Profundidad máxima de pila que se registra por muestra
+PROFUNDIDAD_MAXIMA = 128
+
+
+def firmar_token(secreto, ttl=300):
+    """
+    Genera un token para perfilar una petición concreta
+
+    Se envía en la cabecera X-Profile-Token. Ejemplo:
+        python -c "from app.utils.profiler import firmar_token; print(firmar_token('clave'))"
+
+    Args:
+        secreto: SECRET_KEY de la aplicación
+        ttl: Segundos de validez
+
+    Returns:
+        str: Token con el formato '<expira>.<firma>'
+    """
+    expira = str(int(time.time()) + ttl)
+    firma = hmac.new(secreto.encode('utf-8'), expira.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{expira}.{firma}"
+
+
+def verificar_token(secreto, token):
+    """
+    Verifica un token de X-Profile-Token
+
+    Args:
+        secreto: SECRET_KEY de la aplicación
+        token: Valor de la cabecera
+
+    Returns:
+        bool: True si la firma es válida y no ha expirado (siempre False
+            sin secreto)
+    """
+    if not secreto or not token or '.' not in token:
+        return False
+    expira, firma = token.split('.', 1)
+    if not expira.isdigit() or int(expira) < time.time():
+        return False
+    esperada = hmac.new(secreto.encode('utf-8'), expira.encode('utf-8'), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(esperada, firma)
+
+
+def nombre_ruta(metodo, regla):
+    """
+    Convierte una ruta en un nombre apto para directorio
+
+    Args:
+        metodo: Método HTTP
+        regla: Regla de la ruta (ej: /api/tasks/<int:task_id>)
+
+    Returns:
+        str: Nombre como GET_api_tasks_int_task_id
+    """
+    return metodo + '_' + re.sub(r'[^A-Za-z0-9]+', '_', regla).strip('_')
+
+
+class Perfilador:
+    """
+    Perfilador por muestreo
+
+    Un único hilo muestreador recorre sys._current_frames() cada intervalo y
+    solo registra los hilos con una petición perfilada en curso. Las muestras
+    se agregan por ruta y se vuelcan periódicamente a
+    <directorio>/<ruta>/<timestamp>-<pid>.folded; las peticiones con token
+    firmado se vuelcan en su propio archivo al terminar.
+
+    Attributes:
+        activo (bool): Interruptor general (PROFILING_ENABLED)
+        proporcion (float): Fracción de peticiones perfiladas al azar
+    """
+
+    def __init__(self):
+        """Crea un perfilador desactivado"""
+        self.activo = False
+        self.proporcion = 0.0
+        self.intervalo = 0.005
+        self.directorio = 'profiles'
+        self.conservar = 20
+        self.intervalo_volcado = 10.0
+        self._secreto = ''
+        self._hilos = {}  # id de hilo -> Counter de stacks
+        self._por_ruta = {}
+        self._lock = threading.Lock()
+        self._muestreador = None
+        self._pid_muestreador = None
+        self._ultimo_volcado = time.monotonic()
+
+    def configurar(self, config):
+        """
+        Lee la configuración de la aplicación
+
+        Args:
+            config: app.config
+        """
+        self.activo = config.get('PROFILING_ENABLED', False)
+        self.proporcion = config.get('PROFILING_SAMPLE_RATE', 0.0)
+        self.intervalo = config.get('PROFILING_INTERVAL_MS', 5) / 1000
+        self.directorio = config.get('PROFILING_DIR', 'profiles')
+        self.conservar = config.get('PROFILING_KEEP', 20)
+        self.intervalo_volcado = config.get('PROFILING_FLUSH_SECONDS', 10)
+        # Con la SECRET_KEY de desarrollo cualquiera podría firmar tokens:
+        # se queda sin secreto y solo se perfila por muestreo
+        secreto = config.get('SECRET_KEY') or ''
+        if secreto == config.get('SECRET_KEY_DESARROLLO'):
+            secreto = ''
+        self._secreto = secreto
+
+    # ------------------------------------------------------------------
+    # Peticiones
+    # ------------------------------------------------------------------
+
+    def debe_perfilar(self, token):
+        """
+        Decide si se perfila la petición actual
+
+        Args:
+            token: Cabecera X-Profile-Token (o None)
+
+        Returns:
+            str: 'firmada', 'muestreo' o None
+        """
+        if token and verificar_token(self._secreto, token):
+            return 'firmada'
+        if self.proporcion > 0 and random.random() < self.proporcion:
+            return 'muestreo'
+        return None
+
+    def iniciar(self):
+        """Empieza a muestrear el hilo actual"""
+        self._asegurar_muestreador()
+        with self._lock:
+            self._hilos[threading.get_ident()] = Counter()
+
+    def terminar(self, ruta, modo):
+        """
+        Deja de muestrear el hilo actual y agrega sus muestras
+
+        Args:
+            ruta: Nombre de la ruta (ver nombre_ruta)
+            modo: 'firmada' o 'muestreo'
+        """
+        with self._lock:
+            muestras = self._hilos.pop(threading.get_ident(), None)
+            if not muestras:
+                return
+            if modo == 'firmada':
+                self._escribir(ruta, muestras, sufijo='-firmada')
+                return
+            self._por_ruta.setdefault(ruta, Counter()).update(muestras)
+            if time.monotonic() - self._ultimo_volcado >= self.intervalo_volcado:
+                self._volcar_bloqueado()
+
+    # ------------------------------------------------------------------
+    # Muestreo
+    # ------------------------------------------------------------------
+
+    def _asegurar_muestreador(self):
+        """Arranca el hilo muestreador en este proceso (tras un fork hay que recrearlo)"""
+        if self._muestreador is not None and self._pid_muestreador == os.getpid():
+            return
+        with self._lock:
+            if self._muestreador is not None and self._pid_muestreador == os.getpid():
+                return
+            self._hilos.clear()
+            self._muestreador = threading.Thread(target=self._muestrear, daemon=True,
+                                                 name='taskflow-profiler')
+            self._pid_muestreador = os.getpid()
+            self._muestreador.start()
+
+    def _muestrear(self):
+        """Bucle del hilo muestreador"""
+        while True:
+            time.sleep(self.intervalo)
+            if not self._hilos:
+                continue
+            marcos = sys._current_frames()
+            with self._lock:
+                for ident, muestras in self._hilos.items():
+                    marco = marcos.get(ident)
+                    if marco is not None:
+                        muestras[_colapsar(marco)] += 1
+
+    # ------------------------------------------------------------------
+    # Archivos
+    # ------------------------------------------------------------------
+
+    def volcar(self):
+        """Escribe a disco las muestras agregadas pendientes"""
+        with self._lock:
+            self._volcar_bloqueado()
+
+    def _volcar_bloqueado(self):
+        for ruta, muestras in self._por_ruta.items():
+            if muestras:
+                self._escribir(ruta, muestras)
+        self._por_ruta = {}
+        self._ultimo_volcado = time.monotonic()
+
+    def _escribir(self, ruta, muestras, sufijo=''):
+        """Escribe un archivo .folded y elimina los más antiguos de la ruta"""
+        carpeta = os.path.join(self.directorio, ruta)
+        os.makedirs(carpeta, exist_ok=True)
+        nombre = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}{sufijo}.folded"
+        with open(os.path.join(carpeta, nombre), 'a', encoding='utf-8') as archivo:
+            for stack, cantidad in muestras.most_common():
+                archivo.write(f"{stack} {cantidad}\n")
+
+        archivos = sorted(os.listdir(carpeta))
+        for viejo in archivos[:-self.conservar]:
+            try:
+                os.remove(os.path.join(carpeta, viejo))
+            except OSError:
+                pass
+
+    def listar(self):
+        """
+        Lista los perfiles guardados por ruta
+
+        Returns:
+            dict: ruta -> lista de archivos (más reciente al final)
+        """
+        if not os.path.isdir(self.directorio):
+            return {}
+        return {
+            ruta: sorted(os.listdir(os.path.join(self.directorio, ruta)))
+            for ruta in sorted(os.listdir(self.directorio))
+            if os.path.isdir(os.path.join(self.directorio, ruta))
+        }
+
+    def ultimo(self, ruta):
+        """
+        Ruta absoluta del perfil más reciente de una ruta
+
+        Args:
+            ruta: Nombre de la ruta (ver nombre_ruta)
+
+        Returns:
+            str: Ruta del archivo o None si no hay perfiles
+        """
+        archivos = self.listar().get(ruta)
+        if not archivos:
+            return None
+        return os.path.abspath(os.path.join(self.directorio, ruta, archivos[-1]))
+
+
+def _colapsar(marco):
+    """
+    Convierte una pila en una línea colapsada 'modulo:funcion;...' (raíz primero)
+
+    Args:
+        marco: Frame del hilo muestreado
+
+    Returns:
+        str: Stack colapsado
+    """
+    partes = []
+    while marco is not None and len(partes) < PROFUNDIDAD_MAXIMA:
+        codigo = marco.f_code
+        modulo = marco.f_globals.get('__name__', '?')
+        partes.append(f"{modulo}:{codigo.co_name}")
+        marco = marco.f_back
+    partes.reverse()
+    return ';'.join(partes)
+
+
+# Perfilador global de la aplicación
+perfilador = Perfilador()
@@ -0,0 +1,320 @@
+# app/utils/schema.py
+"""
+Esquemas de validación declarativos
+Cada esquema se compila una sola vez en una función Python generada: por
+cada campo se emiten solo los pasos que declara (limpiar texto, minúsculas,
+valores permitidos...), y la validación informa todos los errores de una vez
+"""
+
+from types import MappingProxyType
+
+from app.utils.validators import PATRON_EMAIL, PATRON_ETIQUETA
+
+# Marcador interno de campo ausente
+_FALTA = object()
+
+# Errores de un elemento válido (vacío e inmutable, compartido)
+SIN_ERRORES = MappingProxyType({})
+_NO_OBJETO = MappingProxyType({'_': "Cada elemento debe ser un objeto JSON"})
+
+# Mayor ID admitido: los IDs se guardan en columnas int64 (IndiceAnalitica)
+MAX_ID = 2 ** 63 - 1
+
+
+class Campo:
+    """
+    Declaración de un campo de un esquema
+
+    Attributes:
+        requerido (bool): El campo debe venir y no estar vacío
+        por_defecto: Valor si el campo no viene (solo esquemas completos)
+        texto (bool): Limpia espacios como sanitizar_string; si no es texto es inválido
+        nulo_si_invalido (bool): Con texto, un valor no textual o vacío pasa a None en vez de error
+        no_vacio (bool): Con texto, rechaza cadenas vacías tras limpiar
+        minusculas (bool): Con texto, convierte a minúsculas
+        opciones (frozenset): Valores permitidos
+        email (bool): Debe tener formato de email
+        booleano (bool): Convierte el valor a bool
+        instante (bool): Segundos desde epoch (número) o None
+        entero_id (bool): ID entero positivo (hasta MAX_ID) o None
+        ids (int): Lista de como mucho 'ids' IDs enteros positivos; se
+            normaliza a una tupla ordenada y sin repetidos
+        etiquetas (int): Lista de como mucho 'etiquetas' etiquetas; se
+            normaliza a minúsculas, en una tupla ordenada y sin repetidos
+        mensaje (str): Error si el valor es inválido
+        mensaje_requerido (str): Error si falta (por defecto, mensaje)
+    """
+
+    def __init__(self, requerido=False, por_defecto=_FALTA, texto=False,
+                 nulo_si_invalido=False, no_vacio=False, minusculas=False,
+                 opciones=None, email=False, booleano=False, instante=False,
+                 entero_id=False, ids=None, etiquetas=None, mensaje=None,
+                 mensaje_requerido=None):
+        self.requerido = requerido
+        self.por_defecto = por_defecto
+        self.texto = texto
+        self.nulo_si_invalido = nulo_si_invalido
+        self.no_vacio = no_vacio
+        self.minusculas = minusculas
+        self.opciones = frozenset(opciones) if opciones is not None else None
+        self.email = email
+        self.booleano = booleano
+        self.instante = instante
+        self.entero_id = entero_id
+        self.ids = ids
+        self.etiquetas = etiquetas
+        self.mensaje = mensaje or "Valor inválido"
+        self.mensaje_requerido = mensaje_requerido or self.mensaje
+
+    def codigo(self, indice, clave):
+        """
+        Genera las ramas que limpian y validan el valor de este campo
+
+        El valor está en la variable local 'v' y ya se sabe que viene en los
+        datos; el resultado queda en la variable 'c<indice>'. Solo se emiten
+        los pasos que el campo declara, encadenados en una única condición.
+
+        Args:
+            indice: Posición del campo (nombra sus variables y constantes)
+            clave: Nombre del campo como literal de Python
+
+        Returns:
+            list: Líneas de código Python (sangría de una rama 'elif')
+        """
+        lineas = []
+        condiciones = []
+
+        if self.booleano:
+            condiciones.append('((v := bool(v)) or True)')
+
+        if self.texto:
+            limpiar = 'v.strip().lower()' if self.minusculas else 'v.strip()'
+            if self.nulo_si_invalido:
+                lineas += ['    elif not v or not isinstance(v, str):',
+                           f'        c{indice} = None']
+            else:
+                condiciones.append('v and isinstance(v, str)')
+            if self.no_vacio:
+                condiciones.append(f'(v := {limpiar})')
+            else:
+                condiciones.append(f'((v := {limpiar}) or True)')
+
+        if self.instante:
+            # bool es subclase de int: se compara el tipo exacto. La cota
+            # descarta NaN, infinitos y milisegundos enviados por error
+            lineas += ['    elif v is None:',
+                       f'        c{indice} = None']
+            condiciones.append('type(v) in (int, float) and 0 <= v < 1e11')
+            condiciones.append('((v := round(float(v), 3)) or True)')
+        if self.entero_id:
+            # Como en _normalizar_ids, bool no cuenta como entero
+            lineas += ['    elif v is None:',
+                       f'        c{indice} = None']
+            condiciones.append(f'type(v) is int and 0 < v <= {MAX_ID}')
+        if self.ids is not None:
+            condiciones.append(f'(v := _ids(v, {int(self.ids)})) is not None')
+        if self.etiquetas is not None:
+            condiciones.append(f'(v := _etiquetas(v, {int(self.etiquetas)})) is not None')
+        if self.opciones is not None:
+            condiciones.append(f'v in _opciones_{indice}')
+        if self.email:
+            condiciones.append('_email(v)' if self.texto else 'isinstance(v, str) and _email(v)')
+
+        # Solo transformaciones: el valor no puede ser inválido
+        if all(condicion.endswith(' or True)') for condicion in condiciones):
+            asignaciones = [f'        v = {condicion[len("((v := "):-len(") or True)")]}'
+                            for condicion in condiciones]
+            return lineas + ['    else:'] + asignaciones + [f'        c{indice} = v']
+        return lineas + [f'    elif {" and ".join(condiciones)}:',
+                         f'        c{indice} = v',
+                         '    else:'] + _error(clave, self.mensaje)
+
+
+def _normalizar_ids(valor, maximo):
+    """
+    Normaliza una lista de IDs (paso de los campos con ids)
+
+    Args:
+        valor: Valor recibido
+        maximo: Cantidad máxima de IDs
+
+    Returns:
+        tuple: IDs ordenados y sin repetir, o None si el valor no es una
+            lista de como mucho 'maximo' enteros positivos (hasta MAX_ID)
+    """
+    if not isinstance(valor, (list, tuple)) or len(valor) > maximo:
+        return None
+    for elemento in valor:
+        if type(elemento) is not int or not 0 < elemento <= MAX_ID:
+            return None
+    return tuple(sorted(set(valor)))
+
+
+def _normalizar_etiquetas(valor, maximo):
+    """
+    Normaliza una lista de etiquetas (paso de los campos con etiquetas)
+
+    Args:
+        valor: Valor recibido
+        maximo: Cantidad máxima de etiquetas
+
+    Returns:
+        tuple: Etiquetas en minúsculas, ordenadas y sin repetir, o None si
+            el valor no es una lista de como mucho 'maximo' etiquetas válidas
+    """
+    if not isinstance(valor, (list, tuple)) or len(valor) > maximo:
+        return None
+    etiquetas = set()
+    for elemento in valor:
+        if not isinstance(elemento, str):
+            return None
+        etiqueta = elemento.strip().lower()
+        if not PATRON_ETIQUETA.match(etiqueta):
+            return None
+        etiquetas.add(etiqueta)
+    return tuple(sorted(etiquetas))
+
+
+def _error(clave, mensaje):
+    """
+    Líneas que registran un error (el diccionario de errores se crea con el primero)
+
+    Args:
+        clave: Nombre del campo como literal de Python
+        mensaje: Mensaje de error
+
+    Returns:
+        list: Líneas de código Python
+    """
+    return ['        if errores is None:',
+            '            errores = {}',
+            f'        errores[{clave}] = {mensaje!r}']
+
+
+class Esquema:
+    """
+    Conjunto de campos que se valida como una unidad
+
+    El esquema se compila al crearlo. Los campos que no declara se ignoran.
+
+    Attributes:
+        campos (dict): nombre -> Campo, en el orden en que se informan errores
+        parcial (bool): Para actualizaciones: solo se validan los campos enviados
+        fuente (str): Código generado (útil para depurar)
+        validar (callable): data -> (limpios, errores); errores vacío si es válido
+        validar_lote (callable): items -> lista de (limpios, errores), una por elemento
+    """
+
+    def __init__(self, campos, parcial=False):
+        """
+        Args:
+            campos: Diccionario nombre -> Campo
+            parcial: True para validar solo los campos presentes
+        """
+        self.campos = campos
+        self.parcial = parcial
+        self.validar, self.validar_lote = self._compilar()
+
+    def _cuerpo(self, espacio, salir):
+        """
+        Genera el código que valida el diccionario 'data'
+
+        Cada campo queda desenrollado en línea (sin bucles ni llamadas por
+        paso) y, si todo es válido, el resultado se construye con un único
+        literal de diccionario, así que validar un elemento cuesta lo mismo
+        que haber escrito las comprobaciones a mano.
+
+        Args:
+            espacio: Espacio de nombres de la función (se añaden las constantes)
+            salir: Función expresión -> líneas que entregan el resultado
+
+        Returns:
+            list: Líneas de código Python (sangría de cuerpo de función)
+        """
+        lineas = ['    errores = None',
+                  '    obtener = data.get']
+        # Campos que pueden no aparecer en el resultado
+        opcionales = []
+
+        for indice, (nombre, campo) in enumerate(self.campos.items()):
+            espacio[f'_opciones_{indice}'] = campo.opciones
+            espacio[f'_defecto_{indice}'] = campo.por_defecto
+            clave = repr(nombre)
+            lineas.append(f'    v = obtener({clave}, _FALTA)')
+            lineas.append('    if v is _FALTA:')
+            if campo.requerido and not self.parcial:
+                lineas += _error(clave, campo.mensaje_requerido)
+            elif campo.por_defecto is not _FALTA and not self.parcial:
+                lineas.append(f'        c{indice} = _defecto_{indice}')
+            else:
+                lineas.append(f'        c{indice} = _FALTA')
+                opcionales.append(indice)
+            if campo.requerido:
+                lineas.append("    elif v is None or v == '':")
+                lineas += _error(clave, campo.mensaje_requerido)
+            lineas += campo.codigo(indice, clave)
+
+        lineas.append('    if errores is not None:')
+        lineas += ['    ' + linea for linea in salir('{}, errores')]
+        claves = [(indice, repr(nombre)) for indice, nombre in enumerate(self.campos)]
+        if not opcionales:
+            pares = ', '.join(f'{clave}: c{indice}' for indice, clave in claves)
+            lineas += salir(f'{{{pares}}}, _SIN_ERRORES')
+        else:
+            lineas.append('    limpios = {}')
+            for indice, clave in claves:
+                if indice in opcionales:
+                    lineas += [f'    if c{indice} is not _FALTA:',
+                               f'        limpios[{clave}] = c{indice}']
+                else:
+                    lineas.append(f'    limpios[{clave}] = c{indice}')
+            lineas += salir('limpios, _SIN_ERRORES')
+        return lineas
+
+    def _compilar(self):
+        """
+        Genera el código fuente de las funciones de validación y lo compila
+
+        validar_lote repite el mismo código dentro del bucle, sin una llamada
+        a función por elemento.
+
+        Returns:
+            tuple: (validar, validar_lote)
+        """
+        espacio = {'_FALTA': _FALTA, '_email': PATRON_EMAIL.match, '_ids': _normalizar_ids,
+                   '_etiquetas': _normalizar_etiquetas,
+                   '_SIN_ERRORES': SIN_ERRORES, '_NO_OBJETO': _NO_OBJETO}
+
+        uno = ['def validar(data):']
+        uno += self._cuerpo(espacio, lambda expresion: [f'    return {expresion}'])
+
+        lote = ['def validar_lote(items):',
+                '    resultados = []',
+                '    agregar = resultados.append',
+                '    for data in items:',
+                '        if not isinstance(data, dict):',
+                '            agregar(({}, _NO_OBJETO))',
+                '            continue']
+        cuerpo = self._cuerpo(espacio, lambda expresion: [f'    agregar(({expresion}))',
+                                                          '    continue'])
+        lote += ['    ' + linea for linea in cuerpo]
+        lote.append('    return resultados')
+
+        self.fuente = '\n'.join(uno + [''] + lote) + '\n'
+        exec(compile(self.fuente, f'<esquema {", ".join(self.campos)}>', 'exec'), espacio)
+        return espacio['validar'], espacio['validar_lote']
+
+
+def unir_errores(errores):
+    """
+    Une los errores de validación en un único mensaje
+
+    Args:
+        errores: Diccionario campo -> mensaje
+
+    Returns:
+        str: Mensajes separados por '; ' (o None si no hay errores)
+    """
+    if not errores:
+        return None
+    return '; '.join(errores.values())
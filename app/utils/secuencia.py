@@ -0,0 +1,65 @@
+# app/utils/secuencia.py
+"""
+Números de secuencia que llegan desordenados
+Los almacenes numeran cada cambio sin un lock global, así que dos cambios
+pueden llegar a un oyente en orden distinto al de su número. Un oyente que
+ofrece "lo posterior a N" solo puede publicar hasta el último número cuyos
+anteriores ya llegaron todos
+"""
+
+import heapq
+
+
+class MarcaContigua:
+    """
+    Mayor número hasta el que han llegado todos los anteriores
+
+    No es segura entre hilos: se usa con el lock del oyente tomado.
+
+    Attributes:
+        valor (int): Último número tal que ya llegaron todos hasta él
+    """
+
+    def __init__(self, valor=0):
+        """
+        Args:
+            valor: Número del que se parte
+        """
+        self.valor = valor
+        self._adelantados = []  # montículo de números llegados tras un hueco
+
+    def llegar(self, numero):
+        """
+        Anota un número y avanza la marca si cierra el hueco
+
+        Args:
+            numero: Número que llega (los ya cubiertos se ignoran)
+        """
+        if numero != self.valor + 1:
+            if numero > self.valor:
+                heapq.heappush(self._adelantados, numero)
+            return
+        self.valor = numero
+        self._avanzar()
+
+    def reiniciar(self, valor):
+        """
+        Salta a un número (la numeración continúa desde él)
+
+        Args:
+            valor: Nuevo valor de la marca
+        """
+        self.valor = valor
+        self._adelantados = [n for n in self._adelantados if n > valor]
+        heapq.heapify(self._adelantados)
+        self._avanzar()
+
+    def _avanzar(self):
+        """Consume los adelantados que ya son contiguos a la marca"""
+        adelantados = self._adelantados
+        while adelantados and adelantados[0] <= self.valor + 1:
+            self.valor = max(self.valor, heapq.heappop(adelantados))
+
+    def __len__(self):
+        """Números llegados por delante de la marca"""
+        return len(self._adelantados)
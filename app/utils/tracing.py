@@ -0,0 +1,201 @@
+# app/utils/tracing.py
+"""
+Trazas ligeras de peticiones
+Cada petición abre un span raíz; las rutas, los servicios y las llamadas a
+Supabase abren spans hijos. Si una petición supera el umbral se registra
+su árbol de spans en el log de peticiones lentas.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+logger_lentas = logging.getLogger('taskflow.slow')
+
+# Span activo en el contexto actual (hilo o contexto copiado)
+_actual = contextvars.ContextVar('taskflow_span', default=None)
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+
+def _nuevo_id(bytes_):
+    """Genera un identificador hexadecimal aleatorio"""
+    return os.urandom(bytes_).hex()
+
+
+class Span:
+    """
+    Un tramo medido de una traza
+
+    Attributes:
+        nombre (str): Qué se está midiendo (ej: task_service.crear_tarea)
+        trace_id (str): ID de la traza (32 hex)
+        span_id (str): ID del span (16 hex)
+        atributos (dict): Datos adicionales (ruta, código de estado...)
+        hijos (list): Spans anidados
+    """
+
+    __slots__ = ('nombre', 'trace_id', 'span_id', 'inicio', 'fin', 'atributos', 'hijos')
+
+    def __init__(self, nombre, trace_id, atributos=None):
+        self.nombre = nombre
+        self.trace_id = trace_id
+        self.span_id = _nuevo_id(8)
+        self.inicio = time.perf_counter()
+        self.fin = None
+        self.atributos = atributos or {}
+        self.hijos = []
+
+    @property
+    def duracion_ms(self):
+        """Duración en milisegundos (hasta ahora si no ha terminado)"""
+        fin = self.fin if self.fin is not None else time.perf_counter()
+        return (fin - self.inicio) * 1000
+
+    def to_dict(self, origen=None):
+        """
+        Convierte el árbol de spans a diccionario
+
+        Args:
+            origen: Instante de inicio de la raíz (para offsets relativos)
+
+        Returns:
+            dict: Span con sus hijos
+        """
+        origen = self.inicio if origen is None else origen
+        datos = {
+            'nombre': self.nombre,
+            'span_id': self.span_id,
+            'inicio_ms': round((self.inicio - origen) * 1000, 3),
+            'duracion_ms': round(self.duracion_ms, 3)
+        }
+        if self.atributos:
+            datos['atributos'] = self.atributos
+        if self.hijos:
+            datos['hijos'] = [hijo.to_dict(origen) for hijo in self.hijos]
+        return datos
+
+
+def span_actual():
+    """
+    Obtiene el span activo
+
+    Returns:
+        Span: Span activo o None si no hay traza
+    """
+    return _actual.get()
+
+
+def iniciar_traza(nombre, traceparent=None, **atributos):
+    """
+    Abre el span raíz de una traza
+
+    Args:
+        nombre: Nombre del span raíz
+        traceparent: Cabecera W3C entrante para continuar la traza (opcional)
+        **atributos: Atributos del span
+
+    Returns:
+        tuple: (span raíz, token para terminar_traza)
+    """
+    trace_id = None
+    if traceparent:
+        coincidencia = _TRACEPARENT.match(traceparent.strip().lower())
+        if coincidencia:
+            trace_id = coincidencia.group(1)
+            atributos['padre_remoto'] = coincidencia.group(2)
+    raiz = Span(nombre, trace_id or _nuevo_id(16), atributos)
+    return raiz, _actual.set(raiz)
+
+
+def terminar_traza(raiz, token):
+    """
+    Cierra el span raíz y restaura el contexto
+
+    Args:
+        raiz: Span raíz devuelto por iniciar_traza
+        token: Token devuelto por iniciar_traza
+    """
+    raiz.fin = time.perf_counter()
+    _actual.reset(token)
+
+
+@contextmanager
+def span(nombre, **atributos):
+    """
+    Abre un span hijo del span activo; sin traza activa no hace nada
+
+    Args:
+        nombre: Nombre del span
+        **atributos: Atributos del span
+
+    Yields:
+        Span: El span creado, o None si no hay traza
+    """
+    padre = _actual.get()
+    if padre is None:
+        yield None
+        return
+    hijo = Span(nombre, padre.trace_id, atributos)
+    padre.hijos.append(hijo)
+    token = _actual.set(hijo)
+    try:
+        yield hijo
+    except Exception as e:
+        hijo.atributos['error'] = type(e).__name__
+        raise
+    finally:
+        hijo.fin = time.perf_counter()
+        _actual.reset(token)
+
+
+def trazar(nombre=None):
+    """
+    Decorador que mide una función como span hijo
+
+    Args:
+        nombre: Nombre del span (por defecto modulo.funcion)
+    """
+    def decorador(funcion):
+        etiqueta = nombre or f"{funcion.__module__.rsplit('.', 1)[-1]}.{funcion.__name__}"
+
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _actual.get() is None:
+                return funcion(*args, **kwargs)
+            with span(etiqueta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def traceparent():
+    """
+    Cabecera W3C traceparent del span activo, para propagar la traza
+
+    Returns:
+        str: Valor de la cabecera o None si no hay traza
+    """
+    actual = _actual.get()
+    if actual is None:
+        return None
+    return f"00-{actual.trace_id}-{actual.span_id}-01"
+
+
+def registrar_lenta(raiz):
+    """
+    Escribe una línea JSON con el árbol de spans en el log de peticiones lentas
+
+    Args:
+        raiz: Span raíz de la petición
+    """
+    logger_lentas.warning(json.dumps({
+        'trace_id': raiz.trace_id,
+        'duracion_ms': round(raiz.duracion_ms, 3),
+        'traza': raiz.to_dict()
+    }, ensure_ascii=False))
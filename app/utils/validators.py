@@ -6,6 +6,14 @@ Funciones reutilizables para validación de datos
 
 import re
 
+# Valores válidos y patrones, construidos una sola vez
+PRIORIDADES_VALIDAS = frozenset(['alta', 'media', 'baja'])
+ROLES_VALIDOS = frozenset(['administrador', 'usuario'])
+PATRON_EMAIL = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Etiquetas de tarea: sin comas ni '-' inicial (separador y negación en los filtros)
+PATRON_ETIQUETA = re.compile(r'^[a-z0-9][a-z0-9_.:-]{0,49}$')
+
+
 def validar_email(email):
     """
     Valida que el email tenga un formato correcto
@@ -19,9 +27,20 @@ def validar_email(email):
     if not email:
         return False
     
-    # Patrón simple de email
-    patron = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(patron, email))
+    return bool(PATRON_EMAIL.match(email))
+
+
+def validar_etiqueta(etiqueta):
+    """
+    Valida el formato de una etiqueta de tarea (ya en minúsculas)
+    
+    Args:
+        etiqueta: Etiqueta a validar
+        
+    Returns:
+        bool: True si la etiqueta es válida, False en caso contrario
+    """
+    return isinstance(etiqueta, str) and bool(PATRON_ETIQUETA.match(etiqueta))
 
 
 def validar_string_no_vacio(texto):
@@ -52,8 +71,7 @@ def validar_prioridad(prioridad):
     if not prioridad:
         return False
     
-    prioridades_validas = ['alta', 'media', 'baja']
-    return prioridad.lower() in prioridades_validas
+    return prioridad.lower() in PRIORIDADES_VALIDAS
 
 
 def validar_rol(rol):
@@ -69,8 +87,7 @@ def validar_rol(rol):
     if not rol:
         return False
     
-    roles_validos = ['administrador', 'usuario']
-    return rol.lower() in roles_validos
+    return rol.lower() in ROLES_VALIDOS
 
 
 def sanitizar_string(texto):
@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+"""
+Benchmarks de TaskFlow
+Scripts independientes; se ejecutan desde la raíz del proyecto con
+python -m benchmarks.<nombre>
+"""
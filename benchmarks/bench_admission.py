@@ -0,0 +1,218 @@
+# benchmarks/bench_admission.py
+"""
+Benchmark del control de admisión bajo sobrecarga
+Arranca un PostgREST falso con latencia y concurrencia fijas y el servidor
+de producción con un worker. Primero mide la capacidad real de
+/api/users/<id> con clientes en lazo cerrado; después le envía en lazo
+abierto llamadas al doble de esa capacidad junto con lecturas de
+/api/tasks/<id> a ritmo constante.
+Las llamadas se reparten entre --clientes clientes (cabecera X-Cliente),
+cada uno por debajo de ADMISSION_CLIENT_RATE; un cliente más envía
+--abusivo lecturas por segundo, por encima de su límite, y debe recibir 429
+sin afectar al resto.
+Compara latencias (p50/p99 de las peticiones admitidas) y rechazos (429 y
+503) con el control de admisión activado y desactivado.
+
+Uso:
+    python -m benchmarks.bench_admission --duracion 10 --sobrecarga 2
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_serve import _esperar_listo, RAIZ
+from benchmarks.supabase_falso import SupabaseFalso
+
+# Cabecera que identifica al cliente (ADMISSION_CLIENT_HEADER del servidor)
+_CABECERA_CLIENTE = 'X-Cliente'
+
+
+def _peticion(port, ruta, resultados, timeout, inicio=None, cliente=None):
+    """
+    Hace una petición en una conexión nueva y anota (ruta, estado, segundos,
+    cliente)
+
+    Args:
+        inicio: Instante (perf_counter) desde el que se mide la latencia; en
+            lazo abierto es el instante programado, así que la espera en el
+            propio generador también cuenta
+        cliente: Valor de la cabecera X-Cliente (opcional)
+    """
+    if inicio is None:
+        inicio = time.perf_counter()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        cabeceras = {'Connection': 'close'}
+        if cliente is not None:
+            cabeceras[_CABECERA_CLIENTE] = cliente
+        conn.request('GET', ruta, headers=cabeceras)
+        respuesta = conn.getresponse()
+        respuesta.read()
+        conn.close()
+        estado = respuesta.status
+    except (OSError, http.client.HTTPException):
+        estado = 'error'
+    resultados.append((ruta, estado, time.perf_counter() - inicio, cliente))
+
+
+def _lazo_abierto(port, flujos, duracion, timeout):
+    """
+    Envía peticiones a ritmo fijo sin esperar las respuestas
+
+    Args:
+        flujos: Lista de (ruta, peticiones por segundo, clientes): cada
+            petición sale de uno de los clientes, por turnos
+
+    Returns:
+        list: (ruta, estado, segundos, cliente) por petición
+    """
+    resultados = []
+    with ThreadPoolExecutor(max_workers=512) as pool:
+        def emitir(ruta, tasa, clientes):
+            inicio = time.perf_counter()
+            k = 0
+            while True:
+                momento = inicio + k / tasa
+                if momento - inicio >= duracion:
+                    return
+                espera = momento - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                pool.submit(_peticion, port, ruta, resultados, timeout, momento,
+                            clientes[k % len(clientes)])
+                k += 1
+
+        emisores = [threading.Thread(target=emitir, args=flujo) for flujo in flujos]
+        for emisor in emisores:
+            emisor.start()
+        for emisor in emisores:
+            emisor.join()
+    return resultados
+
+
+def _capacidad(port, ruta, clientes, duracion, timeout):
+    """
+    Peticiones/s que atiende el servidor con clientes en lazo cerrado
+
+    Returns:
+        float: Respuestas 200 por segundo
+    """
+    resultados = []
+    fin = time.perf_counter() + duracion
+
+    def cliente():
+        while time.perf_counter() < fin:
+            _peticion(port, ruta, resultados, timeout)
+
+    hilos = [threading.Thread(target=cliente) for _ in range(clientes)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    admitidas = sum(1 for _, estado, _, _ in resultados if estado == 200)
+    return admitidas / (time.perf_counter() - inicio)
+
+
+def _arrancar(port, hilos, falso, admision, en_curso):
+    """Arranca el servidor de producción con un worker y límite por cliente
+    (10/s salvo que ADMISSION_CLIENT_RATE venga en el entorno)"""
+    env = dict(os.environ, PORT=str(port), WORKERS='1', THREADS=str(hilos),
+               SUPABASE_URL=falso.url, TRACING_ENABLED='false',
+               ADMISSION_ENABLED='true' if admision else 'false',
+               ADMISSION_SUPABASE_MAX_IN_FLIGHT=str(en_curso),
+               ADMISSION_CLIENT_HEADER=_CABECERA_CLIENTE,
+               ADMISSION_CLIENT_RATE=os.getenv('ADMISSION_CLIENT_RATE', '10'))
+    proceso = subprocess.Popen([sys.executable, 'app.py', 'serve'], cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _esperar_listo(port)
+    return proceso
+
+
+def _crear_falso(args):
+    return SupabaseFalso(retardo=args.retardo, concurrencia=args.concurrencia, usuarios=[
+        {'id': 1, 'nombre': 'Ana', 'email': 'ana@example.com', 'rol': 'usuario'}
+    ]).iniciar()
+
+
+def _percentil(valores, p):
+    if not valores:
+        return float('nan')
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duracion', type=float, default=10)
+    parser.add_argument('--retardo', type=float, default=0.05, help='Latencia de Supabase (s)')
+    parser.add_argument('--concurrencia', type=int, default=4, help='Conexiones de Supabase')
+    parser.add_argument('--sobrecarga', type=float, default=2.0)
+    parser.add_argument('--lecturas', type=float, default=50, help='Lecturas de tareas por segundo')
+    parser.add_argument('--en-curso', type=int, default=8,
+                        help='ADMISSION_SUPABASE_MAX_IN_FLIGHT')
+    parser.add_argument('--clientes', type=int, default=100,
+                        help='Clientes entre los que se reparten las llamadas')
+    parser.add_argument('--abusivo', type=float, default=50,
+                        help='Lecturas por segundo de un único cliente (0: ninguno)')
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--port', type=int, default=5197)
+    args = parser.parse_args()
+
+    falso = _crear_falso(args)
+    proceso = _arrancar(args.port, args.hilos, falso, False, args.en_curso)
+    try:
+        capacidad = _capacidad(args.port, '/api/users/1', args.concurrencia * 2, 3, args.timeout)
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=60)
+        falso.detener()
+
+    tasa = capacidad * args.sobrecarga
+    clientes = [f'c{i}' for i in range(args.clientes)]
+    flujos = [('/api/users/1', tasa, clientes), ('/api/tasks/1', args.lecturas, clientes)]
+    if args.abusivo > 0:
+        flujos.append(('/api/tasks/1', args.abusivo, ['abusivo']))
+    print(f"capacidad medida: {capacidad:.0f} peticiones/s "
+          f"(Supabase: {args.concurrencia / args.retardo:.0f}/s); "
+          f"enviando {tasa:.0f}/s a /api/users/1 y {args.lecturas:.0f}/s a /api/tasks/1 "
+          f"desde {args.clientes} clientes, y {args.abusivo:.0f}/s a /api/tasks/1 desde uno "
+          f"solo, durante {args.duracion:g} s")
+    print()
+    print(f"{'admisión':>9} {'flujo':>22} {'enviadas':>9} {'200':>6} {'429':>6} {'503':>6} "
+          f"{'errores':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'máx (ms)':>9}")
+
+    for admision in (False, True):
+        falso = _crear_falso(args)
+        proceso = _arrancar(args.port, args.hilos, falso, admision, args.en_curso)
+        try:
+            resultados = _lazo_abierto(args.port, flujos, args.duracion, args.timeout)
+        finally:
+            proceso.send_signal(signal.SIGTERM)
+            proceso.wait(timeout=60)
+            falso.detener()
+
+        for ruta, _, clientes_flujo in flujos:
+            abusivo = clientes_flujo == ['abusivo']
+            propias = [(estado, segundos) for r, estado, segundos, cliente in resultados
+                       if r == ruta and (cliente == 'abusivo') == abusivo]
+            admitidas = sorted(segundos for estado, segundos in propias if estado == 200)
+            limitadas = sum(1 for estado, _ in propias if estado == 429)
+            rechazadas = sum(1 for estado, _ in propias if estado == 503)
+            errores = sum(1 for estado, _ in propias if estado not in (200, 429, 503))
+            flujo = f"{ruta} (abusivo)" if abusivo else ruta
+            print(f"{'sí' if admision else 'no':>9} {flujo:>22} {len(propias):>9} "
+                  f"{len(admitidas):>6} {limitadas:>6} {rechazadas:>6} {errores:>8} "
+                  f"{_percentil(admitidas, 0.5):>9.0f} {_percentil(admitidas, 0.99):>9.0f} "
+                  f"{_percentil(admitidas, 1.0):>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
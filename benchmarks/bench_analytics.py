@@ -0,0 +1,135 @@
+# benchmarks/bench_analytics.py
+"""
+Benchmark de la analítica por grupo y periodo
+Llena el almacén con tareas repartidas en un año y mide
+/api/tasks/analytics (obtener_analitica) sobre el índice columnar frente a
+la misma agregación recorriendo las tareas en Python. También mide el coste
+del índice en cada escritura.
+
+Uso:
+    python -m benchmarks.bench_analytics --tareas 1000000
+"""
+
+import argparse
+import collections
+import datetime
+import random
+import time
+
+from app.services import task_service
+from app.store import PERIODOS
+
+_PRIORIDADES = ('alta', 'media', 'baja')
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y devuelve el mejor tiempo
+
+    Returns:
+        float: Milisegundos de la mejor repetición
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def agregar_en_python(agrupar, periodo):
+    """
+    Agregación de referencia: un bucle Python sobre todas las tareas
+
+    Returns:
+        dict: Grupo (el valor o, con varios campos, la tupla de valores) ->
+            (total, completadas, creadas por periodo, completadas por periodo)
+    """
+    dias, desplazamiento = PERIODOS[periodo]
+    campos = agrupar.split(',') if agrupar else []
+
+    def inicio(marca):
+        dia = int(marca // 86400)
+        return dia - (dia + desplazamiento) % dias
+
+    grupos = {}
+    for tarea in task_service.store.todas():
+        grupo = tuple(getattr(tarea, campo) for campo in campos)
+        grupo = grupo[0] if len(grupo) == 1 else grupo or None
+        datos = grupos.get(grupo)
+        if datos is None:
+            datos = grupos[grupo] = [0, 0, collections.Counter(), collections.Counter()]
+        datos[0] += 1
+        datos[2][inicio(tarea.creada_en)] += 1
+        if tarea.completada and tarea.completada_en is not None:
+            datos[1] += 1
+            datos[3][inicio(tarea.completada_en)] += 1
+    epoch = datetime.date(1970, 1, 1)
+    return {grupo: (total, completadas,
+                    {str(epoch + datetime.timedelta(days=p)): n for p, n in creadas.items()},
+                    {str(epoch + datetime.timedelta(days=p)): n for p, n in terminadas.items()})
+            for grupo, (total, completadas, creadas, terminadas) in grupos.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tareas', type=int, default=1000000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    task_service.configurar_store()
+    store = task_service.store
+    ahora = time.time()
+    inicio = time.perf_counter()
+    for i in range(args.tareas):
+        creada_en = ahora - random.random() * 365 * 86400
+        completada = random.random() < 0.4
+        store.insertar({
+            'titulo': f'Tarea {i}',
+            'prioridad': _PRIORIDADES[i % 3],
+            'usuario_id': random.randint(1, args.usuarios),
+            'completada': completada,
+            'creada_en': creada_en,
+            'completada_en': creada_en + random.random() * 14 * 86400 if completada else None
+        })
+    carga = time.perf_counter() - inicio
+    print(f"tareas: {store.contar()}  (carga {carga:.1f} s, "
+          f"{carga / args.tareas * 1e6:.1f} µs por alta)")
+
+    indice = task_service.obtener_indice('analitica')
+    tareas = store.todas()
+    reconstruir = medir(lambda: indice.reconstruir(tareas), 1)
+    del tareas
+    escritura = medir(lambda: [store.actualizar(i, {'prioridad': 'alta'})
+                               for i in range(1, 10001)], 1) / 10000
+    print(f"reconstruir índice: {reconstruir:.0f} ms   actualizar: {escritura * 1000:.1f} µs")
+    print()
+
+    print(f"{'group_by':>22} {'bucket':>7} {'python (ms)':>12} {'numpy (ms)':>11} "
+          f"{'x':>6} {'grupos':>7}")
+    for agrupar in (None, 'prioridad', 'usuario_id', 'usuario_id,completada'):
+        for periodo in PERIODOS:
+            referencia = agregar_en_python(agrupar, periodo)
+            resultado, _ = task_service.obtener_analitica(agrupar, periodo)
+            assert len(resultado['grupos']) == len(referencia)
+            for grupo in resultado['grupos']:
+                clave = grupo['grupo']
+                if isinstance(clave, dict):
+                    clave = tuple(clave.values())
+                esperado = referencia[clave]
+                creadas = {p['periodo']: p['creadas'] for p in grupo['periodos'] if p['creadas']}
+                terminadas = {p['periodo']: p['completadas'] for p in grupo['periodos']
+                              if p['completadas']}
+                assert (grupo['total'], grupo['completadas'], creadas, terminadas) == esperado
+
+            python = medir(lambda: agregar_en_python(agrupar, periodo), args.repeticiones)
+            numpy = medir(lambda: task_service.obtener_analitica(agrupar, periodo),
+                          args.repeticiones)
+            print(f"{agrupar or '-':>22} {periodo:>7} {python:>12.1f} {numpy:>11.1f} "
+                  f"{python / numpy:>6.1f} {len(resultado['grupos']):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_archive.py
+"""
+Benchmark del archivo de tareas (capa fría)
+Mantiene fijas las tareas pendientes y recientes, hace crecer el histórico
+de completadas antiguas y mide las consultas calientes (pendientes, tareas
+de un usuario, recuento por usuario, listado filtrado) con el histórico en
+el almacén y después de archivarlo. También mide el archivado y el tamaño
+comprimido del archivo.
+
+Uso:
+    python -m benchmarks.bench_archive --calientes 20000 --historico 0,100000,500000
+"""
+
+import argparse
+import random
+import time
+
+from app.services import task_service
+from benchmarks.bench_analytics import medir
+
+_PRIORIDADES = ('alta', 'media', 'baja')
+
+# Consultas de las rutas más usadas
+CONSULTAS = (
+    ('pendientes', lambda: task_service.obtener_tareas_pendientes()),
+    ('por_usuario', lambda: task_service.obtener_tareas_por_usuario(1)),
+    ('contar_usuario', lambda: task_service.contar_tareas_por_usuario(1)),
+    ('listar_alta_50', lambda: task_service.listar_tareas(prioridad='alta', limite=50)),
+)
+
+
+def _llenar(calientes, historico, usuarios):
+    """Almacén nuevo con 'historico' completadas hace un año y 'calientes' recientes"""
+    random.seed(0)
+    task_service.configurar_store()
+    ahora = time.time()
+    lote = []
+
+    def tarea(i, creada_en, completada):
+        return {
+            'titulo': f'Tarea {i}',
+            'prioridad': _PRIORIDADES[i % 3],
+            'usuario_id': random.randint(1, usuarios),
+            'completada': completada,
+            'creada_en': creada_en,
+            'completada_en': creada_en + 3600 if completada else None
+        }
+
+    for i in range(historico):
+        lote.append(tarea(i, ahora - (365 - random.random() * 300) * 86400, True))
+    for i in range(calientes):
+        lote.append(tarea(historico + i, ahora - random.random() * 7 * 86400,
+                          random.random() < 0.3))
+    for inicio in range(0, len(lote), 10000):
+        task_service.store.insertar_varias(lote[inicio:inicio + 10000])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calientes', type=int, default=20000,
+                        help='Tareas pendientes o completadas esta semana')
+    parser.add_argument('--historico', default='0,100000,500000',
+                        help='Completadas antiguas (lista separada por comas)')
+    parser.add_argument('--usuarios', type=int, default=100)
+    parser.add_argument('--dias', type=float, default=30)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.calientes} tareas calientes, {args.usuarios} usuarios, "
+          f"archivado de completadas hace más de {args.dias:g} días")
+    print()
+    print(f"{'histórico':>10} {'consulta':>15} {'sin archivar (ms)':>18} "
+          f"{'archivado (ms)':>15} {'x':>6}")
+    for historico in (int(n) for n in args.historico.split(',')):
+        _llenar(args.calientes, historico, args.usuarios)
+        antes = {nombre: medir(consulta, args.repeticiones) for nombre, consulta in CONSULTAS}
+        recuento = task_service.contar_tareas_por_usuario(1)
+
+        inicio = time.perf_counter()
+        archivadas = task_service.archivar_completadas(args.dias)
+        archivado = time.perf_counter() - inicio
+        assert archivadas == historico, (archivadas, historico)
+        assert task_service.contar_tareas_por_usuario(1) == recuento
+
+        for nombre, consulta in CONSULTAS:
+            despues = medir(consulta, args.repeticiones)
+            print(f"{historico:>10} {nombre:>15} {antes[nombre]:>18.2f} {despues:>15.2f} "
+                  f"{antes[nombre] / despues:>6.1f}")
+        archivo = task_service.store.estadisticas()['archivo']
+        print(f"{'':>10} archivado en {archivado:.2f} s: {archivo['bloques']} bloques, "
+              f"{archivo['bytes'] / 1024 / 1024:.1f} MB comprimidos "
+              f"({archivo['bytes'] / max(archivo['tareas'], 1):.0f} B por tarea)")
+        task_service.store.cerrar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_batch.py
+"""
+Benchmark de POST /api/batch
+Arranca un PostgREST falso con latencia fija y el servidor de producción, y
+mide la carga inicial de la aplicación web (usuario, sus tareas, sus
+estadísticas, pendientes, completadas...) de tres formas: una petición HTTP
+por llamada en serie, una por llamada en paralelo (como un navegador con 6
+conexiones) y un único lote. Cuenta también las llamadas a Supabase.
+
+Uso:
+    python -m benchmarks.bench_batch --repeticiones 20 --retardo 0.05
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_analytics import medir
+from benchmarks.bench_serve import _esperar_listo, RAIZ
+from benchmarks.supabase_falso import SupabaseFalso
+
+# Llamadas del arranque de la aplicación web
+ARRANQUE = [
+    '/api/users/1',
+    '/api/users/1/tasks',
+    '/api/users/1/stats',
+    '/api/tasks/pending',
+    '/api/tasks/completed',
+    '/api/tasks/next?limit=10',
+    '/api/tasks?prioridad=alta',
+    '/api/tasks/analytics?group_by=prioridad',
+    '/api/tasks/changes?since=0',
+    '/api/users',
+    '/api/tasks/1',
+    '/api/tasks/2',
+]
+
+
+def _pedir(port, metodo, ruta, cuerpo=None):
+    """Una petición en una conexión nueva; devuelve el JSON de la respuesta"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    cabeceras = {'Content-Type': 'application/json'} if cuerpo is not None else {}
+    conn.request(metodo, ruta, body=json.dumps(cuerpo) if cuerpo is not None else None,
+                 headers=cabeceras)
+    respuesta = conn.getresponse()
+    datos = respuesta.read()
+    conn.close()
+    assert respuesta.status == 200, (ruta, respuesta.status, datos[:200])
+    return json.loads(datos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--retardo', type=float, default=0.05, help='Latencia de Supabase (s)')
+    parser.add_argument('--port', type=int, default=5196)
+    args = parser.parse_args()
+
+    falso = SupabaseFalso(retardo=args.retardo, usuarios=[
+        {'id': 1, 'nombre': 'Ana', 'email': 'ana@example.com', 'rol': 'usuario'},
+        {'id': 2, 'nombre': 'Luis', 'email': 'luis@example.com', 'rol': 'administrador'}
+    ]).iniciar()
+    env = dict(os.environ, PORT=str(args.port), WORKERS='1', SUPABASE_URL=falso.url,
+               TRACING_ENABLED='false', USERS_CACHE_TTL_SECONDS='0')
+    proceso = subprocess.Popen([sys.executable, 'app.py', 'serve'], cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _esperar_listo(args.port)
+        lote = {'requests': [{'path': ruta} for ruta in ARRANQUE]}
+        for respuesta in _pedir(args.port, 'POST', '/api/batch', lote)['responses']:
+            assert respuesta['status'] == 200, respuesta
+
+        def en_serie():
+            for ruta in ARRANQUE:
+                _pedir(args.port, 'GET', ruta)
+
+        def en_paralelo():
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                list(pool.map(lambda ruta: _pedir(args.port, 'GET', ruta), ARRANQUE))
+
+        def en_lote():
+            _pedir(args.port, 'POST', '/api/batch', lote)
+
+        print(f"{len(ARRANQUE)} llamadas, Supabase a {args.retardo * 1000:g} ms, "
+              f"caché de usuarios desactivada")
+        print()
+        print(f"{'modo':>10} {'mejor (ms)':>11} {'peticiones HTTP':>16} {'GET Supabase':>13}")
+        for nombre, funcion, peticiones in (('serie', en_serie, len(ARRANQUE)),
+                                            ('paralelo', en_paralelo, len(ARRANQUE)),
+                                            ('lote', en_lote, 1)):
+            antes = falso.peticiones['GET']
+            mejor = medir(funcion, args.repeticiones)
+            llamadas = (falso.peticiones['GET'] - antes) / args.repeticiones
+            print(f"{nombre:>10} {mejor:>11.1f} {peticiones:>16} {llamadas:>13.0f}")
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=60)
+        falso.detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_bulk.py
+"""
+Benchmark de exportación e importación NDJSON
+Para almacenes cada vez más grandes mide el tiempo y la memoria de pico
+(tracemalloc) de /api/tasks/export frente a serializar GET /api/tasks
+completo, y de /api/tasks/import leyendo el archivo exportado. La memoria
+transitoria de la importación descuenta lo que crece el almacén.
+
+Uso:
+    python -m benchmarks.bench_bulk --tamanos 10000,100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.services import task_service
+
+
+def medir_memoria(funcion):
+    """
+    Ejecuta una función una vez midiendo tiempo y memoria con tracemalloc
+
+    Returns:
+        tuple: (segundos, MB de pico sobre el inicio, MB retenidos al final)
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, (pico - base) / 2**20, (actual - base) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', default='10000,100000')
+    parser.add_argument('--lote', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'tareas':>8} {'operación':>10} {'tiempo (s)':>11} {'pico (MB)':>10} "
+          f"{'transitoria (MB)':>17}")
+    for n in [int(t) for t in args.tamanos.split(',')]:
+        task_service.configurar_store()
+        # Sin las tareas de ejemplo: sus usuarios se consultarían en Supabase al importar
+        for tarea in task_service.store.todas():
+            task_service.store.eliminar(tarea.id)
+        for i in range(n):
+            task_service.store.insertar({'titulo': f'Tarea {i}', 'descripcion': 'x' * 40,
+                                         'prioridad': 'media'})
+
+        segundos, pico, _ = medir_memoria(
+            lambda: json.dumps(task_service.obtener_todas_tareas()).encode('utf-8'))
+        print(f"{n:>8} {'listado':>10} {segundos:>11.2f} {pico:>10.1f} {pico:>17.1f}")
+
+        descriptor, ruta = tempfile.mkstemp(suffix='.ndjson')
+        try:
+            with os.fdopen(descriptor, 'wb') as archivo:
+                segundos, pico, _ = medir_memoria(
+                    lambda: archivo.writelines(task_service.exportar_tareas(args.lote)))
+            print(f"{n:>8} {'export':>10} {segundos:>11.2f} {pico:>10.1f} {pico:>17.1f}")
+
+            task_service.configurar_store()
+            resultado = []
+            with open(ruta, 'rb') as archivo:
+                segundos, pico, retenida = medir_memoria(
+                    lambda: resultado.append(task_service.importar_tareas(archivo, args.lote)))
+            resumen, error = resultado[0]
+            assert error is None and resumen['importadas'] == n, resumen
+            print(f"{n:>8} {'import':>10} {segundos:>11.2f} {pico:>10.1f} "
+                  f"{pico - retenida:>17.1f}")
+        finally:
+            os.unlink(ruta)
+
+
+if __name__ == '__main__':
+    main()
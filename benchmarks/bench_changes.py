@@ -0,0 +1,62 @@
+# benchmarks/bench_changes.py
+"""
+Benchmark de la sincronización incremental
+Mide /api/tasks/changes (obtener_cambios) para pocos cambios sobre almacenes
+cada vez más grandes, frente a descargar todas las tareas
+
+Uso:
+    python -m benchmarks.bench_changes --tamanos 1000,10000,100000 --cambios 10
+"""
+
+import argparse
+import time
+
+from app.services import task_service
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y devuelve el mejor tiempo
+
+    Returns:
+        float: Milisegundos de la mejor repetición
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', default='1000,10000,100000')
+    parser.add_argument('--cambios', type=int, default=10)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tareas':>8} {'todas (ms)':>12} {'cambios (ms)':>14} {'tareas':>8} {'bajas':>7}")
+    for n in [int(t) for t in args.tamanos.split(',')]:
+        task_service.configurar_store()
+        store = task_service.store
+        for i in range(n):
+            store.insertar({'titulo': f'Tarea {i}', 'prioridad': 'media'})
+        version = store.version
+
+        # Unos pocos cambios: la mitad modificaciones, la mitad bajas
+        for i in range(args.cambios):
+            if i % 2:
+                store.actualizar(i + 1, {'completada': True})
+            else:
+                store.eliminar(i + 1)
+
+        todas = medir(task_service.obtener_todas_tareas, args.repeticiones)
+        delta = medir(lambda: task_service.obtener_cambios(version), args.repeticiones)
+        resultado = task_service.obtener_cambios(version)
+        print(f"{n:>8} {todas:>12.3f} {delta:>14.3f} "
+              f"{len(resultado['tareas']):>8} {len(resultado['eliminadas']):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_due.py
+"""
+Benchmark de las consultas por fecha límite (/api/tasks/due y el recuento
+de vencidas)
+Compara recorrer todas las tareas filtrando y ordenando por vence_en (lo
+que haría un cliente con /api/tasks) con leer el índice de vencimientos,
+y mide cuánto añade el índice a completar y reabrir una tarea
+
+Uso:
+    python -m benchmarks.bench_due --tamanos 10000,100000,1000000
+"""
+
+import argparse
+import time
+
+from app.services import task_service
+from app.store import BACKENDS, ListaOrdenada
+from benchmarks.generadores import REFERENCIA, generar_tareas, poblar
+
+_DIA = 86400
+
+
+def recorrer(desde, hasta, usuario_id=None, limite=None):
+    """Tareas pendientes que vencen en [desde, hasta) sin índice"""
+    tareas = [tarea for tarea in task_service.store.todas()
+              if not tarea.completada and tarea.vence_en is not None
+              and desde <= tarea.vence_en < hasta
+              and (usuario_id is None or tarea.usuario_id == usuario_id)]
+    tareas.sort(key=lambda tarea: (tarea.vence_en, tarea.id))
+    return [tarea.to_dict() for tarea in tareas[:limite]]
+
+
+def contar_recorriendo(hasta):
+    """Vencidas antes de un instante sin índice"""
+    return sum(1 for tarea in task_service.store.todas()
+               if not tarea.completada and tarea.vence_en is not None
+               and tarea.vence_en < hasta)
+
+
+def comprobar_vacio():
+    """Sin ninguna pendiente con vence_en, las consultas devuelven vacío"""
+    from app import create_app
+
+    assert list(ListaOrdenada().desde(None)) == []
+    assert list(ListaOrdenada().desde((0,))) == []
+    for backend in BACKENDS:
+        task_service.configurar_store(backend)
+        assert task_service.obtener_tareas_por_vencer() == []
+        assert task_service.obtener_tareas_por_vencer(usuario_id=1, limite=5) == []
+        assert task_service.contar_tareas_vencidas()['vencidas'] == 0
+    cliente = create_app('production').test_client()
+    respuesta = cliente.get('/api/tasks/due')
+    assert respuesta.status_code == 200 and respuesta.get_json() == [], respuesta.get_json()
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y devuelve el mejor tiempo
+
+    Returns:
+        float: Milisegundos de la mejor repetición
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', default='10000,100000,1000000')
+    parser.add_argument('--limite', type=int, default=50)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+    limite = args.limite
+    # Semana siguiente a la fecha de referencia de los datos generados
+    semana = (REFERENCIA, REFERENCIA + 7 * _DIA)
+    indice = lambda: task_service.store.indice('vencimientos')
+
+    comprobar_vacio()
+    print(f"{'tareas':>8} {'caso':<34} {'ms':>10} {'resultado':>10}")
+    for n in [int(t) for t in args.tamanos.split(',')]:
+        task_service.configurar_store()
+        poblar(task_service.store, generar_tareas(n))
+        primera = indice().entre(limite=1)[0][1]
+
+        def completar_y_reabrir():
+            task_service.marcar_tarea_completada(primera)
+            task_service.actualizar_tarea(primera, {'completada': False})
+
+        casos = [
+            ('vencidas: recorrer', lambda: contar_recorriendo(REFERENCIA)),
+            ('vencidas: índice', lambda: indice().contar_antes(REFERENCIA)),
+            ('semana: recorrer', lambda: recorrer(*semana)),
+            ('semana: índice', lambda: task_service.obtener_tareas_por_vencer(*semana)),
+            ('semana limit: recorrer', lambda: recorrer(*semana, limite=limite)),
+            ('semana limit: índice',
+             lambda: task_service.obtener_tareas_por_vencer(*semana, limite=limite)),
+            ('semana usuario 1: índice',
+             lambda: task_service.obtener_tareas_por_vencer(*semana, usuario_id=1)),
+            ('completar + reabrir', completar_y_reabrir),
+        ]
+        # Las dos formas de calcularlas deben coincidir
+        assert recorrer(*semana) == task_service.obtener_tareas_por_vencer(*semana)
+        assert contar_recorriendo(REFERENCIA) == indice().contar_antes(REFERENCIA)
+        for nombre, funcion in casos:
+            ms = medir(funcion, args.repeticiones)
+            resultado = funcion()
+            resultado = resultado if isinstance(resultado, int) else len(resultado or ())
+            print(f"{n:>8} {nombre:<34} {ms:>10.3f} {resultado:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_next_tasks.py
+"""
+Benchmark de la cola de siguientes tareas y los listados top-K
+Compara ordenar todas las pendientes (lo que hacían los clientes con
+/api/tasks/pending) con leer el índice de pendientes y con la selección
+top-K de listar_tareas, para varios tamaños de backlog
+
+Uso:
+    python -m benchmarks.bench_next_tasks --tamanos 1000,10000,100000 --k 10
+"""
+
+import argparse
+import random
+import time
+
+from app.services import task_service
+from app.store import RANGO_PRIORIDAD
+
+
+def poblar(n, semilla=1):
+    """Llena el almacén con n tareas aleatorias (un 30% completadas)"""
+    task_service.configurar_store()
+    rnd = random.Random(semilla)
+    insertar = task_service.store.insertar
+    for i in range(n):
+        insertar({'titulo': f'Tarea {rnd.randrange(n)}', 'descripcion': None,
+                  'completada': rnd.random() < 0.3,
+                  'prioridad': rnd.choice(['alta', 'media', 'baja']),
+                  'usuario_id': rnd.randint(1, 50)})
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y devuelve el mejor tiempo
+
+    Returns:
+        float: Milisegundos de la mejor repetición
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', default='1000,10000,100000')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+    k = args.k
+
+    def ordenar_pendientes():
+        pendientes = task_service.obtener_tareas_pendientes()
+        pendientes.sort(key=lambda t: (RANGO_PRIORIDAD[t['prioridad']], t['id']))
+        return pendientes[:k]
+
+    casos = [
+        ('next: ordenar pendientes', ordenar_pendientes),
+        ('next: índice', lambda: task_service.obtener_siguientes_tareas(k=k)),
+        ('next: índice (usuario)', lambda: task_service.obtener_siguientes_tareas(7, k)),
+        ('sort=titulo: orden total',
+         lambda: task_service.listar_tareas(orden='titulo')[0][:k]),
+        ('sort=titulo&limit: top-K',
+         lambda: task_service.listar_tareas(orden='titulo', limite=k)),
+        ('sort=-id&limit', lambda: task_service.listar_tareas(orden='-id', limite=k)),
+    ]
+
+    print(f"{'tareas':>8} {'caso':<28} {'ms':>10}")
+    for n in [int(t) for t in args.tamanos.split(',')]:
+        poblar(n)
+        for nombre, funcion in casos:
+            print(f"{n:>8} {nombre:<28} {medir(funcion, args.repeticiones):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
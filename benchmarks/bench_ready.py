@@ -0,0 +1,127 @@
+# benchmarks/bench_ready.py
+"""
+Benchmark de las tareas listas para empezar (/api/tasks/ready)
+Compara recorrer todas las pendientes comprobando sus dependencias (lo que
+haría un cliente con /api/tasks) con leer el grafo de dependencias, y mide
+cuánto cuesta completar y reabrir una tarea con el grafo actualizándose.
+Se prueban una cadena profunda (cada tarea depende de la anterior), un
+grafo ancho (dependencias aleatorias hacia atrás) y un árbol
+
+Uso:
+    python -m benchmarks.bench_ready --tamanos 1000,10000,100000 --limite 50
+"""
+
+import argparse
+import random
+import time
+
+from app.services import task_service
+
+
+def dependencias_de(forma, i, rnd):
+    """
+    Dependencias de la tarea i (IDs desde 1) según la forma del grafo
+
+    Args:
+        forma: 'cadena', 'ancho' o 'arbol'
+        i: Posición de la tarea (0 la primera)
+        rnd: random.Random del grafo
+
+    Returns:
+        tuple: IDs de las dependencias
+    """
+    if i == 0:
+        return ()
+    if forma == 'cadena':
+        return (i,)
+    if forma == 'arbol':
+        return ((i - 1) // 2 + 1,)
+    return tuple(sorted({rnd.randint(1, i) for _ in range(rnd.randint(0, 3))}))
+
+
+def poblar(n, forma, semilla=1):
+    """Llena el almacén con n tareas pendientes (un 30% completadas en 'ancho')"""
+    task_service.configurar_store()
+    task_service.eliminar_tarea(1)
+    task_service.eliminar_tarea(2)
+    task_service.eliminar_tarea(3)
+    rnd = random.Random(semilla)
+    insertar = task_service.store.insertar
+    primero = None
+    for i in range(n):
+        tarea = insertar({'titulo': f'Tarea {i}', 'descripcion': None,
+                          'completada': forma == 'ancho' and rnd.random() < 0.3,
+                          'prioridad': 'media', 'usuario_id': rnd.randint(1, 50),
+                          'depende_de': tuple(d + 3 for d in dependencias_de(forma, i, rnd))})
+        primero = primero or tarea.id
+    return primero
+
+
+def recorrer(limite):
+    """Listas recorriendo todas las tareas (sin grafo)"""
+    tareas = {tarea.id: tarea for tarea in task_service.store.todas()}
+    listas = []
+    for tarea in tareas.values():
+        if tarea.completada:
+            continue
+        for dependencia in tarea.depende_de:
+            bloqueo = tareas.get(dependencia)
+            if bloqueo is not None and not bloqueo.completada:
+                break
+        else:
+            listas.append(tarea.to_dict())
+            if len(listas) == limite:
+                break
+    return listas
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y devuelve el mejor tiempo
+
+    Returns:
+        float: Milisegundos de la mejor repetición
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', default='1000,10000,100000')
+    parser.add_argument('--formas', default='cadena,ancho,arbol')
+    parser.add_argument('--limite', type=int, default=50)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+    limite = args.limite
+
+    print(f"{'tareas':>8} {'forma':<8} {'caso':<30} {'ms':>10} {'listas':>8}")
+    for n in [int(t) for t in args.tamanos.split(',')]:
+        for forma in args.formas.split(','):
+            primero = poblar(n, forma)
+
+            def completar_y_reabrir():
+                task_service.marcar_tarea_completada(primero)
+                task_service.actualizar_tarea(primero, {'completada': False})
+
+            casos = [
+                ('ready: recorrer todas', lambda: recorrer(limite)),
+                ('ready: grafo', lambda: task_service.obtener_tareas_listas(limite=limite)),
+                ('ready: grafo (usuario)', lambda: task_service.obtener_tareas_listas(7, limite)),
+                ('completar + reabrir raíz', completar_y_reabrir),
+            ]
+            listas = len(task_service.dependencias)
+            # Las dos formas de calcularlas deben coincidir
+            assert ([t['id'] for t in recorrer(limite)]
+                    == [t['id'] for t in task_service.obtener_tareas_listas(limite=limite)])
+            for nombre, funcion in casos:
+                print(f"{n:>8} {forma:<8} {nombre:<30} "
+                      f"{medir(funcion, args.repeticiones):>10.3f} {listas:>8}")
+
+
+if __name__ == '__main__':
+    main()
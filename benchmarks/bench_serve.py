@@ -0,0 +1,114 @@
+# benchmarks/bench_serve.py
+"""
+Benchmark de carga: servidor de desarrollo (app.run) vs servidor de producción
+Arranca cada servidor en un subproceso y mide peticiones/s y latencias
+
+Uso:
+    python -m benchmarks.bench_serve --clientes 16 --duracion 5 --workers 4
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _esperar_listo(port, timeout=15):
+    """Espera a que el servidor responda /api/health"""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"El servidor en el puerto {port} no arrancó")
+
+
+def _cliente(port, ruta, fin, latencias, errores):
+    """Cliente keep-alive que repite la misma petición hasta la hora de fin"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            conn.request('GET', ruta)
+            respuesta = conn.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores.append(respuesta.status)
+            latencias.append(time.perf_counter() - inicio)
+        except (OSError, http.client.HTTPException):
+            errores.append('conexion')
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.close()
+
+
+def medir(argumentos, entorno, port, clientes, duracion, ruta):
+    """
+    Arranca un servidor y lo somete a carga cerrada
+
+    Returns:
+        dict: Peticiones/s, p50, p99 (ms) y errores
+    """
+    env = dict(os.environ, PORT=str(port), **entorno)
+    proceso = subprocess.Popen([sys.executable, 'app.py'] + argumentos, cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _esperar_listo(port)
+        latencias, errores = [], []
+        fin = time.perf_counter() + duracion
+        hilos = [threading.Thread(target=_cliente, args=(port, ruta, fin, latencias, errores))
+                 for _ in range(clientes)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=60)
+
+    latencias.sort()
+    n = len(latencias) or 1
+    return {
+        'rps': len(latencias) / duracion,
+        'p50': latencias[n // 2] * 1000 if latencias else 0,
+        'p99': latencias[min(n - 1, int(n * 0.99))] * 1000 if latencias else 0,
+        'errores': len(errores)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clientes', type=int, default=16)
+    parser.add_argument('--duracion', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--ruta', default='/api/tasks')
+    args = parser.parse_args()
+
+    # Supabase no interviene en /api/tasks; se apunta a un puerto local cerrado
+    base = {'FLASK_ENV': 'production', 'SUPABASE_URL': 'http://127.0.0.1:9'}
+    escenarios = [
+        ('app.run', [], base, 5101),
+        (f'serve ({args.workers}x{args.hilos})', ['serve'],
+         dict(base, WORKERS=str(args.workers), THREADS=str(args.hilos), TASK_STORE='shared'),
+         5102),
+    ]
+
+    print(f"{'servidor':<20} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errores':>8}")
+    for nombre, argumentos, entorno, port in escenarios:
+        r = medir(argumentos, entorno, port, args.clientes, args.duracion, args.ruta)
+        print(f"{nombre:<20} {r['rps']:>10.0f} {r['p50']:>10.2f} {r['p99']:>10.2f} {r['errores']:>8}")
+
+
+if __name__ == '__main__':
+    main()
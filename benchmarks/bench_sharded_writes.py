@@ -0,0 +1,106 @@
+# benchmarks/bench_sharded_writes.py
+"""
+Benchmark de escrituras concurrentes en el almacén fragmentado
+Lanza varios hilos que crean, reasignan de prioridad y completan tareas de
+usuarios al azar durante un tiempo fijo, con el almacén del servicio (índices
+y oyentes incluidos), y compara 'memory' con 'sharded' según el número de
+fragmentos: operaciones por segundo y latencia de cada escritura.
+
+Uso:
+    python -m benchmarks.bench_sharded_writes --hilos 8 --fragmentos 1,2,4,8,16
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+from app.services import task_service
+
+_PRIORIDADES = ('alta', 'media', 'baja')
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1e6
+
+
+def _escribir(store, semilla, usuarios, fin, latencias):
+    """
+    Mezcla de escrituras de un hilo hasta 'fin'
+
+    La mitad de las operaciones crea una tarea; el resto cambia la prioridad
+    o completa una de las creadas por el hilo.
+    """
+    rnd = random.Random(semilla)
+    propias = []
+    medidas = []
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        r = rnd.random()
+        if r < 0.5 or not propias:
+            tarea = store.insertar({'titulo': 'bench', 'prioridad': rnd.choice(_PRIORIDADES),
+                                    'usuario_id': rnd.randint(1, usuarios)})
+            propias.append(tarea.id)
+        elif r < 0.8:
+            store.actualizar(rnd.choice(propias), {'prioridad': rnd.choice(_PRIORIDADES)})
+        else:
+            store.actualizar(propias.pop(rnd.randrange(len(propias))), {'completada': True})
+        medidas.append(time.perf_counter() - inicio)
+    latencias.extend(medidas)
+
+
+def medir(backend, opciones, hilos, duracion, usuarios, tareas_iniciales):
+    """
+    Escrituras por segundo con un backend y un número de hilos
+
+    Returns:
+        tuple: (operaciones por segundo, lista ordenada de latencias en s)
+    """
+    store = task_service.configurar_store(backend, **opciones)
+    rnd = random.Random(0)
+    store.insertar_varias([{'titulo': f'Tarea {i}', 'usuario_id': rnd.randint(1, usuarios)}
+                           for i in range(tareas_iniciales)])
+    latencias = []
+    fin = time.perf_counter() + duracion
+    trabajadores = [threading.Thread(target=_escribir,
+                                     args=(store, i, usuarios, fin, latencias))
+                    for i in range(hilos)]
+    inicio = time.perf_counter()
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    total = time.perf_counter() - inicio
+    return len(latencias) / total, sorted(latencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--fragmentos', default='1,2,4,8,16')
+    parser.add_argument('--duracion', type=float, default=3)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--tareas-iniciales', type=int, default=100000)
+    args = parser.parse_args()
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{args.hilos} hilos, {args.usuarios} usuarios, {args.tareas_iniciales} tareas "
+          f"iniciales, {args.duracion:g} s por prueba, GIL {'activo' if gil else 'desactivado'}")
+    print()
+    print(f"{'almacén':>12} {'ops/s':>9} {'x':>6} {'p50 (µs)':>9} {'p99 (µs)':>9} {'máx (ms)':>9}")
+    casos = [('memory', {}, 'memory')]
+    casos += [('sharded', {'fragmentos': int(n)}, f'sharded/{n}')
+              for n in args.fragmentos.split(',')]
+    base = None
+    for backend, opciones, nombre in casos:
+        ops, latencias = medir(backend, opciones, args.hilos, args.duracion, args.usuarios,
+                               args.tareas_iniciales)
+        base = base or ops
+        print(f"{nombre:>12} {ops:>9.0f} {ops / base:>6.2f} {_percentil(latencias, 0.5):>9.1f} "
+              f"{_percentil(latencias, 0.99):>9.1f} {latencias[-1] * 1000:>9.1f}")
+    task_service.store.cerrar()
+
+
+if __name__ == '__main__':
+    main()
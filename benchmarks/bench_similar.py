@@ -0,0 +1,152 @@
+# benchmarks/bench_similar.py
+"""
+Benchmark de la detección de tareas duplicadas (MinHash/LSH)
+Llena el almacén con tareas de pocos usuarios, muchas de ellas variantes de
+un mismo título (palabras cambiadas, mayúsculas, signos), y compara buscar
+las parecidas a una tarea comparándola con todas las del usuario (difflib y
+firmas MinHash, sin índice) con leer las cubetas del índice de similares.
+Mide también el coste de crear una tarea con la comprobación de duplicados
+y la exhaustividad del índice frente a comparar todas las firmas
+
+Uso:
+    python -m benchmarks.bench_similar --tamanos 10000,100000 --usuarios 10
+"""
+
+import argparse
+import difflib
+import random
+import time
+
+from app.services import task_service
+from app.store.similares import firmar, similitud
+
+_PALABRAS = ('revisar informe ventas desplegar api login arreglar error cliente '
+             'reunión diseño base datos semanal factura pago correo pruebas '
+             'migrar servidor copia seguridad documentar proceso alta usuario').split()
+_UMBRAL = 0.7
+
+
+def variante(rnd, titulo):
+    """Título casi igual: una palabra cambiada o quitada, mayúsculas o signos"""
+    palabras = titulo.split()
+    cambio = rnd.random()
+    if cambio < 0.3 and len(palabras) > 3:
+        del palabras[rnd.randrange(len(palabras))]
+    elif cambio < 0.6:
+        palabras[rnd.randrange(len(palabras))] = rnd.choice(_PALABRAS)
+    elif cambio < 0.8:
+        palabras = [p.capitalize() for p in palabras]
+    texto = ' '.join(palabras)
+    return texto + '!' if rnd.random() < 0.2 else texto
+
+
+def poblar(n, usuarios, semilla=1):
+    """
+    Llena el almacén con n tareas: la mitad variantes de títulos anteriores
+
+    Returns:
+        list: Títulos base usados
+    """
+    task_service.configurar_store()
+    rnd = random.Random(semilla)
+    bases = []
+    lote = []
+    for i in range(n):
+        if bases and rnd.random() < 0.5:
+            titulo = variante(rnd, rnd.choice(bases))
+        else:
+            titulo = ' '.join(rnd.choices(_PALABRAS, k=rnd.randint(4, 7))) + f' {i}'
+            bases.append(titulo)
+        lote.append({'titulo': titulo, 'descripcion': None, 'completada': False,
+                     'prioridad': 'media', 'usuario_id': rnd.randint(1, usuarios)})
+    task_service.store.insertar_varias(lote)
+    return bases
+
+
+def con_difflib(tarea):
+    """Parecidas comparando el título con el de cada tarea del usuario"""
+    titulo = tarea.titulo.lower()
+    resultado = []
+    for otra in task_service.store.de_usuario(tarea.usuario_id):
+        if otra.id != tarea.id:
+            razon = difflib.SequenceMatcher(None, titulo, otra.titulo.lower()).ratio()
+            if razon >= _UMBRAL:
+                resultado.append((razon, otra.id))
+    return sorted(resultado, reverse=True)
+
+
+def con_firmas(tarea, firmas):
+    """Parecidas comparando la firma con la de cada tarea del usuario"""
+    firma = firmas[tarea.id]
+    resultado = []
+    for otra in task_service.store.de_usuario(tarea.usuario_id):
+        if otra.id != tarea.id:
+            valor = similitud(firma, firmas[otra.id])
+            if valor >= _UMBRAL:
+                resultado.append((valor, otra.id))
+    return sorted(resultado, reverse=True)
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y devuelve el tiempo medio
+
+    Returns:
+        float: Milisegundos por repetición
+    """
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', default='10000,100000')
+    parser.add_argument('--usuarios', type=int, default=10)
+    parser.add_argument('--consultas', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'tareas':>8} {'caso':<34} {'ms':>10}")
+    for n in [int(t) for t in args.tamanos.split(',')]:
+        inicio = time.perf_counter()
+        poblar(n, args.usuarios)
+        print(f"{n:>8} {'poblar (con el índice)':<34} {(time.perf_counter() - inicio) * 1000:>10.1f}")
+        rnd = random.Random(2)
+        tareas = task_service.store.todas()
+        muestra = rnd.sample(tareas, args.consultas)
+        firmas = {t.id: firmar(t.titulo, t.descripcion) for t in tareas}
+
+        # Exhaustividad: las que encuentra el índice de las que superan el umbral
+        esperadas = encontradas = 0
+        for tarea in muestra:
+            todas = {task_id for _, task_id in con_firmas(tarea, firmas)}
+            similares, _ = task_service.obtener_tareas_similares(tarea.id, _UMBRAL, len(tareas))
+            esperadas += len(todas)
+            encontradas += len(todas & {t['id'] for t in similares})
+
+        indice = task_service.obtener_indice('similares')
+
+        def buscar_con_indice():
+            for tarea in muestra:
+                indice.buscar(tarea.titulo, tarea.descripcion, tarea.usuario_id, _UMBRAL,
+                              excluir=tarea.id)
+
+        casos = [
+            ('similar: difflib con todas', lambda: [con_difflib(t) for t in muestra[:2]], 2),
+            ('similar: firmas con todas', lambda: [con_firmas(t, firmas) for t in muestra],
+             len(muestra)),
+            ('similar: índice LSH', buscar_con_indice, len(muestra)),
+        ]
+        for nombre, funcion, consultas in casos:
+            print(f"{n:>8} {nombre:<34} {medir(funcion, 1) / consultas:>10.3f}")
+
+        for modo in task_service.MODOS_DUPLICADOS:
+            datos = {'titulo': variante(rnd, muestra[0].titulo), 'usuario_id': None}
+            ms = medir(lambda: task_service.crear_tarea(dict(datos), modo), 200)
+            print(f"{n:>8} {'crear tarea (' + modo + ')':<34} {ms:>10.3f}")
+        print(f"{n:>8} {'exhaustividad índice':<34} {encontradas / max(esperadas, 1):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
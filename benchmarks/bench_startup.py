@@ -0,0 +1,98 @@
+# benchmarks/bench_startup.py
+"""
+Benchmark de arranque
+Mide el tiempo de importación por módulo (python -X importtime) y el tiempo
+de create_app en procesos nuevos. Termina con código 1 si la mediana de
+import + create_app supera el presupuesto (STARTUP_BUDGET_MS en config.py).
+
+Uso:
+    python -m benchmarks.bench_startup --repeticiones 5
+    python -m benchmarks.bench_startup --budget-ms 300
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código del proceso hijo: importa la aplicación y la crea
+_CODIGO_HIJO = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app('production')
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000}))
+"""
+
+
+def _ejecutar_una_vez():
+    """
+    Arranca la aplicación en un proceso nuevo
+
+    Returns:
+        tuple: (tiempos dict, import_por_modulo dict nombre -> (propio_ms, acumulado_ms))
+    """
+    env = dict(os.environ, SUPABASE_URL='http://127.0.0.1:9')
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', _CODIGO_HIJO],
+                             cwd=RAIZ, env=env, capture_output=True, text=True, check=True)
+    tiempos = json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    modulos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        modulos[nombre.strip()] = (int(propio) / 1000, int(acumulado) / 1000)
+    return tiempos, modulos
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=Config.STARTUP_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=15,
+                        help='Módulos más lentos a mostrar')
+    args = parser.parse_args()
+
+    ejecuciones = [_ejecutar_una_vez() for _ in range(args.repeticiones)]
+    import_ms = statistics.median(t['import_ms'] for t, _ in ejecuciones)
+    create_ms = statistics.median(t['create_app_ms'] for t, _ in ejecuciones)
+    total_ms = import_ms + create_ms
+
+    # Mediana por módulo (acumulado incluye sus dependencias)
+    nombres = set().union(*(m.keys() for _, m in ejecuciones))
+    por_modulo = {}
+    for nombre in nombres:
+        muestras = [m[nombre] for _, m in ejecuciones if nombre in m]
+        por_modulo[nombre] = (statistics.median(p for p, _ in muestras),
+                              statistics.median(a for _, a in muestras))
+
+    print(f"{'módulo':<45} {'propio ms':>10} {'acum. ms':>10}")
+    lentos = sorted(por_modulo.items(), key=lambda kv: kv[1][1], reverse=True)
+    for nombre, (propio, acumulado) in lentos[:args.top]:
+        print(f"{nombre:<45} {propio:>10.2f} {acumulado:>10.2f}")
+    print()
+    for nombre, (propio, acumulado) in sorted(por_modulo.items()):
+        if nombre.lstrip().startswith(('app', 'config')):
+            print(f"{nombre:<45} {propio:>10.2f} {acumulado:>10.2f}")
+    print()
+    print(f"import app:  {import_ms:8.1f} ms")
+    print(f"create_app:  {create_ms:8.1f} ms")
+    print(f"total:       {total_ms:8.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+
+    if total_ms > args.budget_ms:
+        print("✗ El arranque supera el presupuesto")
+        sys.exit(1)
+    print("✓ Arranque dentro del presupuesto")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/bench_stream.py
+"""
+Benchmark de suscriptores SSE inactivos
+Arranca el servidor de producción con un worker, abre miles de conexiones
+a /api/tasks/stream que no hacen nada y mide la memoria (RSS) del worker
+por conexión. Después crea una tarea y mide cuántos suscriptores reciben
+el evento y en cuánto tiempo.
+
+Uso:
+    python -m benchmarks.bench_stream --conexiones 2000
+"""
+
+import argparse
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.bench_serve import _esperar_listo, RAIZ
+
+
+def _subir_limite_descriptores(necesarios):
+    """Sube el límite de descriptores abiertos (lo heredan los subprocesos)"""
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    objetivo = min(duro, max(blando, necesarios))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (objetivo, duro))
+    return objetivo
+
+
+def _rss_kb(pid):
+    """Memoria residente de un proceso en KB (Linux)"""
+    with open(f'/proc/{pid}/status') as archivo:
+        for linea in archivo:
+            if linea.startswith('VmRSS:'):
+                return int(linea.split()[1])
+    return 0
+
+
+def _worker(pid_maestro, timeout=10):
+    """PID del único worker del maestro"""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        with open(f'/proc/{pid_maestro}/task/{pid_maestro}/children') as archivo:
+            hijos = archivo.read().split()
+        if hijos:
+            return int(hijos[0])
+        time.sleep(0.1)
+    raise RuntimeError("El maestro no arrancó ningún worker")
+
+
+def _suscribir(port, n, selector):
+    """
+    Abre n conexiones SSE y espera a que todas reciban la cabecera de respuesta
+
+    Returns:
+        list: Sockets abiertos
+    """
+    sockets = []
+    for i in range(n):
+        s = socket.create_connection(('127.0.0.1', port))
+        s.sendall(b'GET /api/tasks/stream HTTP/1.1\r\nHost: bench\r\n\r\n')
+        s.setblocking(False)
+        selector.register(s, selectors.EVENT_READ, bytearray())
+        sockets.append(s)
+    _leer_hasta(selector, len(sockets), b'retry:', timeout=60)
+    return sockets
+
+
+def _leer_hasta(selector, n, marca, timeout):
+    """
+    Lee de los sockets hasta que n de ellos contengan la marca
+
+    Returns:
+        int: Sockets que la recibieron antes del timeout
+    """
+    listos = set()
+    limite = time.monotonic() + timeout
+    while len(listos) < n and time.monotonic() < limite:
+        for clave, _ in selector.select(timeout=0.5):
+            try:
+                datos = clave.fileobj.recv(65536)
+            except BlockingIOError:
+                continue
+            clave.data.extend(datos)
+            if marca in clave.data:
+                listos.add(clave.fileobj)
+    return len(listos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--conexiones', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=5198)
+    args = parser.parse_args()
+
+    limite = _subir_limite_descriptores(args.conexiones * 2 + 256)
+    if limite < args.conexiones * 2 + 64:
+        print(f"⚠️  Límite de descriptores {limite}: usa menos conexiones")
+
+    env = dict(os.environ, PORT=str(args.port), WORKERS='1', SUPABASE_URL='http://127.0.0.1:9',
+               STREAM_MAX_CONNECTIONS=str(args.conexiones + 10),
+               STREAM_HEARTBEAT_SECONDS='60')
+    proceso = subprocess.Popen([sys.executable, 'app.py', 'serve'], cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    selector = selectors.DefaultSelector()
+    try:
+        _esperar_listo(args.port)
+        worker = _worker(proceso.pid)
+        # Una primera suscripción calienta el código de la ruta
+        _suscribir(args.port, 10, selector)
+        time.sleep(0.5)
+        rss_inicial = _rss_kb(worker)
+
+        inicio = time.perf_counter()
+        sockets = _suscribir(args.port, args.conexiones, selector)
+        apertura = time.perf_counter() - inicio
+        time.sleep(1)
+        rss_final = _rss_kb(worker)
+
+        for clave in list(selector.get_map().values()):
+            clave.data.clear()
+        datos = json.dumps({'titulo': 'evento de prueba'}).encode('utf-8')
+        peticion = urllib.request.Request(f'http://127.0.0.1:{args.port}/api/tasks', data=datos,
+                                          headers={'Content-Type': 'application/json'})
+        inicio = time.perf_counter()
+        urllib.request.urlopen(peticion).read()
+        recibidos = _leer_hasta(selector, len(sockets) + 10, b'event: create', timeout=30)
+        difusion = time.perf_counter() - inicio
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=60)
+        selector.close()
+
+    por_conexion = (rss_final - rss_inicial) / args.conexiones
+    print(f"conexiones:           {args.conexiones}")
+    print(f"apertura:             {apertura:.2f} s")
+    print(f"RSS del worker:       {rss_inicial / 1024:.1f} MB -> {rss_final / 1024:.1f} MB")
+    print(f"memoria por conexión: {por_conexion:.1f} KB")
+    print(f"evento recibido por:  {recibidos} de {args.conexiones + 10} en {difusion * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
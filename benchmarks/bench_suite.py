@@ -0,0 +1,487 @@
+# benchmarks/bench_suite.py
+"""
+Suite de micro-benchmarks de task_service
+Para cada tamaño llena el almacén con datos deterministas
+(benchmarks/generadores.py) y mide cada función pública de task_service y
+su ruta a través del cliente de pruebas de Flask. Cada caso toma varias
+muestras; cada muestra repite la llamada hasta sumar unos milisegundos y
+guarda el tiempo medio por llamada. Los resultados se guardan en JSON.
+
+Con --base compara contra unos resultados guardados: un caso es una
+regresión si su mediana empeora más de --umbral y la diferencia es
+significativa (Mann-Whitney U unilateral, p < --alfa). El proceso termina
+con código 1 si hay alguna.
+
+No se miden configurar_store, vigilar_cambios ni programar_archivado
+(reemplazan el almacén o arrancan hilos). archivar_completadas solo se mide
+hasta --max-archivo tareas porque cada muestra reconstruye el almacén.
+
+Uso:
+    python -m benchmarks.bench_suite --tamanos 1000,10000,100000 --salida base.json
+    python -m benchmarks.bench_suite --tamanos 1000,10000,100000 --base base.json
+    python -m benchmarks.bench_suite --resultados nuevo.json --base base.json
+"""
+
+import argparse
+import gc
+import io
+import json
+import math
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+
+from benchmarks.generadores import generar_tareas, generar_usuarios, poblar, usuarios_para
+from benchmarks.supabase_falso import SupabaseFalso
+
+# Duración mínima de una muestra: las llamadas rápidas se repiten hasta sumarla
+_OBJETIVO_MUESTRA = 0.005
+
+
+class Caso:
+    """
+    Un caso de la suite
+
+    Attributes:
+        nombre (str): 'servicio:<función>' o 'ruta:<MÉTODO> <ruta>'
+        ejecutar: Callable(argumento) que se cronometra
+        preparar: Callable() sin cronometrar que devuelve el argumento
+            (opcional; por defecto None)
+        limpiar: Callable(argumento) sin cronometrar tras cada llamada (opcional)
+        max_tareas (int): Tamaño máximo en el que se ejecuta (opcional)
+        repetir (bool): Si una muestra puede repetir la llamada varias
+            veces (False para los casos lentos que reconstruyen el almacén)
+    """
+
+    def __init__(self, nombre, ejecutar, preparar=None, limpiar=None, max_tareas=None,
+                 repetir=True):
+        self.nombre = nombre
+        self.ejecutar = ejecutar
+        self.preparar = preparar
+        self.limpiar = limpiar
+        self.max_tareas = max_tareas
+        self.repetir = repetir
+
+    def llamar(self, veces):
+        """
+        Ejecuta el caso varias veces
+
+        Returns:
+            float: Segundos cronometrados en total
+        """
+        total = 0.0
+        for _ in range(veces):
+            argumento = self.preparar() if self.preparar else None
+            inicio = time.perf_counter()
+            self.ejecutar(argumento)
+            total += time.perf_counter() - inicio
+            if self.limpiar:
+                self.limpiar(argumento)
+        return total
+
+
+def _consumir(respuesta, codigo=200):
+    """Lee el cuerpo completo de una respuesta del cliente de pruebas y comprueba el código"""
+    datos = respuesta.get_data()
+    respuesta.close()
+    assert respuesta.status_code == codigo, (respuesta.status_code, datos[:200])
+    return datos
+
+
+def _ultimo_id(store):
+    """ID más alto del almacén (0 si está vacío)"""
+    ultimas = store.primeras(1, inverso=True)
+    return ultimas[0].id if ultimas else 0
+
+
+def construir_casos(cliente, tareas, semilla, reconstruir, max_archivo):
+    """
+    Casos de servicio y de ruta para el almacén actual
+
+    Los que escriben dejan el almacén como estaba (limpiar) para que el
+    resto de casos mida siempre los mismos datos.
+
+    Args:
+        cliente: Cliente de pruebas de Flask
+        tareas: Lista de tareas generadas con las que se llenó el almacén
+        semilla: Semilla para elegir IDs y usuarios
+        reconstruir: Callable() que deja un almacén nuevo con 'tareas'
+        max_archivo: Tamaño máximo en el que se mide archivar_completadas
+
+    Returns:
+        list: Lista de Caso
+    """
+    from app.services import task_service as ts
+
+    rnd = random.Random(semilla)
+    store = ts.store
+    ids = [tarea.id for tarea in store.todas()]
+    pendientes = [tarea.id for tarea in store.todas() if not tarea.completada]
+    usuario = 1  # el usuario con más tareas (Zipf)
+    lineas = ''.join(json.dumps(t) + '\n' for t in generar_tareas(1000, semilla=semilla + 1))
+    lineas = lineas.encode('utf-8')
+
+    def id_al_azar():
+        return rnd.choice(ids)
+
+    def pendiente_al_azar():
+        return rnd.choice(pendientes)
+
+    def nueva():
+        return ts.crear_tarea({'titulo': 'Tarea de la suite', 'prioridad': 'media'})[0]['id']
+
+    def desde():
+        # Siempre los últimos 100 cambios, hayan escrito o no los casos anteriores
+        return max(ts.store.version - 100, 0)
+
+    def con_prioridad():
+        task_id = id_al_azar()
+        return task_id, ts.store.obtener(task_id).prioridad
+
+    def restaurar_prioridad(argumento):
+        ts.store.actualizar(argumento[0], {'prioridad': argumento[1]})
+
+    def reabrir(argumento):
+        ts.store.actualizar(argumento, {'completada': False})
+
+    def hasta_ahora():
+        return _ultimo_id(ts.store)
+
+    def borrar_desde(antes):
+        for task_id in range(antes + 1, _ultimo_id(ts.store) + 1):
+            ts.store.eliminar(task_id)
+
+    def borrar_creada(respuesta):
+        borrar_desde(respuesta)
+
+    def exportar(_):
+        for _ in ts.exportar_tareas(1000):
+            pass
+
+    casos = [
+        Caso('servicio:obtener_todas_tareas', lambda _: ts.obtener_todas_tareas()),
+        Caso('servicio:obtener_tarea_por_id', ts.obtener_tarea_por_id, id_al_azar),
+        Caso('servicio:obtener_tareas_por_usuario',
+             lambda _: ts.obtener_tareas_por_usuario(usuario)),
+        Caso('servicio:contar_tareas_por_usuario',
+             lambda _: ts.contar_tareas_por_usuario(usuario)),
+        Caso('servicio:obtener_estadisticas_usuario',
+             lambda _: ts.obtener_estadisticas_usuario(usuario)),
+        Caso('servicio:crear_tarea',
+             lambda _: ts.crear_tarea({'titulo': 'Tarea de la suite', 'prioridad': 'alta'}),
+             hasta_ahora, borrar_desde),
+        Caso('servicio:actualizar_tarea',
+             lambda previa: ts.actualizar_tarea(previa[0], {'prioridad': 'baja'}),
+             con_prioridad, restaurar_prioridad),
+        Caso('servicio:marcar_tarea_completada', ts.marcar_tarea_completada,
+             pendiente_al_azar, reabrir),
+        Caso('servicio:eliminar_tarea', ts.eliminar_tarea, nueva),
+        Caso('servicio:obtener_tareas_completadas', lambda _: ts.obtener_tareas_completadas()),
+        Caso('servicio:obtener_tareas_pendientes', lambda _: ts.obtener_tareas_pendientes()),
+        Caso('servicio:obtener_tareas_por_prioridad',
+             lambda _: ts.obtener_tareas_por_prioridad('alta')),
+        Caso('servicio:obtener_siguientes_tareas',
+             lambda _: ts.obtener_siguientes_tareas(None, 10)),
+        Caso('servicio:obtener_siguientes_tareas[usuario]',
+             lambda _: ts.obtener_siguientes_tareas(usuario, 10)),
+        Caso('servicio:listar_tareas[prioridad,-id,50]',
+             lambda _: ts.listar_tareas(prioridad='alta', orden='-id', limite=50)),
+        Caso('servicio:listar_tareas[pendientes,prioridad,50]',
+             lambda _: ts.listar_tareas(completada=False, orden='prioridad', limite=50)),
+        Caso('servicio:listar_tareas[titulo,50]',
+             lambda _: ts.listar_tareas(orden='titulo', limite=50)),
+        Caso('servicio:obtener_cambios', ts.obtener_cambios, desde),
+        Caso('servicio:exportar_tareas', exportar),
+        Caso('servicio:importar_tareas',
+             lambda _: ts.importar_tareas(io.BytesIO(lineas)), hasta_ahora, borrar_desde),
+        Caso('servicio:obtener_analitica', lambda _: ts.obtener_analitica(None, 'day')),
+        Caso('servicio:obtener_analitica[usuario_id,week]',
+             lambda _: ts.obtener_analitica('usuario_id', 'week')),
+
+        Caso('ruta:GET /api/tasks', lambda _: _consumir(cliente.get('/api/tasks'))),
+        Caso('ruta:GET /api/tasks/<id>',
+             lambda task_id: _consumir(cliente.get(f'/api/tasks/{task_id}')), id_al_azar),
+        Caso('ruta:GET /api/users/<id>/tasks',
+             lambda _: _consumir(cliente.get(f'/api/users/{usuario}/tasks'))),
+        Caso('ruta:GET /api/users/<id>/stats',
+             lambda _: _consumir(cliente.get(f'/api/users/{usuario}/stats'))),
+        Caso('ruta:POST /api/tasks',
+             lambda _: _consumir(cliente.post('/api/tasks', json={'titulo': 'Tarea de la suite'}),
+                                 201),
+             hasta_ahora, borrar_creada),
+        Caso('ruta:PUT /api/tasks/<id>',
+             lambda previa: _consumir(cliente.put(f'/api/tasks/{previa[0]}',
+                                                  json={'prioridad': 'baja'})),
+             con_prioridad, restaurar_prioridad),
+        Caso('ruta:PATCH /api/tasks/<id>/complete',
+             lambda task_id: _consumir(cliente.patch(f'/api/tasks/{task_id}/complete')),
+             pendiente_al_azar, reabrir),
+        Caso('ruta:DELETE /api/tasks/<id>',
+             lambda task_id: _consumir(cliente.delete(f'/api/tasks/{task_id}')), nueva),
+        Caso('ruta:GET /api/tasks/completed',
+             lambda _: _consumir(cliente.get('/api/tasks/completed'))),
+        Caso('ruta:GET /api/tasks/pending',
+             lambda _: _consumir(cliente.get('/api/tasks/pending'))),
+        Caso('ruta:GET /api/tasks?prioridad=alta',
+             lambda _: _consumir(cliente.get('/api/tasks?prioridad=alta'))),
+        Caso('ruta:GET /api/tasks/next?k=10',
+             lambda _: _consumir(cliente.get('/api/tasks/next?k=10'))),
+        Caso('ruta:GET /api/tasks?prioridad=alta&sort=-id&limit=50',
+             lambda _: _consumir(cliente.get('/api/tasks?prioridad=alta&sort=-id&limit=50'))),
+        Caso('ruta:GET /api/tasks/changes',
+             lambda version: _consumir(cliente.get(f'/api/tasks/changes?since={version}')),
+             desde),
+        Caso('ruta:GET /api/tasks/export', lambda _: _consumir(cliente.get('/api/tasks/export'))),
+        Caso('ruta:POST /api/tasks/import',
+             lambda _: _consumir(cliente.post('/api/tasks/import', data=lineas,
+                                              content_type='application/x-ndjson')),
+             hasta_ahora, borrar_desde),
+        Caso('ruta:GET /api/tasks/analytics',
+             lambda _: _consumir(cliente.get('/api/tasks/analytics'))),
+        Caso('ruta:GET /api/tasks/analytics?group_by=usuario_id&bucket=week',
+             lambda _: _consumir(cliente.get('/api/tasks/analytics?group_by=usuario_id'
+                                             '&bucket=week'))),
+
+        # El último: cada muestra reconstruye el almacén y lo deja archivado
+        Caso('servicio:archivar_completadas', lambda _: ts.archivar_completadas(30),
+             reconstruir, max_tareas=max_archivo, repetir=False),
+    ]
+    return casos
+
+
+def _opciones_store(config):
+    """Backend y opciones del almacén según la configuración (como inicializar_store)"""
+    backend = config.get('TASK_STORE', 'memory')
+    opciones = {}
+    if backend == 'shared':
+        opciones['tamano'] = config['TASK_STORE_SIZE']
+    elif backend == 'sharded':
+        opciones['fragmentos'] = config['TASK_STORE_SHARDS']
+    return backend, opciones
+
+
+def _muestra(caso, llamadas):
+    """Una muestra (segundos por llamada) con el recolector de basura en pausa"""
+    gc.disable()
+    try:
+        return caso.llamar(llamadas) / llamadas
+    finally:
+        gc.enable()
+
+
+def medir_casos(casos, repeticiones):
+    """
+    Toma las muestras de varios casos
+
+    Una primera llamada calibra cuántas veces repetir cada caso por muestra.
+    Las muestras se toman por rondas (una de cada caso por ronda) para que
+    las variaciones de la máquina durante la ejecución se repartan entre
+    todos los casos y se reflejen en la dispersión de cada uno, en vez de
+    concentrarse en unos pocos. Los casos que no se repiten (los que
+    reconstruyen el almacén) se miden al final, uno tras otro.
+
+    Returns:
+        list: Un dict {'muestras': [segundos por llamada], 'llamadas'} por caso
+    """
+    gc.collect()
+    medidas = []
+    for caso in casos:
+        llamadas = 1
+        if caso.repetir:
+            primera = _muestra(caso, 1)
+            llamadas = max(1, min(10000, math.ceil(_OBJETIVO_MUESTRA / max(primera, 1e-9))))
+        medidas.append({'muestras': [], 'llamadas': llamadas})
+    repetidos = [(caso, medida) for caso, medida in zip(casos, medidas) if caso.repetir]
+    for _ in range(repeticiones):
+        for caso, medida in repetidos:
+            medida['muestras'].append(_muestra(caso, medida['llamadas']))
+        gc.collect()
+    for caso, medida in zip(casos, medidas):
+        if not caso.repetir:
+            medida['muestras'] = [_muestra(caso, 1) for _ in range(repeticiones)]
+    return medidas
+
+
+def ejecutar(tamanos, repeticiones, filtro, semilla, max_archivo):
+    """
+    Ejecuta la suite
+
+    Returns:
+        dict: Resultados (ver --salida)
+    """
+    os.environ['ADMISSION_ENABLED'] = 'false'
+    os.environ['TASK_ARCHIVE_ENABLED'] = 'false'
+    os.environ.setdefault('TRACING_ENABLED', 'false')
+    falso = SupabaseFalso(usuarios=generar_usuarios(usuarios_para(max(tamanos)))).iniciar()
+    os.environ['SUPABASE_URL'] = falso.url
+
+    from app import create_app
+    from app.services import task_service
+    app = create_app('production')
+    cliente = app.test_client()
+    patron = re.compile(filtro) if filtro else None
+    backend, opciones = _opciones_store(app.config)
+
+    resultados = []
+    try:
+        for tamano in tamanos:
+            tareas = generar_tareas(tamano, semilla=semilla)
+
+            def reconstruir():
+                task_service.configurar_store(backend, **opciones)
+                poblar(task_service.store, tareas)
+
+            reconstruir()
+            print(f"\n{tamano} tareas, {usuarios_para(tamano)} usuarios")
+            casos = [caso for caso in construir_casos(cliente, tareas, semilla, reconstruir,
+                                                      max_archivo)
+                     if (not patron or patron.search(caso.nombre))
+                     and (caso.max_tareas is None or tamano <= caso.max_tareas)]
+            for caso, medida in zip(casos, medir_casos(casos, repeticiones)):
+                mediana = statistics.median(medida['muestras'])
+                print(f"  {caso.nombre:<62} {_formato(mediana):>10}  "
+                      f"(±{_formato(statistics.pstdev(medida['muestras']))}, "
+                      f"{medida['llamadas']} llamadas/muestra)")
+                resultados.append({'caso': caso.nombre, 'tareas': tamano,
+                                   'mediana': mediana, **medida})
+    finally:
+        falso.detener()
+        task_service.store.cerrar()
+
+    return {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'backend': backend,
+        'semilla': semilla,
+        'repeticiones': repeticiones,
+        'resultados': resultados
+    }
+
+
+def _formato(segundos):
+    """Tiempo legible: µs, ms o s"""
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:.1f} µs"
+    if segundos < 1:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos:.2f} s"
+
+
+def mann_whitney_mayor(a, b):
+    """
+    p-valor unilateral de Mann-Whitney U de que las muestras 'a' tiendan a
+    ser mayores que las de 'b' (aproximación normal con corrección por
+    empates y por continuidad)
+
+    Returns:
+        float: p-valor (1.0 si no se puede calcular)
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    valores = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    n = n1 + n2
+    rangos_a = 0.0
+    empates = 0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and valores[j + 1][0] == valores[i][0]:
+            j += 1
+        rango = (i + j) / 2 + 1
+        rangos_a += rango * sum(1 for k in range(i, j + 1) if valores[k][1] == 0)
+        empates += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+    u = rangos_a - n1 * (n1 + 1) / 2
+    varianza = n1 * n2 / 12 * ((n + 1) - empates / (n * (n - 1)))
+    if varianza <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(varianza)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def comparar(actual, base, umbral, alfa):
+    """
+    Compara dos resultados caso a caso
+
+    Args:
+        actual: Resultados nuevos
+        base: Resultados de referencia
+        umbral: Empeoramiento relativo de la mediana a partir del cual se marca
+        alfa: Nivel de significación
+
+    Returns:
+        list: Regresiones (dicts con caso, tareas, base, actual, ratio, p)
+    """
+    referencia = {(r['caso'], r['tareas']): r for r in base['resultados']}
+    regresiones = []
+    print(f"\n{'caso':<62} {'tareas':>8} {'base':>10} {'actual':>10} {'x':>6} {'p':>8}")
+    for resultado in actual['resultados']:
+        previo = referencia.get((resultado['caso'], resultado['tareas']))
+        if previo is None:
+            continue
+        ratio = resultado['mediana'] / previo['mediana']
+        p_peor = mann_whitney_mayor(resultado['muestras'], previo['muestras'])
+        p_mejor = mann_whitney_mayor(previo['muestras'], resultado['muestras'])
+        marca = ''
+        if ratio > 1 + umbral and p_peor < alfa:
+            marca = 'REGRESIÓN'
+            regresiones.append({'caso': resultado['caso'], 'tareas': resultado['tareas'],
+                                'base': previo['mediana'], 'actual': resultado['mediana'],
+                                'ratio': ratio, 'p': p_peor})
+        elif ratio < 1 / (1 + umbral) and p_mejor < alfa:
+            marca = 'mejora'
+        print(f"{resultado['caso']:<62} {resultado['tareas']:>8} "
+              f"{_formato(previo['mediana']):>10} {_formato(resultado['mediana']):>10} "
+              f"{ratio:>6.2f} {min(p_peor, p_mejor):>8.4f} {marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanos', default='1000,10000,100000',
+                        help='Tareas por prueba, separadas por comas (hasta 1000000)')
+    parser.add_argument('--repeticiones', type=int, default=10, help='Muestras por caso')
+    parser.add_argument('--filtro', help='Expresión regular sobre el nombre de los casos')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--max-archivo', type=int, default=100000,
+                        help='Tamaño máximo en el que se mide archivar_completadas')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--resultados', help='Usar estos resultados en vez de ejecutar la suite')
+    parser.add_argument('--base', help='Resultados de referencia con los que comparar')
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help='Empeoramiento relativo mínimo para marcar regresión')
+    parser.add_argument('--alfa', type=float, default=0.01, help='Nivel de significación')
+    args = parser.parse_args()
+
+    if args.resultados:
+        with open(args.resultados, encoding='utf-8') as archivo:
+            actual = json.load(archivo)
+    else:
+        tamanos = [int(n) for n in args.tamanos.split(',')]
+        actual = ejecutar(tamanos, args.repeticiones, args.filtro, args.semilla,
+                          args.max_archivo)
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as archivo:
+                json.dump(actual, archivo, indent=1)
+            print(f"\nResultados guardados en {args.salida}")
+
+    if args.base:
+        with open(args.base, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(actual, base, args.umbral, args.alfa)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones (mediana > +{args.umbral:.0%}, "
+                  f"p < {args.alfa})")
+            sys.exit(1)
+        print("\nSin regresiones significativas")
+
+
+if __name__ == '__main__':
+    main()
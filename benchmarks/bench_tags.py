@@ -0,0 +1,130 @@
+# benchmarks/bench_tags.py
+"""
+Benchmark del filtro por etiquetas (/api/tasks?tags=...)
+Compara recorrer todas las tareas comprobando sus etiquetas con resolver
+el filtro en los mapas de bits del índice, para consultas AND, OR y NOT
+de distinta selectividad combinadas con estado y prioridad: con límite
+(el listado de la API) y calculando todos los IDs. Mide también cuánto
+cuesta cambiar las etiquetas de una tarea con el índice actualizándose.
+Las etiquetas siguen una distribución de Zipf: unas pocas muy frecuentes
+(contenedores densos) y muchas raras (contenedores dispersos)
+
+Uso:
+    python -m benchmarks.bench_tags --tamanos 10000,100000,1000000 --limite 50
+"""
+
+import argparse
+import random
+import time
+
+from app.services import task_service
+
+# Consultas: nombre -> (con, alguna, sin, completada, prioridad)
+CONSULTAS = {
+    'tags=t0 (frecuente)': (['t0'], [], [], None, None),
+    'tags=t40 (rara)': (['t40'], [], [], None, None),
+    'tags=t0,t1 pendientes': (['t0', 't1'], [], [], False, None),
+    'tags_any=t2,t3,t4 alta': ([], ['t2', 't3', 't4'], [], None, 'alta'),
+    'tags=t1,-t0': (['t1'], [], ['t0'], None, None),
+    'tags=t5,t6,t7 (vacía)': (['t5', 't6', 't7'], [], [], None, None)
+}
+
+
+def etiquetas_de(rnd, cantidad):
+    """Entre 0 y 4 etiquetas de t0..t<cantidad-1>, con frecuencia de Zipf"""
+    pesos = [1 / (i + 1) for i in range(cantidad)]
+    elegidas = rnd.choices(range(cantidad), weights=pesos, k=rnd.randint(0, 4))
+    return tuple(sorted({f't{i}' for i in elegidas}))
+
+
+def poblar(n, etiquetas, semilla=1):
+    """Llena el almacén con n tareas etiquetadas"""
+    task_service.configurar_store()
+    rnd = random.Random(semilla)
+    prioridades = ['alta', 'media', 'baja']
+    task_service.store.insertar_varias([
+        {'titulo': f'Tarea {i}', 'descripcion': None, 'completada': rnd.random() < 0.4,
+         'prioridad': rnd.choice(prioridades), 'usuario_id': rnd.randint(1, 50),
+         'etiquetas': etiquetas_de(rnd, etiquetas)}
+        for i in range(n)])
+
+
+def recorrer(con, alguna, sin, completada, prioridad, limite=None):
+    """
+    Filtro recorriendo todas las tareas (sin índice)
+
+    Returns:
+        list: IDs de las primeras tareas que cumplen el filtro
+    """
+    con, alguna, sin = set(con), set(alguna), set(sin)
+    resultado = []
+    for tarea in task_service.store.todas():
+        etiquetas = set(tarea.etiquetas)
+        if (con <= etiquetas and (not alguna or alguna & etiquetas)
+                and not sin & etiquetas
+                and (completada is None or tarea.completada == completada)
+                and (prioridad is None or tarea.prioridad == prioridad)):
+            resultado.append(tarea.id)
+            if len(resultado) == limite:
+                break
+    return resultado
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y devuelve el mejor tiempo
+
+    Returns:
+        float: Milisegundos de la mejor repetición
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', default='10000,100000,1000000')
+    parser.add_argument('--etiquetas', type=int, default=50, help='Etiquetas distintas')
+    parser.add_argument('--limite', type=int, default=50)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+    limite = args.limite
+
+    print(f"{'tareas':>8} {'consulta':<26} {'recorrer ms':>12} {'índice ms':>10} "
+          f"{'recorrer todo ms':>17} {'mapas todo ms':>14} {'total':>8}")
+    for n in [int(t) for t in args.tamanos.split(',')]:
+        poblar(n, args.etiquetas)
+        indice = task_service.obtener_indice('etiquetas')
+        for nombre, filtro in CONSULTAS.items():
+            def listar():
+                return task_service.listar_tareas(filtro[3], filtro[4], None, limite, False,
+                                                  *filtro[:3])[0]
+
+            # Los dos caminos deben devolver las mismas tareas
+            todas = indice.filtrar(*filtro)
+            assert todas == recorrer(*filtro)
+            assert [t['id'] for t in listar()] == recorrer(*filtro, limite)
+            tiempos = [medir(funcion, args.repeticiones) for funcion in (
+                lambda: recorrer(*filtro, limite), listar,
+                lambda: recorrer(*filtro), lambda: indice.filtrar(*filtro))]
+            print(f"{n:>8} {nombre:<26} {tiempos[0]:>12.3f} {tiempos[1]:>10.3f} "
+                  f"{tiempos[2]:>17.3f} {tiempos[3]:>14.3f} {len(todas):>8}")
+
+        ids = [t.id for t in task_service.store.primeras(1000)]
+        rnd = random.Random(2)
+
+        def reetiquetar():
+            for task_id in ids:
+                task_service.store.actualizar(task_id,
+                                              {'etiquetas': etiquetas_de(rnd, args.etiquetas)})
+
+        print(f"{n:>8} {'1000 cambios de etiquetas':<26} {'':>12} "
+              f"{medir(reetiquetar, 1):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_task_store.py
+"""
+Benchmark del almacén compartido de tareas
+Mide el throughput (operaciones/s) según el número de workers
+
+Uso:
+    python -m benchmarks.bench_task_store --workers 1,2,4,8 --duracion 3
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from app.store import SharedMemoryTaskStore
+
+
+def _worker(store, duracion, proporcion_escritura, resultados):
+    """
+    Ejecuta una mezcla de lecturas y escrituras durante un tiempo fijo
+
+    Args:
+        store: Almacén compartido heredado del proceso padre
+        duracion: Segundos de ejecución
+        proporcion_escritura: Fracción de operaciones que escriben
+        resultados: Cola donde se publica el número de operaciones
+    """
+    rnd = random.Random(os.getpid())
+    operaciones = 0
+    fin = time.perf_counter() + duracion
+    while time.perf_counter() < fin:
+        if rnd.random() < proporcion_escritura:
+            tarea = store.insertar({'titulo': 'bench', 'prioridad': 'media'})
+            store.actualizar(tarea.id, {'completada': True})
+        else:
+            store.obtener(rnd.randint(1, 1000))
+        operaciones += 1
+    resultados.put(operaciones)
+
+
+def medir(workers, duracion, proporcion_escritura, tareas_iniciales):
+    """
+    Mide el throughput agregado con un número de workers
+
+    Returns:
+        float: Operaciones por segundo
+    """
+    store = SharedMemoryTaskStore(tamano=256 * 1024 * 1024)
+    for i in range(tareas_iniciales):
+        store.insertar({'titulo': f'Tarea {i}', 'prioridad': 'alta'})
+
+    ctx = multiprocessing.get_context('fork')
+    resultados = ctx.Queue()
+    procesos = [ctx.Process(target=_worker,
+                            args=(store, duracion, proporcion_escritura, resultados))
+                for _ in range(workers)]
+    for p in procesos:
+        p.start()
+    total = sum(resultados.get() for _ in procesos)
+    for p in procesos:
+        p.join()
+
+    # Todos los workers deben ver el mismo contenido
+    store.sincronizar()
+    store.cerrar()
+    return total / duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--duracion', type=float, default=3.0)
+    parser.add_argument('--escrituras', type=float, default=0.05,
+                        help='Fracción de operaciones de escritura')
+    parser.add_argument('--tareas', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'ops/s':>12} {'ops/s/worker':>14}")
+    for n in [int(w) for w in args.workers.split(',')]:
+        ops = medir(n, args.duracion, args.escrituras, args.tareas)
+        print(f"{n:>8} {ops:>12.0f} {ops / n:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_users_bulk.py
+"""
+Benchmark del alta de usuarios en lote
+Contra un PostgREST falso con latencia fija, crea N usuarios uno a uno con
+POST /api/users y de una vez con POST /api/users/bulk, y compara el tiempo
+y las llamadas a Supabase. Comprueba que el lote hace exactamente una
+consulta y una inserción, y que rechaza registro a registro los datos
+inválidos, los emails repetidos en el lote y los ya registrados.
+
+Uso:
+    python -m benchmarks.bench_users_bulk --usuarios 200 --retardo 0.02
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.supabase_falso import SupabaseFalso
+
+_EXISTENTE = {'id': 1, 'nombre': 'Ana', 'email': 'ana@example.com', 'rol': 'usuario'}
+
+
+def _lote(n, prefijo):
+    """n usuarios válidos con emails únicos"""
+    return [{'nombre': f'Usuario {i}', 'email': f'{prefijo}{i}@example.com'}
+            for i in range(n)]
+
+
+def _con_servidor(retardo, funcion):
+    """
+    Ejecuta funcion(cliente) contra un PostgREST falso nuevo
+
+    Returns:
+        tuple: (resultado, segundos, peticiones por método)
+    """
+    from app import create_app
+    from app.services import user_service
+
+    falso = SupabaseFalso(retardo=retardo, usuarios=[_EXISTENTE]).iniciar()
+    os.environ['SUPABASE_URL'] = falso.url
+    user_service._cliente = None
+    try:
+        cliente = create_app('production').test_client()
+        inicio = time.perf_counter()
+        resultado = funcion(cliente)
+        segundos = time.perf_counter() - inicio
+    finally:
+        falso.detener()
+    return resultado, segundos, dict(falso.peticiones)
+
+
+def comprobar_rechazos(retardo):
+    """Un lote con registros inválidos, repetidos y existentes"""
+    items = [
+        {'nombre': 'Nuevo', 'email': 'nuevo@example.com'},
+        {'nombre': '', 'email': 'vacio@example.com'},
+        {'nombre': 'Otra vez', 'email': 'nuevo@example.com'},
+        {'nombre': 'Ana bis', 'email': 'ana@example.com'},
+        'no es un objeto',
+        {'nombre': 'Admin', 'email': 'admin@example.com', 'rol': 'ADMINISTRADOR'},
+    ]
+    respuesta, _, peticiones = _con_servidor(
+        retardo, lambda cliente: cliente.post('/api/users/bulk', json=items))
+    resumen = respuesta.get_json()
+    assert respuesta.status_code == 200, resumen
+    assert peticiones == {'GET': 1, 'POST': 1}, peticiones
+    assert (resumen['creados'], resumen['rechazados']) == (2, 4), resumen
+    creados = [r['indice'] for r in resumen['resultados'] if 'usuario' in r]
+    assert creados == [0, 5], resumen
+    assert resumen['resultados'][5]['usuario']['rol'] == 'administrador'
+    assert [r['indice'] for r in resumen['resultados']] == list(range(len(items)))
+
+    # Todos rechazados localmente o por existir: ninguna inserción
+    _, _, peticiones = _con_servidor(
+        retardo, lambda cliente: cliente.post('/api/users/bulk', json=[_EXISTENTE]))
+    assert peticiones == {'GET': 1}, peticiones
+    _, _, peticiones = _con_servidor(
+        retardo, lambda cliente: cliente.post('/api/users/bulk', json=[{'nombre': 'x'}]))
+    assert peticiones == {}, peticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--usuarios', type=int, default=200)
+    parser.add_argument('--retardo', type=float, default=0.02, help='Latencia de Supabase (s)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('TRACING_ENABLED', 'false')
+    os.environ['ADMISSION_ENABLED'] = 'false'
+    n = args.usuarios
+
+    comprobar_rechazos(args.retardo)
+
+    def uno_a_uno(cliente):
+        for usuario in _lote(n, 'u'):
+            respuesta = cliente.post('/api/users', json=usuario)
+            assert respuesta.status_code == 201, respuesta.get_json()
+
+    def en_lote(cliente):
+        respuesta = cliente.post('/api/users/bulk', json=_lote(n, 'l'))
+        assert respuesta.status_code == 200, respuesta.get_json()
+        assert respuesta.get_json()['creados'] == n, respuesta.get_json()
+
+    print(f"{'modo':<12} {'usuarios':>9} {'s':>8} {'GET':>6} {'POST':>6}")
+    for nombre, funcion in (('uno a uno', uno_a_uno), ('lote', en_lote)):
+        _, segundos, peticiones = _con_servidor(args.retardo, funcion)
+        if funcion is en_lote:
+            assert peticiones == {'GET': 1, 'POST': 1}, peticiones
+        else:
+            assert peticiones == {'GET': n, 'POST': n}, peticiones
+        print(f"{nombre:<12} {n:>9} {segundos:>8.3f} {peticiones.get('GET', 0):>6} "
+              f"{peticiones.get('POST', 0):>6}")
+
+
+if __name__ == '__main__':
+    main()
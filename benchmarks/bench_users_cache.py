@@ -0,0 +1,105 @@
+# benchmarks/bench_users_cache.py
+"""
+Benchmark de la caché del listado de usuarios
+Contra un PostgREST falso con latencia fija, lanza GET /api/users desde
+varios hilos con la caché desactivada y activada, y compara latencias y
+llamadas a Supabase. Cada cierto número de lecturas crea un usuario para
+comprobar que las escrituras invalidan la caché.
+
+Uso:
+    python -m benchmarks.bench_users_cache --peticiones 2000 --retardo 0.05
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.supabase_falso import SupabaseFalso
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000
+
+
+def _ejecutar(cliente, peticiones, hilos, cada):
+    """
+    Reparte las lecturas entre hilos; una de cada 'cada' crea un usuario
+
+    Returns:
+        list: Segundos de cada lectura
+    """
+    latencias = []
+    restantes = iter(range(peticiones))
+    lock = threading.Lock()
+
+    def trabajar():
+        while True:
+            with lock:
+                i = next(restantes, None)
+            if i is None:
+                return
+            if cada and i % cada == cada - 1:
+                respuesta = cliente.post('/api/users', json={'nombre': f'Usuario {i}',
+                                                             'email': f'u{i}@example.com'})
+                assert respuesta.status_code == 201, respuesta.get_json()
+                # Tras la escritura, la siguiente lectura ya la incluye
+                nombres = {u['nombre'] for u in cliente.get('/api/users').get_json()}
+                assert f'Usuario {i}' in nombres
+                continue
+            inicio = time.perf_counter()
+            respuesta = cliente.get('/api/users')
+            latencias.append(time.perf_counter() - inicio)
+            assert respuesta.status_code == 200
+
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    return sorted(latencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--retardo', type=float, default=0.05, help='Latencia de Supabase (s)')
+    parser.add_argument('--escritura-cada', type=int, default=200,
+                        help='Una escritura cada N peticiones (0: ninguna)')
+    parser.add_argument('--ttl', type=float, default=1.0)
+    parser.add_argument('--obsoleto', type=float, default=30.0)
+    args = parser.parse_args()
+
+    os.environ.setdefault('TRACING_ENABLED', 'false')
+    os.environ['ADMISSION_ENABLED'] = 'false'
+    from app import create_app
+    from app.services import user_service
+
+    print(f"{'caché':>6} {'lecturas':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'máx (ms)':>9} "
+          f"{'GET Supabase':>13} {'s':>6}")
+    for ttl in (0, args.ttl):
+        falso = SupabaseFalso(retardo=args.retardo, usuarios=[
+            {'id': 1, 'nombre': 'Ana', 'email': 'ana@example.com', 'rol': 'usuario'}
+        ]).iniciar()
+        os.environ['SUPABASE_URL'] = falso.url
+        user_service._cliente = None
+        app = create_app('production')
+        user_service.configurar_cache(ttl, args.obsoleto)
+        try:
+            inicio = time.perf_counter()
+            latencias = _ejecutar(app.test_client(), args.peticiones, args.hilos,
+                                  args.escritura_cada)
+            total = time.perf_counter() - inicio
+        finally:
+            falso.detener()
+        print(f"{'sí' if ttl else 'no':>6} {len(latencias):>9} {_percentil(latencias, 0.5):>9.1f} "
+              f"{_percentil(latencias, 0.99):>9.1f} {_percentil(latencias, 1.0):>9.1f} "
+              f"{falso.peticiones['GET']:>13} {total:>6.1f}")
+    cache = user_service.cache_usuarios
+    print(f"\ncaché: {cache.aciertos} frescas, {cache.obsoletos} obsoletas, {cache.fallos} "
+          f"cargas síncronas, {cache.refrescos} refrescos, {cache.refrescos_fallidos} fallidos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/bench_validation.py
+"""
+Benchmark de validación de payloads
+Compara el coste por elemento de los esquemas compilados (uno a uno y por
+lotes) con la cadena de validadores sueltos que usaban los servicios, que
+además se detenía en el primer error
+
+Uso:
+    python -m benchmarks.bench_validation --items 100000
+"""
+
+import argparse
+import gc
+import random
+import re
+import time
+
+from app.services.task_service import ESQUEMA_TAREA_NUEVA
+from app.services.user_service import ESQUEMA_USUARIO_NUEVO
+from app.utils.validators import validar_string_no_vacio, sanitizar_string
+
+
+# Validadores tal como eran antes de los esquemas: reconstruyen la lista de
+# valores válidos y buscan el patrón en la caché de re en cada llamada
+def validar_email(email):
+    if not email:
+        return False
+    patron = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return bool(re.match(patron, email))
+
+
+def validar_prioridad(prioridad):
+    if not prioridad:
+        return False
+    prioridades_validas = ['alta', 'media', 'baja']
+    return prioridad.lower() in prioridades_validas
+
+
+def generar_tareas(n, invalidos, semilla=1):
+    """Genera payloads de tarea; una fracción 'invalidos' tiene una prioridad inválida"""
+    rnd = random.Random(semilla)
+    return [{'titulo': f'  Tarea {i} ',
+             'descripcion': f'Descripción {i}',
+             'prioridad': 'urgente' if rnd.random() < invalidos
+             else rnd.choice(['alta', 'Media', 'BAJA']),
+             'completada': rnd.random() < 0.3}
+            for i in range(n)]
+
+
+def generar_usuarios(n, invalidos, semilla=2):
+    """Genera payloads de usuario; una fracción 'invalidos' tiene un email inválido"""
+    rnd = random.Random(semilla)
+    return [{'nombre': f'Usuario {i}',
+             'email': f'usuario{i}' if rnd.random() < invalidos else f'usuario{i}@example.com',
+             'rol': rnd.choice(['usuario', 'Administrador'])}
+            for i in range(n)]
+
+
+def tarea_legado(data):
+    """Validación de tarea tal como la hacía crear_tarea con validadores sueltos"""
+    titulo = sanitizar_string(data.get('titulo'))
+    if not validar_string_no_vacio(titulo):
+        return None, "El título es requerido y no puede estar vacío"
+    prioridad = data.get('prioridad', 'media').lower()
+    if not validar_prioridad(prioridad):
+        return None, "La prioridad debe ser: alta, media o baja"
+    return {'titulo': titulo,
+            'descripcion': sanitizar_string(data.get('descripcion', '')),
+            'completada': data.get('completada', False),
+            'prioridad': prioridad,
+            'usuario_id': data.get('usuario_id')}, None
+
+
+def usuario_legado(data):
+    """Validación de usuario tal como la hacía crear_usuario con validadores sueltos"""
+    if not data.get('nombre'):
+        return None, "El nombre es requerido"
+    if not data.get('email'):
+        return None, "El email es requerido"
+    nombre = sanitizar_string(data['nombre'])
+    email = sanitizar_string(data['email'])
+    if not validar_string_no_vacio(nombre):
+        return None, "El nombre no puede estar vacío"
+    if not validar_email(email):
+        return None, "El email no es válido"
+    rol = data.get('rol', 'usuario').lower()
+    if rol not in ['administrador', 'usuario']:
+        return None, "Rol inválido"
+    return {'nombre': nombre, 'email': email, 'rol': rol}, None
+
+
+def medir(modos, repeticiones):
+    """
+    Mide varias funciones alternándolas en cada repetición (sin recolector de
+    basura), para que el ruido de la máquina afecte a todas por igual
+
+    Args:
+        modos: Diccionario nombre -> función sin argumentos
+        repeticiones: Veces que se ejecuta cada función
+
+    Returns:
+        dict: nombre -> segundos de la mejor repetición
+    """
+    mejores = dict.fromkeys(modos, float('inf'))
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            for nombre, funcion in modos.items():
+                inicio = time.perf_counter()
+                funcion()
+                mejores[nombre] = min(mejores[nombre], time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    return mejores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--invalidos', type=float, default=0.05,
+                        help='Fracción de payloads inválidos')
+    args = parser.parse_args()
+
+    casos = [
+        ('tareas', generar_tareas(args.items, args.invalidos),
+         tarea_legado, ESQUEMA_TAREA_NUEVA),
+        ('usuarios', generar_usuarios(args.items, args.invalidos),
+         usuario_legado, ESQUEMA_USUARIO_NUEVO),
+    ]
+
+    print(f"{'payload':<10} {'modo':<18} {'ns/item':>10} {'vs legado':>10}")
+    for nombre, items, legado, esquema in casos:
+        validar = esquema.validar
+        validar_lote = esquema.validar_lote
+        tiempos = medir({
+            'legado': lambda: [legado(d) for d in items],
+            'esquema': lambda: [validar(d) for d in items],
+            'esquema (lote)': lambda: validar_lote(items),
+        }, args.repeticiones)
+        base = tiempos['legado']
+        for modo, segundos in tiempos.items():
+            print(f"{nombre:<10} {modo:<18} {segundos / len(items) * 1e9:>10.0f} "
+                  f"{base / segundos:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,551 @@
+# benchmarks/generador_carga.py
+"""
+Generador de carga para planificar capacidad
+Envía a una instancia de TaskFlow peticiones en lazo abierto (a un ritmo
+programado, sin esperar las respuestas) siguiendo etapas de ritmo constante
+o en rampa. Las peticiones salen de una mezcla configurable de operaciones
+de tareas y usuarios, o se reproducen desde un registro JSONL. Informa, por
+etapa y por endpoint, del rendimiento, la tasa de errores y las latencias
+p50, p95 y p99, para ver en qué ritmo se satura el servicio.
+
+Con --arrancar levanta el servidor de producción contra un PostgREST falso
+local (benchmarks/supabase_falso.py) y lo llena con tareas generadas; si
+no, se usa la instancia de --url tal como esté.
+
+La latencia se mide desde el instante programado de cada petición, así que
+incluye la espera en el propio generador cuando el servidor no da abasto
+(sin ocultar la cola, como haría un cliente en lazo cerrado).
+
+Etapas (--etapas): lista separada por comas de ritmo:segundos (constante)
+o inicio-fin:segundos (rampa lineal), en peticiones por segundo.
+
+Mezcla (--mezcla): nombre=peso separados por comas, con los nombres de
+OPERACIONES.
+
+Registro (--registro): una petición JSON por línea con method, path y,
+opcionalmente, body, nombre (endpoint en el informe) y t (segundos desde el
+inicio; con --respetar-tiempos se reproduce a ese ritmo, dividido por
+--velocidad, en lugar de seguir las etapas). --grabar escribe en ese
+formato las peticiones enviadas.
+
+Uso:
+    python -m benchmarks.generador_carga --arrancar --tareas 10000 --etapas 50-400:60
+    python -m benchmarks.generador_carga --url http://127.0.0.1:5000 --etapas 100:30,200:30
+    python -m benchmarks.generador_carga --url http://127.0.0.1:5000 --registro peticiones.jsonl
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from benchmarks.bench_serve import RAIZ, _esperar_listo
+from benchmarks.generadores import REFERENCIA, generar_tareas, generar_usuarios, usuarios_para
+from benchmarks.supabase_falso import SupabaseFalso
+
+_DIA = 86400
+_PRIORIDADES = ('alta', 'media', 'baja')
+
+
+class Contexto:
+    """
+    Estado con el que las operaciones eligen IDs (solo lo usa el hilo que
+    programa las peticiones)
+
+    Attributes:
+        rnd (random.Random): Generador de la mezcla
+        max_tarea (int): ID de tarea más alto conocido
+        usuarios (int): Usuarios con IDs 1..usuarios
+    """
+
+    def __init__(self, semilla, max_tarea, usuarios):
+        self.rnd = random.Random(semilla)
+        self.max_tarea = max(1, max_tarea)
+        self.usuarios = max(1, usuarios)
+
+    def tarea(self):
+        """ID de tarea, sesgado hacia las recientes (las más consultadas)"""
+        return max(1, self.max_tarea - int(self.max_tarea * self.rnd.random() ** 3))
+
+    def usuario(self):
+        """ID de usuario, sesgado hacia los primeros (los que más tareas tienen)"""
+        return 1 + int(self.usuarios * self.rnd.random() ** 2)
+
+
+# Operaciones de la mezcla: nombre -> función(contexto) que devuelve
+# (método, ruta, cuerpo, endpoint)
+OPERACIONES = {
+    'ver': lambda c: ('GET', f'/api/tasks/{c.tarea()}', None, 'GET /api/tasks/<id>'),
+    'listar': lambda c: ('GET', '/api/tasks?completada=false&limit=50', None, 'GET /api/tasks'),
+    'siguientes': lambda c: ('GET', f'/api/tasks/next?usuario_id={c.usuario()}&k=10', None,
+                             'GET /api/tasks/next'),
+    'listas': lambda c: ('GET', '/api/tasks/ready?limit=50', None, 'GET /api/tasks/ready'),
+    'vencen': lambda c: ('GET', f'/api/tasks/due?after={REFERENCIA:.0f}'
+                                f'&before={REFERENCIA + 7 * _DIA:.0f}&limit=50', None,
+                         'GET /api/tasks/due'),
+    'crear': lambda c: ('POST', '/api/tasks',
+                        {'titulo': f'Carga {c.rnd.randrange(10 ** 6)}',
+                         'prioridad': c.rnd.choice(_PRIORIDADES), 'usuario_id': c.usuario()},
+                        'POST /api/tasks'),
+    'actualizar': lambda c: ('PUT', f'/api/tasks/{c.tarea()}',
+                             {'prioridad': c.rnd.choice(_PRIORIDADES)}, 'PUT /api/tasks/<id>'),
+    'completar': lambda c: ('PATCH', f'/api/tasks/{c.tarea()}/complete', None,
+                            'PATCH /api/tasks/<id>/complete'),
+    'usuarios': lambda c: ('GET', '/api/users', None, 'GET /api/users'),
+    'usuario': lambda c: ('GET', f'/api/users/{c.usuario()}', None, 'GET /api/users/<id>'),
+    'tareas_usuario': lambda c: ('GET', f'/api/users/{c.usuario()}/tasks', None,
+                                 'GET /api/users/<id>/tasks'),
+    'estadisticas': lambda c: ('GET', f'/api/users/{c.usuario()}/stats', None,
+                               'GET /api/users/<id>/stats'),
+}
+
+MEZCLA_POR_DEFECTO = ('ver=30,listar=8,siguientes=10,listas=4,vencen=4,crear=8,actualizar=8,'
+                      'completar=6,usuarios=6,usuario=8,tareas_usuario=4,estadisticas=4')
+
+
+def leer_etapas(texto):
+    """
+    Interpreta --etapas
+
+    Args:
+        texto: 'ritmo:segundos' o 'inicio-fin:segundos' separados por comas
+
+    Returns:
+        list: (ritmo inicial, ritmo final, segundos) por etapa
+
+    Raises:
+        ValueError: Si alguna etapa no tiene el formato esperado
+    """
+    etapas = []
+    for parte in texto.split(','):
+        ritmos, _, segundos = parte.strip().partition(':')
+        inicio, _, fin = ritmos.partition('-')
+        inicio = float(inicio)
+        fin = float(fin) if fin else inicio
+        segundos = float(segundos)
+        if inicio < 0 or fin < 0 or segundos <= 0 or inicio == fin == 0:
+            raise ValueError(f"Etapa inválida: {parte}")
+        etapas.append((inicio, fin, segundos))
+    return etapas
+
+
+def leer_mezcla(texto):
+    """
+    Interpreta --mezcla
+
+    Returns:
+        tuple: (nombres, pesos acumulados)
+
+    Raises:
+        ValueError: Si hay operaciones desconocidas o ningún peso positivo
+    """
+    nombres, pesos = [], []
+    for parte in texto.split(','):
+        nombre, _, peso = parte.strip().partition('=')
+        if nombre not in OPERACIONES:
+            raise ValueError(f"Operación desconocida: {nombre} (opciones: {', '.join(OPERACIONES)})")
+        nombres.append(nombre)
+        pesos.append(float(peso or 1))
+    if sum(pesos) <= 0:
+        raise ValueError("La mezcla no tiene ningún peso positivo")
+    return nombres, list(itertools.accumulate(pesos))
+
+
+def instantes(etapas, poisson, rnd):
+    """
+    Instantes de llegada (segundos desde el inicio) según las etapas
+
+    En una rampa el ritmo crece linealmente: la llegada k-ésima se coloca
+    donde la integral del ritmo alcanza k (o un incremento exponencial de
+    media 1 con llegadas de Poisson).
+
+    Yields:
+        tuple: (índice de etapa, segundos desde el inicio)
+    """
+    origen = 0.0
+    for numero, (inicio, fin, duracion) in enumerate(etapas):
+        pendiente = (fin - inicio) / duracion
+        acumulado = 0.0  # llegadas esperadas desde el principio de la etapa
+        total = (inicio + fin) / 2 * duracion
+        while True:
+            acumulado += rnd.expovariate(1.0) if poisson else 1.0
+            if acumulado > total:
+                break
+            # Resolver inicio*t + pendiente*t²/2 = acumulado
+            if pendiente:
+                t = (-inicio + math.sqrt(inicio * inicio + 2 * pendiente * acumulado)) / pendiente
+            else:
+                t = acumulado / inicio
+            yield numero, origen + t
+        origen += duracion
+
+
+def leer_registro(ruta):
+    """
+    Lee un registro JSONL de peticiones
+
+    Returns:
+        list: (método, ruta, cuerpo, endpoint, t o None)
+
+    Raises:
+        ValueError: Si una línea no es un objeto con method y path
+    """
+    peticiones = []
+    with open(ruta, encoding='utf-8') as archivo:
+        for numero, linea in enumerate(archivo, 1):
+            if not linea.strip():
+                continue
+            datos = json.loads(linea)
+            if not isinstance(datos, dict) or 'method' not in datos or 'path' not in datos:
+                raise ValueError(f"Línea {numero}: se esperaba un objeto con method y path")
+            metodo = datos['method'].upper()
+            nombre = datos.get('nombre') or f"{metodo} {normalizar_ruta(datos['path'])}"
+            peticiones.append((metodo, datos['path'], datos.get('body'), nombre, datos.get('t')))
+    if not peticiones:
+        raise ValueError("El registro está vacío")
+    return peticiones
+
+
+def normalizar_ruta(ruta):
+    """Endpoint de una ruta: sin query y con los números como <id>"""
+    return re.sub(r'/\d+(?=/|$)', '/<id>', ruta.split('?', 1)[0])
+
+
+class Emisor:
+    """
+    Envía peticiones en un pool de hilos, cada uno con su conexión
+    keep-alive, y anota el resultado de cada una
+
+    Attributes:
+        resultados (list): (etapa, endpoint, estado, segundos) por petición;
+            estado es el código HTTP o 'error' si falló la conexión
+        descartadas (int): Peticiones no enviadas por superar max_en_vuelo
+    """
+
+    def __init__(self, url, hilos, timeout, max_en_vuelo):
+        partes = urlsplit(url)
+        self._clase = (http.client.HTTPSConnection if partes.scheme == 'https'
+                       else http.client.HTTPConnection)
+        self._destino = (partes.hostname, partes.port)
+        self._prefijo = partes.path.rstrip('/')
+        self._timeout = timeout
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='carga')
+        self._en_vuelo = threading.BoundedSemaphore(max_en_vuelo)
+        self.resultados = []
+        self.descartadas = 0
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = self._local.conexion = self._clase(*self._destino, timeout=self._timeout)
+        return conexion
+
+    def _enviar(self, etapa, metodo, ruta, cuerpo, nombre, programada):
+        try:
+            datos, cabeceras = None, {}
+            if cuerpo is not None:
+                datos = json.dumps(cuerpo).encode('utf-8')
+                cabeceras['Content-Type'] = 'application/json'
+            try:
+                conexion = self._conexion()
+                conexion.request(metodo, self._prefijo + ruta, body=datos, headers=cabeceras)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                estado = respuesta.status
+                if respuesta.will_close:
+                    conexion.close()
+                    self._local.conexion = None
+            except (OSError, http.client.HTTPException):
+                estado = 'error'
+                if self._local.conexion is not None:
+                    self._local.conexion.close()
+                    self._local.conexion = None
+            self.resultados.append((etapa, nombre, estado, time.perf_counter() - programada))
+        finally:
+            self._en_vuelo.release()
+
+    def programar(self, etapa, metodo, ruta, cuerpo, nombre, programada):
+        """
+        Envía una petición en cuanto haya un hilo libre
+
+        Args:
+            programada: Instante (perf_counter) en que debía salir
+        """
+        if not self._en_vuelo.acquire(blocking=False):
+            self.descartadas += 1
+            return
+        self._pool.submit(self._enviar, etapa, metodo, ruta, cuerpo, nombre, programada)
+
+    def cerrar(self):
+        """Espera a que terminen las peticiones en curso"""
+        self._pool.shutdown(wait=True)
+
+
+def ejecutar(emisor, llegadas, peticion, grabar=None):
+    """
+    Programa las peticiones en sus instantes de llegada
+
+    Args:
+        emisor: Emisor
+        llegadas: Iterable de (etapa, segundos desde el inicio)
+        peticion: Función sin argumentos que devuelve (método, ruta, cuerpo, endpoint)
+        grabar: Archivo abierto donde escribir las peticiones (opcional)
+
+    Returns:
+        float: Instante (perf_counter) del inicio
+    """
+    inicio = time.perf_counter()
+    for etapa, segundos in llegadas:
+        momento = inicio + segundos
+        espera = momento - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        metodo, ruta, cuerpo, nombre = peticion()
+        if grabar is not None:
+            linea = {'method': metodo, 'path': ruta, 'nombre': nombre, 't': round(segundos, 4)}
+            if cuerpo is not None:
+                linea['body'] = cuerpo
+            grabar.write(json.dumps(linea, ensure_ascii=False) + '\n')
+        emisor.programar(etapa, metodo, ruta, cuerpo, nombre, momento)
+    return inicio
+
+
+def _percentil(valores, p):
+    """Percentil (valores ordenados, en segundos) en milisegundos"""
+    if not valores:
+        return float('nan')
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000
+
+
+def resumir(resultados, segundos):
+    """
+    Métricas de un grupo de peticiones
+
+    Args:
+        resultados: (estado, segundos) por petición
+        segundos: Duración del periodo en que se enviaron
+
+    Returns:
+        dict: peticiones, rendimiento (respuestas no 5xx por segundo), tasa
+            de errores (5xx y de conexión), 4xx y latencias p50/p95/p99 (ms)
+    """
+    latencias = sorted(duracion for _, duracion in resultados)
+    errores = sum(1 for estado, _ in resultados if estado == 'error' or estado >= 500)
+    cliente = sum(1 for estado, _ in resultados if estado != 'error' and 400 <= estado < 500)
+    return {
+        'peticiones': len(resultados),
+        'rendimiento': round((len(resultados) - errores) / segundos, 2) if segundos else 0.0,
+        'errores': round(errores / len(resultados), 4) if resultados else 0.0,
+        '4xx': cliente,
+        'p50_ms': round(_percentil(latencias, 0.50), 2),
+        'p95_ms': round(_percentil(latencias, 0.95), 2),
+        'p99_ms': round(_percentil(latencias, 0.99), 2),
+    }
+
+
+def informe(resultados, etapas):
+    """
+    Agrupa los resultados por etapa y endpoint
+
+    Args:
+        resultados: Emisor.resultados
+        etapas: (ritmo inicial, ritmo final, segundos) por etapa
+
+    Returns:
+        list: Diccionarios con etapa, ritmo, endpoint y las métricas de resumir()
+    """
+    grupos = {}
+    for etapa, nombre, estado, duracion in resultados:
+        grupos.setdefault((etapa, nombre), []).append((estado, duracion))
+        grupos.setdefault((etapa, '(total)'), []).append((estado, duracion))
+    filas = []
+    for (etapa, nombre), propias in sorted(grupos.items(),
+                                           key=lambda item: (item[0][0], item[0][1] != '(total)',
+                                                             item[0][1])):
+        inicio, fin, segundos = etapas[etapa]
+        ritmo = f'{inicio:g}' if inicio == fin else f'{inicio:g}-{fin:g}'
+        filas.append({'etapa': etapa + 1, 'ritmo': ritmo, 'endpoint': nombre,
+                      **resumir(propias, segundos)})
+    return filas
+
+
+def imprimir(filas, descartadas):
+    """Muestra el informe como tabla"""
+    print(f"{'etapa':>5} {'ritmo/s':>10} {'endpoint':<32} {'n':>7} {'ok/s':>8} {'err %':>6} "
+          f"{'4xx':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for fila in filas:
+        print(f"{fila['etapa']:>5} {fila['ritmo']:>10} {fila['endpoint']:<32} "
+              f"{fila['peticiones']:>7} {fila['rendimiento']:>8.1f} {fila['errores'] * 100:>6.2f} "
+              f"{fila['4xx']:>5} {fila['p50_ms']:>8.1f} {fila['p95_ms']:>8.1f} "
+              f"{fila['p99_ms']:>8.1f}")
+    if descartadas:
+        print(f"\n{descartadas} peticiones no se enviaron: había --max-en-vuelo sin responder")
+
+
+def _arrancar(args):
+    """
+    Levanta el PostgREST falso y el servidor de producción, y carga las tareas
+
+    Returns:
+        tuple: (url, proceso, falso, ID de tarea más alto, usuarios)
+    """
+    usuarios = args.usuarios or usuarios_para(args.tareas)
+    falso = SupabaseFalso(retardo=args.retardo_supabase, concurrencia=args.concurrencia_supabase,
+                          usuarios=generar_usuarios(usuarios)).iniciar()
+    env = dict(os.environ, PORT=str(args.port), WORKERS=str(args.workers),
+               THREADS=str(args.hilos_servidor), SUPABASE_URL=falso.url,
+               SUPABASE_KEY=os.getenv('SUPABASE_KEY', 'carga'), TASK_STORE=args.store,
+               TRACING_ENABLED=os.getenv('TRACING_ENABLED', 'false'),
+               # Las tareas generadas son de antes de REFERENCIA: con el
+               # archivado activo casi todas las completadas saldrían del almacén
+               TASK_ARCHIVE_ENABLED=os.getenv('TASK_ARCHIVE_ENABLED', 'false'))
+    proceso = subprocess.Popen([sys.executable, 'app.py', 'serve'], cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _esperar_listo(args.port)
+        max_tarea = 3  # Tareas iniciales de cada almacén
+        if args.tareas:
+            cuerpo = ''.join(json.dumps(tarea) + '\n'
+                             for tarea in generar_tareas(args.tareas, usuarios, args.semilla))
+            conexion = http.client.HTTPConnection('127.0.0.1', args.port, timeout=600)
+            conexion.request('POST', '/api/tasks/import', body=cuerpo.encode('utf-8'))
+            resumen = json.loads(conexion.getresponse().read())
+            conexion.close()
+            max_tarea += resumen.get('importadas', 0)
+            print(f"Cargadas {resumen.get('importadas', 0)} tareas de {usuarios} usuarios "
+                  f"({resumen.get('rechazadas', 0)} rechazadas)")
+    except BaseException:
+        _detener(proceso, falso)
+        raise
+    return f'http://127.0.0.1:{args.port}', proceso, falso, max_tarea, usuarios
+
+
+def _detener(proceso, falso):
+    """Para el servidor y el PostgREST falso"""
+    proceso.send_signal(signal.SIGTERM)
+    proceso.wait(timeout=60)
+    falso.detener()
+
+
+def _max_tarea(url, timeout):
+    """ID de tarea más alto de una instancia en marcha (1 si no se puede leer)"""
+    partes = urlsplit(url)
+    try:
+        conexion = http.client.HTTPConnection(partes.hostname, partes.port, timeout=timeout)
+        conexion.request('GET', partes.path.rstrip('/') + '/api/tasks?sort=-id&limit=1')
+        tareas = json.loads(conexion.getresponse().read())
+        conexion.close()
+        return tareas[0]['id'] if tareas else 1
+    except (OSError, http.client.HTTPException, ValueError, LookupError, TypeError):
+        return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--url', help='Instancia en marcha (ej: http://127.0.0.1:5000)')
+    destino.add_argument('--arrancar', action='store_true',
+                         help='Levantar servidor y PostgREST falso locales')
+    parser.add_argument('--etapas', default='50:30', help='ritmo:s o inicio-fin:s, por comas')
+    parser.add_argument('--llegadas', choices=('poisson', 'constante'), default='poisson')
+    parser.add_argument('--mezcla', default=MEZCLA_POR_DEFECTO)
+    parser.add_argument('--registro', help='JSONL de peticiones a reproducir en lugar de la mezcla')
+    parser.add_argument('--respetar-tiempos', action='store_true',
+                        help='Reproducir el registro con sus tiempos t (ignora --etapas)')
+    parser.add_argument('--velocidad', type=float, default=1.0,
+                        help='Factor de aceleración con --respetar-tiempos')
+    parser.add_argument('--grabar', help='Escribir las peticiones enviadas en este JSONL')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--hilos', type=int, default=256, help='Hilos del generador')
+    parser.add_argument('--max-en-vuelo', type=int, default=10000)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--salida', help='Guardar el informe en JSON')
+    parser.add_argument('--usuarios', type=int, default=None,
+                        help='Usuarios 1..N (default: según --tareas, o 10 con --url)')
+    # Solo con --arrancar
+    parser.add_argument('--tareas', type=int, default=10000)
+    parser.add_argument('--port', type=int, default=5198)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--hilos-servidor', type=int, default=8)
+    parser.add_argument('--store', default='shared',
+                        help='TASK_STORE del servidor (con --workers > 1, solo shared)')
+    parser.add_argument('--retardo-supabase', type=float, default=0.005)
+    parser.add_argument('--concurrencia-supabase', type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        etapas = leer_etapas(args.etapas)
+        nombres, acumulados = leer_mezcla(args.mezcla)
+        registro = leer_registro(args.registro) if args.registro else None
+    except (ValueError, OSError) as error:
+        parser.error(str(error))
+    if args.arrancar and args.workers > 1 and args.store != 'shared':
+        parser.error('--workers > 1 necesita --store shared: el servidor no arranca con '
+                     'tareas separadas por worker')
+
+    proceso = falso = None
+    if args.arrancar:
+        url, proceso, falso, max_tarea, usuarios = _arrancar(args)
+    else:
+        url = args.url
+        max_tarea, usuarios = _max_tarea(url, args.timeout), args.usuarios or 10
+
+    rnd = random.Random(args.semilla)
+    if registro is not None and args.respetar_tiempos:
+        # Una sola etapa con la duración del registro
+        tiempos = [(t or 0.0) / args.velocidad for *_, t in registro]
+        duracion = max(tiempos[-1], 1e-3)
+        etapas = [(len(registro) / duracion,) * 2 + (duracion,)]
+        llegadas = ((0, t) for t in tiempos)
+    else:
+        llegadas = instantes(etapas, args.llegadas == 'poisson', rnd)
+
+    if registro is not None:
+        siguiente = itertools.cycle(registro)
+        peticion = lambda: next(siguiente)[:4]
+    else:
+        contexto = Contexto(args.semilla, max_tarea, usuarios)
+        total = acumulados[-1]
+
+        def peticion():
+            eleccion = bisect.bisect_right(acumulados, contexto.rnd.random() * total)
+            return OPERACIONES[nombres[min(eleccion, len(nombres) - 1)]](contexto)
+
+    emisor = Emisor(url, args.hilos, args.timeout, args.max_en_vuelo)
+    grabar = open(args.grabar, 'w', encoding='utf-8') if args.grabar else None
+    try:
+        origen = 'registro' if registro is not None else 'mezcla'
+        print(f"Enviando a {url} ({origen}), etapas: "
+              + ', '.join(f'{inicio:g}-{fin:g}/s x {segundos:g} s' for inicio, fin, segundos in etapas))
+        ejecutar(emisor, llegadas, peticion, grabar)
+        emisor.cerrar()
+    finally:
+        if grabar is not None:
+            grabar.close()
+        if proceso is not None:
+            _detener(proceso, falso)
+
+    filas = informe(emisor.resultados, etapas)
+    imprimir(filas, emisor.descartadas)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump({'url': url, 'etapas': etapas, 'descartadas': emisor.descartadas,
+                       'filas': filas}, archivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
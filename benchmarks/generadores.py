@@ -0,0 +1,128 @@
+# benchmarks/generadores.py
+"""
+Generadores deterministas de datos para benchmarks
+Producen usuarios y tareas con distribuciones parecidas a las reales: pocos
+usuarios con muchas tareas (Zipf), más prioridad media que alta o baja, más
+tareas recientes que antiguas y casi todas las antiguas completadas. Con la
+misma semilla y el mismo tamaño los datos son idénticos en cada ejecución.
+"""
+
+import bisect
+import itertools
+import random
+
+# Instante de referencia fijo (2024-01-01 UTC): las marcas de tiempo no
+# dependen del día en que se ejecuta el benchmark
+REFERENCIA = 1704067200.0
+
+_DIA = 86400
+_PRIORIDADES = ('alta', 'media', 'baja')
+_PESOS_PRIORIDAD = (0.2, 0.5, 0.3)
+_VERBOS = ('Revisar', 'Preparar', 'Actualizar', 'Documentar', 'Probar', 'Desplegar',
+           'Corregir', 'Diseñar', 'Migrar', 'Optimizar')
+_OBJETOS = ('informe', 'API', 'base de datos', 'frontend', 'presupuesto', 'contrato',
+            'pipeline', 'índices', 'manual', 'reunión semanal')
+
+
+def usuarios_para(tareas):
+    """
+    Número de usuarios razonable para un volumen de tareas (unas 100 por
+    usuario, como mínimo 10)
+
+    Args:
+        tareas: Número de tareas
+
+    Returns:
+        int: Número de usuarios
+    """
+    return max(10, tareas // 100)
+
+
+def generar_usuarios(n):
+    """
+    Usuarios con IDs 1..n (como los devolvería Supabase)
+
+    Args:
+        n: Número de usuarios
+
+    Returns:
+        list: Diccionarios con id, nombre, email y rol
+    """
+    return [{'id': i, 'nombre': f'Usuario {i}', 'email': f'usuario{i}@example.com',
+             'rol': 'administrador' if i % 50 == 1 else 'usuario'}
+            for i in range(1, n + 1)]
+
+
+def generar_tareas(n, usuarios=None, semilla=0, dias=365, zipf=1.1):
+    """
+    Tareas listas para TaskStore.insertar_varias, en orden de creación
+
+    - usuario_id: Zipf con exponente 'zipf' sobre los usuarios (el usuario 1
+      es el que más tareas tiene); un 5% sin usuario.
+    - prioridad: 20% alta, 50% media, 30% baja.
+    - creada_en: en los 'dias' anteriores a REFERENCIA, más densa cuanto más
+      reciente.
+    - completada: 85% de las de más de 30 días, 30% de las recientes; se
+      completan tras un tiempo exponencial de media 3 días.
+    - vence_en: el 60% tiene fecha límite entre 1 y 30 días después de
+      creada_en (sale de un generador aparte, así que el resto de campos
+      no cambia respecto a versiones sin vence_en).
+
+    Args:
+        n: Número de tareas
+        usuarios: Número de usuarios (por defecto, usuarios_para(n))
+        semilla: Semilla del generador
+        dias: Antigüedad máxima en días
+        zipf: Exponente de la distribución de tareas por usuario
+
+    Returns:
+        list: Diccionarios con titulo, descripcion, completada, prioridad,
+            usuario_id, creada_en, completada_en y vence_en
+    """
+    rnd = random.Random(semilla)
+    rnd_vence = random.Random(semilla + 1)
+    usuarios = usuarios or usuarios_para(n)
+    acumulados = list(itertools.accumulate(1.0 / rango ** zipf
+                                           for rango in range(1, usuarios + 1)))
+    total = acumulados[-1]
+    acumulados_prioridad = list(itertools.accumulate(_PESOS_PRIORIDAD))
+
+    # Edades ordenadas de mayor a menor: el orden de inserción (y de ID)
+    # coincide con el de creación
+    edades = sorted((dias * _DIA * rnd.random() ** 1.5 for _ in range(n)), reverse=True)
+    tareas = []
+    for i, edad in enumerate(edades):
+        creada_en = round(REFERENCIA - edad, 3)
+        completada = rnd.random() < (0.85 if edad > 30 * _DIA else 0.3)
+        completada_en = None
+        if completada:
+            completada_en = round(min(creada_en + rnd.expovariate(1 / (3 * _DIA)), REFERENCIA), 3)
+        usuario_id = None
+        if rnd.random() >= 0.05:
+            usuario_id = min(bisect.bisect_left(acumulados, rnd.random() * total), usuarios - 1) + 1
+        tareas.append({
+            'titulo': f'{rnd.choice(_VERBOS)} {rnd.choice(_OBJETOS)} #{i + 1}',
+            'descripcion': None if rnd.random() < 0.4 else f'Detalle de la tarea {i + 1}',
+            'completada': completada,
+            'prioridad': _PRIORIDADES[bisect.bisect_left(acumulados_prioridad,
+                                                         rnd.random() * acumulados_prioridad[-1])],
+            'usuario_id': usuario_id,
+            'creada_en': creada_en,
+            'completada_en': completada_en,
+            'vence_en': (round(creada_en + rnd_vence.uniform(1, 30) * _DIA, 3)
+                         if rnd_vence.random() < 0.6 else None)
+        })
+    return tareas
+
+
+def poblar(store, tareas, lote=10000):
+    """
+    Inserta tareas generadas en un almacén por lotes
+
+    Args:
+        store: TaskStore
+        tareas: Lista de generar_tareas()
+        lote: Tareas por llamada a insertar_varias
+    """
+    for inicio in range(0, len(tareas), lote):
+        store.insertar_varias(tareas[inicio:inicio + lote])
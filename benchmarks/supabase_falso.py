@@ -0,0 +1,197 @@
+# benchmarks/supabase_falso.py
+"""
+PostgREST falso para benchmarks
+Servidor HTTP mínimo que imita /rest/v1/users de Supabase con los usuarios
+en memoria. Puede añadir una latencia fija por petición y limitar cuántas
+atiende a la vez (como el pool de conexiones de una base de datos), y
+cuenta las peticiones recibidas por método.
+
+Uso:
+    python -m benchmarks.supabase_falso --port 5999 --retardo 0.05 --concurrencia 4
+    SUPABASE_URL=http://127.0.0.1:5999 python app.py
+"""
+
+import argparse
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    """Atiende /rest/v1/users con filtros eq. e in.(...)"""
+
+    protocol_version = 'HTTP/1.1'
+    # Cabeceras y cuerpo van en dos escrituras: sin esto, Nagle y el ACK
+    # retardado del cliente añaden ~40 ms a cada respuesta
+    disable_nagle_algorithm = True
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, codigo, cuerpo=None):
+        datos = b'' if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _cuerpo(self):
+        longitud = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(longitud) or b'null')
+
+    def _atender(self, metodo):
+        servidor = self.server.falso
+        with servidor.limite:
+            servidor.contar(metodo)
+            time.sleep(servidor.retardo)
+            partes = urlsplit(self.path)
+            if not partes.path.startswith('/rest/v1/users'):
+                self._responder(404, {'message': 'not found'})
+                return
+            with servidor.lock:
+                getattr(self, f'_{metodo.lower()}')(servidor, partes.query)
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def do_PATCH(self):
+        self._atender('PATCH')
+
+    def do_DELETE(self):
+        self._atender('DELETE')
+
+    def _get(self, servidor, query):
+        self._responder(200, servidor.filtrar(query))
+
+    def _post(self, servidor, query):
+        cuerpo = self._cuerpo()
+        nuevos = cuerpo if isinstance(cuerpo, list) else [cuerpo]
+        emails = {usuario['email'] for usuario in servidor.usuarios}
+        if any(nuevo.get('email') in emails for nuevo in nuevos):
+            self._responder(409, {'code': '23505', 'message': 'duplicate key value'})
+            return
+        creados = []
+        for nuevo in nuevos:
+            creado = dict(nuevo, id=servidor.siguiente_id)
+            servidor.siguiente_id += 1
+            servidor.usuarios.append(creado)
+            creados.append(creado)
+        self._responder(201, creados)
+
+    def _patch(self, servidor, query):
+        cambios = self._cuerpo()
+        usuarios = servidor.filtrar(query)
+        for usuario in usuarios:
+            usuario.update(cambios)
+        self._responder(200, usuarios)
+
+    def _delete(self, servidor, query):
+        for usuario in servidor.filtrar(query):
+            servidor.usuarios.remove(usuario)
+        self._responder(204)
+
+
+class SupabaseFalso:
+    """
+    PostgREST falso en un hilo de fondo
+
+    Attributes:
+        port (int): Puerto de escucha
+        url (str): Valor para SUPABASE_URL
+        retardo (float): Segundos que tarda cada petición
+        usuarios (list): Usuarios en memoria
+        peticiones (Counter): Peticiones recibidas por método
+    """
+
+    def __init__(self, port=0, retardo=0.0, concurrencia=None, usuarios=()):
+        """
+        Args:
+            port: Puerto (0: uno libre)
+            retardo: Segundos que tarda cada petición
+            concurrencia: Peticiones atendidas a la vez (None: sin límite)
+            usuarios: Usuarios iniciales (diccionarios con id, nombre, email, rol)
+        """
+        self.retardo = retardo
+        self.usuarios = [dict(usuario) for usuario in usuarios]
+        self.siguiente_id = max((u['id'] for u in self.usuarios), default=0) + 1
+        self.peticiones = collections.Counter()
+        self.lock = threading.Lock()
+        self.limite = threading.BoundedSemaphore(concurrencia) if concurrencia else _SinLimite()
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', port), _Manejador)
+        self._servidor.daemon_threads = True
+        self._servidor.falso = self
+        self.port = self._servidor.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}'
+        self._hilo = None
+
+    def contar(self, metodo):
+        """Cuenta una petición recibida"""
+        with self.lock:
+            self.peticiones[metodo] += 1
+
+    def filtrar(self, query):
+        """
+        Usuarios que cumplen los filtros PostgREST de la query (eq. e in.)
+
+        Returns:
+            list: Usuarios (los mismos diccionarios, no copias)
+        """
+        resultado = self.usuarios
+        for campo, condicion in parse_qsl(query):
+            if condicion.startswith('eq.'):
+                resultado = [u for u in resultado if str(u.get(campo)) == condicion[3:]]
+            elif condicion.startswith('in.(') and condicion.endswith(')'):
+                valores = {v.strip('"') for v in condicion[4:-1].split(',')}
+                resultado = [u for u in resultado if str(u.get(campo)) in valores]
+        return list(resultado)
+
+    def iniciar(self):
+        """Empieza a atender en un hilo de fondo"""
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True,
+                                      name='supabase-falso')
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        """Deja de atender y cierra el socket"""
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+class _SinLimite:
+    """Contexto que no limita nada (concurrencia ilimitada)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=5999)
+    parser.add_argument('--retardo', type=float, default=0.0)
+    parser.add_argument('--concurrencia', type=int, default=None)
+    args = parser.parse_args()
+
+    falso = SupabaseFalso(args.port, args.retardo, args.concurrencia, usuarios=[
+        {'id': 1, 'nombre': 'Ana', 'email': 'ana@example.com', 'rol': 'usuario'},
+        {'id': 2, 'nombre': 'Luis', 'email': 'luis@example.com', 'rol': 'administrador'}
+    ])
+    print(f"PostgREST falso en {falso.url}")
+    try:
+        falso.iniciar()._hilo.join()
+    except KeyboardInterrupt:
+        falso.detener()
+
+
+if __name__ == '__main__':
+    main()
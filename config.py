@@ -6,8 +6,9 @@ Este archivo centraliza todas las configuraciones del proyecto
 import os
 from dotenv import load_dotenv
 
-# Cargar variables de entorno
-load_dotenv()
+# Cargar variables de entorno (ruta explícita: evita que find_dotenv
+# recorra la pila de llamadas y los directorios buscando el archivo)
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
 
 
 class Config:
@@ -15,19 +16,154 @@ class Config:
     
     # Configuración del servidor
     DEBUG = True
-    PORT = 5000
-    HOST = '0.0.0.0'
+    PORT = int(os.getenv('PORT', 5000))
+    HOST = os.getenv('HOST', '0.0.0.0')
+    
+    # Servidor de producción (python app.py serve)
+    # Procesos pre-forkeados: con más de uno hace falta TASK_STORE=shared
+    # (memory y sharded guardan las tareas en cada proceso)
+    WORKERS = int(os.getenv('WORKERS', 1))
+    THREADS = int(os.getenv('THREADS', 8))              # Hilos por worker
+    GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', 30))  # Segundos para terminar peticiones en curso
+    
+    # Presupuesto de arranque (import + create_app) para benchmarks/bench_startup.py
+    STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', 400))
     
     # Configuración de CORS
     CORS_ORIGINS = '*'  # En producción, especificar dominios permitidos
     
-    # Configuración de la aplicación
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    # Configuración de la aplicación. La clave por defecto es pública: con
+    # ella (o vacía) no se aceptan tokens firmados (X-Profile-Token)
+    SECRET_KEY_DESARROLLO = 'dev-secret-key-change-in-production'
+    SECRET_KEY = os.getenv('SECRET_KEY', SECRET_KEY_DESARROLLO)
+    
+    # Token para los endpoints /api/admin (sin token quedan deshabilitados)
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    
+    # Perfilado por muestreo: una fracción de peticiones, o las que lleven
+    # una cabecera X-Profile-Token firmada con SECRET_KEY (si no es la de desarrollo)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.0))
+    PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', 5))
+    PROFILING_DIR = os.getenv('PROFILING_DIR', 'profiles')
+    PROFILING_KEEP = int(os.getenv('PROFILING_KEEP', 20))                  # Archivos por ruta
+    PROFILING_FLUSH_SECONDS = float(os.getenv('PROFILING_FLUSH_SECONDS', 10))
+
+    # Memoria (/api/admin/memory): instantáneas de tracemalloc bajo demanda
+    # y, opcionalmente, pico de memoria reservada en una fracción de las
+    # peticiones (deja tracemalloc activo siempre: ralentiza las reservas)
+    MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', 1))       # Marcos por reserva
+    MEMORY_MAX_SNAPSHOTS = int(os.getenv('MEMORY_MAX_SNAPSHOTS', 5))
+    MEMORY_ESTIMATE_SAMPLE = int(os.getenv('MEMORY_ESTIMATE_SAMPLE', 1000))  # Elementos por contenedor
+    MEMORY_ROUTE_PEAKS_ENABLED = os.getenv('MEMORY_ROUTE_PEAKS_ENABLED', 'false').lower() == 'true'
+    MEMORY_ROUTE_PEAKS_SAMPLE_RATE = float(os.getenv('MEMORY_ROUTE_PEAKS_SAMPLE_RATE', 0.1))
+
+    # Trazas: span raíz por petición, X-Trace-Id en la respuesta y log
+    # 'taskflow.slow' con el árbol de spans de las peticiones lentas
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+    TRACING_SLOW_MS = float(os.getenv('TRACING_SLOW_MS', 500))
+    
+    # Flujo SSE de cambios (/api/tasks/stream). El servidor de producción
+    # atiende cada flujo en un hilo propio, fuera del pool, hasta
+    # STREAM_MAX_CONNECTIONS por worker
+    STREAM_HEARTBEAT_SECONDS = float(os.getenv('STREAM_HEARTBEAT_SECONDS', 15))
+    STREAM_BUFFER_SIZE = int(os.getenv('STREAM_BUFFER_SIZE', 1000))       # Eventos para reanudar
+    STREAM_RETRY_MS = int(os.getenv('STREAM_RETRY_MS', 3000))
+    STREAM_POLL_MS = float(os.getenv('STREAM_POLL_MS', 100))             # Cambios de otros workers
+    STREAM_MAX_CONNECTIONS = int(os.getenv('STREAM_MAX_CONNECTIONS', 10000))
+    STREAM_ROUTES = ('/api/tasks/stream',)
+    
+    # Sincronización incremental (/api/tasks/changes): bajas que se recuerdan;
+    # un cliente con una versión anterior a la más antigua recibe todo
+    CHANGES_MAX_TOMBSTONES = int(os.getenv('CHANGES_MAX_TOMBSTONES', 10000))
+    
+    # Exportación e importación NDJSON (/api/tasks/export, /api/tasks/import):
+    # tareas por lote y límites de cada línea importada y de errores detallados
+    BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 1000))
+    IMPORT_MAX_LINE_BYTES = int(os.getenv('IMPORT_MAX_LINE_BYTES', 64 * 1024))
+    IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 100))
+    
+    # Lotes (POST /api/batch): sub-peticiones por lote, lecturas ejecutadas a
+    # la vez, tiempo tras el que no se empiezan más (504) y bytes de
+    # respuesta acumulados: al superarlos no se empiezan más (413) y una
+    # escritura ya aplicada se devuelve sin cuerpo. Las rutas de flujo no se
+    # pueden usar
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 8))
+    BATCH_TIMEOUT_SECONDS = float(os.getenv('BATCH_TIMEOUT_SECONDS', 10))
+    BATCH_MAX_RESPONSE_BYTES = int(os.getenv('BATCH_MAX_RESPONSE_BYTES', 4 * 1024 * 1024))
+    BATCH_EXCLUDED = ('tasks.stream_tareas', 'tasks.exportar_tareas',
+                      'tasks.importar_tareas', 'batch.ejecutar_lote')
+    
+    # Control de admisión (por worker). Clases de ruta: 'local' (tareas, en
+    # memoria) y 'supabase' (usuarios): peticiones en curso, en espera y
+    # espera objetivo en ms; por encima se responde 503 con Retry-After.
+    # ADMISSION_CLIENT_RATE limita las peticiones/s por cliente (0, por
+    # defecto: sin límite; 429) con ráfagas de hasta ADMISSION_CLIENT_BURST.
+    # El cliente es la IP o la cabecera ADMISSION_CLIENT_HEADER: detrás de
+    # un proxy todas las peticiones llegan con la IP del proxy, así que sin
+    # esa cabecera el límite sería de todo el servicio. Un lote gasta una
+    # ficha; sus sub-peticiones, ninguna.
+    # Las peticiones en curso y en espera de 'supabase' deben sumar menos que
+    # THREADS para que las lecturas locales siempre encuentren hilo libre
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_CLASSES = {
+        'local': (int(os.getenv('ADMISSION_LOCAL_MAX_IN_FLIGHT', 8)),
+                  int(os.getenv('ADMISSION_LOCAL_MAX_QUEUE', 64)),
+                  float(os.getenv('ADMISSION_LOCAL_TARGET_MS', 100))),
+        'supabase': (int(os.getenv('ADMISSION_SUPABASE_MAX_IN_FLIGHT', 4)),
+                     int(os.getenv('ADMISSION_SUPABASE_MAX_QUEUE', 2)),
+                     float(os.getenv('ADMISSION_SUPABASE_TARGET_MS', 500)))
+    }
+    ADMISSION_BLUEPRINTS = {'tasks': 'local', 'users': 'supabase'}
+    ADMISSION_EXEMPT = ('tasks.stream_tareas',)
+    ADMISSION_CLIENT_RATE = float(os.getenv('ADMISSION_CLIENT_RATE', 0))
+    ADMISSION_CLIENT_BURST = int(os.getenv('ADMISSION_CLIENT_BURST', 20))
+    ADMISSION_CLIENT_HEADER = os.getenv('ADMISSION_CLIENT_HEADER')
+    
+    # Caché del listado de usuarios (GET /api/users): segundos en los que se
+    # sirve fresca y ventana posterior en la que se sirve obsoleta mientras
+    # un hilo la refresca. Las escrituras de usuarios la invalidan en todos
+    # los workers. USERS_CACHE_TTL_SECONDS=0 la desactiva
+    USERS_CACHE_TTL_SECONDS = float(os.getenv('USERS_CACHE_TTL_SECONDS', 5))
+    USERS_CACHE_STALE_SECONDS = float(os.getenv('USERS_CACHE_STALE_SECONDS', 60))
+    
+    # Alta de usuarios en lote (POST /api/users/bulk): usuarios por lote. Los
+    # emails van en la URL de una consulta email=in.(...), así que el límite
+    # acota su longitud (200 emails ~ 6 KB)
+    USERS_BULK_MAX = int(os.getenv('USERS_BULK_MAX', 200))
     
     # Configuración Supabase
     SUPABASE_URL = os.getenv('SUPABASE_URL')
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
     
+    # Almacén de tareas: 'memory' (un solo proceso), 'sharded' (un solo
+    # proceso, repartido en TASK_STORE_SHARDS fragmentos por usuario con un
+    # lock cada uno) o 'shared' (segmento de memoria compartida entre
+    # workers pre-forkeados)
+    TASK_STORE = os.getenv('TASK_STORE', 'memory')
+    TASK_STORE_SIZE = int(os.getenv('TASK_STORE_SIZE', 64 * 1024 * 1024))
+    TASK_STORE_SHARDS = int(os.getenv('TASK_STORE_SHARDS', 8))
+    
+    # Archivo de tareas (capa fría): las completadas hace más de
+    # TASK_ARCHIVE_AFTER_DAYS salen del almacén y se guardan comprimidas en
+    # bloques de TASK_ARCHIVE_BLOCK_SIZE, en TASK_ARCHIVE_DIR o en memoria si
+    # no se indica. Cada worker revisa cada TASK_ARCHIVE_INTERVAL_SECONDS
+    TASK_ARCHIVE_ENABLED = os.getenv('TASK_ARCHIVE_ENABLED', 'true').lower() == 'true'
+    TASK_ARCHIVE_AFTER_DAYS = float(os.getenv('TASK_ARCHIVE_AFTER_DAYS', 30))
+    TASK_ARCHIVE_INTERVAL_SECONDS = float(os.getenv('TASK_ARCHIVE_INTERVAL_SECONDS', 3600))
+    TASK_ARCHIVE_BLOCK_SIZE = int(os.getenv('TASK_ARCHIVE_BLOCK_SIZE', 1000))
+    TASK_ARCHIVE_DIR = os.getenv('TASK_ARCHIVE_DIR') or None
+    
+    # Tareas duplicadas al crear (POST /api/tasks): 'off' (por defecto: no
+    # se buscan y el índice de similares no se construye), 'flag' (se crea y
+    # la respuesta lista las parecidas en posibles_duplicados) o 'reject'
+    # (409). Cuenta como duplicada una tarea del mismo usuario con similitud
+    # estimada (MinHash de título y descripción) de al menos
+    # TASK_DUPLICATE_THRESHOLD. El parámetro ?duplicates= lo cambia por petición
+    TASK_DUPLICATES = os.getenv('TASK_DUPLICATES', 'off')
+    TASK_DUPLICATE_THRESHOLD = float(os.getenv('TASK_DUPLICATE_THRESHOLD', 0.8))
+    
     @staticmethod
     def init_app(app):
         """Inicializa configuraciones adicionales"""
@@ -53,8 +189,3 @@ config = {
     'production': ProductionConfig,
     'default': DevelopmentConfig
 }
-config = {
-    'development': DevelopmentConfig,
-    'production': ProductionConfig,
-    'default': DevelopmentConfig
-}
\ No newline at end of file